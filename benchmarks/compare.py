@@ -0,0 +1,43 @@
+"""Compare two benchmark result files written by `pytest benchmarks`.
+
+    python benchmarks/compare.py benchmarks/results/OLD.json benchmarks/results/NEW.json
+
+Prints one row per benchmark present in either run, with the new/old time
+ratio (below 1.0 is faster).
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+
+def _load(path: str) -> tuple[dict, dict[tuple[str, str], float]]:
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    return doc, {(r["test"], r["name"]): float(r["seconds"]) for r in doc["results"]}
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) != 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    old_doc, old = _load(argv[0])
+    new_doc, new = _load(argv[1])
+    print(f"old: {argv[0]} ({old_doc.get('git_rev')}, {old_doc.get('created_utc')})")
+    print(f"new: {argv[1]} ({new_doc.get('git_rev')}, {new_doc.get('created_utc')})")
+
+    keys = list(dict.fromkeys([*old, *new]))
+    width = max(len(name) for _test, name in keys)
+    print(f"{'benchmark':<{width}}  {'old_s':>9}  {'new_s':>9}  {'ratio':>6}")
+    for key in keys:
+        o, n = old.get(key), new.get(key)
+        cells = [f"{o:9.4f}" if o is not None else f"{'-':>9}"]
+        cells.append(f"{n:9.4f}" if n is not None else f"{'-':>9}")
+        cells.append(f"{n / o:6.2f}" if o and n is not None else f"{'-':>6}")
+        print(f"{key[1]:<{width}}  {'  '.join(cells)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# The test doubles (stub Toggl server, fake session bus) live with the tests.
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests"))
+
+# Every bench.run() of the session, written out as JSON at the end.
+_RESULTS: list[dict[str, object]] = []
+
+
+class Bench:
+    """Tiny timing helper: `bench.run(name, fn, n=...)` prints throughput."""
+
+    def __init__(self, test: str = "") -> None:
+        self.test = test
+        self.results: dict[str, dict[str, float]] = {}
+
+    def run(self, name: str, fn: Callable[[], object], *, n: int = 1) -> float:
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        per_s = n / elapsed if elapsed > 0 else float("inf")
+        self.results[name] = {"seconds": elapsed, "n": n, "per_s": per_s}
+        _RESULTS.append({"test": self.test, "name": name, "seconds": elapsed, "n": n})
+        print(f"\n{name}: {elapsed:.3f}s for {n} ({per_s:,.1f}/s)")
+        return elapsed
+
+
+@pytest.fixture
+def bench(request: pytest.FixtureRequest) -> Bench:
+    return Bench(request.node.nodeid)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--bench-json",
+        default=None,
+        help="Where to write benchmark results (default: benchmarks/results/<timestamp>.json)",
+    )
+
+
+def _git_rev() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    if not _RESULTS:
+        return
+    now = datetime.now(UTC).replace(microsecond=0)
+    opt = session.config.getoption("--bench-json")
+    path = Path(opt) if opt else RESULTS_DIR / f"{now.strftime('%Y%m%dT%H%M%SZ')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = {
+        "created_utc": now.isoformat(),
+        "git_rev": _git_rev(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": _RESULTS,
+    }
+    path.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+    print(f"\nbenchmark results: {path}")
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import UTC, date, datetime, timedelta
+
+from toggl_sherpa.m1.gnome import FocusSample
+from toggl_sherpa.m1.schedule import AdaptiveSchedule, FixedSchedule
+from toggl_sherpa.m3.model import SampleRow
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.synthetic import focus_trace
+
+DAYS = 5
+DAY0 = date(2026, 1, 5)
+
+
+def _replay(trace: list[tuple[int, str, str]], day: date, schedule) -> list[SampleRow]:
+    midnight = datetime(day.year, day.month, day.day, tzinfo=UTC)
+    out: list[SampleRow] = []
+    t = 0.0
+    while t < len(trace):
+        idle_ms, title, wm = trace[int(t)]
+        interval = schedule.next_interval(FocusSample(idle_ms, title, wm, 1, {}))
+        ts = (midnight + timedelta(seconds=int(t))).isoformat()
+        out.append(SampleRow(len(out) + 1, ts, idle_ms, title, wm, 1, interval))
+        t += interval
+    return out
+
+
+def _tracked(samples: list[SampleRow]) -> Counter[str]:
+    totals: Counter[str] = Counter()
+    for b in summarise_blocks(samples, [], min_block_s=1):
+        totals[b.label] += b.seconds
+    return totals
+
+
+def test_bench_adaptive_vs_fixed_on_replayed_traces(bench) -> None:
+    days = [DAY0 + timedelta(days=d) for d in range(DAYS)]
+    traces = [(day, focus_trace(day, seed=i)) for i, day in enumerate(days)]
+    results: dict[str, list[list[SampleRow]]] = {}
+    for name, make in (
+        ("fixed 10s", lambda: FixedSchedule(10)),
+        ("adaptive", lambda: AdaptiveSchedule(base_s=10)),
+    ):
+        runs: list[list[SampleRow]] = []
+        bench.run(
+            f"replay {DAYS} day(s) ({name})",
+            lambda make=make, runs=runs: runs.extend(_replay(tr, d, make()) for d, tr in traces),
+            n=DAYS,
+        )
+        results[name] = runs
+
+    # Ground truth: the same traces sampled every second.
+    truth = [_tracked(_replay(trace, day, FixedSchedule(1))) for day, trace in traces]
+
+    for name, runs in results.items():
+        rows = sum(len(r) for r in runs) / DAYS
+        err = 0
+        for got, want in zip((_tracked(r) for r in runs), truth, strict=True):
+            err += sum(abs(got[k] - want[k]) for k in got.keys() | want.keys())
+        total = sum(sum(t.values()) for t in truth)
+        print(
+            f"{name}: {rows:,.0f} rows/day, {rows / 24:,.0f} wakeups/hour, "
+            f"per-label error {100 * err / total:.1f}% of {total / DAYS / 3600:.1f} h/day"
+        )
+    assert sum(map(len, results["adaptive"])) < sum(map(len, results["fixed 10s"]))
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m3.model import EvidenceItem, TimesheetBlock
+from toggl_sherpa.m4.apply import iter_merged_blocks, load_blocks_json, merge_adjacent_blocks
+from toggl_sherpa.m4.blockfile import iter_blocks, write_blocks
+
+BLOCKS = 50_000
+EVIDENCE = 3
+
+
+def _blocks(n: int):
+    t0 = datetime(2026, 1, 1, tzinfo=UTC)
+    for i in range(n):
+        start = t0 + timedelta(minutes=i)
+        ts = start.isoformat()
+        yield TimesheetBlock(
+            start_ts_utc=ts,
+            end_ts_utc=(start + timedelta(seconds=50)).isoformat(),
+            seconds=50,
+            # Alternating labels: nothing merges, every block is carried through.
+            label=f"code:{i % 2}",
+            project_suggestion=None,
+            tags_suggestion=[],
+            evidence=[
+                EvidenceItem(ts, True, f"https://example.com/{i}/{j}", f"Tab {j}", None, None)
+                for j in range(EVIDENCE)
+            ],
+        )
+
+
+def _peak_mb(fn: Callable[[], object]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def test_bench_merge_pipeline_json_vs_jsonl(bench, tmp_path: Path) -> None:
+    src_json = tmp_path / "reviewed.json"
+    src_jsonl = tmp_path / "reviewed.jsonl"
+    src_gz = tmp_path / "reviewed.jsonl.gz"
+    for p in (src_json, src_jsonl, src_gz):
+        write_blocks(p, _blocks(BLOCKS))
+
+    def whole_array() -> None:
+        blocks = load_blocks_json(src_json)
+        write_blocks(tmp_path / "merged.json", merge_adjacent_blocks(blocks))
+
+    def streamed(src: Path, out: str) -> Callable[[], None]:
+        return lambda: write_blocks(tmp_path / out, iter_merged_blocks(iter_blocks(src)))
+
+    cases = [
+        ("json array", whole_array, src_json),
+        ("jsonl stream", streamed(src_jsonl, "merged.jsonl"), src_jsonl),
+        ("jsonl.gz stream", streamed(src_gz, "merged.jsonl.gz"), src_gz),
+    ]
+    for name, fn, src in cases:
+        size_mb = src.stat().st_size / 1e6
+        bench.run(f"merge {name} ({BLOCKS:,} blocks, {size_mb:.0f} MB in)", fn, n=BLOCKS)
+        print(f"  peak traced memory: {_peak_mb(fn):.2f} MB")
+
+    assert sum(1 for _ in iter_blocks(tmp_path / "merged.jsonl.gz")) == BLOCKS
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from stub_server import StubTogglServer
+
+from toggl_sherpa.m5.apply import ApplyPlanItem, apply_plan
+from toggl_sherpa.m5.toggl_api import TogglConfig
+
+N = 200
+LATENCY_S = 0.03
+
+
+def _plan() -> list[ApplyPlanItem]:
+    return [
+        ApplyPlanItem(
+            start=f"2026-02-08T{i // 60:02d}:{i % 60:02d}:00+00:00",
+            stop=f"2026-02-08T{i // 60:02d}:{i % 60:02d}:30+00:00",
+            description=f"e{i}",
+            tags=[],
+            project_id=None,
+        )
+        for i in range(N)
+    ]
+
+
+def test_bench_apply_concurrency(bench, tmp_path: Path) -> None:
+    plan = _plan()
+    with StubTogglServer(latency_s=LATENCY_S) as srv:
+        cfg = TogglConfig(api_token="t", workspace_id=1, base_url=srv.base_url, max_rps=None)
+        for concurrency in (1, 4, 8):
+            ledger = tmp_path / f"ledger_{concurrency}.sqlite"
+            bench.run(
+                f"apply_plan concurrency={concurrency} ({LATENCY_S * 1000:.0f} ms RTT)",
+                # Each run posts the same plan to the shared stub; reconciling
+                # would find the previous run's entries and skip them all.
+                lambda c=concurrency, ledger=ledger: apply_plan(
+                    plan, cfg, ledger_db_path=ledger, concurrency=c, reconcile_remote=False
+                ),
+                n=N,
+            )
+    assert len(srv.time_entries) == 3 * N
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.recent import RecentSamples
+from toggl_sherpa.m2.tab_ingest import _nearest_sample_id
+from toggl_sherpa.synthetic import generate
+
+DAYS = 20
+LINKS = 500
+POSTS = 200
+
+
+def _db(tmp_path: Path) -> Path:
+    path = tmp_path / "bench.sqlite"
+    conn = db_mod.connect(path)
+    generate(conn, days=DAYS)
+    conn.close()
+    return path
+
+
+def test_bench_tab_linking_ring_vs_table(bench, tmp_path: Path) -> None:
+    conn = db_mod.connect(_db(tmp_path))
+    ring = RecentSamples.from_db(conn, 2000)
+    # Tab events from the end of the last day: what a running daemon sees.
+    stamps = [
+        r["ts_utc"]
+        for r in conn.execute(
+            "SELECT ts_utc FROM tab_events ORDER BY id DESC LIMIT ?", (LINKS,)
+        ).fetchall()
+    ]
+    assert all(ring.covers(ts, 60) for ts in stamps)
+
+    table: list[int | None] = []
+    ringed: list[int | None] = []
+    bench.run(
+        f"link {LINKS} tab events (samples table, {DAYS} days)",
+        lambda: table.extend(_nearest_sample_id(conn, ts) for ts in stamps),
+        n=LINKS,
+    )
+    bench.run(
+        f"link {LINKS} tab events (ring buffer)",
+        lambda: ringed.extend(ring.nearest(ts, 60) for ts in stamps),
+        n=LINKS,
+    )
+    conn.close()
+    assert ringed == table
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def _spawn(code: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-c", code], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def _post(port: int) -> None:
+    body = json.dumps({"url": "https://github.com/acme/x", "title": "x"}).encode("utf-8")
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}/v1/active_tab",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        resp.read()
+
+
+def _wait_ready(port: int) -> None:
+    deadline = time.monotonic() + 20
+    while True:
+        try:
+            _post(port)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def _rss_kb(pid: int) -> int:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return 0
+
+
+def test_bench_one_process_vs_logger_plus_tab_server(bench, tmp_path: Path) -> None:
+    path = _db(tmp_path)
+    setups = {
+        # Both sample every second (GNOME Shell isn't reachable here, so
+        # each sample is an error row: still a write per second).
+        "logger + tab-server": [
+            "from toggl_sherpa.m1.logger import run_loop; from pathlib import Path; "
+            f"run_loop(Path({str(path)!r}), 1.0, adaptive=False)",
+            "from toggl_sherpa.m2.tab_server import serve; from pathlib import Path; "
+            f"serve(Path({str(path)!r}), port={{port}})",
+        ],
+        "daemon": [
+            "from toggl_sherpa.daemon import serve; from pathlib import Path; "
+            f"serve(Path({str(path)!r}), port={{port}}, interval_s=1.0, adaptive=False)",
+        ],
+    }
+    rss: dict[str, int] = {}
+    for name, codes in setups.items():
+        port = _free_port()
+        procs = [_spawn(code.replace("{port}", str(port))) for code in codes]
+        try:
+            _wait_ready(port)
+            time.sleep(1.5)  # Let the logger settle into its loop.
+            assert all(p.poll() is None for p in procs)
+            rss[name] = sum(_rss_kb(p.pid) for p in procs)
+            bench.run(
+                f"POST {POSTS} tab events ({name})",
+                lambda port=port: [_post(port) for _ in range(POSTS)],
+                n=POSTS,
+            )
+        finally:
+            for p in procs:
+                p.terminate()
+                p.wait(timeout=10)
+
+    for name, kb in rss.items():
+        print(f"{name}: {len(setups[name])} process(es), RSS {kb / 1024:.1f} MiB")
+    assert rss["daemon"] < rss["logger + tab-server"]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.query import day_bounds_utc, fetch_samples, fetch_tab_events
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.synthetic import generate
+
+CONNECTS = 500
+LOADED_CONNECTS = 200
+REPORTS = 20
+DAY = date(2026, 1, 7)
+
+
+def _connect_always_migrating(path: Path) -> sqlite3.Connection:
+    # The previous connect(): migration (a write + commit) on every call.
+    conn = db_mod.connect(path)
+    db_mod._migrate(conn)
+    return conn
+
+
+def _report(connect, path: Path) -> None:
+    conn = connect(path)
+    try:
+        bounds = day_bounds_utc(DAY.isoformat())
+        samples = fetch_samples(conn, *bounds)
+        tabs = fetch_tab_events(conn, *bounds)
+    finally:
+        conn.close()
+    summarise_blocks(samples, tabs)
+
+
+class _Logger(threading.Thread):
+    """Writes a sample every few ms, holding each write transaction briefly."""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(daemon=True)
+        self.path = path
+        self.stop = threading.Event()
+        self.writes = 0
+
+    def run(self) -> None:
+        conn = sqlite3.connect(self.path, timeout=30)
+        while not self.stop.is_set():
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO samples(ts_utc, idle_ms, focus_wm_class) VALUES (?, 0, 'code')",
+                ("2027-01-01T00:00:00+00:00",),
+            )
+            time.sleep(0.005)
+            conn.commit()
+            self.writes += 1
+            time.sleep(0.001)
+        conn.close()
+
+
+CONNECTORS = (
+    ("always migrating", _connect_always_migrating),
+    ("fast path", db_mod.connect),
+    ("read-only", db_mod.connect_readonly),
+)
+
+
+def test_bench_connect_and_report(bench, tmp_path: Path) -> None:
+    path = tmp_path / "db.sqlite"
+    conn = db_mod.connect(path)
+    generate(conn, days=30, start=date(2026, 1, 5))
+    conn.close()
+
+    def connects(connect, n: int, latencies: list[float]) -> None:
+        for _ in range(n):
+            t0 = time.perf_counter()
+            connect(path).close()
+            latencies.append(time.perf_counter() - t0)
+
+    for name, connect in CONNECTORS:
+        bench.run(f"connect ({name})", lambda c=connect: connects(c, CONNECTS, []), n=CONNECTS)
+
+    logger = _Logger(path)
+    logger.start()
+    time.sleep(0.1)
+    try:
+        for name, connect in CONNECTORS:
+            lat: list[float] = []
+            bench.run(
+                f"connect with logger writing ({name})",
+                lambda c=connect, lat=lat: connects(c, LOADED_CONNECTS, lat),
+                n=LOADED_CONNECTS,
+            )
+            print(f"  worst connect: {max(lat) * 1000:.1f} ms")
+            bench.run(
+                f"day report with logger writing ({name})",
+                lambda c=connect: [_report(c, path) for _ in range(REPORTS)],
+                n=REPORTS,
+            )
+    finally:
+        logger.stop.set()
+        logger.join()
+    print(f"logger writes: {logger.writes}")
+    assert logger.writes > 0
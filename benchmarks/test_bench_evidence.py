@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m3.model import SampleRow, TabEventRow
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.m4.blockfile import write_blocks
+
+DAYS = 5
+TICKS_PER_DAY = 8 * 360  # An 8-hour day of 10-second samples.
+
+
+def _day_of_tabs() -> tuple[list[SampleRow], list[TabEventRow]]:
+    # Hour-long stretches on a handful of pages each, switching every 5 minutes.
+    t0 = datetime(2026, 2, 9, 9, tzinfo=UTC)
+    samples: list[SampleRow] = []
+    tabs: list[TabEventRow] = []
+    for day in range(DAYS):
+        for i in range(TICKS_PER_DAY):
+            n = day * TICKS_PER_DAY + i
+            ts = (t0 + timedelta(days=day, seconds=10 * i)).isoformat()
+            hour, page = divmod(i // 30, 12)
+            url = f"https://github.com/org/repo/pull/{hour}/files?page={page % 4}"
+            samples.append(SampleRow(n, ts, 0, "Firefox", "firefox", 1))
+            tabs.append(
+                TabEventRow(n, ts, n, True, url, f"PR {hour} · page {page % 4}", None, None)
+            )
+    return samples, tabs
+
+
+def test_bench_aggregated_vs_per_tick_evidence(bench, tmp_path: Path) -> None:
+    samples, tabs = _day_of_tabs()
+    out: dict[str, list] = {}
+
+    modes = (("per-tick", True, None), ("aggregated", False, None), ("by reference", False, "db"))
+    for name, per_tick, ref_db in modes:
+        bench.run(
+            f"summarise {name} ({len(samples):,} samples)",
+            lambda per_tick=per_tick, name=name, ref_db=ref_db: out.__setitem__(
+                name,
+                summarise_blocks(samples, tabs, per_tick_evidence=per_tick, evidence_ref_db=ref_db),
+            ),
+            n=len(samples),
+        )
+        path = tmp_path / f"{name.replace(' ', '-')}.json"
+        bench.run(f"write {name} JSON", lambda p=path, name=name: write_blocks(p, out[name]))
+        items = sum(len(b.evidence) for b in out[name])
+        print(f"  {items:,} evidence items, {path.stat().st_size / 1e3:,.1f} kB")
+
+    assert len(out["per-tick"]) == len(out["aggregated"])
+    assert sum(len(b.evidence) for b in out["per-tick"]) == sum(
+        e.count for b in out["aggregated"] for e in b.evidence
+    )
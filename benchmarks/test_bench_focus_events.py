@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import sys
+from collections import Counter
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m1 import events
+from toggl_sherpa.m1.gnome import FocusSample, GnomeShellEvalError
+from toggl_sherpa.m3.model import SampleRow
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.synthetic import focus_trace
+
+DAYS = 5
+DAY0 = date(2026, 1, 5)
+SWITCHES = 5_000
+FAKE_BUS = Path(__file__).parents[1] / "tests" / "fake_bus.py"
+HEARTBEAT_S = 60
+
+
+def _tracked(samples: list[SampleRow]) -> Counter[str]:
+    totals: Counter[str] = Counter()
+    for b in summarise_blocks(samples, [], min_block_s=1):
+        totals[b.label] += b.seconds
+    return totals
+
+
+def _rows(trace, day: date, *, every_s: int | None) -> tuple[list[SampleRow], int]:
+    """Rows and wakeups for polling every `every_s`, or events + heartbeats (None)."""
+    midnight = datetime(day.year, day.month, day.day, tzinfo=UTC)
+    out: list[SampleRow] = []
+    wakeups = 0
+    filt = events.ChangeFilter(heartbeat_s=HEARTBEAT_S)
+    prev_signal = None
+    for sec, (idle_ms, title, wm) in enumerate(trace):
+        sample = FocusSample(idle_ms, title, wm, 1, {})
+        if every_s is not None:
+            write = sec % every_s == 0
+            wakeups += write
+        else:
+            # The extension signals focus/title changes and idle transitions.
+            signal = (title, wm, idle_ms >= 60_000)
+            woke = signal != prev_signal
+            prev_signal = signal
+            write = woke and filt.changed(sample)
+            if not write and filt.heartbeat_due(sec) <= 0:
+                woke = write = True
+            wakeups += woke
+        if write:
+            ts = (midnight + timedelta(seconds=sec)).isoformat()
+            interval = every_s  # None for event rows: they stand until the next one.
+            out.append(SampleRow(len(out) + 1, ts, idle_ms, title, wm, 1, interval))
+            filt.wrote(sample, sec)
+    return out, wakeups
+
+
+def test_bench_events_vs_polling_on_replayed_traces(bench) -> None:
+    days = [DAY0 + timedelta(days=d) for d in range(DAYS)]
+    traces = [(day, focus_trace(day, seed=i)) for i, day in enumerate(days)]
+    truth = [_tracked(_rows(trace, day, every_s=1)[0]) for day, trace in traces]
+    total = sum(sum(t.values()) for t in truth)
+
+    for name, every_s in (("poll 10s", 10), ("events", None)):
+        runs: list[tuple[list[SampleRow], int]] = []
+        bench.run(
+            f"replay {DAYS} day(s) ({name})",
+            lambda e=every_s, runs=runs: runs.extend(_rows(tr, d, every_s=e) for d, tr in traces),
+            n=DAYS,
+        )
+        err = 0
+        for (rows, _w), want in zip(runs, truth, strict=True):
+            got = _tracked(rows)
+            err += sum(abs(got[k] - want[k]) for k in got.keys() | want.keys())
+        n_rows = sum(len(r) for r, _w in runs) / DAYS
+        wakeups = sum(w for _r, w in runs) / DAYS
+        print(
+            f"{name}: {n_rows:,.0f} rows/day, {wakeups / 24:,.0f} wakeups/hour, "
+            f"per-label error {100 * err / total:.1f}%"
+        )
+
+
+def test_bench_event_loop_ingest(bench, tmp_path: Path) -> None:
+    def no_poll() -> FocusSample:
+        raise GnomeShellEvalError("no GNOME here")
+
+    cmd = [sys.executable, str(FAKE_BUS), "--switches", str(SWITCHES)]
+    written: list[int] = []
+    bench.run(
+        f"event loop ingest via fake bus ({SWITCHES:,} signals)",
+        lambda: written.append(
+            events.run_event_loop(tmp_path / "db.sqlite", monitor_cmd=cmd, poll=no_poll)
+        ),
+        n=SWITCHES,
+    )
+    assert written == [SWITCHES]
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m6.idempotency import (
+    already_applied,
+    applied_fingerprints,
+    fingerprint,
+    record_applied,
+    record_applied_many,
+)
+
+LEDGER_ROWS = 100_000
+PLAN = 2_000
+BATCH = 50
+
+
+BASE = datetime(2015, 1, 1, tzinfo=UTC)
+
+
+def _row(i: int) -> tuple[str, str, str, str, int]:
+    # One 30-minute entry per hour: ~11 years of ledger at 100k rows.
+    t0 = BASE + timedelta(hours=i)
+    start = t0.isoformat()
+    stop = (t0 + timedelta(minutes=30)).isoformat()
+    desc = f"entry {i}"
+    return fingerprint(start=start, stop=stop, description=desc), start, stop, desc, i
+
+
+def _ledger(path: Path) -> None:
+    conn = db_mod.connect(path)
+    record_applied_many(conn, (_row(i) for i in range(LEDGER_ROWS)))
+    conn.close()
+
+
+def test_bench_ledger_phase(bench, tmp_path: Path) -> None:
+    # Half the plan is already applied, half is new.
+    plan = [_row(i) for i in range(LEDGER_ROWS - PLAN // 2, LEDGER_ROWS + PLAN // 2)]
+    fps = [r[0] for r in plan]
+
+    per_item = tmp_path / "per_item.sqlite"
+    batched = tmp_path / "batched.sqlite"
+    _ledger(per_item)
+    _ledger(batched)
+
+    def old() -> None:
+        conn = db_mod.connect(per_item)
+        for fp, start, stop, desc, te_id in plan:
+            if already_applied(conn, fp):
+                continue
+            record_applied(
+                conn, fp=fp, start=start, stop=stop, description=desc, toggl_time_entry_id=te_id
+            )
+        conn.close()
+
+    def new() -> None:
+        conn = db_mod.connect(batched)
+        seen = applied_fingerprints(conn, fps)
+        todo = [r for r in plan if r[0] not in seen]
+        for i in range(0, len(todo), BATCH):
+            record_applied_many(conn, todo[i : i + BATCH])
+        conn.close()
+
+    t_old = bench.run(f"ledger per-item ({LEDGER_ROWS:,} rows, plan {PLAN})", old, n=PLAN)
+    t_new = bench.run(f"ledger batched ({LEDGER_ROWS:,} rows, plan {PLAN})", new, n=PLAN)
+    print(f"speedup: {t_old / t_new:.1f}x")
+
+    for path in (per_item, batched):
+        conn = db_mod.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM applied_entries").fetchone()[0] == (
+            LEDGER_ROWS + PLAN // 2
+        )
+        conn.close()
+
+
+def test_bench_ledger_overlaps(bench, tmp_path: Path) -> None:
+    from toggl_sherpa.m5.apply import ApplyPlanItem, ledger_overlaps
+
+    path = tmp_path / "ledger.sqlite"
+    _ledger(path)
+    # A re-summarised backfill of the most recent entries: same slots, new labels.
+    plan = [
+        ApplyPlanItem(start=r[1], stop=r[2], description=f"re-{r[3]}", tags=[], project_id=None)
+        for r in (_row(i) for i in range(LEDGER_ROWS - PLAN, LEDGER_ROWS))
+    ]
+    conn = db_mod.connect(path)
+    found: list = []
+    bench.run(
+        f"ledger_overlaps ({LEDGER_ROWS:,} rows, plan {PLAN})",
+        lambda: found.extend(ledger_overlaps(conn, plan)),
+        n=PLAN,
+    )
+    conn.close()
+    assert len(found) == PLAN
+
+
+def test_bench_ledger_list_and_stats(bench, tmp_path: Path) -> None:
+    from toggl_sherpa.m6.ledger import list_applied, parse_cursor, stats
+
+    path = tmp_path / "ledger.sqlite"
+    _ledger(path)
+    conn = db_mod.connect(path)
+    # A real ledger is written over years, not in one second.
+    conn.execute("UPDATE applied_entries SET ts_utc = end_ts_utc")
+    conn.commit()
+
+    def offset_page() -> None:
+        # What a deep OFFSET page costs: every skipped row is still visited.
+        conn.execute(
+            "SELECT * FROM applied_entries ORDER BY ts_utc DESC, id DESC LIMIT 50 OFFSET ?",
+            (LEDGER_ROWS - 100,),
+        ).fetchall()
+
+    deep = list_applied(conn, limit=LEDGER_ROWS - 100)[-1]
+    bench.run("ledger list deep page (OFFSET)", offset_page)
+    bench.run(
+        "ledger list deep page (keyset)",
+        lambda: list_applied(conn, limit=50, after=parse_cursor(deep.cursor)),
+    )
+    bench.run(
+        "ledger list --prefix + --start-from",
+        lambda: list_applied(conn, limit=50, prefix="entry 9999", start_from="2020-01-01"),
+    )
+
+    def full_aggregate() -> None:
+        conn.execute(
+            """
+            SELECT COUNT(*), MIN(ts_utc), MAX(ts_utc), COUNT(DISTINCT toggl_time_entry_id)
+            FROM applied_entries
+            """
+        ).fetchone()
+
+    bench.run(f"ledger stats full aggregate ({LEDGER_ROWS:,} rows)", full_aggregate)
+    bench.run(f"ledger stats counters ({LEDGER_ROWS:,} rows)", lambda: stats(conn))
+    assert stats(conn).count == LEDGER_ROWS
+    conn.close()
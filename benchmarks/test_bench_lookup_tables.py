@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlparse
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.query import (
+    day_bounds_utc,
+    fetch_samples,
+    sample_counts_by_app,
+    tab_counts_by_host,
+)
+from toggl_sherpa.synthetic import generate
+
+DAYS = 365
+DAY = "2026-06-10"
+YEAR = ("2026-01-01T00:00:00+00:00", "2027-01-31T00:00:00+00:00")
+
+# The v9 layout: strings stored inline in every row.
+_V9_DDL = """
+CREATE TABLE samples (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, ts_utc TEXT NOT NULL, idle_ms INTEGER,
+    focus_title TEXT, focus_wm_class TEXT, focus_pid INTEGER, raw_json TEXT, interval_s REAL
+);
+CREATE INDEX idx_samples_ts ON samples(ts_utc);
+CREATE TABLE tab_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, ts_utc TEXT NOT NULL, sample_id INTEGER,
+    url TEXT, title TEXT, url_redacted TEXT, title_redacted TEXT,
+    allowed INTEGER NOT NULL DEFAULT 0, raw_json TEXT
+);
+CREATE INDEX idx_tab_events_ts ON tab_events(ts_utc);
+CREATE INDEX idx_tab_events_sample_id ON tab_events(sample_id);
+"""
+
+
+def _host(url: str | None) -> str | None:
+    return (urlparse(url).hostname or None) if url else None
+
+
+def _v9_copy(src: Path, dst: Path) -> None:
+    conn = sqlite3.connect(dst)
+    conn.executescript(_V9_DDL)
+    conn.execute("ATTACH DATABASE ? AS src", (str(src),))
+    conn.execute(
+        "INSERT INTO samples SELECT id, ts_utc, idle_ms, focus_title, focus_wm_class,"
+        " focus_pid, raw_json, interval_s FROM src.samples"
+    )
+    conn.execute(
+        "INSERT INTO tab_events SELECT id, ts_utc, sample_id, url, title, url_redacted,"
+        " title_redacted, allowed, raw_json FROM src.tab_events"
+    )
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    conn.close()
+
+
+def _vacuumed_mib(path: Path) -> float:
+    out = path.with_suffix(".vacuumed")
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM INTO ?", (str(out),))
+    conn.close()
+    return out.stat().st_size / 2**20
+
+
+def test_bench_lookup_tables_size_and_group_by(bench, tmp_path: Path) -> None:
+    new_path = tmp_path / "v10.sqlite"
+    conn = db_mod.connect(new_path)
+    stats = generate(conn, days=DAYS)
+    conn.close()
+    old_path = tmp_path / "v9.sqlite"
+    _v9_copy(new_path, old_path)
+
+    old_mib, new_mib = _vacuumed_mib(old_path), _vacuumed_mib(new_path)
+    print(
+        f"\n{stats.samples:,} samples, {stats.tab_events:,} tab events: "
+        f"v9 {old_mib:.1f} MiB, v10 {new_mib:.1f} MiB ({100 * new_mib / old_mib:.0f}%)"
+    )
+
+    old = sqlite3.connect(old_path)
+    old.row_factory = sqlite3.Row
+    old.create_function("url_host", 1, _host, deterministic=True)
+    new = db_mod.connect_readonly(new_path)
+
+    got: dict[str, object] = {}
+    bench.run(
+        "samples per app, a year (v9: GROUP BY focus_wm_class)",
+        lambda: got.__setitem__(
+            "old_apps",
+            Counter(
+                dict(
+                    old.execute(
+                        "SELECT focus_wm_class, COUNT(*) FROM samples"
+                        " WHERE ts_utc >= ? AND ts_utc <= ? GROUP BY focus_wm_class",
+                        YEAR,
+                    ).fetchall()
+                )
+            ),
+        ),
+        n=stats.samples,
+    )
+    bench.run(
+        "samples per app, a year (v10: GROUP BY wm_class_id)",
+        lambda: got.__setitem__("new_apps", Counter(dict(sample_counts_by_app(new, *YEAR)))),
+        n=stats.samples,
+    )
+    bench.run(
+        "tab events per host, a year (v9: host parsed from each URL)",
+        lambda: got.__setitem__(
+            "old_hosts",
+            Counter(
+                dict(
+                    old.execute(
+                        "SELECT url_host(COALESCE(url, url_redacted)) AS h, COUNT(*)"
+                        " FROM tab_events WHERE ts_utc >= ? AND ts_utc <= ? GROUP BY h",
+                        YEAR,
+                    ).fetchall()
+                )
+            ),
+        ),
+        n=stats.tab_events,
+    )
+    bench.run(
+        "tab events per host, a year (v10: GROUP BY host_id)",
+        lambda: got.__setitem__("new_hosts", Counter(dict(tab_counts_by_host(new, *YEAR)))),
+        n=stats.tab_events,
+    )
+    bounds = day_bounds_utc(DAY)
+    day_rows: dict[str, list] = {}
+    for name, c in (("v9 table", old), ("v10 view", new)):
+        bench.run(
+            f"fetch one day of samples ({name}) x20",
+            lambda c=c, name=name: [
+                day_rows.__setitem__(name, fetch_samples(c, *bounds)) for _ in range(20)
+            ],
+            n=20,
+        )
+    old.close()
+    new.close()
+
+    assert got["old_apps"] == got["new_apps"]
+    assert got["old_hosts"] == got["new_hosts"]
+    assert day_rows["v9 table"] == day_rows["v10 view"]
+    assert new_mib < old_mib
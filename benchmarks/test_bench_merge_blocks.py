@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from toggl_sherpa.m3.model import EvidenceItem, TimesheetBlock
+from toggl_sherpa.m4.apply import merge_adjacent_blocks
+
+BLOCK_S = 10
+MONTH = 30 * 24 * 3600 // BLOCK_S  # 259,200 blocks
+RUN = 360  # An hour on the same thing.
+
+
+def _blocks(n: int, run: int) -> list[TimesheetBlock]:
+    t0 = datetime(2026, 1, 1, tzinfo=UTC)
+    out = []
+    for i in range(n):
+        start = t0 + timedelta(seconds=i * BLOCK_S)
+        ts = start.isoformat()
+        out.append(
+            TimesheetBlock(
+                start_ts_utc=ts,
+                end_ts_utc=(start + timedelta(seconds=BLOCK_S)).isoformat(),
+                seconds=BLOCK_S,
+                label=f"code:{i // run % 4}",
+                project_suggestion=None,
+                tags_suggestion=[],
+                evidence=[EvidenceItem(ts, True, f"https://x/{i}", "t", None, None)],
+            )
+        )
+    return out
+
+
+def _merge_pairwise(blocks: list[TimesheetBlock], *, gap_seconds: int = 60):
+    # The previous implementation: evidence list rebuilt on every merge.
+    from dataclasses import replace
+
+    from toggl_sherpa.m3.query import parse_ts
+
+    merged = [blocks[0]]
+    for b in blocks[1:]:
+        prev = merged[-1]
+        gap = int((parse_ts(b.start_ts_utc) - parse_ts(prev.end_ts_utc)).total_seconds())
+        if (
+            gap <= gap_seconds
+            and b.label == prev.label
+            and b.project_suggestion == prev.project_suggestion
+            and b.tags_suggestion == prev.tags_suggestion
+        ):
+            merged[-1] = replace(
+                prev,
+                end_ts_utc=b.end_ts_utc,
+                seconds=prev.seconds + b.seconds + max(gap, 0),
+                evidence=[*prev.evidence, *b.evidence],
+            )
+        else:
+            merged.append(b)
+    return merged
+
+
+def test_bench_merge_month_of_10s_blocks(bench) -> None:
+    blocks = _blocks(MONTH, RUN)
+    out: dict[str, list] = {}
+
+    t_old = bench.run(
+        f"merge pairwise ({MONTH:,} blocks, runs of {RUN})",
+        lambda: out.setdefault("old", _merge_pairwise(blocks)),
+        n=MONTH,
+    )
+    t_new = bench.run(
+        f"merge single-pass ({MONTH:,} blocks, runs of {RUN})",
+        lambda: out.setdefault("new", merge_adjacent_blocks(blocks)),
+        n=MONTH,
+    )
+    print(f"speedup: {t_old / t_new:.1f}x")
+    assert out["old"] == out["new"]
+    assert len(out["new"]) == MONTH // RUN
+
+
+def test_bench_merge_one_long_run(bench) -> None:
+    # A full day of one label: the pairwise version's worst case.
+    day = 24 * 3600 // BLOCK_S
+    blocks = _blocks(day, day)
+    t_old = bench.run(f"merge pairwise (1 run of {day:,})", lambda: _merge_pairwise(blocks), n=day)
+    t_new = bench.run(
+        f"merge single-pass (1 run of {day:,})", lambda: merge_adjacent_blocks(blocks), n=day
+    )
+    print(f"speedup: {t_old / t_new:.1f}x")
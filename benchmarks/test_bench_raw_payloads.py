@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1 import rawstore
+from toggl_sherpa.m3.query import day_bounds_utc
+from toggl_sherpa.synthetic import generate
+
+DAYS = 90
+DAY = "2026-02-10"
+UA = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko)"
+    " Chrome/126.0.0.0 Safari/537.36"
+)
+
+
+def _inline_payloads(conn: sqlite3.Connection) -> None:
+    """Give the synthetic rows the payloads real writers log, stored inline (as in v10)."""
+    conn.create_function("dumps", 1, lambda s: json.dumps(json.loads(s), sort_keys=True))
+    conn.execute(
+        """
+        UPDATE sample_rows SET raw_id = NULL, raw_json = dumps(json_object(
+            'idle_ms', idle_ms,
+            'pid', focus_pid,
+            'title', (SELECT title FROM titles WHERE id = title_id),
+            'wm_class', (SELECT wm_class FROM wm_classes WHERE id = wm_class_id)
+        ))
+        """
+    )
+    conn.execute(
+        """
+        UPDATE tab_event_rows SET raw_id = NULL, raw_json = dumps(json_object(
+            'title', (SELECT title FROM titles WHERE id = title_id),
+            'ts_utc', NULL,
+            'url', (SELECT url FROM urls WHERE id = url_id),
+            'user_agent', ?
+        ))
+        """,
+        (UA,),
+    )
+    conn.execute("DELETE FROM raw_payloads")
+    conn.commit()
+    conn.execute("VACUUM")
+
+
+def _vacuumed_mib(path: Path) -> float:
+    out = path.with_suffix(".vacuumed")
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM INTO ?", (str(out),))
+    conn.close()
+    return out.stat().st_size / 2**20
+
+
+def _day_raw(conn: sqlite3.Connection, bounds: tuple[str, str]) -> list[str | None]:
+    ids = [
+        r[0]
+        for r in conn.execute(
+            "SELECT id FROM samples WHERE ts_utc >= ? AND ts_utc <= ? ORDER BY id", bounds
+        )
+    ]
+    return [rawstore.sample_raw_json(conn, i) for i in ids]
+
+
+def test_bench_raw_payload_size_and_read_back(bench, tmp_path: Path) -> None:
+    inline_path = tmp_path / "inline.sqlite"
+    conn = db_mod.connect(inline_path)
+    stats = generate(conn, days=DAYS)
+    _inline_payloads(conn)
+    conn.close()
+    stored_path = tmp_path / "stored.sqlite"
+    shutil.copyfile(inline_path, stored_path)
+
+    conn = sqlite3.connect(stored_path)
+    moved: list[int] = []
+    bench.run(
+        "compact inline raw_json into raw_payloads (chunks of 5000)",
+        lambda: moved.append(rawstore.compact(conn)),
+        n=stats.samples + stats.tab_events,
+    )
+    payloads, codecs = conn.execute(
+        "SELECT COUNT(*), group_concat(DISTINCT codec) FROM raw_payloads"
+    ).fetchone()
+    conn.close()
+
+    inline_mib, stored_mib = _vacuumed_mib(inline_path), _vacuumed_mib(stored_path)
+    print(
+        f"\n{stats.samples:,} samples, {stats.tab_events:,} tab events -> {payloads:,} payloads"
+        f" ({codecs}): inline {inline_mib:.1f} MiB, stored {stored_mib:.1f} MiB"
+        f" ({100 * stored_mib / inline_mib:.0f}%)"
+    )
+
+    bounds = day_bounds_utc(DAY)
+    got: dict[str, list] = {}
+    for name, path in (("inline", inline_path), ("stored", stored_path)):
+        c = db_mod.connect_readonly(path)
+        bench.run(
+            f"read back one day of raw JSON ({name})",
+            lambda c=c, name=name: got.__setitem__(name, _day_raw(c, bounds)),
+            n=1,
+        )
+        c.close()
+
+    assert moved == [stats.samples + stats.tab_events]
+    assert got["inline"] == got["stored"] and got["inline"]
+    assert stored_mib < inline_mib
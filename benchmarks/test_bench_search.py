@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.search import search, time_bound
+from toggl_sherpa.synthetic import generate
+
+DAYS = 1000
+TICKETS = 5000
+MONTH = ("2025-07-01", "2025-07-31")
+
+
+def _add_tickets(conn: sqlite3.Connection) -> None:
+    """Every 7th sample works on a ticket, in runs of ids; each ticket recurs a few times."""
+    conn.executemany(
+        "INSERT INTO titles(title) VALUES (?)",
+        [(f"PROJ-{n} fix - toggl-sherpa — Visual Studio Code",) for n in range(TICKETS)],
+    )
+    conn.execute(
+        f"""
+        UPDATE sample_rows SET title_id = (
+            SELECT id FROM titles
+            WHERE title = 'PROJ-' || ((sample_rows.id / 200) % {TICKETS})
+                || ' fix - toggl-sherpa — Visual Studio Code'
+        )
+        WHERE id % 7 = 0
+        """
+    )
+    # Rebuild the search index the way an upgrade from v11 would.
+    conn.executescript(
+        """
+        DROP TRIGGER sample_rows_fts;
+        DROP TRIGGER tab_event_rows_fts;
+        DROP TABLE title_fts;
+        DROP TABLE url_fts;
+        UPDATE meta SET value = '11' WHERE key = 'schema_version';
+        """
+    )
+
+
+def _like(conn: sqlite3.Connection, needle: str, lo: str, hi: str) -> tuple[int, int]:
+    pattern = f"%{needle}%"
+    samples = conn.execute(
+        "SELECT COUNT(*) FROM samples WHERE focus_title LIKE ? AND ts_utc >= ? AND ts_utc < ?",
+        (pattern, lo, hi),
+    ).fetchone()[0]
+    tabs = conn.execute(
+        "SELECT COUNT(*) FROM tab_events WHERE allowed = 1 AND (title LIKE ? OR url LIKE ?)"
+        " AND ts_utc >= ? AND ts_utc < ?",
+        (pattern, pattern, lo, hi),
+    ).fetchone()[0]
+    return samples, tabs
+
+
+def test_bench_search_fts_vs_like(bench, tmp_path: Path) -> None:
+    path = tmp_path / "db.sqlite"
+    conn = db_mod.connect(path)
+    stats = generate(conn, days=DAYS, start=date(2024, 1, 1))
+    _add_tickets(conn)
+    conn.close()
+    rows = stats.samples + stats.tab_events
+    print(f"\n{stats.samples:,} samples, {stats.tab_events:,} tab events")
+
+    bench.run("upgrade: build the FTS5 indexes", lambda: db_mod.connect(path).close(), n=rows)
+
+    conn = db_mod.connect_readonly(path)
+    everything = ("", "\U0010ffff")
+    month = (time_bound(MONTH[0]), time_bound(MONTH[1], end=True))
+    cases = [
+        ("PROJ-1234", everything, None, None),
+        ("PROJ-1234", month, *MONTH),
+        ("summarise.py", month, *MONTH),
+        ("Pull request #117", everything, None, None),
+    ]
+    for needle, (lo, hi), since, until in cases:
+        where = "all time" if since is None else "one month"
+        got: dict[str, object] = {}
+        bench.run(
+            f"find {needle!r}, {where} (LIKE scan)",
+            lambda needle=needle, lo=lo, hi=hi, got=got: got.__setitem__(
+                "like", _like(conn, needle, lo, hi)
+            ),
+            n=1,
+        )
+        bench.run(
+            f"find {needle!r}, {where} (FTS5, grouped into sessions)",
+            lambda needle=needle, since=since, until=until, got=got: got.__setitem__(
+                "fts", search(conn, needle, since=since, until=until)
+            ),
+            n=1,
+        )
+        sessions = got["fts"]
+        assert isinstance(sessions, list)
+        counts = (sum(s.samples for s in sessions), sum(s.tab_events for s in sessions))
+        print(f"  {needle!r} {where}: {len(sessions)} session(s), {counts} hits")
+        assert counts == got["like"] and sessions
+    conn.close()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1 import segments
+from toggl_sherpa.m1.gnome import FocusSample
+from toggl_sherpa.m1.logger import insert_sample
+from toggl_sherpa.m3.query import fetch_samples
+
+SAMPLES = 5_000  # ~1.4 h at 1 s
+T0 = datetime(2026, 1, 7, 9, tzinfo=UTC)
+
+
+def _samples() -> list[tuple[FocusSample, str]]:
+    out = []
+    for i in range(SAMPLES):
+        title = f"summarise.py - toggl-sherpa - Visual Studio Code ({i // 30})"
+        s = FocusSample(idle_ms=i % 900, title=title, wm_class="code", pid=4242, raw={})
+        out.append((s, (T0 + timedelta(seconds=i)).isoformat()))
+    return out
+
+
+def test_bench_segment_append_vs_sqlite_insert(bench, tmp_path: Path) -> None:
+    rows = _samples()
+    day = (T0.isoformat(), (T0 + timedelta(days=1)).isoformat())
+
+    conn = db_mod.connect(tmp_path / "sqlite.sqlite")
+    bench.run(
+        f"insert {SAMPLES} samples (one SQLite transaction each)",
+        lambda: [insert_sample(conn, s, interval_s=1.0, ts_utc=ts) for s, ts in rows],
+        n=SAMPLES,
+    )
+    conn.close()
+
+    db = tmp_path / "segments.sqlite"
+    conn = db_mod.connect(db)
+    writer = segments.SegmentWriter(segments.segments_dir(db))
+    bench.run(
+        f"append {SAMPLES} samples (segment file)",
+        lambda: [writer.append(s, ts_utc=ts, interval_s=1.0) for s, ts in rows],
+        n=SAMPLES,
+    )
+    tail: list = []
+    bench.run(
+        "report query with unsealed tail",
+        lambda: tail.extend(fetch_samples(conn, *day)),
+        n=SAMPLES,
+    )
+    writer.close()
+    bench.run(
+        "bulk import of sealed segments",
+        lambda: segments.import_sealed(conn, segments.segments_dir(db)),
+        n=SAMPLES,
+    )
+    imported = fetch_samples(conn, *day)
+    bench.run("report query after import", lambda: fetch_samples(conn, *day), n=SAMPLES)
+    conn.close()
+
+    assert len(tail) == len(imported) == SAMPLES
+    assert [s.focus_title for s in tail] == [s.focus_title for s in imported]
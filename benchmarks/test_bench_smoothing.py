@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import replace
+from datetime import date, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.model import SampleRow, TabEventRow
+from toggl_sherpa.m3.query import day_bounds_utc, fetch_samples, fetch_tab_events
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.synthetic import generate
+
+DAYS = 20
+DAY0 = date(2026, 1, 5)
+DWELLS = (0, 30, 60, 120)
+# One 10 s glance at chat every ~10 minutes of 10 s samples.
+GLANCE_EVERY = 61
+
+
+def _with_glances(samples: list[SampleRow]) -> list[SampleRow]:
+    return [
+        replace(s, focus_title="DM Sam — Slack", focus_wm_class="slack")
+        if i % GLANCE_EVERY == GLANCE_EVERY - 1
+        else s
+        for i, s in enumerate(samples)
+    ]
+
+
+def _per_label(blocks) -> Counter[str]:
+    totals: Counter[str] = Counter()
+    for b in blocks:
+        totals[b.label] += b.seconds
+    return totals
+
+
+def test_bench_smoothing_block_counts_on_replayed_days(bench, tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    generate(conn, days=DAYS, start=DAY0)
+    days: list[tuple[list[SampleRow], list[TabEventRow]]] = []
+    for d in range(DAYS):
+        bounds = day_bounds_utc((DAY0 + timedelta(days=d)).isoformat())
+        days.append((fetch_samples(conn, *bounds), fetch_tab_events(conn, *bounds)))
+    conn.close()
+
+    for variant, replayed in (
+        ("synthetic", days),
+        ("synthetic + chat glances", [(_with_glances(s), t) for s, t in days]),
+    ):
+        # Every switch kept, nothing dropped: what each label really got.
+        truth = [_per_label(summarise_blocks(s, t, min_block_s=1)) for s, t in replayed]
+        base = None
+        for dwell in DWELLS:
+            out: list[list] = []
+            bench.run(
+                f"summarise {DAYS} day(s), {variant}, min_dwell_s={dwell}",
+                lambda dwell=dwell, out=out, replayed=replayed: out.extend(
+                    summarise_blocks(s, t, min_dwell_s=dwell) for s, t in replayed
+                ),
+                n=DAYS,
+            )
+            blocks = sum(map(len, out)) / DAYS
+            base = base or blocks
+            moved = sum(
+                sum(abs(_per_label(b)[k] - want[k]) for k in _per_label(b).keys() | want.keys())
+                for b, want in zip(out, truth, strict=True)
+            )
+            total = sum(sum(w.values()) for w in truth)
+            print(
+                f"  {variant}, min_dwell_s={dwell}: {blocks:.1f} blocks/day"
+                f" ({100 * blocks / base:.0f}% of review prompts and API calls),"
+                f" per-label time off by {100 * moved / total:.1f}%"
+            )
+            if dwell == DWELLS[-1]:
+                assert blocks < base
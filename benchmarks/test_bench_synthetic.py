@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.synthetic import SyntheticStats, generate
+
+# Override with e.g. TOGGL_SHERPA_BENCH_DAYS=1,30 for a quicker run.
+SCALES = [int(d) for d in os.environ.get("TOGGL_SHERPA_BENCH_DAYS", "1,30,365").split(",")]
+START = date(2026, 1, 5)  # A Monday.
+INGEST = 200
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=lambda d: f"{d}d")
+def synthetic_db(request, tmp_path_factory) -> tuple[Path, SyntheticStats]:
+    path = tmp_path_factory.mktemp("synthetic") / "db.sqlite"
+    conn = db_mod.connect(path)
+    stats = generate(conn, days=request.param, start=START)
+    conn.close()
+    print(f"\n{request.param} day(s): {stats.samples:,} samples, {stats.tab_events:,} tab events")
+    return path, stats
+
+
+def test_bench_pipeline(bench, synthetic_db, tmp_path: Path) -> None:
+    from toggl_sherpa.m3.query import day_bounds_utc, fetch_samples, fetch_tab_events
+    from toggl_sherpa.m3.summarise import summarise_blocks
+    from toggl_sherpa.m4.apply import merge_adjacent_blocks, write_toggl_csv
+    from toggl_sherpa.m5.apply import build_plan, ledger_overlaps
+    from toggl_sherpa.m6.idempotency import (
+        applied_fingerprints,
+        fingerprint,
+        record_applied_many,
+    )
+
+    path, stats = synthetic_db
+    tag = f"[{stats.days}d]"
+    start_ts = day_bounds_utc(START.isoformat())[0]
+    end_ts = day_bounds_utc(stats.end_ts_utc[:10])[1]
+    conn = db_mod.connect(path)
+
+    last_day = day_bounds_utc(stats.end_ts_utc[:10])
+    bench.run(f"fetch_samples one day {tag}", lambda: fetch_samples(conn, *last_day))
+
+    samples: list = []
+    tabs: list = []
+    bench.run(
+        f"fetch_samples all {tag}",
+        lambda: samples.extend(fetch_samples(conn, start_ts, end_ts)),
+        n=stats.samples,
+    )
+    bench.run(
+        f"fetch_tab_events all {tag}",
+        lambda: tabs.extend(fetch_tab_events(conn, start_ts, end_ts)),
+        n=stats.tab_events,
+    )
+
+    blocks: list = []
+    bench.run(
+        f"summarise_blocks {tag}",
+        lambda: blocks.extend(summarise_blocks(samples, tabs)),
+        n=len(samples),
+    )
+    merged: list = []
+    bench.run(
+        f"merge_adjacent_blocks {tag}",
+        lambda: merged.extend(merge_adjacent_blocks(blocks)),
+        n=len(blocks),
+    )
+    plan: list = []
+    bench.run(f"build_plan {tag}", lambda: plan.extend(build_plan(merged)), n=len(merged))
+    bench.run(
+        f"write_toggl_csv {tag}",
+        lambda: write_toggl_csv(tmp_path / "out.csv", merged),
+        n=len(merged),
+    )
+
+    # Ledger checks against a ledger holding every other entry of the plan.
+    fps = [fingerprint(start=p.start, stop=p.stop, description=p.description) for p in plan]
+    rows = [
+        (fp, p.start, p.stop, p.description, i)
+        for i, (fp, p) in enumerate(zip(fps, plan, strict=True))
+    ]
+    record_applied_many(conn, rows[::2])
+    seen: set[str] = set()
+    bench.run(
+        f"applied_fingerprints {tag}",
+        lambda: seen.update(applied_fingerprints(conn, fps)),
+        n=len(fps),
+    )
+    bench.run(f"ledger_overlaps {tag}", lambda: ledger_overlaps(conn, plan), n=len(plan))
+    conn.close()
+
+    assert samples and blocks and merged
+    assert len(merged) <= len(blocks)
+    assert len(seen) == len(fps[::2])
+
+
+def test_bench_tab_ingest(bench, synthetic_db) -> None:
+    from toggl_sherpa.m2.tab_ingest import TabPayload, insert_tab_event
+
+    path, stats = synthetic_db
+    conn = db_mod.connect(path)
+    # Live ingest during the last (busy) day: every event links to a sample.
+    t0 = datetime.fromisoformat(stats.end_ts_utc[:10] + "T10:00:00+00:00")
+    payloads = [
+        TabPayload(
+            url=f"https://github.com/acme/toggl-sherpa/pull/{i}",
+            title=f"PR {i}",
+            ts_utc=(t0 + timedelta(seconds=7 * i)).isoformat(),
+        )
+        for i in range(INGEST)
+    ]
+    allow = {"github.com"}
+
+    def ingest() -> None:
+        for p in payloads:
+            insert_tab_event(conn, p, allow)
+
+    bench.run(f"tab ingest ({stats.samples:,} samples in db)", ingest, n=INGEST)
+    linked = conn.execute(
+        "SELECT COUNT(*) FROM tab_events WHERE title LIKE 'PR %' AND sample_id IS NOT NULL"
+    ).fetchone()[0]
+    conn.close()
+    assert linked == INGEST
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import random
+import re
+from dataclasses import replace
+from datetime import date, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.model import SampleRow, TabEventRow
+from toggl_sherpa.m3.normalise import DEFAULT_RULES, TitleNormaliser
+from toggl_sherpa.m3.query import day_bounds_utc, fetch_samples, fetch_tab_events
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.synthetic import generate
+
+DAYS = 20
+DAY0 = date(2026, 1, 5)
+
+
+def _volatile(samples: list[SampleRow], rng: random.Random) -> list[SampleRow]:
+    """What real titles do between samples: counters tick, editors toggle dirty markers."""
+    out: list[SampleRow] = []
+    for s in samples:
+        title = s.focus_title or ""
+        if s.focus_wm_class == "slack" or "Mail" in title:
+            title = f"({rng.randint(1, 9)}) {title}"
+        elif s.focus_wm_class in ("code", "rstudio") and rng.random() < 0.5:
+            title = f"● {title}"
+        elif "Calendar" in title:
+            title = f"{title} {rng.randint(8, 17)}:{rng.choice(('00', '30'))}"
+        out.append(replace(s, focus_title=title))
+    return out
+
+
+class _Uncompiled:
+    """Same rules, `re.sub` with pattern strings on every call and no per-title cache."""
+
+    def __call__(self, title: str | None) -> str | None:
+        if not title:
+            return title
+        out = title
+        for pattern, repl in DEFAULT_RULES:
+            out = re.sub(pattern, repl, out)
+        return out or title
+
+
+def test_bench_title_normalise_on_replayed_days(bench, tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    generate(conn, days=DAYS, start=DAY0)
+    rng = random.Random(7)
+    days: list[tuple[list[SampleRow], list[TabEventRow]]] = []
+    for d in range(DAYS):
+        bounds = day_bounds_utc((DAY0 + timedelta(days=d)).isoformat())
+        samples = _volatile(fetch_samples(conn, *bounds), rng)
+        days.append((samples, fetch_tab_events(conn, *bounds)))
+    conn.close()
+    n_samples = sum(len(s) for s, _ in days)
+
+    counts: dict[str, tuple[float, float, float]] = {}
+    for name, make in (
+        ("raw titles", lambda: None),
+        ("re.sub per title, no cache", _Uncompiled),
+        ("TitleNormaliser (compiled, cached)", TitleNormaliser),
+    ):
+        out: list[list] = []
+        bench.run(
+            f"summarise {DAYS} day(s), {name}",
+            lambda make=make, out=out: out.extend(
+                summarise_blocks(s, t, normalise_title=make()) for s, t in days
+            ),
+            n=n_samples,
+        )
+        kept = sum(b.seconds for blocks in out[-DAYS:] for b in blocks) / DAYS / 3600
+        # Every title change kept: how finely the volatile parts chop the day.
+        runs = sum(
+            len(summarise_blocks(s, t, min_block_s=1, normalise_title=make())) for s, t in days
+        )
+        counts[name] = (sum(map(len, out[-DAYS:])) / DAYS, kept, runs / DAYS)
+        print(
+            f"  {name}: {counts[name][0]:.1f} blocks/day, {kept:.2f} h/day kept,"
+            f" {counts[name][2]:.1f} runs/day before min_block_s"
+        )
+
+    raw, cached = counts["raw titles"], counts["TitleNormaliser (compiled, cached)"]
+    assert cached[1] > raw[1] and cached[2] < raw[2]
+    assert cached == counts["re.sub per title, no cache"]
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from stub_server import StubTogglServer
+
+from toggl_sherpa.m5.toggl_api import TogglClient, TogglConfig, create_time_entry
+
+N = 500
+
+
+def _entry(i: int) -> dict:
+    return {
+        "start": f"2026-02-08T{i // 60 % 24:02d}:{i % 60:02d}:00+00:00",
+        "stop": f"2026-02-08T{i // 60 % 24:02d}:{i % 60:02d}:30+00:00",
+        "description": f"entry {i}",
+        "tags": ["code"],
+    }
+
+
+def test_bench_creates_pooled_vs_per_call(bench) -> None:
+    with StubTogglServer() as srv:
+        cfg = TogglConfig(api_token="t", workspace_id=1, base_url=srv.base_url, max_rps=None)
+
+        def per_call() -> None:
+            for i in range(N):
+                create_time_entry(cfg, **_entry(i))
+
+        def pooled() -> None:
+            with TogglClient.from_config(cfg) as client:
+                for i in range(N):
+                    client.create_time_entry(cfg.workspace_id, **_entry(i))
+
+        bench.run("create_time_entry per-call session", per_call, n=N)
+        conns_per_call = srv.connections
+        bench.run("TogglClient pooled session", pooled, n=N)
+        conns_pooled = srv.connections - conns_per_call
+
+    print(f"connections: per-call={conns_per_call} pooled={conns_pooled}")
+    assert conns_per_call == N
+    assert conns_pooled == 1
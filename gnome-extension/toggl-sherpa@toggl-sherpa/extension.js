@@ -0,0 +1,85 @@
+// Exports /org/gnome/Shell/Extensions/TogglSherpa on the session bus and emits
+// Changed(s payload) when the focused window or its title changes, when the
+// user goes idle and when they come back. The payload is the same JSON as the
+// logger's Eval poll, plus a "reason".
+import Gio from 'gi://Gio';
+import GLib from 'gi://GLib';
+import {Extension} from 'resource:///org/gnome/shell/extensions/extension.js';
+
+const OBJECT_PATH = '/org/gnome/Shell/Extensions/TogglSherpa';
+const IFACE = `
+<node>
+  <interface name="org.gnome.Shell.Extensions.TogglSherpa">
+    <signal name="Changed">
+      <arg type="s" name="payload"/>
+    </signal>
+  </interface>
+</node>`;
+
+// Matches the report's default idle threshold.
+const IDLE_MS = 60000;
+
+export default class TogglSherpaFocus extends Extension {
+    enable() {
+        this._dbus = Gio.DBusExportedObject.wrapJSObject(IFACE, this);
+        this._dbus.export(Gio.DBus.session, OBJECT_PATH);
+
+        this._idleMonitor = global.backend.get_core_idle_monitor();
+        this._idleWatch = this._idleMonitor.add_idle_watch(IDLE_MS, () => this._onIdle());
+        this._activeWatch = 0;
+
+        this._window = null;
+        this._titleId = 0;
+        this._focusId = global.display.connect('notify::focus-window', () => this._onFocus());
+        this._onFocus();
+    }
+
+    disable() {
+        global.display.disconnect(this._focusId);
+        this._untrackWindow();
+        this._idleMonitor.remove_watch(this._idleWatch);
+        if (this._activeWatch)
+            this._idleMonitor.remove_watch(this._activeWatch);
+        this._dbus.unexport();
+        this._dbus = null;
+        this._idleMonitor = null;
+    }
+
+    _untrackWindow() {
+        if (this._window && this._titleId)
+            this._window.disconnect(this._titleId);
+        this._window = null;
+        this._titleId = 0;
+    }
+
+    _onFocus() {
+        this._untrackWindow();
+        const w = global.display.focus_window;
+        if (w) {
+            this._window = w;
+            this._titleId = w.connect('notify::title', () => this._emit('title'));
+        }
+        this._emit('focus');
+    }
+
+    _onIdle() {
+        this._emit('idle');
+        // One-shot: re-armed on every idle transition.
+        this._activeWatch = this._idleMonitor.add_user_active_watch(() => {
+            this._activeWatch = 0;
+            this._emit('active');
+        });
+    }
+
+    _emit(reason) {
+        const w = global.display.focus_window;
+        const payload = JSON.stringify({
+            reason,
+            idle_ms: this._idleMonitor.get_idletime(),
+            title: w?.get_title?.() ?? null,
+            wm_class: w?.get_wm_class?.() ?? null,
+            pid: w?.get_pid?.() ?? null,
+        });
+        this._dbus.emit_signal('Changed', new GLib.Variant('(s)', [payload]));
+    }
+}
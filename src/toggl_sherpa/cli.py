@@ -2,39 +2,21 @@ from __future__ import annotations
 
 import os
 import shutil
+from collections.abc import Callable
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import typer
 
-from toggl_sherpa.m1 import db as db_mod
-from toggl_sherpa.m1.daemon import (
-    AlreadyRunningError,
-    start_logger,
-    stop_logger,
-)
-from toggl_sherpa.m1.daemon import (
-    status as logger_status,
-)
-from toggl_sherpa.m1.gnome import GnomeShellEvalError, get_focus_sample
-from toggl_sherpa.m1.logger import insert_sample
 from toggl_sherpa.m1.paths import default_db_path, pidfile_path
-from toggl_sherpa.m2.tab_server import serve as serve_tab_ingest
-from toggl_sherpa.m3.query import day_bounds_utc, fetch_samples, fetch_tab_events, to_jsonable
-from toggl_sherpa.m3.report import blocks_to_markdown
-from toggl_sherpa.m3.summarise import summarise_blocks
-from toggl_sherpa.m4.apply import load_blocks_json, merge_adjacent_blocks, write_toggl_csv
-from toggl_sherpa.m4.review import interactive_review, write_reviewed_json
-from toggl_sherpa.m5.apply import (
-    _load_blocks,
-    apply_plan,
-    build_plan,
-    load_config_from_env,
-    print_plan,
-)
-from toggl_sherpa.m5.toggl_api import list_clients, list_projects, list_tags, list_workspaces
-from toggl_sherpa.m6.config import default_config_path, load_mapping
-from toggl_sherpa.m6.ledger import list_applied
-from toggl_sherpa.m6.ledger import stats as ledger_stats
+
+if TYPE_CHECKING:
+    from toggl_sherpa.m5.apply import ApplyPlanItem, ApplyResult
+    from toggl_sherpa.m5.reconcile import RemoteEntry
+
+# Command modules are imported inside the commands that use them: `log status`
+# and friends run from shell prompts/status bars, so startup must stay cheap
+# (no `requests`, HTTP server, summariser, csv, ... on the hot path).
 
 app = typer.Typer(add_completion=False, no_args_is_help=True)
 log_app = typer.Typer(add_completion=False, no_args_is_help=True)
@@ -43,22 +25,61 @@ report_app = typer.Typer(add_completion=False, no_args_is_help=True)
 ledger_app = typer.Typer(add_completion=False, no_args_is_help=True)
 config_app = typer.Typer(add_completion=False, no_args_is_help=True)
 toggl_app = typer.Typer(add_completion=False, no_args_is_help=True)
+dev_app = typer.Typer(add_completion=False, no_args_is_help=True)
 app.add_typer(log_app, name="log")
 app.add_typer(web_app, name="web")
 app.add_typer(report_app, name="report")
 app.add_typer(ledger_app, name="ledger")
 app.add_typer(config_app, name="config")
 app.add_typer(toggl_app, name="toggl")
+app.add_typer(dev_app, name="dev")
 
 
 @app.callback()
-def _root() -> None:
+def _root(
+    ctx: typer.Context,
+    timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Print per-stage timings (db, summarise, render, network, ...) to stderr",
+    ),
+    profile: Path | None = typer.Option(  # noqa: B008
+        None,
+        "--profile",
+        help="Write a cProfile dump of the command to this path (read with pstats)",
+    ),
+) -> None:
     """toggl-sherpa."""
+    if timings:
+        from toggl_sherpa import profiling
+
+        rec = profiling.enable()
+
+        def _print_timings() -> None:
+            profiling.disable()
+            typer.echo(profiling.format_table(rec), err=True)
+
+        ctx.call_on_close(_print_timings)
+
+    if profile is not None:
+        import cProfile
+
+        prof = cProfile.Profile()
+
+        def _dump_profile() -> None:
+            prof.disable()
+            prof.dump_stats(str(profile))
+            typer.echo(f"wrote profile {profile}", err=True)
+
+        ctx.call_on_close(_dump_profile)
+        prof.enable()
 
 
 @app.command()
 def doctor() -> None:
     """Check environment prerequisites (GNOME + gdbus, etc.)."""
+    from toggl_sherpa.m1.gnome import GnomeShellEvalError, get_focus_sample
+
     missing: list[str] = []
     if shutil.which("gdbus") is None:
         missing.append("gdbus")
@@ -81,6 +102,10 @@ def log_once(
     db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
 ) -> None:
     """Capture one focus+idle sample and store it in SQLite (for testing)."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m1.gnome import get_focus_sample
+    from toggl_sherpa.m1.logger import insert_sample
+
     conn = db_mod.connect(db)
     sample = get_focus_sample()
     insert_sample(conn, sample)
@@ -96,19 +121,91 @@ def log_start(
         min=1.0,
         help="Sampling interval (seconds)",
     ),  # noqa: B008
+    adaptive: bool = typer.Option(
+        True,
+        "--adaptive/--fixed",
+        help="Sample faster after a focus change and back off while idle",
+    ),
+    events: bool = typer.Option(
+        False,
+        "--events",
+        help="Log focus changes signalled by the GNOME Shell extension instead of polling",
+    ),
+    heartbeat_s: float = typer.Option(
+        60.0,
+        "--heartbeat",
+        min=1.0,
+        help="With --events: write a row after this many seconds without a change",
+    ),
+    segments: bool = typer.Option(
+        False,
+        "--segments",
+        help="Append samples to segment files and import them into the DB in bulk",
+    ),
 ) -> None:
     """Start background logger process (writes pidfile)."""
+    from toggl_sherpa.m1.daemon import AlreadyRunningError, start_logger
+
+    if segments and events:
+        typer.echo("--segments can't be combined with --events")
+        raise typer.Exit(code=2)
+
     try:
-        pid = start_logger(str(db), interval_s=interval_s)
+        pid = start_logger(
+            str(db),
+            interval_s=interval_s,
+            adaptive=adaptive,
+            events=events,
+            heartbeat_s=heartbeat_s,
+            segments=segments,
+        )
     except AlreadyRunningError as e:
         typer.echo(str(e))
         raise typer.Exit(code=1) from e
     typer.echo(f"started (pid {pid})")
 
 
+@log_app.command("import-segments")
+def log_import_segments(
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+) -> None:
+    """Import sealed sample segments (from `log start --segments`) into the DB now."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m1.segments import import_sealed, segments_dir
+
+    directory = segments_dir(db)
+    if not directory.is_dir():
+        typer.echo(f"no segments for {db}")
+        return
+    conn = db_mod.connect(db)
+    try:
+        n = import_sealed(conn, directory)
+    finally:
+        conn.close()
+    typer.echo(f"imported {n} samples")
+
+
+@log_app.command("compact-raw")
+def log_compact_raw(
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+) -> None:
+    """Move raw JSON still stored inline into the deduplicated, compressed payload table."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m1.rawstore import compact
+
+    conn = db_mod.connect(db)
+    try:
+        n = compact(conn)
+    finally:
+        conn.close()
+    typer.echo(f"compacted {n} rows")
+
+
 @log_app.command("stop")
 def log_stop() -> None:
     """Stop background logger process."""
+    from toggl_sherpa.m1.daemon import stop_logger
+
     stopped = stop_logger()
     if stopped:
         typer.echo("stopped")
@@ -119,6 +216,8 @@ def log_stop() -> None:
 @log_app.command("status")
 def log_status() -> None:
     """Show logger status."""
+    from toggl_sherpa.m1.daemon import status as logger_status
+
     running, pid = logger_status()
     pf = pidfile_path()
     if running:
@@ -144,10 +243,74 @@ def web_tab_server(
     ),  # noqa: B008
 ) -> None:
     """Run a localhost HTTP server to ingest active tab events from the Chrome extension."""
+    from toggl_sherpa.m2.tab_server import serve as serve_tab_ingest
+
     typer.echo(f"tab ingest server listening on http://{host}:{port} (db={db})")
     serve_tab_ingest(db_path=db, host=host, port=port, allowlist=allowlist or None)
 
 
+@app.command("daemon")
+def daemon_cmd(
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+    host: str = typer.Option("127.0.0.1", "--host", help="Tab server bind host"),  # noqa: B008
+    port: int = typer.Option(5055, "--port", help="Tab server bind port"),  # noqa: B008
+    allowlist: str = typer.Option(
+        "",
+        "--allowlist",
+        help="Comma-separated host/domain allowlist (stores full URL+title only for allowed hosts)",
+        envvar="TOGGL_SHERPA_TAB_ALLOWLIST",
+    ),  # noqa: B008
+    interval_s: float = typer.Option(
+        10.0,
+        "--interval",
+        min=1.0,
+        help="Sampling interval (seconds)",
+    ),  # noqa: B008
+    adaptive: bool = typer.Option(
+        True,
+        "--adaptive/--fixed",
+        help="Sample faster after a focus change and back off while idle",
+    ),
+) -> None:
+    """Run the focus logger and tab ingest server in one foreground process."""
+    from toggl_sherpa.m1 import daemon as logger_daemon
+
+    running, pid = logger_daemon.status()
+    if running:
+        typer.echo(f"background logger is running (pid {pid}); stop it with `log stop` first")
+        raise typer.Exit(code=1)
+
+    from toggl_sherpa.daemon import serve as serve_daemon
+
+    typer.echo(f"daemon logging to {db}, tab ingest on http://{host}:{port}")
+    try:
+        serve_daemon(
+            db,
+            host=host,
+            port=port,
+            allowlist=allowlist or None,
+            interval_s=interval_s,
+            adaptive=adaptive,
+        )
+    except logger_daemon.AlreadyRunningError as e:
+        typer.echo(f"{e}; stop it with `log stop` first")
+        raise typer.Exit(code=1) from e
+
+
+def _title_normaliser(enabled: bool, config: Path | None = None):
+    """The configured title normaliser for summarising, or None for raw titles."""
+    if not enabled:
+        return None
+    from toggl_sherpa.m3.normalise import TitleNormaliser
+    from toggl_sherpa.m6.config import load_title_rules
+
+    try:
+        return TitleNormaliser(load_title_rules(config))
+    except ValueError as e:
+        typer.echo(f"invalid config: {e}")
+        raise typer.Exit(code=2) from e
+
+
 @report_app.command("draft-timesheet")
 def report_draft_timesheet(
     date: str = typer.Option(
@@ -164,22 +327,74 @@ def report_draft_timesheet(
         "--idle-threshold-ms",
         help="Treat samples as idle if idle_ms >= this",
     ),
+    min_dwell_s: int = typer.Option(
+        0,
+        "--min-dwell-s",
+        min=0,
+        help="Absorb activity shorter than this into the block around it (default 0: off)",
+    ),
+    normalise_titles: bool = typer.Option(
+        False,
+        "--normalise-titles/--raw-titles",
+        help="Drop volatile title parts (unread counts, unsaved markers, clocks) before labelling"
+        " (default: raw titles)",
+    ),
+    config: str = typer.Option(
+        "",
+        "--config",
+        help="Optional config.json for title rules (default: XDG config path)",
+    ),  # noqa: B008
+    per_tick_evidence: bool = typer.Option(
+        False,
+        "--per-tick-evidence",
+        help="Keep one evidence item per tab event instead of one per distinct url/title",
+    ),
+    evidence_ref: bool = typer.Option(
+        False,
+        "--evidence-ref",
+        help="JSON output: reference evidence as tab_events id ranges instead of embedding it",
+    ),
 ) -> None:
     """Generate a draft timesheet + evidence report for one UTC day."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m3.query import (
+        day_bounds_utc,
+        db_fingerprint,
+        fetch_samples,
+        fetch_tab_events,
+        to_jsonable,
+    )
+    from toggl_sherpa.m3.report import blocks_to_markdown
+    from toggl_sherpa.m3.summarise import summarise_blocks
+
     start_ts, end_ts = day_bounds_utc(date)
-    conn = db_mod.connect(db)
+    conn = db_mod.connect_readonly(db)
     try:
         samples = fetch_samples(conn, start_ts, end_ts)
         tabs = fetch_tab_events(conn, start_ts, end_ts)
+        # Markdown shows the evidence, so only JSON output can reference it.
+        ref_db = db_fingerprint(conn) if evidence_ref and format == "json" else None
     finally:
         conn.close()
 
-    blocks = summarise_blocks(samples, tabs, idle_threshold_ms=idle_threshold_ms)
+    blocks = summarise_blocks(
+        samples,
+        tabs,
+        idle_threshold_ms=idle_threshold_ms,
+        min_dwell_s=min_dwell_s,
+        normalise_title=_title_normaliser(normalise_titles, Path(config) if config else None),
+        per_tick_evidence=per_tick_evidence,
+        evidence_ref_db=ref_db,
+    )
 
     if format == "json":
         import json
 
-        typer.echo(json.dumps(to_jsonable(blocks), ensure_ascii=False, indent=2))
+        from toggl_sherpa.profiling import span
+
+        with span("render"):
+            out = json.dumps(to_jsonable(blocks), ensure_ascii=False, indent=2)
+        typer.echo(out)
         return
 
     if format != "md":
@@ -198,7 +413,10 @@ def report_review(
     out: str = typer.Option(
         "reviewed_timesheet.json",
         "--out",
-        help="Where to write reviewed blocks JSON (file name or full path)",
+        help=(
+            "Where to write reviewed blocks JSON (file name or full path; "
+            ".jsonl/.jsonl.gz for JSON Lines)"
+        ),
     ),  # noqa: B008
     out_dir: str = typer.Option(
         "",
@@ -213,17 +431,63 @@ def report_review(
         "--idle-threshold-ms",
         help="Treat samples as idle if idle_ms >= this",
     ),
+    min_dwell_s: int = typer.Option(
+        0,
+        "--min-dwell-s",
+        min=0,
+        help="Absorb activity shorter than this into the block around it (default 0: off)",
+    ),
+    normalise_titles: bool = typer.Option(
+        False,
+        "--normalise-titles/--raw-titles",
+        help="Drop volatile title parts (unread counts, unsaved markers, clocks) before labelling"
+        " (default: raw titles)",
+    ),
+    config: str = typer.Option(
+        "",
+        "--config",
+        help="Optional config.json for title rules (default: XDG config path)",
+    ),  # noqa: B008
+    per_tick_evidence: bool = typer.Option(
+        False,
+        "--per-tick-evidence",
+        help="Keep one evidence item per tab event instead of one per distinct url/title",
+    ),
+    evidence_ref: bool = typer.Option(
+        False,
+        "--evidence-ref",
+        help="Reference evidence as tab_events id ranges in --db instead of embedding it",
+    ),
 ) -> None:
     """Interactively review blocks and write an accepted/edited JSON file."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m3.query import (
+        day_bounds_utc,
+        db_fingerprint,
+        fetch_samples,
+        fetch_tab_events,
+    )
+    from toggl_sherpa.m3.summarise import summarise_blocks
+    from toggl_sherpa.m4.review import interactive_review, write_reviewed_json
+
     start_ts, end_ts = day_bounds_utc(date)
-    conn = db_mod.connect(db)
+    conn = db_mod.connect_readonly(db)
     try:
         samples = fetch_samples(conn, start_ts, end_ts)
         tabs = fetch_tab_events(conn, start_ts, end_ts)
+        ref_db = db_fingerprint(conn) if evidence_ref else None
     finally:
         conn.close()
 
-    blocks = summarise_blocks(samples, tabs, idle_threshold_ms=idle_threshold_ms)
+    blocks = summarise_blocks(
+        samples,
+        tabs,
+        idle_threshold_ms=idle_threshold_ms,
+        min_dwell_s=min_dwell_s,
+        normalise_title=_title_normaliser(normalise_titles, Path(config) if config else None),
+        per_tick_evidence=per_tick_evidence,
+        evidence_ref_db=ref_db,
+    )
     reviewed = interactive_review(blocks)
 
     out_path = str(Path(out_dir) / out) if out_dir and Path(out).name == out else out
@@ -231,6 +495,35 @@ def report_review(
     typer.echo(f"wrote {out_path} ({len(reviewed)} accepted block(s))")
 
 
+@report_app.command("show")
+def report_show(
+    in_path: str = typer.Option(..., "--in", help="Input blocks file (.json/.jsonl, optional .gz)"),
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+    per_tick_evidence: bool = typer.Option(
+        False,
+        "--per-tick-evidence",
+        help="Show referenced evidence per tab event instead of per distinct url/title",
+    ),
+) -> None:
+    """Render a blocks file as markdown, loading referenced evidence from the DB."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m3.query import iter_hydrated
+    from toggl_sherpa.m3.report import blocks_to_markdown
+    from toggl_sherpa.m4.blockfile import iter_blocks
+
+    conn = db_mod.connect_readonly(db)
+    try:
+        md = blocks_to_markdown(
+            iter_hydrated(conn, iter_blocks(in_path), per_tick=per_tick_evidence)
+        )
+    except ValueError as e:
+        typer.echo(f"error: {e}")
+        raise typer.Exit(code=1) from e
+    finally:
+        conn.close()
+    typer.echo(md)
+
+
 @report_app.command("merge")
 def report_merge(
     in_path: str = typer.Option(
@@ -239,7 +532,7 @@ def report_merge(
     out: str = typer.Option(
         "merged_timesheet.json",
         "--out",
-        help="Where to write merged blocks JSON",
+        help="Where to write merged blocks JSON (.jsonl/.jsonl.gz for JSON Lines)",
     ),  # noqa: B008
     gap_seconds: int = typer.Option(
         60,
@@ -247,11 +540,16 @@ def report_merge(
         help="Merge blocks if gap between them <= this (and label/project/tags match)",
     ),
 ) -> None:
-    """Merge adjacent reviewed blocks into longer runs."""
-    blocks = load_blocks_json(in_path)
-    merged = merge_adjacent_blocks(blocks, gap_seconds=gap_seconds)
-    write_reviewed_json(out, merged)
-    typer.echo(f"wrote {out} ({len(merged)} block(s))")
+    """Merge adjacent reviewed blocks into longer runs.
+
+    `.jsonl` (optionally `.gz`) files are streamed block by block.
+    """
+    from toggl_sherpa.m4.apply import iter_merged_blocks
+    from toggl_sherpa.m4.blockfile import iter_blocks
+    from toggl_sherpa.m4.review import write_reviewed_json
+
+    n = write_reviewed_json(out, iter_merged_blocks(iter_blocks(in_path), gap_seconds=gap_seconds))
+    typer.echo(f"wrote {out} ({n} block(s))")
 
 
 @report_app.command("apply")
@@ -266,9 +564,68 @@ def report_apply(
     ),  # noqa: B008
 ) -> None:
     """Convert approved blocks to a Toggl Track CSV import file."""
-    blocks = load_blocks_json(in_path)
-    write_toggl_csv(out, blocks)
-    typer.echo(f"wrote {out} ({len(blocks)} row(s))")
+    from toggl_sherpa.m4.apply import write_toggl_csv
+    from toggl_sherpa.m4.blockfile import iter_blocks
+
+    n = write_toggl_csv(out, iter_blocks(in_path, evidence=False))
+    typer.echo(f"wrote {out} ({n} row(s))")
+
+
+_RESUME_HINT = "re-run with `toggl-sherpa apply --resume --yes` to continue"
+
+
+def _run_apply(run: Callable[[], ApplyResult]) -> ApplyResult:
+    from toggl_sherpa.m5.toggl_api import TogglApiError
+
+    try:
+        return run()
+    except TogglApiError as e:
+        typer.echo(f"error: {e}")
+        typer.echo(f"progress is saved in the apply journal; {_RESUME_HINT}")
+        raise typer.Exit(code=1) from e
+
+
+def _echo_overlaps(
+    overlaps: list[tuple[ApplyPlanItem, list[RemoteEntry]]], *, prefix: str, where: str
+) -> None:
+    if not overlaps:
+        return
+    typer.echo(f"{prefix} {len(overlaps)} entr(y/ies) overlap {where}")
+    for p, hits in overlaps[:20]:
+        other = "; ".join(h.description or "(no description)" for h in hits)
+        typer.echo(f"- {p.start} → {p.stop} | {p.description} ~ {other}")
+    if len(overlaps) > 20:
+        typer.echo(f"- … ({len(overlaps) - 20} more)")
+
+
+def _echo_apply_result(
+    result: ApplyResult, *, explain_skips: bool = False, skip_overlaps: bool = False
+) -> None:
+    _echo_overlaps(
+        result.overlaps,
+        prefix="skipped" if skip_overlaps else "warning:",
+        where="existing entries",
+    )
+    typer.echo(f"created {len(result.created)} time entr(y/ies)")
+    if result.remote_items:
+        typer.echo(f"skipped {len(result.remote_items)} entr(y/ies) already in Toggl")
+    if result.recovered_items:
+        typer.echo(
+            f"recovered {len(result.recovered_items)} interrupted entr(y/ies) already in Toggl"
+        )
+    if result.skipped:
+        typer.echo(f"skipped {result.skipped} already-applied entr(y/ies)")
+        if explain_skips:
+            for p in result.skipped_items[:20]:
+                typer.echo(f"- {p.start} → {p.stop} | {p.description}")
+            if len(result.skipped_items) > 20:
+                typer.echo(f"- … ({len(result.skipped_items) - 20} more)")
+    if result.failed:
+        typer.echo(f"failed {len(result.failed)} entr(y/ies):")
+        for p, err in result.failed[:20]:
+            typer.echo(f"- {p.start} → {p.stop} | {p.description}: {err}")
+        typer.echo(_RESUME_HINT)
+        raise typer.Exit(code=1)
 
 
 @app.command("apply")
@@ -298,6 +655,11 @@ def apply(
         "--yes",
         help="Actually create entries in Toggl (explicit approval gate)",
     ),  # noqa: B008
+    db: Path = typer.Option(  # noqa: B008
+        default_db_path,
+        "--db",
+        help="SQLite DB holding the Toggl metadata cache (as for `toggl sync-meta`)",
+    ),
     ledger_db: str = typer.Option(
         "",
         "--ledger-db",
@@ -308,11 +670,51 @@ def apply(
         "--force",
         help="Disable idempotency checks (re-post even if already applied)",
     ),  # noqa: B008
+    concurrency: int = typer.Option(
+        1,
+        "--concurrency",
+        min=1,
+        help="Number of create requests to run in parallel",
+    ),  # noqa: B008
+    max_rps: float | None = typer.Option(
+        None,
+        "--max-rps",
+        min=0.0,
+        help="Client-side rate limit in requests/second (default: none; Toggl asks for about 1/s)",
+    ),  # noqa: B008
+    reconcile: bool = typer.Option(
+        True,
+        "--reconcile/--no-reconcile",
+        help="Fetch existing Toggl entries for the plan's range and skip duplicates",
+    ),  # noqa: B008
+    skip_overlaps: bool = typer.Option(
+        False,
+        "--skip-overlaps",
+        help="Don't create entries that overlap existing Toggl entries",
+    ),  # noqa: B008
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Continue the last interrupted/failed apply run (ignores --reviewed)",
+    ),  # noqa: B008
 ) -> None:
     """Apply reviewed blocks to Toggl Track.
 
     Refuses to create anything unless `--yes` is provided.
     """
+    from toggl_sherpa.m5.apply import (
+        _load_blocks,
+        apply_plan,
+        build_plan,
+        env_workspace_id,
+        find_ledger_overlaps,
+        load_config_from_env,
+        open_run_ids,
+        print_plan,
+        project_ids_with_cache,
+        resume_apply,
+    )
+    from toggl_sherpa.m6.config import load_mapping
 
     if yes:
         dry_run = False
@@ -321,31 +723,67 @@ def apply(
         typer.echo("refusing: pass --yes to create entries")
         raise typer.Exit(code=2)
 
+    ledger_path = Path(ledger_db) if ledger_db else default_db_path()
+
+    if resume:
+        if dry_run:
+            typer.echo("refusing: pass --yes to resume an apply run")
+            raise typer.Exit(code=2)
+        cfg = load_config_from_env(max_rps=max_rps, concurrency=concurrency)
+        result = _run_apply(
+            lambda: resume_apply(cfg, ledger_db_path=ledger_path, concurrency=concurrency)
+        )
+        if result.run_id is None:
+            typer.echo("nothing to resume")
+            return
+        runs = ", ".join(str(r) for r in result.run_ids)
+        typer.echo(f"resumed apply run(s) {runs}")
+        _echo_apply_result(result)
+        return
+
     blocks = _load_blocks(Path(reviewed))
     mapping = load_mapping(Path(config) if config else None)
-    plan = build_plan(blocks, project_ids=mapping.project_ids, tag_map=mapping.tag_map)
+    cfg = None if dry_run else load_config_from_env(max_rps=max_rps, concurrency=concurrency)
+    project_ids = project_ids_with_cache(
+        blocks,
+        mapping.project_ids,
+        db_path=db,
+        workspace_id=cfg.workspace_id if cfg else env_workspace_id(),
+        cfg=cfg,
+    )
+    plan = build_plan(blocks, project_ids=project_ids, tag_map=mapping.tag_map)
     print_plan(plan)
 
-    if dry_run:
+    if cfg is None:
+        _echo_overlaps(
+            find_ledger_overlaps(plan, ledger_db_path=ledger_path),
+            prefix="would skip" if skip_overlaps else "warning:",
+            where="already-applied entries",
+        )
         typer.echo("dry-run: not creating anything")
         return
 
-    cfg = load_config_from_env()
-    ledger_path = Path(ledger_db) if ledger_db else default_db_path()
-    created, skipped, skipped_items = apply_plan(
-        plan,
-        cfg,
-        ledger_db_path=ledger_path,
-        force=force,
+    result = _run_apply(
+        lambda: apply_plan(
+            plan,
+            cfg,
+            ledger_db_path=ledger_path,
+            force=force,
+            concurrency=concurrency,
+            reconcile_remote=reconcile,
+            skip_overlaps=skip_overlaps,
+        )
     )
-    typer.echo(f"created {len(created)} time entr(y/ies)")
-    if skipped:
-        typer.echo(f"skipped {skipped} already-applied entr(y/ies)")
-        if explain_skips:
-            for p in skipped_items[:20]:
-                typer.echo(f"- {p.start} → {p.stop} | {p.description}")
-            if len(skipped_items) > 20:
-                typer.echo(f"- … ({len(skipped_items) - 20} more)")
+    # Earlier runs with items this plan didn't cover are still waiting.
+    stale = [
+        r
+        for r in open_run_ids(ledger_path, workspace_id=cfg.workspace_id)
+        if r not in result.run_ids
+    ]
+    if stale:
+        runs = ", ".join(str(r) for r in stale)
+        typer.echo(f"note: apply run(s) {runs} unfinished; use --resume to continue")
+    _echo_apply_result(result, explain_skips=explain_skips, skip_overlaps=skip_overlaps)
 
 
 @app.command("day")
@@ -369,6 +807,28 @@ def day(
         "--idle-threshold-ms",
         help="Treat samples as idle if idle_ms >= this",
     ),  # noqa: B008
+    min_dwell_s: int = typer.Option(
+        0,
+        "--min-dwell-s",
+        min=0,
+        help="Absorb activity shorter than this into the block around it (default 0: off)",
+    ),
+    normalise_titles: bool = typer.Option(
+        False,
+        "--normalise-titles/--raw-titles",
+        help="Drop volatile title parts (unread counts, unsaved markers, clocks) before labelling"
+        " (default: raw titles)",
+    ),  # noqa: B008
+    per_tick_evidence: bool = typer.Option(
+        False,
+        "--per-tick-evidence",
+        help="Keep one evidence item per tab event instead of one per distinct url/title",
+    ),
+    evidence_ref: bool = typer.Option(
+        False,
+        "--evidence-ref",
+        help="Reference evidence as tab_events id ranges in --db instead of embedding it",
+    ),
     out_dir: str = typer.Option(
         "",
         "--out-dir",
@@ -409,8 +869,50 @@ def day(
         "--force",
         help="Disable idempotency checks (re-post even if already applied)",
     ),  # noqa: B008
+    concurrency: int = typer.Option(
+        1,
+        "--concurrency",
+        min=1,
+        help="Number of create requests to run in parallel",
+    ),  # noqa: B008
+    max_rps: float | None = typer.Option(
+        None,
+        "--max-rps",
+        min=0.0,
+        help="Client-side rate limit in requests/second (default: none; Toggl asks for about 1/s)",
+    ),  # noqa: B008
+    reconcile: bool = typer.Option(
+        True,
+        "--reconcile/--no-reconcile",
+        help="Fetch existing Toggl entries for the plan's range and skip duplicates",
+    ),  # noqa: B008
+    skip_overlaps: bool = typer.Option(
+        False,
+        "--skip-overlaps",
+        help="Don't create entries that overlap existing Toggl entries",
+    ),  # noqa: B008
 ) -> None:
     """One-shot day workflow: draft -> review -> (dry-run/apply)."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m3.query import (
+        day_bounds_utc,
+        db_fingerprint,
+        fetch_samples,
+        fetch_tab_events,
+    )
+    from toggl_sherpa.m3.summarise import summarise_blocks
+    from toggl_sherpa.m4.apply import merge_adjacent_blocks
+    from toggl_sherpa.m4.review import interactive_review, write_reviewed_json
+    from toggl_sherpa.m5.apply import (
+        apply_plan,
+        build_plan,
+        env_workspace_id,
+        find_ledger_overlaps,
+        load_config_from_env,
+        print_plan,
+        project_ids_with_cache,
+    )
+    from toggl_sherpa.m6.config import load_mapping
 
     if yes:
         dry_run = False
@@ -420,14 +922,23 @@ def day(
         raise typer.Exit(code=2)
 
     start_ts, end_ts = day_bounds_utc(date)
-    conn = db_mod.connect(db)
+    conn = db_mod.connect_readonly(db)
     try:
         samples = fetch_samples(conn, start_ts, end_ts)
         tabs = fetch_tab_events(conn, start_ts, end_ts)
+        ref_db = db_fingerprint(conn) if evidence_ref else None
     finally:
         conn.close()
 
-    blocks = summarise_blocks(samples, tabs, idle_threshold_ms=idle_threshold_ms)
+    blocks = summarise_blocks(
+        samples,
+        tabs,
+        idle_threshold_ms=idle_threshold_ms,
+        min_dwell_s=min_dwell_s,
+        normalise_title=_title_normaliser(normalise_titles, Path(config) if config else None),
+        per_tick_evidence=per_tick_evidence,
+        evidence_ref_db=ref_db,
+    )
     reviewed = blocks if accept_all else interactive_review(blocks)
 
     if merge:
@@ -443,24 +954,84 @@ def day(
     typer.echo(f"wrote {out_path} ({len(reviewed)} accepted block(s))")
 
     mapping = load_mapping(Path(config) if config else None)
-    plan = build_plan(reviewed, project_ids=mapping.project_ids, tag_map=mapping.tag_map)
+    ledger_path = Path(ledger_db) if ledger_db else default_db_path()
+    cfg = None if dry_run else load_config_from_env(max_rps=max_rps, concurrency=concurrency)
+    project_ids = project_ids_with_cache(
+        reviewed,
+        mapping.project_ids,
+        db_path=db,
+        workspace_id=cfg.workspace_id if cfg else env_workspace_id(),
+        cfg=cfg,
+    )
+    plan = build_plan(reviewed, project_ids=project_ids, tag_map=mapping.tag_map)
     print_plan(plan)
 
-    if dry_run:
+    if cfg is None:
+        _echo_overlaps(
+            find_ledger_overlaps(plan, ledger_db_path=ledger_path),
+            prefix="would skip" if skip_overlaps else "warning:",
+            where="already-applied entries",
+        )
         typer.echo("dry-run: not creating anything")
         return
 
-    cfg = load_config_from_env()
-    ledger_path = Path(ledger_db) if ledger_db else default_db_path()
-    created, skipped, _skipped_items = apply_plan(
-        plan,
-        cfg,
-        ledger_db_path=ledger_path,
-        force=force,
+    result = _run_apply(
+        lambda: apply_plan(
+            plan,
+            cfg,
+            ledger_db_path=ledger_path,
+            force=force,
+            concurrency=concurrency,
+            reconcile_remote=reconcile,
+            skip_overlaps=skip_overlaps,
+        )
     )
-    typer.echo(f"created {len(created)} time entr(y/ies)")
-    if skipped:
-        typer.echo(f"skipped {skipped} already-applied entr(y/ies)")
+    _echo_apply_result(result, skip_overlaps=skip_overlaps)
+
+
+@app.command("search")
+def search_cmd(
+    query: str = typer.Argument(..., help="Words to find in window titles and allowed tabs"),
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+    since: str | None = typer.Option(
+        None,
+        "--since",
+        help="Only activity at/after this UTC date (YYYY-MM-DD) or timestamp",
+    ),
+    until: str | None = typer.Option(
+        None,
+        "--until",
+        help="Only activity up to this UTC date (inclusive) or timestamp",
+    ),
+    gap_s: int = typer.Option(
+        300,
+        "--gap-s",
+        help="Merge matches less than this many seconds apart into one session",
+    ),  # noqa: B008
+) -> None:
+    """Find when you worked on something: matching time ranges, grouped into sessions."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m3.search import search
+
+    conn = db_mod.connect_readonly(db)
+    try:
+        sessions = search(conn, query, since=since, until=until, gap_s=gap_s)
+    except ValueError as e:
+        typer.echo(f"invalid search: {e}")
+        raise typer.Exit(code=2) from e
+    finally:
+        conn.close()
+
+    for s in sessions:
+        tabs = f", {s.tab_events} tab event(s)" if s.tab_events else ""
+        typer.echo(
+            f"{s.start_ts_utc} → {s.end_ts_utc} ({round(s.seconds / 60)} min;"
+            f" {s.samples} sample(s){tabs})"
+        )
+        for m in s.matches:
+            typer.echo(f"  {m}")
+    total_min = round(sum(s.seconds for s in sessions) / 60)
+    typer.echo(f"{len(sessions)} session(s), {total_min} min")
 
 
 @ledger_app.command("list")
@@ -472,6 +1043,26 @@ def ledger_list(
         help="Only show entries applied since this UTC date (YYYY-MM-DD)",
     ),
     limit: int = typer.Option(50, "--limit", help="Max rows to show"),  # noqa: B008
+    after: str | None = typer.Option(
+        None,
+        "--after",
+        help="Continue below this cursor (TS,ID, printed at the end of a full page)",
+    ),
+    start_from: str | None = typer.Option(
+        None,
+        "--start-from",
+        help="Only entries starting at/after this UTC date or timestamp",
+    ),
+    start_to: str | None = typer.Option(
+        None,
+        "--start-to",
+        help="Only entries starting before this UTC date or timestamp",
+    ),
+    prefix: str | None = typer.Option(
+        None,
+        "--prefix",
+        help="Only entries whose description starts with this text",
+    ),
     show_fingerprint: bool = typer.Option(
         False,
         "--show-fingerprint",
@@ -479,9 +1070,26 @@ def ledger_list(
     ),  # noqa: B008
 ) -> None:
     """List applied time entries (local idempotency ledger)."""
-    conn = db_mod.connect(db)
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m6.ledger import list_applied, parse_cursor
+
+    try:
+        cursor = parse_cursor(after) if after else None
+    except ValueError as e:
+        typer.echo(f"invalid --after: {e}")
+        raise typer.Exit(code=2) from e
+
+    conn = db_mod.connect_readonly(db)
     try:
-        rows = list_applied(conn, since=since, limit=limit)
+        rows = list_applied(
+            conn,
+            since=since,
+            limit=limit,
+            after=cursor,
+            start_from=start_from,
+            start_to=start_to,
+            prefix=prefix,
+        )
     finally:
         conn.close()
 
@@ -491,6 +1099,8 @@ def ledger_list(
         typer.echo(
             f"{r.ts_utc} | {r.start_ts_utc} → {r.end_ts_utc} | id={te_id} | {r.description}{fp}"
         )
+    if rows and len(rows) == limit:
+        typer.echo(f"next page: --after {rows[-1].cursor}")
 
 
 @ledger_app.command("stats")
@@ -503,7 +1113,10 @@ def ledger_stats_cmd(
     ),
 ) -> None:
     """Show summary stats for the local ledger."""
-    conn = db_mod.connect(db)
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m6.ledger import stats as ledger_stats
+
+    conn = db_mod.connect_readonly(db)
     try:
         s = ledger_stats(conn, since=since)
     finally:
@@ -518,6 +1131,8 @@ def ledger_stats_cmd(
 @config_app.command("show")
 def config_show() -> None:
     """Show resolved config paths and relevant env var status."""
+    from toggl_sherpa.m6.config import default_config_path
+
     db = default_db_path()
     cfg = default_config_path()
 
@@ -539,23 +1154,45 @@ def config_show() -> None:
         )
 
 
-@toggl_app.command("workspaces")
-def toggl_workspaces() -> None:
-    """List Toggl Track workspaces (id + name)."""
-    tok = os.environ.get("TOGGL_API_TOKEN")
-    if not tok:
-        typer.echo("missing TOGGL_API_TOKEN")
-        raise typer.Exit(code=2)
+def _toggl_meta(kind: str, *, workspace_id: int, db: Path, refresh: bool) -> list[dict]:
+    """Metadata list from the local cache, fetched from Toggl if stale or `refresh`."""
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m5 import metacache
+    from toggl_sherpa.m5.toggl_api import TogglClient
 
-    ws = list_workspaces(api_token=tok)
-    if not ws:
-        typer.echo("(no workspaces found)")
+    conn = db_mod.connect(db)
+    try:
+        if not refresh and metacache.is_fresh(conn, workspace_id=workspace_id, kind=kind):
+            return metacache.cached(conn, workspace_id=workspace_id, kind=kind)
+
+        tok = os.environ.get("TOGGL_API_TOKEN")
+        if not tok:
+            typer.echo("missing TOGGL_API_TOKEN")
+            raise typer.Exit(code=2)
+        with TogglClient(tok) as client:
+            return metacache.load(conn, client, workspace_id=workspace_id, kind=kind, force=True)
+    finally:
+        conn.close()
+
+
+def _echo_id_names(items: list[dict], *, empty: str) -> None:
+    if not items:
+        typer.echo(empty)
         return
+    for it in items:
+        typer.echo(f"{it.get('id')}\t{it.get('name')}")
 
-    for w in ws:
-        wid = w.get("id")
-        name = w.get("name")
-        typer.echo(f"{wid}\t{name}")
+
+@toggl_app.command("workspaces")
+def toggl_workspaces(
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+    refresh: bool = typer.Option(
+        False, "--refresh", help="Ignore the metadata cache and ask Toggl"
+    ),  # noqa: B008
+) -> None:
+    """List Toggl Track workspaces (id + name)."""
+    ws = _toggl_meta("workspaces", workspace_id=0, db=db, refresh=refresh)
+    _echo_id_names(ws, empty="(no workspaces found)")
 
 
 @toggl_app.command("projects")
@@ -563,22 +1200,14 @@ def toggl_projects(
     workspace_id: int = typer.Option(
         ..., "--workspace-id", help="Toggl workspace id"
     ),
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+    refresh: bool = typer.Option(
+        False, "--refresh", help="Ignore the metadata cache and ask Toggl"
+    ),  # noqa: B008
 ) -> None:
     """List Toggl Track projects in a workspace (id + name)."""
-    tok = os.environ.get("TOGGL_API_TOKEN")
-    if not tok:
-        typer.echo("missing TOGGL_API_TOKEN")
-        raise typer.Exit(code=2)
-
-    projects = list_projects(api_token=tok, workspace_id=workspace_id)
-    if not projects:
-        typer.echo("(no projects found)")
-        return
-
-    for p in projects:
-        pid = p.get("id")
-        name = p.get("name")
-        typer.echo(f"{pid}\t{name}")
+    projects = _toggl_meta("projects", workspace_id=workspace_id, db=db, refresh=refresh)
+    _echo_id_names(projects, empty="(no projects found)")
 
 
 @toggl_app.command("tags")
@@ -586,22 +1215,14 @@ def toggl_tags(
     workspace_id: int = typer.Option(
         ..., "--workspace-id", help="Toggl workspace id"
     ),
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+    refresh: bool = typer.Option(
+        False, "--refresh", help="Ignore the metadata cache and ask Toggl"
+    ),  # noqa: B008
 ) -> None:
     """List Toggl Track tags in a workspace (id + name)."""
-    tok = os.environ.get("TOGGL_API_TOKEN")
-    if not tok:
-        typer.echo("missing TOGGL_API_TOKEN")
-        raise typer.Exit(code=2)
-
-    tags = list_tags(api_token=tok, workspace_id=workspace_id)
-    if not tags:
-        typer.echo("(no tags found)")
-        return
-
-    for t in tags:
-        tid = t.get("id")
-        name = t.get("name")
-        typer.echo(f"{tid}\t{name}")
+    tags = _toggl_meta("tags", workspace_id=workspace_id, db=db, refresh=refresh)
+    _echo_id_names(tags, empty="(no tags found)")
 
 
 @toggl_app.command("clients")
@@ -609,22 +1230,93 @@ def toggl_clients(
     workspace_id: int = typer.Option(
         ..., "--workspace-id", help="Toggl workspace id"
     ),
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+    refresh: bool = typer.Option(
+        False, "--refresh", help="Ignore the metadata cache and ask Toggl"
+    ),  # noqa: B008
 ) -> None:
     """List Toggl Track clients in a workspace (id + name)."""
+    clients = _toggl_meta("clients", workspace_id=workspace_id, db=db, refresh=refresh)
+    _echo_id_names(clients, empty="(no clients found)")
+
+
+@toggl_app.command("sync-meta")
+def toggl_sync_meta(
+    workspace_id: int = typer.Option(
+        None, "--workspace-id", help="Toggl workspace id (default: TOGGL_WORKSPACE_ID)"
+    ),
+    db: Path = typer.Option(default_db_path, "--db", help="SQLite DB path"),  # noqa: B008
+    full: bool = typer.Option(
+        False, "--full", help="Re-download everything instead of revalidating"
+    ),  # noqa: B008
+) -> None:
+    """Refresh the local cache of workspaces, projects, tags and clients.
+
+    Later `toggl` listings and dry-run project resolution then work offline.
+    """
+    from toggl_sherpa.m1 import db as db_mod
+    from toggl_sherpa.m5 import metacache
+    from toggl_sherpa.m5.apply import env_workspace_id
+    from toggl_sherpa.m5.toggl_api import TogglClient
+
     tok = os.environ.get("TOGGL_API_TOKEN")
     if not tok:
         typer.echo("missing TOGGL_API_TOKEN")
         raise typer.Exit(code=2)
+    wid = workspace_id if workspace_id is not None else env_workspace_id()
+    if wid is None:
+        typer.echo("missing --workspace-id (or TOGGL_WORKSPACE_ID)")
+        raise typer.Exit(code=2)
 
-    clients = list_clients(api_token=tok, workspace_id=workspace_id)
-    if not clients:
-        typer.echo("(no clients found)")
-        return
+    conn = db_mod.connect(db)
+    try:
+        with TogglClient(tok) as client:
+            counts = metacache.sync(conn, client, workspace_id=wid, full=full)
+        for kind in metacache.KINDS:
+            n = len(metacache.cached(conn, workspace_id=wid, kind=kind))
+            typer.echo(f"{kind}: {n} cached ({counts[kind]} updated)")
+    finally:
+        conn.close()
+
+
+@dev_app.command("gen-synthetic")
+def dev_gen_synthetic(
+    db: Path = typer.Option(..., "--db", help="SQLite DB path to fill"),  # noqa: B008
+    days: int = typer.Option(1, "--days", min=1, help="Calendar days to generate"),
+    tabs_per_min: float = typer.Option(
+        6.0, "--tabs-per-min", min=0.0, help="Tab events per minute while a browser is focused"
+    ),
+    start: str = typer.Option("2026-01-05", "--start", help="First UTC date (YYYY-MM-DD)"),
+    seed: int = typer.Option(0, "--seed", help="Random seed (output is deterministic)"),
+) -> None:
+    """Fill a DB with realistic synthetic samples and tab events (benchmarks/testing).
+
+    Weekdays get a working day of focus samples with app switches, repeated
+    window titles, a lunch break and short idle periods; browser focus emits
+    tab events, redacted outside a small allowlist. Weekends stay empty.
+    """
+    import datetime as dt
 
-    for c in clients:
-        cid = c.get("id")
-        name = c.get("name")
-        typer.echo(f"{cid}\t{name}")
+    from toggl_sherpa import synthetic
+    from toggl_sherpa.m1 import db as db_mod
+
+    try:
+        start_day = dt.date.fromisoformat(start)
+    except ValueError as e:
+        typer.echo(f"invalid --start: {start!r} (expected YYYY-MM-DD)")
+        raise typer.Exit(code=2) from e
+
+    conn = db_mod.connect(db)
+    try:
+        stats = synthetic.generate(
+            conn, days=days, tabs_per_min=tabs_per_min, start=start_day, seed=seed
+        )
+    finally:
+        conn.close()
+    typer.echo(
+        f"generated {stats.samples} samples and {stats.tab_events} tab events "
+        f"({stats.start_ts_utc} .. {stats.end_ts_utc})"
+    )
 
 
 def main() -> None:
@@ -0,0 +1,147 @@
+"""Focus logger and tab server in one process (`toggl-sherpa daemon`).
+
+`log start` and `web tab-server` are two processes with two connections to
+the same DB, and every tab event looks for its sample with a scan of
+`samples`. Here one loop both samples on the logger's schedule and serves
+the ingest endpoint between samples, through a single connection, so
+there's one interpreter, one page cache and no second writer. The samples
+it writes are also kept in a small ring buffer, which links tab events
+without reading the DB; only an event older than the ring (a late
+backfill) falls back to the table lookup.
+"""
+
+from __future__ import annotations
+
+import signal
+import threading
+import time
+from collections.abc import Callable
+from http.server import HTTPServer
+from pathlib import Path
+
+from toggl_sherpa.m1 import daemon as logger_daemon
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.gnome import FocusSample, get_focus_sample
+from toggl_sherpa.m1.logger import insert_sample, take_sample, utc_now_iso
+from toggl_sherpa.m1.lookup import Lookups
+from toggl_sherpa.m1.recent import DEFAULT_RING_SIZE, RecentSamples
+from toggl_sherpa.m1.schedule import AdaptiveSchedule, FixedSchedule
+from toggl_sherpa.m2.redaction import parse_allowlist
+from toggl_sherpa.m2.tab_ingest import _nearest_sample_id
+from toggl_sherpa.m2.tab_server import TabIngestHandler
+
+# Longest the loop waits for a request before checking the schedule/stop.
+_MAX_WAIT_S = 0.5
+
+
+class _InlineHandler(TabIngestHandler):
+    # Requests are served on the loop, so a stalled client can't hold it long.
+    timeout = 2.0
+
+
+class _InlineTabServer(HTTPServer):
+    """The tab ingest endpoint, served one request at a time by the caller."""
+
+    def __init__(self, server_address, conn, allow_hosts: set[str], link, lookups) -> None:  # noqa: ANN001
+        super().__init__(server_address, _InlineHandler)
+        self.conn = conn
+        self.allow_hosts = allow_hosts
+        self.link = link
+        self.lookups = lookups
+
+
+class UnifiedDaemon:
+    """Samples focus and ingests tab events on one loop and one connection."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 5055,
+        allowlist: str | None = None,
+        interval_s: float = 10.0,
+        adaptive: bool = True,
+        poll: Callable[[], FocusSample] = get_focus_sample,
+        ring_size: int = DEFAULT_RING_SIZE,
+    ) -> None:
+        # Used only by the loop, which may run on a thread other than the creator.
+        self.conn = db_mod.connect(db_path, check_same_thread=False)
+        self.schedule = (
+            AdaptiveSchedule(base_s=interval_s) if adaptive else FixedSchedule(interval_s)
+        )
+        self.poll = poll
+        self.lookups = Lookups()
+        self.recent = RecentSamples.from_db(self.conn, ring_size)
+        self.db_links = 0  # Tab events that had to be linked via the samples table.
+        self.httpd = _InlineTabServer(
+            (host, port), self.conn, parse_allowlist(allowlist), self.link, self.lookups
+        )
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self.httpd.server_address[:2]
+        return str(host), int(port)
+
+    def link(self, ts_utc: str, max_age_s: int) -> int | None:
+        if self.recent.covers(ts_utc, max_age_s):
+            return self.recent.nearest(ts_utc, max_age_s)
+        self.db_links += 1
+        return _nearest_sample_id(self.conn, ts_utc, max_age_s=max_age_s)
+
+    def sample_once(self) -> float:
+        """Write one sample; returns the interval until the next one."""
+        sample = take_sample(self.poll)
+        interval = self.schedule.next_interval(sample)
+        ts_utc = utc_now_iso()
+        sample_id = insert_sample(
+            self.conn, sample, interval_s=interval, ts_utc=ts_utc, lookups=self.lookups
+        )
+        self.recent.add(sample_id, ts_utc)
+        return interval
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Sample and serve until SIGTERM/SIGINT (or `stop`).
+
+        Samples follow a monotonic deadline as in `m1.logger.run_loop`; the
+        time in between is spent waiting for tab requests.
+        """
+        stop = stop or threading.Event()
+        if threading.current_thread() is threading.main_thread():
+
+            def _handle(_sig, _frame):  # noqa: ANN001
+                stop.set()
+
+            signal.signal(signal.SIGTERM, _handle)
+            signal.signal(signal.SIGINT, _handle)
+
+        deadline = time.monotonic()
+        while not stop.is_set():
+            now = time.monotonic()
+            if now >= deadline:
+                deadline = max(deadline + self.sample_once(), time.monotonic())
+                continue
+            self.httpd.timeout = min(deadline - now, _MAX_WAIT_S)
+            self.httpd.handle_request()
+
+    def close(self) -> None:
+        self.httpd.server_close()
+        self.conn.close()
+
+
+def serve(db_path: Path, *, pidfile: Path | None = None, **kwargs) -> None:  # noqa: ANN003
+    """Run the unified daemon in the foreground until signalled.
+
+    It holds the logger pidfile while it runs, so `log start` won't add a
+    second sampler and `log status`/`log stop` see it as the logger.
+    Raises `AlreadyRunningError` if another logger holds it.
+    """
+    pidfile = logger_daemon.claim_pidfile(pidfile)
+    try:
+        d = UnifiedDaemon(db_path, **kwargs)
+        try:
+            d.run()
+        finally:
+            d.close()
+    finally:
+        logger_daemon.release_pidfile(pidfile)
@@ -45,7 +45,35 @@ def status(pidfile: Path | None = None) -> tuple[bool, int | None]:
     return (_pid_is_running(pid), pid)
 
 
-def start_logger(db_path: str, interval_s: float = 10.0, pidfile: Path | None = None) -> int:
+def claim_pidfile(pidfile: Path | None = None) -> Path:
+    """Record this process as the logger (for `toggl-sherpa daemon`, which logs in-process)."""
+    pidfile = pidfile or pidfile_path()
+    pidfile.parent.mkdir(parents=True, exist_ok=True)
+
+    running, pid = status(pidfile)
+    if running and pid != os.getpid():
+        raise AlreadyRunningError(f"logger already running (pid {pid})")
+    pidfile.write_text(str(os.getpid()), encoding="utf-8")
+    return pidfile
+
+
+def release_pidfile(pidfile: Path | None = None) -> None:
+    """Remove the pidfile if it still names this process."""
+    pidfile = pidfile or pidfile_path()
+    if read_pid(pidfile) == os.getpid():
+        pidfile.unlink(missing_ok=True)
+
+
+def start_logger(
+    db_path: str,
+    interval_s: float = 10.0,
+    pidfile: Path | None = None,
+    *,
+    adaptive: bool = True,
+    events: bool = False,
+    heartbeat_s: float = 60.0,
+    segments: bool = False,
+) -> int:
     pidfile = pidfile or pidfile_path()
     pidfile.parent.mkdir(parents=True, exist_ok=True)
 
@@ -53,8 +81,15 @@ def start_logger(db_path: str, interval_s: float = 10.0, pidfile: Path | None =
     if running:
         raise AlreadyRunningError(f"logger already running (pid {pid})")
 
+    args = [sys.executable, "-m", "toggl_sherpa.m1.logger", db_path, str(interval_s)]
+    if events:
+        args += ["--events", f"--heartbeat={heartbeat_s}"]
+    elif not adaptive:
+        args.append("--fixed")
+    if segments and not events:
+        args.append("--segments")
     proc = subprocess.Popen(
-        [sys.executable, "-m", "toggl_sherpa.m1.logger", db_path, str(interval_s)],
+        args,
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
         start_new_session=True,
@@ -1,21 +1,77 @@
 from __future__ import annotations
 
 import sqlite3
+import uuid
 from pathlib import Path
 
-SCHEMA_VERSION = 3
+from toggl_sherpa.m1 import rawstore
+from toggl_sherpa.profiling import timed
 
+SCHEMA_VERSION = 14
 
+# Read-only profile for report/ledger commands: a bigger page cache, mmap'd
+# reads and in-memory temp tables (sorts, DISTINCT) instead of temp files.
+READONLY_PRAGMAS = (
+    "PRAGMA query_only=ON",
+    "PRAGMA cache_size=-65536",  # KiB, i.e. 64 MiB
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+@timed("db.connect")
 def connect(db_path: Path, *, check_same_thread: bool = True) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
-    _migrate(conn)
+    # Migrating writes (and commits) even when there is nothing to do, so
+    # only take that path for a new or outdated DB.
+    if schema_version(conn) < SCHEMA_VERSION:
+        _migrate(conn)
     return conn
 
 
+def _open_readonly(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    for pragma in READONLY_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@timed("db.connect")
+def connect_readonly(db_path: Path) -> sqlite3.Connection:
+    """Open the DB for reading only (`mode=ro`, `query_only`).
+
+    Such a connection never takes the write lock, so reports don't contend
+    with a running logger. A missing or outdated DB is first created or
+    migrated through `connect`.
+    """
+    if db_path.exists():
+        conn = _open_readonly(db_path)
+        if schema_version(conn) >= SCHEMA_VERSION:
+            return conn
+        conn.close()
+    connect(db_path).close()
+    return _open_readonly(db_path)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """The DB's schema version, read without writing (0 if unversioned)."""
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key='schema_version'").fetchone()
+    except sqlite3.OperationalError:
+        # No meta table yet.
+        return 0
+    try:
+        return int(row[0]) if row is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+@timed("db.migrate")
 def _migrate(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
@@ -106,8 +162,586 @@ def _migrate(conn: sqlite3.Connection) -> None:
         )
         version = 3
 
+    # v4: apply journal (resumable Toggl apply runs)
+    if version < 4:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS apply_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts_utc TEXT NOT NULL,
+                workspace_id INTEGER NOT NULL,
+                state TEXT NOT NULL DEFAULT 'open'
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS apply_journal (
+                run_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                start_ts_utc TEXT NOT NULL,
+                end_ts_utc TEXT NOT NULL,
+                description TEXT NOT NULL,
+                tags_json TEXT NOT NULL DEFAULT '[]',
+                project_id INTEGER,
+                state TEXT NOT NULL DEFAULT 'pending',
+                toggl_time_entry_id INTEGER,
+                error TEXT,
+                PRIMARY KEY(run_id, seq),
+                FOREIGN KEY(run_id) REFERENCES apply_runs(id) ON DELETE CASCADE
+            )
+            """
+        )
+        version = 4
+
+    # v5: cached Toggl metadata (workspaces/projects/tags/clients)
+    if version < 5:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS toggl_meta (
+                workspace_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                raw_json TEXT,
+                PRIMARY KEY(workspace_id, kind, id)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS toggl_meta_sync (
+                workspace_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                fetched_ts_utc TEXT NOT NULL,
+                etag TEXT,
+                PRIMARY KEY(workspace_id, kind)
+            )
+            """
+        )
+        version = 5
+
+    # v6: epoch columns on the ledger for interval (overlap) queries
+    if version < 6:
+        cols = {r["name"] for r in conn.execute("PRAGMA table_info(applied_entries)")}
+        for col in ("start_epoch", "end_epoch"):
+            if col not in cols:
+                conn.execute(f"ALTER TABLE applied_entries ADD COLUMN {col} INTEGER")
+        conn.execute(
+            """
+            UPDATE applied_entries SET
+                start_epoch = CAST(strftime('%s', start_ts_utc) AS INTEGER),
+                end_epoch = CAST(strftime('%s', end_ts_utc) AS INTEGER)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_applied_entries_start_epoch
+            ON applied_entries(start_epoch)
+            """
+        )
+        # Longest entry in O(log n), to bound how far back an overlap can start.
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_applied_entries_span
+            ON applied_entries(end_epoch - start_epoch)
+            """
+        )
+        version = 6
+
+    # v7: ledger browsing indexes + stats counters maintained by triggers
+    if version < 7:
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_applied_entries_description
+            ON applied_entries(description)
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ledger_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+            """
+        )
+        # Reference counts per Toggl id, so "unique ids" survives deletes.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ledger_ids (
+                toggl_time_entry_id INTEGER PRIMARY KEY,
+                n INTEGER NOT NULL
+            )
+            """
+        )
+        # Rows per UTC day of ts_utc, for `stats --since`.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ledger_daily (
+                day TEXT PRIMARY KEY,
+                n INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO ledger_counters(name, value)
+            SELECT 'count', COUNT(*) FROM applied_entries
+            UNION ALL
+            SELECT 'unique_ids', COUNT(DISTINCT toggl_time_entry_id) FROM applied_entries
+            """
+        )
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO ledger_ids(toggl_time_entry_id, n)
+            SELECT toggl_time_entry_id, COUNT(*) FROM applied_entries
+            WHERE toggl_time_entry_id IS NOT NULL
+            GROUP BY toggl_time_entry_id
+            """
+        )
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO ledger_daily(day, n)
+            SELECT substr(ts_utc, 1, 10), COUNT(*) FROM applied_entries
+            GROUP BY substr(ts_utc, 1, 10)
+            """
+        )
+        # Counters change in the same transaction as the ledger row.
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_applied_entries_ai
+            AFTER INSERT ON applied_entries
+            BEGIN
+                UPDATE applied_entries SET
+                    start_epoch = CAST(strftime('%s', NEW.start_ts_utc) AS INTEGER),
+                    end_epoch = CAST(strftime('%s', NEW.end_ts_utc) AS INTEGER)
+                WHERE id = NEW.id AND NEW.start_epoch IS NULL;
+                UPDATE ledger_counters SET value = value + 1 WHERE name = 'count';
+                UPDATE ledger_counters SET value = value + 1
+                WHERE name = 'unique_ids'
+                    AND NEW.toggl_time_entry_id IS NOT NULL
+                    AND NOT EXISTS (
+                        SELECT 1 FROM ledger_ids
+                        WHERE toggl_time_entry_id = NEW.toggl_time_entry_id
+                    );
+                INSERT INTO ledger_ids(toggl_time_entry_id, n)
+                SELECT NEW.toggl_time_entry_id, 1 WHERE NEW.toggl_time_entry_id IS NOT NULL
+                ON CONFLICT(toggl_time_entry_id) DO UPDATE SET n = n + 1;
+                INSERT INTO ledger_daily(day, n) VALUES (substr(NEW.ts_utc, 1, 10), 1)
+                ON CONFLICT(day) DO UPDATE SET n = n + 1;
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_applied_entries_ad
+            AFTER DELETE ON applied_entries
+            BEGIN
+                UPDATE ledger_counters SET value = value - 1 WHERE name = 'count';
+                UPDATE ledger_ids SET n = n - 1
+                WHERE toggl_time_entry_id = OLD.toggl_time_entry_id;
+                UPDATE ledger_counters SET value = value - 1
+                WHERE name = 'unique_ids'
+                    AND EXISTS (
+                        SELECT 1 FROM ledger_ids
+                        WHERE toggl_time_entry_id = OLD.toggl_time_entry_id AND n = 0
+                    );
+                DELETE FROM ledger_ids WHERE toggl_time_entry_id = OLD.toggl_time_entry_id
+                    AND n = 0;
+                UPDATE ledger_daily SET n = n - 1 WHERE day = substr(OLD.ts_utc, 1, 10);
+                DELETE FROM ledger_daily WHERE day = substr(OLD.ts_utc, 1, 10) AND n = 0;
+            END
+            """
+        )
+        # Moving a row between days/ids: take the old values out, put the new in.
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_applied_entries_au
+            AFTER UPDATE OF ts_utc, toggl_time_entry_id ON applied_entries
+            BEGIN
+                UPDATE ledger_ids SET n = n - 1
+                WHERE toggl_time_entry_id = OLD.toggl_time_entry_id;
+                UPDATE ledger_counters SET value = value - 1
+                WHERE name = 'unique_ids'
+                    AND EXISTS (
+                        SELECT 1 FROM ledger_ids
+                        WHERE toggl_time_entry_id = OLD.toggl_time_entry_id AND n = 0
+                    );
+                DELETE FROM ledger_ids WHERE toggl_time_entry_id = OLD.toggl_time_entry_id
+                    AND n = 0;
+                UPDATE ledger_daily SET n = n - 1 WHERE day = substr(OLD.ts_utc, 1, 10);
+                DELETE FROM ledger_daily WHERE day = substr(OLD.ts_utc, 1, 10) AND n = 0;
+                UPDATE ledger_counters SET value = value + 1
+                WHERE name = 'unique_ids'
+                    AND NEW.toggl_time_entry_id IS NOT NULL
+                    AND NOT EXISTS (
+                        SELECT 1 FROM ledger_ids
+                        WHERE toggl_time_entry_id = NEW.toggl_time_entry_id
+                    );
+                INSERT INTO ledger_ids(toggl_time_entry_id, n)
+                SELECT NEW.toggl_time_entry_id, 1 WHERE NEW.toggl_time_entry_id IS NOT NULL
+                ON CONFLICT(toggl_time_entry_id) DO UPDATE SET n = n + 1;
+                INSERT INTO ledger_daily(day, n) VALUES (substr(NEW.ts_utc, 1, 10), 1)
+                ON CONFLICT(day) DO UPDATE SET n = n + 1;
+            END
+            """
+        )
+        version = 7
+
+    # v8: a random id for this DB, so artifacts that reference tab_events by
+    # id can tell which database they came from.
+    if version < 8:
+        conn.execute(
+            "INSERT OR IGNORE INTO meta(key, value) VALUES('db_id', ?)",
+            (uuid.uuid4().hex,),
+        )
+        version = 8
+
+    # v9: the interval each sample stands for (seconds until the logger's next
+    # sample). NULL for rows from fixed-interval loggers before v9.
+    if version < 9:
+        cols = {r["name"] for r in conn.execute("PRAGMA table_info(samples)")}
+        if "interval_s" not in cols:
+            conn.execute("ALTER TABLE samples ADD COLUMN interval_s REAL")
+        version = 9
+
+    # v10: dictionary-encoded strings. Titles, wm classes and URLs live once
+    # in lookup tables and rows reference them by id; `samples` and
+    # `tab_events` become views with the old columns (INSERTs go through
+    # INSTEAD OF triggers, so plain SQL writers keep working).
+    if version < 10:
+        row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'samples'").fetchone()
+        if row is not None and row["type"] == "table":
+            # The copy is a transaction of its own: commit the steps above
+            # first, with the version they reached.
+            _set_version(conn, version)
+            conn.commit()
+            _encode_strings(conn)
+        version = 10
+
+    # v11: raw payloads stored once per distinct JSON, compressed, in
+    # `raw_payloads`; rows reference them by `raw_id` (see m1.rawstore).
+    # Existing inline `raw_json` is moved over in chunks after the schema
+    # change is committed.
+    compact_raw = version < 11
+    if version < 11:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS raw_payloads (
+                id INTEGER PRIMARY KEY,
+                hash BLOB NOT NULL UNIQUE,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL
+            )
+            """
+        )
+        for table in ("sample_rows", "tab_event_rows"):
+            cols = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+            if "raw_id" not in cols:
+                conn.execute(
+                    f"ALTER TABLE {table} ADD COLUMN raw_id INTEGER REFERENCES raw_payloads(id)"
+                )
+        version = 11
+
+    # v12: FTS5 indexes over window titles and allowed tab titles/URLs, kept
+    # up to date by triggers on the row tables (see m3.search). Redacted tab
+    # strings are never indexed.
+    if version < 12:
+        for sql in _SEARCH_DDL:
+            conn.execute(sql)
+        version = 12
+
+    # v14: the views expose `raw_id` next to `raw_json`, which is NULL once
+    # a payload has moved to `raw_payloads` (see m1.rawstore). This also
+    # replaces the v13 views, which needed a Python SQL function to read.
+    if version < 14:
+        for sql in _RAW_VIEWS_DDL:
+            conn.execute(sql)
+        version = 14
+
+    _set_version(conn, version)
+    conn.commit()
+    if compact_raw:
+        rawstore.compact(conn)
+
+
+def _set_version(conn: sqlite3.Connection, version: int) -> None:
     conn.execute(
         "UPDATE meta SET value=? WHERE key='schema_version'",
         (str(version),),
     )
-    conn.commit()
+
+
+# The host of a URL (lowercased, without userinfo or port), from `NEW.url`.
+_URL_HOST_SQL = """
+    SELECT lower(CASE WHEN instr(h, ':') > 0 THEN substr(h, 1, instr(h, ':') - 1) ELSE h END)
+    FROM (
+        SELECT substr(auth, instr(auth, '@') + 1) AS h FROM (
+            SELECT substr(
+                a, 1, min(instr(a || '/', '/'), instr(a || '?', '?'), instr(a || '#', '#')) - 1
+            ) AS auth
+            FROM (SELECT substr(NEW.url, instr(NEW.url, '://') + 3) AS a
+                  WHERE instr(NEW.url, '://') > 0)
+        )
+    )
+"""
+
+_LOOKUP_DDL = (
+    "CREATE TABLE titles (id INTEGER PRIMARY KEY, title TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE wm_classes (id INTEGER PRIMARY KEY, wm_class TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE hosts (id INTEGER PRIMARY KEY, host TEXT NOT NULL UNIQUE)",
+    """
+    CREATE TABLE urls (
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        host_id INTEGER REFERENCES hosts(id)
+    )
+    """,
+    "CREATE INDEX idx_urls_host ON urls(host_id)",
+    f"""
+    CREATE TRIGGER urls_host AFTER INSERT ON urls
+    BEGIN
+        INSERT OR IGNORE INTO hosts(host)
+        SELECT h FROM (SELECT ({_URL_HOST_SQL}) AS h) WHERE h IS NOT NULL AND h != '';
+        UPDATE urls SET host_id = (SELECT id FROM hosts WHERE host = ({_URL_HOST_SQL}))
+        WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TABLE sample_rows (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts_utc TEXT NOT NULL,
+        idle_ms INTEGER,
+        title_id INTEGER REFERENCES titles(id),
+        wm_class_id INTEGER REFERENCES wm_classes(id),
+        focus_pid INTEGER,
+        raw_json TEXT,
+        interval_s REAL
+    )
+    """,
+    """
+    CREATE TABLE tab_event_rows (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts_utc TEXT NOT NULL,
+        sample_id INTEGER REFERENCES sample_rows(id) ON DELETE SET NULL,
+        url_id INTEGER REFERENCES urls(id),
+        title_id INTEGER REFERENCES titles(id),
+        url_redacted_id INTEGER REFERENCES urls(id),
+        title_redacted_id INTEGER REFERENCES titles(id),
+        allowed INTEGER NOT NULL DEFAULT 0,
+        raw_json TEXT
+    )
+    """,
+)
+
+_ENCODE_COPY_SQL = (
+    """
+    INSERT OR IGNORE INTO titles(title)
+    SELECT focus_title FROM samples WHERE focus_title IS NOT NULL
+    UNION SELECT title FROM tab_events WHERE title IS NOT NULL
+    UNION SELECT title_redacted FROM tab_events WHERE title_redacted IS NOT NULL
+    """,
+    """
+    INSERT OR IGNORE INTO wm_classes(wm_class)
+    SELECT DISTINCT focus_wm_class FROM samples WHERE focus_wm_class IS NOT NULL
+    """,
+    """
+    INSERT OR IGNORE INTO urls(url)
+    SELECT url FROM tab_events WHERE url IS NOT NULL
+    UNION SELECT url_redacted FROM tab_events WHERE url_redacted IS NOT NULL
+    """,
+    """
+    INSERT INTO sample_rows(
+        id, ts_utc, idle_ms, title_id, wm_class_id, focus_pid, raw_json, interval_s
+    )
+    SELECT s.id, s.ts_utc, s.idle_ms, t.id, w.id, s.focus_pid, s.raw_json, s.interval_s
+    FROM samples s
+    LEFT JOIN titles t ON t.title = s.focus_title
+    LEFT JOIN wm_classes w ON w.wm_class = s.focus_wm_class
+    """,
+    """
+    INSERT INTO tab_event_rows(
+        id, ts_utc, sample_id, url_id, title_id, url_redacted_id, title_redacted_id,
+        allowed, raw_json
+    )
+    SELECT e.id, e.ts_utc, e.sample_id, u.id, t.id, ur.id, tr.id, e.allowed, e.raw_json
+    FROM tab_events e
+    LEFT JOIN urls u ON u.url = e.url
+    LEFT JOIN titles t ON t.title = e.title
+    LEFT JOIN urls ur ON ur.url = e.url_redacted
+    LEFT JOIN titles tr ON tr.title = e.title_redacted
+    """,
+    # Keep the AUTOINCREMENT high-water marks, so ids are never reused.
+    "DELETE FROM sqlite_sequence WHERE name IN ('sample_rows', 'tab_event_rows')",
+    """
+    INSERT INTO sqlite_sequence(name, seq)
+    SELECT CASE name WHEN 'samples' THEN 'sample_rows' ELSE 'tab_event_rows' END, seq
+    FROM sqlite_sequence WHERE name IN ('samples', 'tab_events')
+    """,
+    "DROP TABLE tab_events",
+    "DROP TABLE samples",
+)
+
+_VIEW_TRIGGERS_DDL = (
+    """
+    CREATE TRIGGER samples_insert INSTEAD OF INSERT ON samples
+    BEGIN
+        INSERT OR IGNORE INTO titles(title)
+        SELECT NEW.focus_title WHERE NEW.focus_title IS NOT NULL;
+        INSERT OR IGNORE INTO wm_classes(wm_class)
+        SELECT NEW.focus_wm_class WHERE NEW.focus_wm_class IS NOT NULL;
+        INSERT INTO sample_rows(
+            id, ts_utc, idle_ms, title_id, wm_class_id, focus_pid, raw_json, interval_s
+        ) VALUES (
+            NEW.id, NEW.ts_utc, NEW.idle_ms,
+            (SELECT id FROM titles WHERE title = NEW.focus_title),
+            (SELECT id FROM wm_classes WHERE wm_class = NEW.focus_wm_class),
+            NEW.focus_pid, NEW.raw_json, NEW.interval_s
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER tab_events_insert INSTEAD OF INSERT ON tab_events
+    BEGIN
+        INSERT OR IGNORE INTO urls(url)
+        SELECT u FROM (SELECT NEW.url AS u UNION ALL SELECT NEW.url_redacted) WHERE u IS NOT NULL;
+        INSERT OR IGNORE INTO titles(title)
+        SELECT t FROM (SELECT NEW.title AS t UNION ALL SELECT NEW.title_redacted)
+        WHERE t IS NOT NULL;
+        INSERT INTO tab_event_rows(
+            id, ts_utc, sample_id, url_id, title_id, url_redacted_id, title_redacted_id,
+            allowed, raw_json
+        ) VALUES (
+            NEW.id, NEW.ts_utc, NEW.sample_id,
+            (SELECT id FROM urls WHERE url = NEW.url),
+            (SELECT id FROM titles WHERE title = NEW.title),
+            (SELECT id FROM urls WHERE url = NEW.url_redacted),
+            (SELECT id FROM titles WHERE title = NEW.title_redacted),
+            COALESCE(NEW.allowed, 0), NEW.raw_json
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER tab_events_relink INSTEAD OF UPDATE OF sample_id ON tab_events
+    BEGIN
+        UPDATE tab_event_rows SET sample_id = NEW.sample_id WHERE id = OLD.id;
+    END
+    """,
+)
+
+_ENCODED_VIEWS_DDL = (
+    "CREATE INDEX idx_sample_rows_ts ON sample_rows(ts_utc)",
+    "CREATE INDEX idx_tab_event_rows_ts ON tab_event_rows(ts_utc)",
+    "CREATE INDEX idx_tab_event_rows_sample_id ON tab_event_rows(sample_id)",
+    """
+    CREATE VIEW samples AS
+    SELECT s.id, s.ts_utc, s.idle_ms, t.title AS focus_title, w.wm_class AS focus_wm_class,
+           s.focus_pid, s.raw_json, s.interval_s
+    FROM sample_rows s
+    LEFT JOIN titles t ON t.id = s.title_id
+    LEFT JOIN wm_classes w ON w.id = s.wm_class_id
+    """,
+    """
+    CREATE VIEW tab_events AS
+    SELECT e.id, e.ts_utc, e.sample_id, u.url, t.title, ur.url AS url_redacted,
+           tr.title AS title_redacted, e.allowed, e.raw_json
+    FROM tab_event_rows e
+    LEFT JOIN urls u ON u.id = e.url_id
+    LEFT JOIN titles t ON t.id = e.title_id
+    LEFT JOIN urls ur ON ur.id = e.url_redacted_id
+    LEFT JOIN titles tr ON tr.id = e.title_redacted_id
+    """,
+    *_VIEW_TRIGGERS_DDL,
+)
+
+# v14: the views also expose `raw_id`, so plain SQL can tell a compacted
+# payload (`raw_json` NULL, `raw_id` set) from a missing one. They stay
+# plain SQL: decoding is left to `rawstore.sample_raw_json` and friends.
+# Dropping a view drops its triggers, so those are created again.
+_RAW_VIEWS_DDL = (
+    "DROP VIEW IF EXISTS samples",
+    "DROP VIEW IF EXISTS tab_events",
+    """
+    CREATE VIEW samples AS
+    SELECT s.id, s.ts_utc, s.idle_ms, t.title AS focus_title, w.wm_class AS focus_wm_class,
+           s.focus_pid, s.raw_json, s.interval_s, s.raw_id
+    FROM sample_rows s
+    LEFT JOIN titles t ON t.id = s.title_id
+    LEFT JOIN wm_classes w ON w.id = s.wm_class_id
+    """,
+    """
+    CREATE VIEW tab_events AS
+    SELECT e.id, e.ts_utc, e.sample_id, u.url, t.title, ur.url AS url_redacted,
+           tr.title AS title_redacted, e.allowed, e.raw_json, e.raw_id
+    FROM tab_event_rows e
+    LEFT JOIN urls u ON u.id = e.url_id
+    LEFT JOIN titles t ON t.id = e.title_id
+    LEFT JOIN urls ur ON ur.id = e.url_redacted_id
+    LEFT JOIN titles tr ON tr.id = e.title_redacted_id
+    """,
+    *_VIEW_TRIGGERS_DDL,
+)
+
+
+# One FTS row per distinct string (rowid = the lookup table id), added the
+# first time a row references it. Only `title_id`/`url_id` of allowed tab
+# events are indexed; their `*_redacted_id` columns never are.
+_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS title_fts USING fts5(title)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS url_fts USING fts5(url)",
+    """
+    INSERT INTO title_fts(rowid, title)
+    SELECT id, title FROM titles
+    WHERE id IN (
+        SELECT title_id FROM sample_rows
+        UNION SELECT title_id FROM tab_event_rows WHERE allowed = 1
+    )
+    AND id NOT IN (SELECT rowid FROM title_fts)
+    """,
+    """
+    INSERT INTO url_fts(rowid, url)
+    SELECT id, url FROM urls
+    WHERE id IN (SELECT url_id FROM tab_event_rows WHERE allowed = 1)
+    AND id NOT IN (SELECT rowid FROM url_fts)
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sample_rows_fts AFTER INSERT ON sample_rows
+    WHEN NEW.title_id IS NOT NULL
+    BEGIN
+        INSERT INTO title_fts(rowid, title)
+        SELECT id, title FROM titles
+        WHERE id = NEW.title_id
+        AND NOT EXISTS (SELECT 1 FROM title_fts WHERE rowid = NEW.title_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tab_event_rows_fts AFTER INSERT ON tab_event_rows
+    WHEN NEW.allowed = 1
+    BEGIN
+        INSERT INTO title_fts(rowid, title)
+        SELECT id, title FROM titles
+        WHERE id = NEW.title_id
+        AND NOT EXISTS (SELECT 1 FROM title_fts WHERE rowid = NEW.title_id);
+        INSERT INTO url_fts(rowid, url)
+        SELECT id, url FROM urls
+        WHERE id = NEW.url_id
+        AND NOT EXISTS (SELECT 1 FROM url_fts WHERE rowid = NEW.url_id);
+    END
+    """,
+    # Matches are looked up by string id, then narrowed by time.
+    "CREATE INDEX IF NOT EXISTS idx_sample_rows_title_ts ON sample_rows(title_id, ts_utc)",
+    "CREATE INDEX IF NOT EXISTS idx_tab_event_rows_title_ts ON tab_event_rows(title_id, ts_utc)",
+    "CREATE INDEX IF NOT EXISTS idx_tab_event_rows_url_ts ON tab_event_rows(url_id, ts_utc)",
+)
+
+
+def _encode_strings(conn: sqlite3.Connection) -> None:
+    """Move `samples`/`tab_events` into the v10 encoded tables, keeping ids.
+
+    Runs as one transaction (committed by `_migrate`), so an interrupted
+    migration leaves the v9 tables as they were.
+    """
+    conn.execute("BEGIN")
+    for sql in (*_LOOKUP_DDL, *_ENCODE_COPY_SQL, *_ENCODED_VIEWS_DDL):
+        conn.execute(sql)
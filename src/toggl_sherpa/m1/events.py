@@ -0,0 +1,185 @@
+"""Event-driven focus logging (`log start --events`).
+
+Instead of polling `global.display.focus_window`, the logger listens for the
+`Changed` signal of the toggl-sherpa GNOME Shell extension (see
+`gnome-extension/`), which fires when the focused window or its title
+changes and when the user goes idle or comes back. Signals are read from
+`gdbus monitor`, so there is no Python D-Bus dependency.
+
+A row is written only when the focus state changes, plus a heartbeat row
+(a fresh Eval poll, or the last known state if that fails) after
+`heartbeat_s` without one, so long stretches in one window don't look like
+gaps. Rows carry no `interval_s`: each stands until the next one.
+"""
+
+from __future__ import annotations
+
+import queue
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import replace
+from pathlib import Path
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.gnome import (
+    FocusSample,
+    GnomeShellEvalError,
+    decode_gvariant_string,
+    focus_sample_from_json,
+    get_focus_sample,
+)
+from toggl_sherpa.m1.logger import insert_sample
+from toggl_sherpa.m1.lookup import Lookups
+
+BUS_NAME = "org.gnome.Shell"
+OBJECT_PATH = "/org/gnome/Shell/Extensions/TogglSherpa"
+INTERFACE = "org.gnome.Shell.Extensions.TogglSherpa"
+
+MONITOR_CMD = [
+    "gdbus",
+    "monitor",
+    "--session",
+    "--dest",
+    BUS_NAME,
+    "--object-path",
+    OBJECT_PATH,
+]
+
+# e.g. /org/.../TogglSherpa: org.gnome.Shell.Extensions.TogglSherpa.Changed ('{...}',)
+_SIGNAL_RE = re.compile(
+    rf"^{re.escape(OBJECT_PATH)}: {re.escape(INTERFACE)}\.Changed \((.*),\)\s*$", re.DOTALL
+)
+
+
+def parse_monitor_line(line: str) -> FocusSample | None:
+    """The sample carried by one `gdbus monitor` line, or None for other output."""
+    m = _SIGNAL_RE.match(line.strip())
+    if m is None:
+        return None
+    try:
+        return focus_sample_from_json(decode_gvariant_string(m.group(1)))
+    except GnomeShellEvalError:
+        return None
+
+
+def iter_samples(lines: Iterable[str]) -> Iterator[FocusSample]:
+    """Samples from `gdbus monitor` output lines (other lines are skipped)."""
+    for line in lines:
+        sample = parse_monitor_line(line)
+        if sample is not None:
+            yield sample
+
+
+def _state(sample: FocusSample, idle_threshold_ms: int) -> tuple:
+    idle = sample.idle_ms is not None and sample.idle_ms >= idle_threshold_ms
+    return (sample.wm_class, sample.title, sample.pid, idle)
+
+
+class ChangeFilter:
+    """Decides which events become rows: state changes, and heartbeats."""
+
+    def __init__(self, *, heartbeat_s: float, idle_threshold_ms: int = 60_000) -> None:
+        self.heartbeat_s = heartbeat_s
+        self.idle_threshold_ms = idle_threshold_ms
+        self.last: FocusSample | None = None
+        self._last_state: tuple | None = None
+        self.last_write = 0.0
+
+    def changed(self, sample: FocusSample) -> bool:
+        return _state(sample, self.idle_threshold_ms) != self._last_state
+
+    def wrote(self, sample: FocusSample, now: float) -> None:
+        self.last = sample
+        self._last_state = _state(sample, self.idle_threshold_ms)
+        self.last_write = now
+
+    def heartbeat_due(self, now: float) -> float:
+        """Seconds until the next heartbeat (<= 0 when due)."""
+        return self.last_write + self.heartbeat_s - now
+
+
+def _reader(lines: Iterable[str], out: queue.Queue) -> None:
+    for sample in iter_samples(lines):
+        out.put(sample)
+    out.put(None)  # Monitor exited.
+
+
+def run_event_loop(
+    db_path: Path,
+    *,
+    heartbeat_s: float = 60.0,
+    monitor_cmd: list[str] | None = None,
+    poll: Callable[[], FocusSample] = get_focus_sample,
+    stop: threading.Event | None = None,
+) -> int:
+    """Log focus changes until SIGTERM/SIGINT (or `stop`); returns rows written.
+
+    `monitor_cmd` replaces `gdbus monitor` (e.g. with the fake emitter in
+    `tests/fake_bus.py`); the loop also ends when the monitor exits.
+    """
+    conn = db_mod.connect(db_path)
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+
+        def _handle(_sig, _frame):  # noqa: ANN001
+            stop.set()
+
+        signal.signal(signal.SIGTERM, _handle)
+        signal.signal(signal.SIGINT, _handle)
+
+    proc = subprocess.Popen(
+        monitor_cmd or MONITOR_CMD,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    events: queue.Queue[FocusSample | None] = queue.Queue()
+    threading.Thread(target=_reader, args=(proc.stdout, events), daemon=True).start()
+
+    filt = ChangeFilter(heartbeat_s=heartbeat_s)
+    lookups = Lookups()
+    written = 0
+
+    def write(sample: FocusSample, source: str) -> None:
+        nonlocal written
+        insert_sample(conn, replace(sample, raw={**sample.raw, "source": source}), lookups=lookups)
+        filt.wrote(sample, time.monotonic())
+        written += 1
+
+    def try_poll() -> FocusSample | None:
+        try:
+            return poll()
+        except GnomeShellEvalError:
+            return None
+
+    # Start from the current state, as the extension only reports changes.
+    first = try_poll()
+    if first is not None:
+        write(first, "poll")
+
+    try:
+        while not stop.is_set():
+            wait = filt.heartbeat_due(time.monotonic())
+            try:
+                sample = events.get(timeout=min(max(wait, 0.0), 1.0))
+            except queue.Empty:
+                if filt.heartbeat_due(time.monotonic()) <= 0:
+                    beat = try_poll() or filt.last
+                    if beat is not None:
+                        write(beat, "heartbeat")
+                    else:
+                        filt.last_write = time.monotonic()
+                continue
+            if sample is None:
+                break
+            if filt.changed(sample):
+                write(sample, "event")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=5)
+        conn.close()
+    return written
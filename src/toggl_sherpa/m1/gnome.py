@@ -73,28 +73,35 @@ def shell_eval(js: str) -> str:
         raise GnomeShellEvalError(f"Unrecognised gdbus output: {out!r}")
 
     success = m.group(1).lower() == "true"
-    payload = m.group(2).strip()
+    inner = decode_gvariant_string(m.group(2))
+    if not success:
+        raise GnomeShellEvalError(inner)
+    return inner
+
+
+def decode_gvariant_string(payload: str) -> str:
+    """Decode a GVariant string literal as printed by gdbus."""
+    payload = payload.strip()
     # payload is a GVariant string, usually single-quoted with C escapes.
     try:
         # Convert GVariant string literal into python by abusing JSON: gdbus string escaping
         # is close to C; easiest robust approach: ask python to decode via unicode_escape
         if payload.startswith("'") and payload.endswith("'"):
             inner = payload[1:-1]
-            inner = bytes(inner, "utf-8").decode("unicode_escape")
-        elif payload.startswith('"') and payload.endswith('"'):
-            inner = json.loads(payload)
-        else:
-            inner = payload
+            return bytes(inner, "utf-8").decode("unicode_escape")
+        if payload.startswith('"') and payload.endswith('"'):
+            return json.loads(payload)
+        return payload
     except Exception as e:  # noqa: BLE001
         raise GnomeShellEvalError(f"Failed to parse Eval payload: {payload!r}") from e
 
-    if not success:
-        raise GnomeShellEvalError(inner)
-    return inner
-
 
 def get_focus_sample() -> FocusSample:
-    raw_s = shell_eval(_JS)
+    return focus_sample_from_json(shell_eval(_JS))
+
+
+def focus_sample_from_json(raw_s: str) -> FocusSample:
+    """Build a sample from the JSON the shell side produces (Eval or extension signal)."""
     try:
         raw = json.loads(raw_s)
     except json.JSONDecodeError as e:
@@ -4,37 +4,88 @@ import json
 import signal
 import sys
 import time
+from collections.abc import Callable
 from datetime import UTC, datetime
 from pathlib import Path
 
 from toggl_sherpa.m1 import db as db_mod
 from toggl_sherpa.m1.gnome import FocusSample, GnomeShellEvalError, get_focus_sample
+from toggl_sherpa.m1.lookup import INSERT_SAMPLE, Lookups
+from toggl_sherpa.m1.schedule import AdaptiveSchedule, FixedSchedule
+from toggl_sherpa.profiling import timed
 
 
 def utc_now_iso() -> str:
     return datetime.now(UTC).replace(microsecond=0).isoformat()
 
 
-def insert_sample(conn, sample: FocusSample) -> None:
-    conn.execute(
-        """
-        INSERT INTO samples(ts_utc, idle_ms, focus_title, focus_wm_class, focus_pid, raw_json)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (
-            utc_now_iso(),
-            sample.idle_ms,
-            sample.title,
-            sample.wm_class,
-            sample.pid,
-            json.dumps(sample.raw, ensure_ascii=False, sort_keys=True),
-        ),
+@timed("db.write")
+def insert_sample(
+    conn,
+    sample: FocusSample,
+    *,
+    interval_s: float | None = None,
+    ts_utc: str | None = None,
+    lookups: Lookups | None = None,
+) -> int:
+    """Insert one sample and commit; returns its id.
+
+    Pass the writer's `lookups` so repeated titles/wm classes aren't looked up again.
+    """
+    lookups = lookups or Lookups()
+    row = (
+        None,
+        ts_utc or utc_now_iso(),
+        sample.idle_ms,
+        sample.title,
+        sample.wm_class,
+        sample.pid,
+        json.dumps(sample.raw, ensure_ascii=False, sort_keys=True),
+        interval_s,
     )
+    cur = conn.execute(INSERT_SAMPLE, lookups.sample_row(conn, row))
     conn.commit()
-
-
-def run_loop(db_path: Path, interval_s: float = 10.0) -> None:
+    return int(cur.lastrowid)
+
+
+def take_sample(poll: Callable[[], FocusSample] = get_focus_sample) -> FocusSample:
+    """The current focus, or an error sample if GNOME Shell can't be asked."""
+    try:
+        return poll()
+    except GnomeShellEvalError as e:
+        # Still log something so we can debug later.
+        return FocusSample(
+            idle_ms=None,
+            title=None,
+            wm_class=None,
+            pid=None,
+            raw={"error": str(e)},
+        )
+
+
+def run_loop(
+    db_path: Path,
+    interval_s: float = 10.0,
+    *,
+    adaptive: bool = True,
+    segments: bool = False,
+) -> None:
+    """Sample until SIGTERM/SIGINT.
+
+    Wakeups follow a monotonic deadline, so the period doesn't drift by the
+    time the gdbus call takes; a sample that overruns its slot moves the
+    deadline rather than causing a burst of catch-up samples. With
+    `segments`, samples are appended to segment files and imported in bulk
+    (see `m1.segments`).
+    """
     conn = db_mod.connect(db_path)
+    lookups = Lookups()
+    store = None
+    if segments:
+        from toggl_sherpa.m1.segments import SegmentStore
+
+        store = SegmentStore(db_path)
+    schedule = AdaptiveSchedule(base_s=interval_s) if adaptive else FixedSchedule(interval_s)
 
     stopping = False
 
@@ -45,35 +96,55 @@ def run_loop(db_path: Path, interval_s: float = 10.0) -> None:
     signal.signal(signal.SIGTERM, _handle)
     signal.signal(signal.SIGINT, _handle)
 
-    while not stopping:
-        try:
-            sample = get_focus_sample()
-        except GnomeShellEvalError as e:
-            # Still log something so we can debug later.
-            sample = FocusSample(
-                idle_ms=None,
-                title=None,
-                wm_class=None,
-                pid=None,
-                raw={"error": str(e)},
-            )
-
-        insert_sample(conn, sample)
-        time.sleep(interval_s)
+    deadline = time.monotonic()
+    try:
+        while not stopping:
+            sample = take_sample(get_focus_sample)
+            interval = schedule.next_interval(sample)
+            if store is None:
+                insert_sample(conn, sample, interval_s=interval, lookups=lookups)
+            else:
+                store.append(sample, ts_utc=utc_now_iso(), interval_s=interval)
+
+            deadline += interval
+            now = time.monotonic()
+            if deadline < now:
+                deadline = now
+            time.sleep(deadline - now)
+    finally:
+        if store is not None:
+            store.close()
 
 
 def _main(argv: list[str]) -> int:
     # Minimal internal entrypoint for the detached process.
-    # Usage: python -m toggl_sherpa.m1.logger <db_path> <interval_s>
-    if len(argv) < 2:
-        raise SystemExit("usage: python -m toggl_sherpa.m1.logger <db_path> [interval_s]")
-    db_path = Path(argv[1])
-    interval_s = float(argv[2]) if len(argv) >= 3 else 10.0
+    # Usage: python -m toggl_sherpa.m1.logger <db_path> [interval_s] [--fixed] [--segments]
+    #        python -m toggl_sherpa.m1.logger <db_path> --events [--heartbeat=S]
+    args = [a for a in argv[1:] if not a.startswith("--")]
+    flags = dict(a[2:].partition("=")[::2] for a in argv[1:] if a.startswith("--"))
+    if not args:
+        raise SystemExit(
+            "usage: python -m toggl_sherpa.m1.logger <db_path> [interval_s] [--fixed] [--segments]"
+            " | <db_path> --events [--heartbeat=S]"
+        )
+    db_path = Path(args[0])
+    interval_s = float(args[1]) if len(args) >= 2 else 10.0
 
     # Ensure we don't die on SIGHUP in detached mode.
     signal.signal(signal.SIGHUP, signal.SIG_IGN)
 
-    run_loop(db_path=db_path, interval_s=interval_s)
+    if "events" in flags:
+        from toggl_sherpa.m1.events import run_event_loop
+
+        run_event_loop(db_path, heartbeat_s=float(flags.get("heartbeat") or 60.0))
+        return 0
+
+    run_loop(
+        db_path=db_path,
+        interval_s=interval_s,
+        adaptive="fixed" not in flags,
+        segments="segments" in flags,
+    )
     return 0
 
 
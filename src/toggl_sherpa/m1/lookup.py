@@ -0,0 +1,114 @@
+"""String interning for the dictionary-encoded tables (schema v10).
+
+Titles, wm classes and URLs are stored once in lookup tables (`titles`,
+`wm_classes`, `urls`; each URL's host is filled in by a trigger into
+`hosts`) and `sample_rows`/`tab_event_rows` reference them by id. The
+`samples` and `tab_events` views keep the old column shape for readers,
+and their INSTEAD OF triggers accept plain INSERTs, but those look every
+string up again; hot writers (logger, tab server, importer) keep a
+`Lookups` and insert ids into the row tables directly. Raw payloads are
+stored the same way (schema v11, see `rawstore`).
+
+A `Lookups` belongs to one database; ids cached before a rolled-back
+transaction may be gone, so call `clear()` after a rollback.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterable
+
+from toggl_sherpa.m1.rawstore import RawPayloads
+
+# Cached strings per table before the cache starts over.
+MAX_CACHED = 8192
+
+
+class Interner:
+    """string -> id in one lookup table, inserting unseen strings."""
+
+    def __init__(self, table: str, column: str, *, max_cached: int = MAX_CACHED) -> None:
+        self.max_cached = max_cached
+        self._cache: dict[str, int] = {}
+        self._insert = f"INSERT OR IGNORE INTO {table}({column}) VALUES (?)"
+        self._select = f"SELECT id FROM {table} WHERE {column} = ?"
+
+    def __call__(self, conn: sqlite3.Connection, value: str | None) -> int | None:
+        if value is None:
+            return None
+        hit = self._cache.get(value)
+        if hit is not None:
+            return hit
+        conn.execute(self._insert, (value,))
+        found = int(conn.execute(self._select, (value,)).fetchone()[0])
+        if len(self._cache) >= self.max_cached:
+            self._cache.clear()
+        self._cache[value] = found
+        return found
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class Lookups:
+    """The interners a writer needs for samples and tab events."""
+
+    def __init__(self) -> None:
+        self.title = Interner("titles", "title")
+        self.wm_class = Interner("wm_classes", "wm_class")
+        self.url = Interner("urls", "url")
+        self.raw = RawPayloads()
+
+    def clear(self) -> None:
+        for interner in (self.title, self.wm_class, self.url, self.raw):
+            interner.clear()
+
+    def sample_row(self, conn: sqlite3.Connection, row: tuple) -> tuple:
+        """A `samples` row (as in INSERT_SAMPLE's column order) with strings encoded."""
+        id_, ts, idle_ms, title, wm_class, pid, raw_json, interval_s = row
+        return (
+            id_,
+            ts,
+            idle_ms,
+            self.title(conn, title),
+            self.wm_class(conn, wm_class),
+            pid,
+            self.raw(conn, raw_json),
+            interval_s,
+        )
+
+    def tab_row(self, conn: sqlite3.Connection, row: tuple) -> tuple:
+        """A `tab_events` row (as in INSERT_TAB_EVENT's column order), encoded."""
+        ts, sample_id, url, title, url_redacted, title_redacted, allowed, raw_json = row
+        return (
+            ts,
+            sample_id,
+            self.url(conn, url),
+            self.title(conn, title),
+            self.url(conn, url_redacted),
+            self.title(conn, title_redacted),
+            allowed,
+            self.raw(conn, raw_json),
+        )
+
+    def insert_samples(self, conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+        conn.executemany(INSERT_SAMPLE, [self.sample_row(conn, r) for r in rows])
+
+    def insert_tab_events(self, conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+        conn.executemany(INSERT_TAB_EVENT, [self.tab_row(conn, r) for r in rows])
+
+
+# Rows: (id or None, ts_utc, idle_ms, title, wm_class, pid, raw_json, interval_s).
+INSERT_SAMPLE = """
+    INSERT INTO sample_rows(
+        id, ts_utc, idle_ms, title_id, wm_class_id, focus_pid, raw_id, interval_s
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Rows: (ts_utc, sample_id, url, title, url_redacted, title_redacted, allowed, raw_json).
+INSERT_TAB_EVENT = """
+    INSERT INTO tab_event_rows(
+        ts_utc, sample_id, url_id, title_id, url_redacted_id, title_redacted_id, allowed,
+        raw_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
@@ -0,0 +1,158 @@
+"""Content-addressed, compressed raw payloads (schema v11).
+
+Every sample and tab event keeps the raw JSON it was built from, and most
+of those payloads repeat (tab events for the same page, error samples,
+the `{}` of imported rows). Each distinct payload is stored once in
+`raw_payloads`, keyed by its BLAKE2b hash and compressed (zstd when the
+optional `zstandard` package is installed, zlib otherwise; payloads that
+don't shrink are stored as they are); `sample_rows`/`tab_event_rows`
+reference it by `raw_id`, like the v10 lookup tables.
+
+Plain INSERTs into the `samples`/`tab_events` views can't hash, so those
+rows keep their payload inline in `raw_json` until `compact` moves them
+over. Read a row's original JSON back with `sample_raw_json` or
+`tab_event_raw_json`, which handle both forms.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import zlib
+
+from toggl_sherpa.profiling import timed
+
+try:
+    import zstandard
+except ImportError:  # optional: `pip install zstandard`
+    zstandard = None
+
+HASH_BYTES = 16
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 10
+# Rows converted per transaction by `compact`.
+COMPACT_CHUNK = 5000
+# Cached payloads per writer before the cache starts over.
+MAX_CACHED = 4096
+
+
+def payload_hash(raw: str) -> bytes:
+    return hashlib.blake2b(raw.encode(), digest_size=HASH_BYTES).digest()
+
+
+def encode(raw: str) -> tuple[str, bytes]:
+    """(codec, data) for a payload: compressed if that makes it smaller."""
+    data = raw.encode()
+    if zstandard is not None:
+        codec, packed = "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        codec, packed = "zlib", zlib.compress(data, ZLIB_LEVEL)
+    return (codec, packed) if len(packed) < len(data) else ("none", data)
+
+
+def decode(codec: str, data: bytes) -> str:
+    if codec == "none":
+        return bytes(data).decode()
+    if codec == "zlib":
+        return zlib.decompress(data).decode()
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("raw payload is zstd-compressed; install `zstandard` to read it")
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+    raise ValueError(f"unknown raw payload codec: {codec!r}")
+
+
+class RawPayloads:
+    """raw JSON -> `raw_payloads` id, storing unseen payloads."""
+
+    def __init__(self, *, max_cached: int = MAX_CACHED) -> None:
+        self.max_cached = max_cached
+        self._cache: dict[str, int] = {}
+
+    def __call__(self, conn: sqlite3.Connection, raw: str | None) -> int | None:
+        if raw is None:
+            return None
+        hit = self._cache.get(raw)
+        if hit is not None:
+            return hit
+        digest = payload_hash(raw)
+        row = conn.execute("SELECT id FROM raw_payloads WHERE hash = ?", (digest,)).fetchone()
+        if row is not None:
+            found = int(row[0])
+        else:
+            codec, data = encode(raw)
+            cur = conn.execute(
+                "INSERT INTO raw_payloads(hash, codec, data) VALUES (?, ?, ?)",
+                (digest, codec, data),
+            )
+            found = int(cur.lastrowid)
+        if len(self._cache) >= self.max_cached:
+            self._cache.clear()
+        self._cache[raw] = found
+        return found
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+def read_raw(conn: sqlite3.Connection, raw_id: int) -> str | None:
+    """The original JSON of one stored payload (None if there is no such id)."""
+    row = conn.execute("SELECT codec, data FROM raw_payloads WHERE id = ?", (raw_id,)).fetchone()
+    return decode(row[0], row[1]) if row is not None else None
+
+
+def _row_raw_json(conn: sqlite3.Connection, table: str, row_id: int) -> str | None:
+    row = conn.execute(
+        f"SELECT r.raw_json, p.codec, p.data FROM {table} r"
+        " LEFT JOIN raw_payloads p ON p.id = r.raw_id WHERE r.id = ?",
+        (row_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    inline, codec, data = row
+    if inline is not None:
+        return inline
+    return decode(codec, data) if codec is not None else None
+
+
+def sample_raw_json(conn: sqlite3.Connection, sample_id: int) -> str | None:
+    """The raw JSON a sample was logged with, stored or still inline."""
+    return _row_raw_json(conn, "sample_rows", sample_id)
+
+
+def tab_event_raw_json(conn: sqlite3.Connection, event_id: int) -> str | None:
+    """The raw JSON a tab event was posted with, stored or still inline."""
+    return _row_raw_json(conn, "tab_event_rows", event_id)
+
+
+@timed("db.write")
+def compact(conn: sqlite3.Connection, *, chunk: int = COMPACT_CHUNK) -> int:
+    """Move inline `raw_json` into `raw_payloads`, `chunk` rows per transaction.
+
+    Commits after each chunk, so an interrupted run keeps its progress and
+    the next one picks up the rows still inline. Returns the rows moved.
+    """
+    payloads = RawPayloads()
+    moved = 0
+    for table in ("sample_rows", "tab_event_rows"):
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT id, raw_json FROM {table}"
+                " WHERE id > ? AND raw_json IS NOT NULL ORDER BY id LIMIT ?",
+                (last_id, chunk),
+            ).fetchall()
+            if not rows:
+                break
+            try:
+                conn.executemany(
+                    f"UPDATE {table} SET raw_id = ?, raw_json = NULL WHERE id = ?",
+                    [(payloads(conn, raw), row_id) for row_id, raw in rows],
+                )
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            last_id = rows[-1][0]
+            moved += len(rows)
+    return moved
@@ -0,0 +1,78 @@
+"""Ring buffer of recently written samples, for linking tab events.
+
+The daemon keeps the samples it writes here, so a tab event finds its
+nearest sample without reading the DB; segment import uses one to re-link
+tab events around the samples it loads.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import UTC, datetime
+
+# An hour of samples at the base interval, ~12 minutes at the fast one.
+DEFAULT_RING_SIZE = 360
+
+
+def _epoch_s(ts_utc: str) -> int | None:
+    """Whole Unix seconds, as SQLite's strftime('%s', ...) would give."""
+    try:
+        dt = datetime.fromisoformat(ts_utc)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return int(dt.timestamp())
+
+
+class RecentSamples:
+    """The last `maxlen` samples as (epoch seconds, id), oldest first."""
+
+    def __init__(self, maxlen: int = DEFAULT_RING_SIZE) -> None:
+        self._ring: deque[tuple[int, int]] = deque(maxlen=maxlen)
+        # Samples at or before this time may be missing (evicted, or never added).
+        self._complete_after: float = float("-inf")
+
+    @classmethod
+    def from_db(cls, conn, maxlen: int = DEFAULT_RING_SIZE) -> RecentSamples:
+        """Seed with the newest samples already in the DB (one read, at startup)."""
+        ring = cls(maxlen)
+        rows = conn.execute(
+            "SELECT id, ts_utc FROM samples ORDER BY id DESC LIMIT ?", (maxlen,)
+        ).fetchall()
+        for row in reversed(rows):
+            ring.add(int(row["id"]), row["ts_utc"])
+        if len(rows) == maxlen and ring._ring:
+            ring._complete_after = ring._ring[0][0]
+        return ring
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def add(self, sample_id: int, ts_utc: str) -> None:
+        t = _epoch_s(ts_utc)
+        if t is None:
+            return
+        if len(self._ring) == self._ring.maxlen:
+            self._complete_after = self._ring[0][0]
+        self._ring.append((t, sample_id))
+
+    def covers(self, ts_utc: str, max_age_s: int) -> bool:
+        """Whether every sample within `max_age_s` of `ts_utc` is in the ring."""
+        t = _epoch_s(ts_utc)
+        return t is None or t - max_age_s > self._complete_after
+
+    def nearest(self, ts_utc: str, max_age_s: int) -> int | None:
+        """Id of the sample closest to `ts_utc`, if one is within `max_age_s`."""
+        t = _epoch_s(ts_utc)
+        if t is None:
+            return None
+        best: tuple[int, int] | None = None
+        for ts, sample_id in reversed(self._ring):
+            if ts < t - max_age_s:
+                break
+            d = abs(ts - t)
+            # `<=` while walking backwards keeps the earliest of equal distances.
+            if d <= max_age_s and (best is None or d <= best[0]):
+                best = (d, sample_id)
+        return best[1] if best is not None else None
@@ -0,0 +1,59 @@
+"""When the focus logger takes its next sample.
+
+`FixedSchedule` samples every `interval_s`. `AdaptiveSchedule` samples at
+`base_s` normally, at `fast_s` for a few samples right after the focused
+window changes (so short visits get a sharp start and end), and backs off
+geometrically up to `max_s` while the user stays idle. Backing off only starts
+once idle time reaches `idle_after_ms` (by default the report's idle
+threshold), so every slow sample is one the report drops anyway; the cost is
+noticing the user's return up to `max_s` late.
+
+Both return the interval the sample just taken stands for, which the logger
+records in `samples.interval_s`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from toggl_sherpa.m1.gnome import FocusSample
+
+
+@dataclass
+class FixedSchedule:
+    interval_s: float = 10.0
+
+    def next_interval(self, sample: FocusSample) -> float:
+        return self.interval_s
+
+
+@dataclass
+class AdaptiveSchedule:
+    base_s: float = 10.0
+    fast_s: float = 2.0
+    fast_samples: int = 3
+    idle_after_ms: int = 60_000
+    backoff: float = 2.0
+    max_s: float = 60.0
+
+    def __post_init__(self) -> None:
+        self._focus: tuple[str | None, str | None] | None = None
+        self._fast_left = 0
+        self._idle_interval: float | None = None
+
+    def next_interval(self, sample: FocusSample) -> float:
+        focus = (sample.wm_class, sample.title)
+        if self._focus is not None and focus != self._focus:
+            self._fast_left = self.fast_samples
+        self._focus = focus
+
+        if sample.idle_ms is not None and sample.idle_ms >= self.idle_after_ms:
+            prev = self._idle_interval or self.base_s
+            self._idle_interval = min(self.max_s, prev * self.backoff)
+            return self._idle_interval
+        self._idle_interval = None
+
+        if self._fast_left > 0:
+            self._fast_left -= 1
+            return min(self.fast_s, self.base_s)
+        return self.base_s
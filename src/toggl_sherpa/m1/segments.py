@@ -0,0 +1,386 @@
+"""Append-only segment files for samples (`log start --segments`).
+
+At short sampling intervals a SQLite transaction per sample is most of the
+logger's work. In segment mode it instead appends fixed-layout records to a
+memory-mapped, preallocated segment file next to the DB
+(`<db>.segments/<name>.open`). A segment is sealed (truncated, fsynced and
+renamed to `<name>.seg`) when it is full, after `seal_after_s`, or when the
+logger stops. `import_sealed` bulk-loads sealed segments into `samples`, one
+transaction per segment, and re-links the tab events they cover; until then
+`m3.query` reads them (and the open segment) directly, so reports stay
+current. Names sort in write order and segments are imported in that order,
+so everything up to the last imported name is in the DB.
+
+A record is a fixed 48-byte header followed by the UTF-8 title, wm_class and
+raw JSON:
+
+    length u32 | crc32 u32 | ts (epoch s) i64 | idle_ms i64 | pid i32 |
+    interval_s f64 | title len u32 | wm_class len u32 | raw len u32
+
+The CRC covers everything after itself, so a record torn by a crash is
+detected and reading stops there; a restarted writer resumes after the last
+good record.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m1.gnome import FocusSample
+from toggl_sherpa.m1.lookup import Lookups
+from toggl_sherpa.m1.recent import RecentSamples
+from toggl_sherpa.profiling import timed
+
+SEGMENT_BYTES = 1 << 20  # ~10k samples
+SEAL_AFTER_S = 600.0
+IMPORT_EVERY_S = 60.0
+
+_PREFIX = struct.Struct("<II")  # length, crc32
+_FIELDS = struct.Struct("<qqidIII")
+HEADER_BYTES = _PREFIX.size + _FIELDS.size
+_NONE_LEN = 0xFFFFFFFF
+
+# meta key: the last segment imported (its file may survive a crash before unlink).
+_LAST_IMPORTED_KEY = "segments.last_imported"
+
+# Tab events this close to an imported segment may now have a nearer sample.
+_RELINK_S = 60
+
+_log = logging.getLogger(__name__)
+
+
+class SegmentImportedError(RuntimeError):
+    """A segment was imported and removed while `read_tail` was reading it."""
+
+
+def segments_dir(db_path: Path) -> Path:
+    return db_path.with_name(db_path.name + ".segments")
+
+
+@dataclass(frozen=True)
+class SegmentRecord:
+    ts_utc: str
+    idle_ms: int | None
+    title: str | None
+    wm_class: str | None
+    pid: int | None
+    raw_json: str
+    interval_s: float | None
+
+
+def _enc(s: str | None) -> bytes | None:
+    return None if s is None else s.encode("utf-8")
+
+
+def _dec(b: bytes | None) -> str | None:
+    return None if b is None else b.decode("utf-8", errors="replace")
+
+
+def encode_record(sample: FocusSample, *, ts_utc: str, interval_s: float | None = None) -> bytes:
+    parts = [
+        _enc(sample.title),
+        _enc(sample.wm_class),
+        json.dumps(sample.raw, ensure_ascii=False, sort_keys=True).encode("utf-8"),
+    ]
+    payload = _FIELDS.pack(
+        int(datetime.fromisoformat(ts_utc).timestamp()),
+        -1 if sample.idle_ms is None else sample.idle_ms,
+        -1 if sample.pid is None else sample.pid,
+        math.nan if interval_s is None else interval_s,
+        *(_NONE_LEN if p is None else len(p) for p in parts),
+    ) + b"".join(p for p in parts if p is not None)
+    return _PREFIX.pack(_PREFIX.size + len(payload), zlib.crc32(payload)) + payload
+
+
+def iter_records(buf: bytes | mmap.mmap) -> Iterator[tuple[int, SegmentRecord]]:
+    """(end offset, record) for each valid record, stopping at the first bad one."""
+    offset = 0
+    while offset + HEADER_BYTES <= len(buf):
+        length, crc = _PREFIX.unpack_from(buf, offset)
+        if length < HEADER_BYTES or offset + length > len(buf):
+            return
+        payload = bytes(buf[offset + _PREFIX.size : offset + length])
+        if zlib.crc32(payload) != crc:
+            return
+        ts, idle_ms, pid, interval_s, *lens = _FIELDS.unpack_from(payload)
+        pos = _FIELDS.size
+        texts: list[bytes | None] = []
+        for n in lens:
+            if n == _NONE_LEN:
+                texts.append(None)
+            else:
+                texts.append(payload[pos : pos + n])
+                pos += n
+        title, wm_class, raw = texts
+        offset += length
+        yield (
+            offset,
+            SegmentRecord(
+                ts_utc=datetime.fromtimestamp(ts, UTC).isoformat(),
+                idle_ms=None if idle_ms < 0 else idle_ms,
+                title=_dec(title),
+                wm_class=_dec(wm_class),
+                pid=None if pid < 0 else pid,
+                raw_json=_dec(raw) or "{}",
+                interval_s=None if math.isnan(interval_s) else interval_s,
+            ),
+        )
+
+
+def read_segment(path: Path) -> list[SegmentRecord]:
+    return [rec for _end, rec in iter_records(path.read_bytes())]
+
+
+class SegmentWriter:
+    """Appends sample records to the open segment, sealing and rotating as needed."""
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        segment_bytes: int = SEGMENT_BYTES,
+        seal_after_s: float = SEAL_AFTER_S,
+    ) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.seal_after_s = seal_after_s
+        self._path: Path | None = None
+        self._file = None
+        self._mm: mmap.mmap | None = None
+        self._offset = 0
+        self._opened_at = 0.0
+        directory.mkdir(parents=True, exist_ok=True)
+        # Resume (or seal) segments left open by a crash.
+        leftover = sorted(directory.glob("*.open"))
+        for path in leftover:
+            self._open(path, segment_bytes)
+            if path != leftover[-1]:
+                self.seal()
+
+    def _open(self, path: Path, size: int) -> None:
+        f = open(path, "r+b" if path.exists() else "w+b")  # noqa: SIM115
+        if os.fstat(f.fileno()).st_size < size:
+            f.truncate(size)
+        mm = mmap.mmap(f.fileno(), 0)
+        end = 0
+        for end, _rec in iter_records(mm):  # noqa: B007
+            pass
+        # Clear whatever a crash left after the last good record.
+        mm[end:] = bytes(len(mm) - end)
+        self._path, self._file, self._mm = path, f, mm
+        self._offset = end
+        self._opened_at = time.monotonic()
+
+    def append(self, sample: FocusSample, *, ts_utc: str, interval_s: float | None = None) -> None:
+        rec = encode_record(sample, ts_utc=ts_utc, interval_s=interval_s)
+        mm = self._mm
+        if mm is not None and (
+            self._offset + len(rec) > len(mm)
+            or time.monotonic() - self._opened_at >= self.seal_after_s
+        ):
+            self.seal()
+            mm = None
+        if mm is None:
+            self._open(
+                self.directory / f"{time.time_ns():020d}.open",
+                max(self.segment_bytes, len(rec)),
+            )
+            mm = self._mm
+            assert mm is not None
+        mm[self._offset : self._offset + len(rec)] = rec
+        self._offset += len(rec)
+
+    def seal(self) -> Path | None:
+        """Close the open segment; returns the sealed file (None if it was empty)."""
+        if self._mm is None or self._file is None or self._path is None:
+            return None
+        self._mm.flush()
+        self._mm.close()
+        self._file.truncate(self._offset)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        path, empty = self._path, self._offset == 0
+        self._path, self._file, self._mm, self._offset = None, None, None, 0
+        if empty:
+            path.unlink()
+            return None
+        sealed = path.with_suffix(".seg")
+        os.replace(path, sealed)
+        return sealed
+
+    def close(self) -> None:
+        self.seal()
+
+
+def _last_imported(conn: sqlite3.Connection) -> str | None:
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key=?", (_LAST_IMPORTED_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return None if row is None else str(row[0])
+
+
+def _shift(ts_utc: str, seconds: int) -> str:
+    return (datetime.fromisoformat(ts_utc) + timedelta(seconds=seconds)).isoformat()
+
+
+def _relink_tabs(conn: sqlite3.Connection, lo_ts: str, hi_ts: str) -> int:
+    """Point tab events near [lo_ts, hi_ts] at their (possibly new) nearest sample."""
+    samples = conn.execute(
+        "SELECT id, ts_utc FROM sample_rows WHERE ts_utc >= ? AND ts_utc <= ? ORDER BY ts_utc, id",
+        (_shift(lo_ts, -2 * _RELINK_S), _shift(hi_ts, 2 * _RELINK_S)),
+    ).fetchall()
+    ring = RecentSamples(maxlen=len(samples) + 1)
+    for r in samples:
+        ring.add(int(r["id"]), r["ts_utc"])
+    tabs = conn.execute(
+        "SELECT id, ts_utc, sample_id FROM tab_event_rows WHERE ts_utc >= ? AND ts_utc <= ?",
+        (_shift(lo_ts, -_RELINK_S), _shift(hi_ts, _RELINK_S)),
+    ).fetchall()
+    changes = [
+        (sid, t["id"])
+        for t in tabs
+        if (sid := ring.nearest(t["ts_utc"], _RELINK_S)) != t["sample_id"]
+    ]
+    conn.executemany("UPDATE tab_event_rows SET sample_id=? WHERE id=?", changes)
+    return len(changes)
+
+
+@timed("db.write")
+def import_sealed(conn: sqlite3.Connection, directory: Path) -> int:
+    """Load sealed segments into `samples` (oldest first); returns rows imported.
+
+    Each segment is one transaction that also records it as imported, and
+    the file is deleted after the commit; a file left behind by a crash in
+    between (or by another importer) is recognised and deleted without
+    importing it twice.
+    """
+    lookups = Lookups()
+    total = 0
+    for path in sorted(directory.glob("*.seg")):
+        with conn:
+            # Checked under the write lock, so concurrent importers agree.
+            conn.execute("BEGIN IMMEDIATE")
+            last = _last_imported(conn)
+            if last is not None and path.stem <= last:
+                path.unlink(missing_ok=True)
+                continue
+            records = read_segment(path)
+            lookups.insert_samples(
+                conn,
+                (
+                    (
+                        None,
+                        r.ts_utc,
+                        r.idle_ms,
+                        r.title,
+                        r.wm_class,
+                        r.pid,
+                        r.raw_json,
+                        r.interval_s,
+                    )
+                    for r in records
+                ),
+            )
+            if records:
+                _relink_tabs(
+                    conn,
+                    min(r.ts_utc for r in records),
+                    max(r.ts_utc for r in records),
+                )
+            conn.execute(
+                "INSERT INTO meta(key, value) VALUES(?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (_LAST_IMPORTED_KEY, path.stem),
+            )
+        path.unlink(missing_ok=True)
+        total += len(records)
+    return total
+
+
+def read_tail(conn: sqlite3.Connection, start_ts_utc: str, end_ts_utc: str) -> list[SegmentRecord]:
+    """Records in [start, end] not yet imported into the DB behind `conn`.
+
+    Segments up to the last imported one in `conn`'s view are skipped, so a
+    caller reading `samples` in the same transaction counts each record once.
+    Raises `SegmentImportedError` if a newer segment disappears meanwhile: it
+    was imported after that view was taken, so the caller should read again.
+    """
+    row = conn.execute("PRAGMA database_list").fetchone()  # (seq, name, file) of main
+    if row is None or not row[2]:
+        return []
+    directory = segments_dir(Path(row[2]))
+    if not directory.is_dir():
+        return []
+    last = _last_imported(conn) or ""
+    out: list[SegmentRecord] = []
+    for stem in sorted({p.stem for p in directory.iterdir() if p.suffix in (".open", ".seg")}):
+        if stem <= last:
+            continue
+        # The open segment may be sealed (renamed) while we look, hence .seg twice.
+        for suffix in (".seg", ".open", ".seg"):
+            try:
+                records = read_segment(directory / f"{stem}{suffix}")
+            except FileNotFoundError:
+                continue
+            out.extend(r for r in records if start_ts_utc <= r.ts_utc <= end_ts_utc)
+            break
+        else:
+            raise SegmentImportedError(stem)
+    return out
+
+
+class SegmentStore:
+    """A SegmentWriter plus a background thread importing sealed segments."""
+
+    def __init__(
+        self, db_path: Path, *, import_every_s: float = IMPORT_EVERY_S, **writer_kw
+    ) -> None:
+        self.db_path = db_path
+        self.writer = SegmentWriter(segments_dir(db_path), **writer_kw)
+        self.import_every_s = import_every_s
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._import_loop, daemon=True)
+        self._thread.start()
+
+    def append(self, sample: FocusSample, *, ts_utc: str, interval_s: float | None = None) -> None:
+        self.writer.append(sample, ts_utc=ts_utc, interval_s=interval_s)
+
+    def _import_once(self) -> int:
+        from toggl_sherpa.m1 import db as db_mod
+
+        conn = db_mod.connect(self.db_path)
+        try:
+            return import_sealed(conn, self.writer.directory)
+        finally:
+            conn.close()
+
+    def _import_loop(self) -> None:
+        while not self._stop.wait(self.import_every_s):
+            try:
+                self._import_once()
+            except sqlite3.OperationalError:
+                continue  # DB busy; the segment stays sealed for next time.
+            except Exception:
+                # Keep importing: sampling goes on, so segments would pile up.
+                _log.exception("segment import failed; retrying in %ss", self.import_every_s)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.writer.close()
+        self._import_once()
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import json
 import sqlite3
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import UTC, datetime
 
+from toggl_sherpa.m1.lookup import INSERT_TAB_EVENT, Lookups
 from toggl_sherpa.m2.redaction import RedactedTab, redact_tab
+from toggl_sherpa.profiling import timed
 
 
 def utc_now_iso() -> str:
@@ -36,16 +39,28 @@ def _nearest_sample_id(conn: sqlite3.Connection, ts_utc: str, max_age_s: int = 6
     return int(row["id"]) if row is not None else None
 
 
+@timed("db.write")
 def insert_tab_event(
     conn: sqlite3.Connection,
     payload: TabPayload,
     allow_hosts: set[str],
     *,
     max_link_age_s: int = 60,
+    link: Callable[[str, int], int | None] | None = None,
+    lookups: Lookups | None = None,
 ) -> RedactedTab:
+    """Store one tab event, linked to the nearest sample within `max_link_age_s`.
+
+    `link(ts_utc, max_age_s)` replaces the samples-table lookup (the unified
+    daemon answers it from the samples it has just written). Pass the
+    writer's `lookups` to reuse its cached string ids.
+    """
     ts_utc = payload.ts_utc or utc_now_iso()
     red: RedactedTab = redact_tab(payload.url, payload.title, allow_hosts)
-    sample_id = _nearest_sample_id(conn, ts_utc, max_age_s=max_link_age_s)
+    if link is None:
+        sample_id = _nearest_sample_id(conn, ts_utc, max_age_s=max_link_age_s)
+    else:
+        sample_id = link(ts_utc, max_link_age_s)
 
     raw = {
         "url": payload.url,
@@ -54,21 +69,21 @@ def insert_tab_event(
         "user_agent": payload.user_agent,
     }
 
+    lookups = lookups or Lookups()
     conn.execute(
-        """
-        INSERT INTO tab_events(
-            ts_utc, sample_id, url, title, url_redacted, title_redacted, allowed, raw_json
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            ts_utc,
-            sample_id,
-            red.url,
-            red.title,
-            red.url_redacted,
-            red.title_redacted,
-            1 if red.allowed else 0,
-            json.dumps(raw, ensure_ascii=False, sort_keys=True),
+        INSERT_TAB_EVENT,
+        lookups.tab_row(
+            conn,
+            (
+                ts_utc,
+                sample_id,
+                red.url,
+                red.title,
+                red.url_redacted,
+                red.title_redacted,
+                1 if red.allowed else 0,
+                json.dumps(raw, ensure_ascii=False, sort_keys=True),
+            ),
         ),
     )
     conn.commit()
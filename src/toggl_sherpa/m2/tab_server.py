@@ -3,12 +3,14 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
+from collections.abc import Callable
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Any
 
 from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.lookup import Lookups
 from toggl_sherpa.m2.redaction import parse_allowlist
 from toggl_sherpa.m2.tab_ingest import TabPayload, insert_tab_event
 
@@ -71,6 +73,8 @@ class TabIngestHandler(BaseHTTPRequestHandler):
                 self.server.conn,
                 TabPayload(url=url, title=title, ts_utc=ts_utc, user_agent=ua),
                 self.server.allow_hosts,
+                link=self.server.link,
+                lookups=self.server.lookups,
             )
         except sqlite3.Error as e:
             self._json_response(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
@@ -102,6 +106,9 @@ class TabIngestHTTPServer(ThreadingHTTPServer):
         super().__init__(server_address, TabIngestHandler)
         self.conn = conn
         self.allow_hosts = allow_hosts
+        # Optional replacement for the samples-table lookup (see insert_tab_event).
+        self.link: Callable[[str, int], int | None] | None = None
+        self.lookups = Lookups()
 
 
 def serve(
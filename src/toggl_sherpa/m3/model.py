@@ -11,6 +11,8 @@ class SampleRow:
     focus_title: str | None
     focus_wm_class: str | None
     focus_pid: int | None
+    # Seconds until the logger's next sample; None for older fixed-interval rows.
+    interval_s: float | None = None
 
 
 @dataclass(frozen=True)
@@ -27,12 +29,17 @@ class TabEventRow:
 
 @dataclass(frozen=True)
 class EvidenceItem:
+    # For aggregated evidence, ts_utc is when this url/title was first seen,
+    # last_ts_utc when it was last seen, and count the number of tab events.
+    # Per-tick items leave last_ts_utc unset.
     ts_utc: str
     allowed: bool
     url: str | None
     title: str | None
     url_redacted: str | None
     title_redacted: str | None
+    last_ts_utc: str | None = None
+    count: int = 1
 
     def display_url(self) -> str:
         if self.allowed and self.url:
@@ -45,6 +52,31 @@ class EvidenceItem:
         return self.title_redacted or ""
 
 
+@dataclass(frozen=True)
+class EvidenceRef:
+    """Evidence left in the source DB: inclusive tab_events id ranges.
+
+    `db` is the source DB's `db_id` (see `m3.query.db_fingerprint`).
+    """
+
+    db: str
+    ranges: list[tuple[int, int]]
+
+    def event_count(self) -> int:
+        return sum(hi - lo + 1 for lo, hi in self.ranges)
+
+    def extend(self, other: EvidenceRef) -> EvidenceRef:
+        if other.db != self.db:
+            raise ValueError("evidence references point at different databases")
+        ranges = list(self.ranges)
+        for lo, hi in other.ranges:
+            if ranges and lo == ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], hi)
+            else:
+                ranges.append((lo, hi))
+        return EvidenceRef(db=self.db, ranges=ranges)
+
+
 @dataclass(frozen=True)
 class TimesheetBlock:
     start_ts_utc: str
@@ -54,3 +86,5 @@ class TimesheetBlock:
     project_suggestion: str | None
     tags_suggestion: list[str]
     evidence: list[EvidenceItem]
+    # Set instead of `evidence` when blocks are written by reference.
+    evidence_ref: EvidenceRef | None = None
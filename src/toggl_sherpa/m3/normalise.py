@@ -0,0 +1,71 @@
+"""Title normalisation before labelling and suggestions.
+
+Window titles carry volatile parts (unread counters, editors' unsaved
+markers, clocks, notification badges), so the same activity shows up
+under many titles and `summarise_blocks` splits it into many blocks.
+A `TitleNormaliser` applies an ordered list of regex rewrites, compiled
+once, and caches the result per distinct title, so a day's samples cost
+one dict lookup each.
+
+Rules are `(pattern, replacement)` pairs for `re.sub`; `DEFAULT_RULES`
+covers the common cases, and config.json can add its own (see
+`m6.config.load_title_rules`).
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+
+# Distinct titles cached before the cache starts over.
+MAX_CACHED = 8192
+
+DEFAULT_RULES: tuple[tuple[str, str], ...] = (
+    # Unread counters and badges up front: "(3) Slack", "[12] Inbox", "(99+) …".
+    (r"^\s*[(\[]\d+\+?[)\]]\s*", ""),
+    # Unsaved/dirty markers: "● cli.py - Code", "* notes.md".
+    (r"^\s*[●•*]\s+", ""),
+    # Counters before a separator or at the end: "Inbox (12) — Firefox".
+    (r"\s+\(\d+\+?\)(?=\s*(?:[-—–|·:]|$))", ""),
+    # Clock times and ISO timestamps: "Standup 09:30", "log 2026-02-07T12:00:01".
+    # Not line:column refs like "cli.py:10:20".
+    (r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2})?(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?\b", ""),
+    (r"(?<![\d:])\b\d{1,2}:\d{2}(?::\d{2})?(?:\s?[AaPp][Mm])?\b(?!:\d)", ""),
+    # Whatever is left over from the rewrites above.
+    (r"\s{2,}", " "),
+    (r"^\s+|\s+$", ""),
+)
+
+
+class TitleNormaliser:
+    """Title -> normalised title, with compiled rules and a per-title cache."""
+
+    def __init__(
+        self,
+        rules: Iterable[tuple[str, str]] = DEFAULT_RULES,
+        *,
+        max_cached: int = MAX_CACHED,
+    ) -> None:
+        # Raises re.error for a bad pattern, before any title is seen.
+        self.rules = [(re.compile(p), r) for p, r in rules]
+        self.max_cached = max_cached
+        self._cache: dict[str, str] = {}
+
+    def __call__(self, title: str | None) -> str | None:
+        if not title:
+            return title
+        hit = self._cache.get(title)
+        if hit is not None:
+            return hit
+        out = title
+        for pattern, repl in self.rules:
+            out = pattern.sub(repl, out)
+        # A title that is all volatile parts keeps its original text.
+        out = out or title
+        if len(self._cache) >= self.max_cached:
+            self._cache.clear()
+        self._cache[title] = out
+        return out
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import sqlite3
-from dataclasses import asdict
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import asdict, replace
 from datetime import UTC, datetime
 
-from toggl_sherpa.m3.model import SampleRow, TabEventRow
+from toggl_sherpa.m3.model import SampleRow, TabEventRow, TimesheetBlock
+from toggl_sherpa.profiling import timed
 
 
 def parse_ts(ts: str) -> datetime:
@@ -25,18 +27,38 @@ def day_bounds_utc(date_yyyy_mm_dd: str) -> tuple[str, str]:
     return start.isoformat(), end.isoformat()
 
 
+@timed("db.fetch")
 def fetch_samples(conn: sqlite3.Connection, start_ts_utc: str, end_ts_utc: str) -> list[SampleRow]:
-    cur = conn.execute(
-        """
-        SELECT id, ts_utc, idle_ms, focus_title, focus_wm_class, focus_pid
-        FROM samples
-        WHERE ts_utc >= ? AND ts_utc <= ?
-        ORDER BY ts_utc ASC
-        """,
-        (start_ts_utc, end_ts_utc),
-    )
+    from toggl_sherpa.m1.segments import SegmentImportedError
+
+    # The rows and the segment tail must agree on which segments are imported,
+    # so both are read in one transaction; if a segment is imported meanwhile
+    # (its file is gone), read again.
+    while True:
+        began = not conn.in_transaction
+        if began:
+            conn.execute("BEGIN")
+        try:
+            rows = conn.execute(
+                """
+                SELECT id, ts_utc, idle_ms, focus_title, focus_wm_class, focus_pid, interval_s
+                FROM samples
+                WHERE ts_utc >= ? AND ts_utc <= ?
+                ORDER BY ts_utc ASC
+                """,
+                (start_ts_utc, end_ts_utc),
+            ).fetchall()
+            tail = _segment_tail(conn, start_ts_utc, end_ts_utc)
+        except SegmentImportedError:
+            if not began:
+                raise  # the caller's transaction can't be refreshed
+            continue
+        finally:
+            if began:
+                conn.execute("COMMIT")
+        break
     out: list[SampleRow] = []
-    for r in cur.fetchall():
+    for r in rows:
         out.append(
             SampleRow(
                 id=int(r["id"]),
@@ -45,11 +67,38 @@ def fetch_samples(conn: sqlite3.Connection, start_ts_utc: str, end_ts_utc: str)
                 focus_title=r["focus_title"],
                 focus_wm_class=r["focus_wm_class"],
                 focus_pid=r["focus_pid"],
+                interval_s=r["interval_s"],
             )
         )
+    if tail:
+        out.extend(tail)
+        out.sort(key=lambda s: s.ts_utc)
     return out
 
 
+def _segment_tail(conn: sqlite3.Connection, start_ts_utc: str, end_ts_utc: str) -> list[SampleRow]:
+    """Samples still in segment files (`log start --segments`), not yet imported.
+
+    They have no row id yet, so they get negative ids and no tab events
+    (tab events are linked to them on import).
+    """
+    from toggl_sherpa.m1.segments import read_tail
+
+    return [
+        SampleRow(
+            id=-i,
+            ts_utc=r.ts_utc,
+            idle_ms=r.idle_ms,
+            focus_title=r.title,
+            focus_wm_class=r.wm_class,
+            focus_pid=r.pid,
+            interval_s=r.interval_s,
+        )
+        for i, r in enumerate(read_tail(conn, start_ts_utc, end_ts_utc), 1)
+    ]
+
+
+@timed("db.fetch")
 def fetch_tab_events(
     conn: sqlite3.Connection,
     start_ts_utc: str,
@@ -64,23 +113,141 @@ def fetch_tab_events(
         """,
         (start_ts_utc, end_ts_utc),
     )
+    return [_tab_event_row(r) for r in cur.fetchall()]
+
+
+@timed("db.fetch")
+def sample_counts_by_app(
+    conn: sqlite3.Connection, start_ts_utc: str, end_ts_utc: str
+) -> list[tuple[str | None, int]]:
+    """(wm_class, samples) in [start, end], most first; grouped on the interned ids."""
+    cur = conn.execute(
+        """
+        SELECT w.wm_class, g.n
+        FROM (
+            SELECT wm_class_id, COUNT(*) AS n
+            FROM sample_rows
+            WHERE ts_utc >= ? AND ts_utc <= ?
+            GROUP BY wm_class_id
+        ) g
+        LEFT JOIN wm_classes w ON w.id = g.wm_class_id
+        ORDER BY g.n DESC, w.wm_class
+        """,
+        (start_ts_utc, end_ts_utc),
+    )
+    return [(r[0], int(r[1])) for r in cur.fetchall()]
+
+
+@timed("db.fetch")
+def tab_counts_by_host(
+    conn: sqlite3.Connection, start_ts_utc: str, end_ts_utc: str
+) -> list[tuple[str | None, int]]:
+    """(host, tab events) in [start, end], most first; redacted events count too."""
+    cur = conn.execute(
+        """
+        SELECT h.host, SUM(g.n) AS n
+        FROM (
+            SELECT COALESCE(url_id, url_redacted_id) AS url_id, COUNT(*) AS n
+            FROM tab_event_rows
+            WHERE ts_utc >= ? AND ts_utc <= ?
+            GROUP BY 1
+        ) g
+        LEFT JOIN urls u ON u.id = g.url_id
+        LEFT JOIN hosts h ON h.id = u.host_id
+        GROUP BY u.host_id
+        ORDER BY n DESC, h.host
+        """,
+        (start_ts_utc, end_ts_utc),
+    )
+    return [(r[0], int(r[1])) for r in cur.fetchall()]
+
+
+def _tab_event_row(r: sqlite3.Row) -> TabEventRow:
+    return TabEventRow(
+        id=int(r["id"]),
+        ts_utc=str(r["ts_utc"]),
+        sample_id=(int(r["sample_id"]) if r["sample_id"] is not None else None),
+        allowed=bool(r["allowed"]),
+        url=r["url"],
+        title=r["title"],
+        url_redacted=r["url_redacted"],
+        title_redacted=r["title_redacted"],
+    )
+
+
+def db_fingerprint(conn: sqlite3.Connection) -> str:
+    """Stable id of this DB, recorded in evidence references."""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'db_id'").fetchone()
+    if row is None:
+        raise ValueError("database has no db_id (run a migration first)")
+    return str(row[0])
+
+
+# Ranges per query; each range is two bound parameters.
+_RANGE_CHUNK = 200
+
+
+@timed("db.fetch")
+def fetch_tab_events_by_ranges(
+    conn: sqlite3.Connection,
+    ranges: Sequence[tuple[int, int]],
+) -> list[TabEventRow]:
+    """Tab events whose id falls in any inclusive `(lo, hi)` range, in time order."""
     out: list[TabEventRow] = []
-    for r in cur.fetchall():
-        out.append(
-            TabEventRow(
-                id=int(r["id"]),
-                ts_utc=str(r["ts_utc"]),
-                sample_id=(int(r["sample_id"]) if r["sample_id"] is not None else None),
-                allowed=bool(r["allowed"]),
-                url=r["url"],
-                title=r["title"],
-                url_redacted=r["url_redacted"],
-                title_redacted=r["title_redacted"],
-            )
+    for i in range(0, len(ranges), _RANGE_CHUNK):
+        chunk = ranges[i : i + _RANGE_CHUNK]
+        where = " OR ".join("id BETWEEN ? AND ?" for _ in chunk)
+        cur = conn.execute(
+            f"""
+            SELECT id, ts_utc, sample_id, allowed, url, title, url_redacted, title_redacted
+            FROM tab_events
+            WHERE {where}
+            """,
+            [x for r in chunk for x in r],
         )
+        out.extend(_tab_event_row(r) for r in cur.fetchall())
+    out.sort(key=lambda t: (t.ts_utc, t.id))
     return out
 
 
+@timed("hydrate")
+def hydrate_evidence(
+    conn: sqlite3.Connection,
+    block: TimesheetBlock,
+    *,
+    per_tick: bool = False,
+) -> TimesheetBlock:
+    """Return `block` with referenced evidence loaded from `conn`.
+
+    Blocks that already embed their evidence are returned unchanged. Raises
+    ValueError if the reference was made against another database.
+    """
+    from toggl_sherpa.m3.summarise import evidence_from_tab_events
+
+    ref = block.evidence_ref
+    if ref is None:
+        return block
+    if ref.db != db_fingerprint(conn):
+        raise ValueError("evidence references a different database (wrong --db?)")
+    tabs = fetch_tab_events_by_ranges(conn, ref.ranges)
+    return replace(
+        block,
+        evidence=evidence_from_tab_events(tabs, per_tick=per_tick),
+        evidence_ref=None,
+    )
+
+
+def iter_hydrated(
+    conn: sqlite3.Connection,
+    blocks: Iterable[TimesheetBlock],
+    *,
+    per_tick: bool = False,
+) -> Iterator[TimesheetBlock]:
+    """Hydrate blocks one at a time, as the consumer gets to them."""
+    for b in blocks:
+        yield hydrate_evidence(conn, b, per_tick=per_tick)
+
+
 def to_jsonable(obj):
     # Small helper for CLI output.
     if hasattr(obj, "__dataclass_fields__"):
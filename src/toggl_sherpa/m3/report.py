@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from toggl_sherpa.m3.model import TimesheetBlock
+from collections.abc import Iterable
 
+from toggl_sherpa.m3.model import TimesheetBlock
+from toggl_sherpa.profiling import timed
 
-def blocks_to_markdown(blocks: list[TimesheetBlock]) -> str:
-    if not blocks:
-        return "# Draft timesheet\n\n(no activity in range)\n"
 
+@timed("render")
+def blocks_to_markdown(blocks: Iterable[TimesheetBlock]) -> str:
     lines: list[str] = []
     lines.append("# Draft timesheet")
     lines.append("")
@@ -27,16 +28,22 @@ def blocks_to_markdown(blocks: list[TimesheetBlock]) -> str:
             for ev in b.evidence[:20]:
                 title = ev.display_title()
                 url = ev.display_url()
+                when = ev.ts_utc
+                if ev.last_ts_utc and ev.last_ts_utc != ev.ts_utc:
+                    when = f"{ev.ts_utc} … {ev.last_ts_utc}"
+                seen = f" ×{ev.count}" if ev.count > 1 else ""
                 if title and url:
-                    lines.append(f"- {ev.ts_utc} — {title} ({url})")
+                    lines.append(f"- {when} — {title} ({url}){seen}")
                 elif url:
-                    lines.append(f"- {ev.ts_utc} — {url}")
+                    lines.append(f"- {when} — {url}{seen}")
                 elif title:
-                    lines.append(f"- {ev.ts_utc} — {title}")
+                    lines.append(f"- {when} — {title}{seen}")
                 else:
-                    lines.append(f"- {ev.ts_utc} — (redacted)")
+                    lines.append(f"- {when} — (redacted){seen}")
             if len(b.evidence) > 20:
                 lines.append(f"- … ({len(b.evidence) - 20} more)")
             lines.append("")
 
+    if len(lines) == 2:
+        return "# Draft timesheet\n\n(no activity in range)\n"
     return "\n".join(lines) + "\n"
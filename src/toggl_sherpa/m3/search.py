@@ -0,0 +1,154 @@
+"""Full-text search over window titles and allowed tab history (schema v12).
+
+`title_fts` and `url_fts` hold each distinct focus title, allowed tab
+title and allowed tab URL once (rowid = its `titles`/`urls` id; redacted
+tab strings are never indexed). A query is matched there first, the
+matching ids are then looked up in `sample_rows`/`tab_event_rows` for the
+time range, and the hits are merged into sessions: runs of matching
+activity with no gap longer than `gap_s`.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from toggl_sherpa.m3.query import parse_ts, seconds_between
+from toggl_sherpa.profiling import timed
+
+DEFAULT_GAP_S = 300
+# Matching titles/URLs listed per session.
+MAX_MATCHES = 3
+
+
+@dataclass(frozen=True)
+class SearchSession:
+    start_ts_utc: str
+    end_ts_utc: str
+    samples: int
+    tab_events: int
+    # Distinct matching titles/URLs, most frequent first (at most MAX_MATCHES).
+    matches: tuple[str, ...]
+
+    @property
+    def seconds(self) -> int:
+        return seconds_between(self.start_ts_utc, self.end_ts_utc)
+
+
+def match_expression(query: str) -> str:
+    """An FTS5 MATCH expression for free text: every word has to match.
+
+    Words are quoted, so punctuation in them (`ABC-123`, `parser.py`) means
+    a phrase of their tokens rather than FTS syntax; a trailing `*` keeps
+    prefix matching.
+    """
+    terms = []
+    for word in query.split():
+        body = word.rstrip("*")
+        if not any(c.isalnum() for c in body):
+            continue
+        terms.append('"' + body.replace('"', '""') + '"' + ("*" if body != word else ""))
+    if not terms:
+        raise ValueError(f"nothing to search for in {query!r}")
+    return " ".join(terms)
+
+
+def time_bound(date_or_ts: str, *, end: bool = False) -> str:
+    """A UTC timestamp for a `--since`/`--until` value.
+
+    A date (YYYY-MM-DD) means the start of that day, or with `end` the
+    start of the next one, so `--until` includes the whole day.
+    """
+    if len(date_or_ts) == 10:
+        d = datetime.fromisoformat(date_or_ts).date()
+        start = datetime(d.year, d.month, d.day, tzinfo=UTC)
+        return (start + timedelta(days=1) if end else start).isoformat()
+    dt = datetime.fromisoformat(date_or_ts.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.astimezone(UTC).isoformat()
+
+
+_SAMPLE_HITS = """
+    SELECT s.ts_utc, s.interval_s, f.title
+    FROM title_fts f
+    JOIN sample_rows s ON s.title_id = f.rowid
+    WHERE title_fts MATCH ? AND s.ts_utc >= ? AND s.ts_utc < ?
+"""
+
+_TAB_HITS = """
+    SELECT e.id, e.ts_utc, f.title
+    FROM title_fts f
+    JOIN tab_event_rows e ON e.title_id = f.rowid
+    WHERE title_fts MATCH ? AND e.allowed = 1 AND e.ts_utc >= ? AND e.ts_utc < ?
+    UNION ALL
+    SELECT e.id, e.ts_utc, f.url
+    FROM url_fts f
+    JOIN tab_event_rows e ON e.url_id = f.rowid
+    WHERE url_fts MATCH ? AND e.allowed = 1 AND e.ts_utc >= ? AND e.ts_utc < ?
+"""
+
+
+@timed("db.fetch")
+def search(
+    conn: sqlite3.Connection,
+    query: str,
+    *,
+    since: str | None = None,
+    until: str | None = None,
+    gap_s: int = DEFAULT_GAP_S,
+    assumed_interval_s: int = 10,
+) -> list[SearchSession]:
+    """Sessions of activity whose window title, tab title or tab URL matches `query`.
+
+    A matching sample covers its `interval_s` (or `assumed_interval_s`), a
+    matching tab event just its timestamp. Raises ValueError for a query
+    with no words in it.
+    """
+    expr = match_expression(query)
+    lo = time_bound(since) if since else ""
+    hi = time_bound(until, end=True) if until else "\U0010ffff"
+
+    # (start, end, is_sample, text)
+    hits: list[tuple[datetime, datetime, bool, str]] = []
+    for ts, interval_s, title in conn.execute(_SAMPLE_HITS, (expr, lo, hi)):
+        start = parse_ts(ts)
+        covered = interval_s if interval_s is not None else assumed_interval_s
+        hits.append((start, start + timedelta(seconds=round(covered)), True, title))
+    seen_events: set[int] = set()
+    for event_id, ts, text in conn.execute(_TAB_HITS, (expr, lo, hi, expr, lo, hi)):
+        if event_id in seen_events:
+            continue
+        seen_events.add(event_id)
+        start = parse_ts(ts)
+        hits.append((start, start, False, text))
+    hits.sort(key=lambda h: h[0])
+
+    sessions: list[SearchSession] = []
+    gap = timedelta(seconds=gap_s)
+    i = 0
+    while i < len(hits):
+        start, end = hits[i][0], hits[i][1]
+        texts: Counter[str] = Counter()
+        n_samples = n_tabs = 0
+        while i < len(hits) and hits[i][0] <= end + gap:
+            _, hit_end, is_sample, text = hits[i]
+            end = max(end, hit_end)
+            texts[text] += 1
+            if is_sample:
+                n_samples += 1
+            else:
+                n_tabs += 1
+            i += 1
+        sessions.append(
+            SearchSession(
+                start_ts_utc=start.isoformat(),
+                end_ts_utc=end.isoformat(),
+                samples=n_samples,
+                tab_events=n_tabs,
+                matches=tuple(t for t, _ in texts.most_common(MAX_MATCHES)),
+            )
+        )
+    return sessions
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
+from dataclasses import replace
 from datetime import timedelta
 from urllib.parse import urlparse
 
-from toggl_sherpa.m3.model import EvidenceItem, SampleRow, TabEventRow, TimesheetBlock
+from toggl_sherpa.m3.model import (
+    EvidenceItem,
+    EvidenceRef,
+    SampleRow,
+    TabEventRow,
+    TimesheetBlock,
+)
 from toggl_sherpa.m3.query import parse_ts, seconds_between
 from toggl_sherpa.m3.suggest import suggest_for_sample
+from toggl_sherpa.profiling import span, timed
 
 
 def _label_for(sample: SampleRow, tab: TabEventRow | None) -> str:
@@ -36,6 +44,156 @@ def _tab_by_sample_id(tab_events: Iterable[TabEventRow]) -> dict[int, TabEventRo
     return out
 
 
+def _covered_until(sample: SampleRow, next_ts: str | None, assumed_interval_s: int) -> str:
+    """Where the time a sample stands for ends.
+
+    `next_ts` is the next sample of any kind, idle ones included. Samples
+    with a recorded `interval_s` cover exactly that long (but not past the
+    next sample); rows without one (older loggers, focus events) run until
+    the next sample, or `assumed_interval_s` for the last one.
+    """
+    if sample.interval_s is None:
+        if next_ts is not None:
+            return next_ts
+        return (parse_ts(sample.ts_utc) + timedelta(seconds=assumed_interval_s)).isoformat()
+    end = parse_ts(sample.ts_utc) + timedelta(seconds=round(sample.interval_s))
+    if next_ts is not None and parse_ts(next_ts) < end:
+        return next_ts
+    return end.isoformat()
+
+
+def _smooth_labels(
+    active: list[tuple[SampleRow, TabEventRow | None, str | None]],
+    labels: list[str],
+    *,
+    min_dwell_s: int,
+    gap_threshold_s: int,
+    assumed_interval_s: int,
+) -> list[str]:
+    """`labels` with short interruptions absorbed into the surrounding activity.
+
+    A run of consecutive samples with one label that covers less than
+    `min_dwell_s` (a quick alt-tab, a glance at chat) takes the label of the
+    last run before it that lasted long enough, or, at the start of a
+    stretch, of the first one after it. Stretches are separated by gaps of
+    more than `gap_threshold_s`, which still split blocks; a stretch with no
+    long enough run keeps its labels.
+    """
+    # Runs as [first index, end index, label, seconds covered].
+    stretches: list[list[list]] = []
+    prev_t: float | None = None
+    for i, (s, _t, next_ts) in enumerate(active):
+        # As `_covered_until`, on epoch seconds (each timestamp parsed once).
+        t = parse_ts(s.ts_utc).timestamp()
+        next_t = parse_ts(next_ts).timestamp() if next_ts is not None else None
+        if s.interval_s is None:
+            secs = next_t - t if next_t is not None else assumed_interval_s
+        else:
+            secs = round(s.interval_s)
+            if next_t is not None:
+                secs = min(secs, next_t - t)
+        if prev_t is None or t - prev_t > gap_threshold_s:
+            stretches.append([[i, i + 1, labels[i], secs]])
+        elif stretches[-1][-1][2] == labels[i]:
+            stretches[-1][-1][1] = i + 1
+            stretches[-1][-1][3] += secs
+        else:
+            stretches[-1].append([i, i + 1, labels[i], secs])
+        prev_t = t
+
+    out = list(labels)
+    for runs in stretches:
+        anchor = next((r[2] for r in runs if r[3] >= min_dwell_s), None)
+        if anchor is None:
+            continue
+        for first, end, label, secs in runs:
+            if secs >= min_dwell_s:
+                anchor = label
+            elif label != anchor:
+                out[first:end] = [anchor] * (end - first)
+    return out
+
+
+_EvidenceKey = tuple[bool, str | None, str | None, str | None, str | None]
+
+
+class _EvidenceAcc:
+    """Collects one block's tab events: per tick, aggregated, or as id refs."""
+
+    def __init__(self, per_tick: bool, ref_db: str | None = None) -> None:
+        self.per_tick = per_tick
+        self.ref_db = ref_db
+        self.ticks: list[EvidenceItem] = []
+        # key -> [first_ts, last_ts, count]; dicts keep first-seen order.
+        self.seen: dict[_EvidenceKey, list] = {}
+        self.ids: list[int] = []
+
+    def add(self, t: TabEventRow) -> None:
+        if self.ref_db is not None:
+            self.ids.append(t.id)
+            return
+        if self.per_tick:
+            self.ticks.append(
+                EvidenceItem(
+                    ts_utc=t.ts_utc,
+                    allowed=t.allowed,
+                    url=t.url,
+                    title=t.title,
+                    url_redacted=t.url_redacted,
+                    title_redacted=t.title_redacted,
+                )
+            )
+            return
+        key = (t.allowed, t.url, t.title, t.url_redacted, t.title_redacted)
+        acc = self.seen.get(key)
+        if acc is None:
+            self.seen[key] = [t.ts_utc, t.ts_utc, 1]
+        else:
+            acc[1] = t.ts_utc
+            acc[2] += 1
+
+    def ref(self) -> EvidenceRef | None:
+        if self.ref_db is None:
+            return None
+        ranges: list[tuple[int, int]] = []
+        for i in sorted(set(self.ids)):
+            if ranges and i == ranges[-1][1] + 1:
+                ranges[-1] = (ranges[-1][0], i)
+            else:
+                ranges.append((i, i))
+        return EvidenceRef(db=self.ref_db, ranges=ranges)
+
+    def items(self) -> list[EvidenceItem]:
+        if self.per_tick:
+            return self.ticks
+        return [
+            EvidenceItem(
+                ts_utc=first,
+                allowed=allowed,
+                url=url,
+                title=title,
+                url_redacted=url_redacted,
+                title_redacted=title_redacted,
+                last_ts_utc=last,
+                count=count,
+            )
+            for (allowed, url, title, url_redacted, title_redacted), (first, last, count) in (
+                self.seen.items()
+            )
+        ]
+
+
+def evidence_from_tab_events(
+    tab_events: Iterable[TabEventRow], *, per_tick: bool = False
+) -> list[EvidenceItem]:
+    """Evidence items for tab events in time order (aggregated unless `per_tick`)."""
+    acc = _EvidenceAcc(per_tick)
+    for t in tab_events:
+        acc.add(t)
+    return acc.items()
+
+
+@timed("summarise")
 def summarise_blocks(
     samples: list[SampleRow],
     tab_events: list[TabEventRow],
@@ -44,31 +202,69 @@ def summarise_blocks(
     gap_threshold_s: int = 90,
     min_block_s: int = 60,
     assumed_interval_s: int = 10,
+    min_dwell_s: int = 0,
+    normalise_title: Callable[[str | None], str | None] | None = None,
+    per_tick_evidence: bool = False,
+    evidence_ref_db: str | None = None,
 ) -> list[TimesheetBlock]:
     """Create draft timesheet blocks from samples.
 
     - Drops samples deemed idle (idle_ms >= idle_threshold_ms)
+    - With `normalise_title` (e.g. an `m3.normalise.TitleNormaliser`),
+      labels and suggestions see normalised window and tab titles;
+      evidence keeps the titles as seen
+    - With `min_dwell_s`, absorbs label runs shorter than that into the
+      activity around them first, so a short interruption doesn't split a
+      block (see `_smooth_labels`); the block's suggestion then comes from
+      its own label's samples
     - Splits blocks when label changes or when there is a big time gap
+    - Ends each block where its last sample's time runs out: its recorded
+      `interval_s`, else the next (possibly idle) sample, else
+      `assumed_interval_s`; time covered by dropped idle samples isn't counted
+    - Collapses each block's tab events into one evidence item per distinct
+      url/title (first/last seen, count); `per_tick_evidence` keeps one item
+      per tab event instead
+    - With `evidence_ref_db` (the source DB's `db_fingerprint`), blocks
+      reference their tab_events id ranges instead of embedding evidence;
+      see `m3.query.hydrate_evidence`
 
     Assumes samples are ordered by ts_utc.
     """
 
     tab_map = _tab_by_sample_id(tab_events)
 
-    active: list[tuple[SampleRow, TabEventRow | None]] = []
-    for s in samples:
+    # (sample, its tab event, the next sample's ts whether idle or not)
+    active: list[tuple[SampleRow, TabEventRow | None, str | None]] = []
+    for i, s in enumerate(samples):
         if s.idle_ms is not None and s.idle_ms >= idle_threshold_ms:
             continue
-        active.append((s, tab_map.get(s.id)))
+        next_ts = samples[i + 1].ts_utc if i + 1 < len(samples) else None
+        if normalise_title is not None:
+            title = normalise_title(s.focus_title)
+            if title != s.focus_title:
+                s = replace(s, focus_title=title)
+        active.append((s, tab_map.get(s.id), next_ts))
 
     if not active:
         return []
 
+    raw_labels = [_label_for(s, t) for s, t, _next_ts in active]
+    labels = raw_labels
+    if min_dwell_s > 0:
+        with span("smooth"):
+            labels = _smooth_labels(
+                active,
+                raw_labels,
+                min_dwell_s=min_dwell_s,
+                gap_threshold_s=gap_threshold_s,
+                assumed_interval_s=assumed_interval_s,
+            )
+
     blocks: list[TimesheetBlock] = []
 
     cur_start = active[0][0].ts_utc
-    cur_label = _label_for(active[0][0], active[0][1])
-    cur_evidence: list[EvidenceItem] = []
+    cur_label = labels[0]
+    cur_evidence = _EvidenceAcc(per_tick_evidence, evidence_ref_db)
     last_sample: SampleRow = active[0][0]
     last_tab: TabEventRow | None = active[0][1]
 
@@ -78,7 +274,13 @@ def summarise_blocks(
         if secs < min_block_s:
             return
 
-        sug = suggest_for_sample(last_sample, last_tab)
+        tab = last_tab
+        if normalise_title is not None and tab is not None:
+            title = normalise_title(tab.title)
+            if title != tab.title:
+                tab = replace(tab, title=title)
+        with span("suggest"):
+            sug = suggest_for_sample(last_sample, tab)
 
         blocks.append(
             TimesheetBlock(
@@ -88,58 +290,46 @@ def summarise_blocks(
                 label=cur_label,
                 project_suggestion=sug.project,
                 tags_suggestion=sug.tags,
-                evidence=cur_evidence,
+                evidence=cur_evidence.items(),
+                evidence_ref=cur_evidence.ref(),
             )
         )
 
     prev_ts = active[0][0].ts_utc
+    prev_sample, prev_next_ts = active[0][0], active[0][2]
 
-    for i, (s, t) in enumerate(active):
+    for i, (s, t, next_ts) in enumerate(active):
         if i == 0:
             # Evidence belongs to the first (current) block.
             if t is not None:
-                cur_evidence.append(
-                    EvidenceItem(
-                        ts_utc=t.ts_utc,
-                        allowed=t.allowed,
-                        url=t.url,
-                        title=t.title,
-                        url_redacted=t.url_redacted,
-                        title_redacted=t.title_redacted,
-                    )
-                )
+                cur_evidence.add(t)
             continue
 
-        this_label = _label_for(s, t)
+        this_label = labels[i]
         gap_s = seconds_between(prev_ts, s.ts_utc)
 
         if this_label != cur_label or gap_s > gap_threshold_s:
-            # Close the current block at the *start* of this sample.
-            flush(s.ts_utc)
+            # Close the current block where the previous sample's time ran
+            # out: at the latest, the *start* of this sample.
+            flush(_covered_until(prev_sample, prev_next_ts, assumed_interval_s))
             cur_start = s.ts_utc
             cur_label = this_label
-            cur_evidence = []
+            cur_evidence = _EvidenceAcc(per_tick_evidence, evidence_ref_db)
+            last_sample, last_tab = s, t
 
         # Evidence belongs to the current block (after any boundary split).
         if t is not None:
-            cur_evidence.append(
-                EvidenceItem(
-                    ts_utc=t.ts_utc,
-                    allowed=t.allowed,
-                    url=t.url,
-                    title=t.title,
-                    url_redacted=t.url_redacted,
-                    title_redacted=t.title_redacted,
-                )
-            )
+            cur_evidence.add(t)
 
         prev_ts = s.ts_utc
-        last_sample = s
-        last_tab = t
+        prev_sample, prev_next_ts = s, next_ts
+        # Absorbed interruptions don't drive the block's suggestion.
+        if raw_labels[i] == this_label:
+            last_sample = s
+            last_tab = t
 
-    # Give the final sample a minimal duration, otherwise single-sample blocks
+    # Give the final sample its duration, otherwise single-sample blocks
     # would collapse to 0 seconds.
-    end_final = (parse_ts(prev_ts) + timedelta(seconds=assumed_interval_s)).isoformat()
-    flush(end_final)
+    flush(_covered_until(prev_sample, prev_next_ts, assumed_interval_s))
 
     return blocks
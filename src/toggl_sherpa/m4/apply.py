@@ -1,53 +1,20 @@
 from __future__ import annotations
 
 import csv
-import json
+from collections.abc import Iterable, Iterator
 from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
 
-from toggl_sherpa.m3.model import EvidenceItem, TimesheetBlock
+from toggl_sherpa.m3.model import EvidenceItem, EvidenceRef, TimesheetBlock
 from toggl_sherpa.m3.query import parse_ts
+from toggl_sherpa.m4.blockfile import iter_blocks
+from toggl_sherpa.profiling import timed
 
 
 def load_blocks_json(path: str | Path) -> list[TimesheetBlock]:
-    p = Path(path)
-    data = json.loads(p.read_text(encoding="utf-8"))
-    if not isinstance(data, list):
-        raise ValueError("expected a list of blocks")
-
-    blocks: list[TimesheetBlock] = []
-    for i, d in enumerate(data):
-        if not isinstance(d, dict):
-            raise ValueError(f"block[{i}] must be an object")
-        ev = []
-        for j, e in enumerate(d.get("evidence", [])):
-            if not isinstance(e, dict):
-                raise ValueError(f"block[{i}].evidence[{j}] must be an object")
-            ev.append(
-                EvidenceItem(
-                    ts_utc=str(e["ts_utc"]),
-                    allowed=bool(e["allowed"]),
-                    url=e.get("url"),
-                    title=e.get("title"),
-                    url_redacted=e.get("url_redacted"),
-                    title_redacted=e.get("title_redacted"),
-                )
-            )
-
-        blocks.append(
-            TimesheetBlock(
-                start_ts_utc=str(d["start_ts_utc"]),
-                end_ts_utc=str(d["end_ts_utc"]),
-                seconds=int(d["seconds"]),
-                label=str(d["label"]),
-                project_suggestion=d.get("project_suggestion"),
-                tags_suggestion=[str(x) for x in d.get("tags_suggestion", [])],
-                evidence=ev,
-            )
-        )
-
-    return blocks
+    """Load every block from a block file (JSON array or JSON Lines)."""
+    return list(iter_blocks(path))
 
 
 def merge_adjacent_blocks(
@@ -55,39 +22,81 @@ def merge_adjacent_blocks(
     *,
     gap_seconds: int = 60,
 ) -> list[TimesheetBlock]:
+    """List form of `iter_merged_blocks`."""
+    return list(iter_merged_blocks(blocks, gap_seconds=gap_seconds))
+
+
+def iter_merged_blocks(
+    blocks: Iterable[TimesheetBlock],
+    *,
+    gap_seconds: int = 60,
+) -> Iterator[TimesheetBlock]:
     """Merge adjacent blocks if they are effectively contiguous and identical enough.
 
     Criteria:
     - gap between end and next start <= gap_seconds
     - same label/project/tags
 
-    Evidence is concatenated (stable order).
+    Evidence (and evidence references) are concatenated (stable order).
+
+    Single pass: each run of mergeable blocks is accumulated and materialised
+    once, and every timestamp is parsed once.
     """
 
-    if not blocks:
-        return []
+    it = iter(blocks)
+    first = next(it, None)
+    if first is None:
+        return
+
+    run_end = first.end_ts_utc
+    run_end_dt = parse_ts(run_end)
+    run_seconds = first.seconds
+    run_evidence: list[EvidenceItem] | None = None  # Only built for runs of 2+.
+    run_ref = first.evidence_ref
 
-    merged: list[TimesheetBlock] = [blocks[0]]
-    for b in blocks[1:]:
-        prev = merged[-1]
-        gap = int((parse_ts(b.start_ts_utc) - parse_ts(prev.end_ts_utc)).total_seconds())
+    for b in it:
+        gap = int((parse_ts(b.start_ts_utc) - run_end_dt).total_seconds())
 
         if (
             gap <= gap_seconds
-            and b.label == prev.label
-            and b.project_suggestion == prev.project_suggestion
-            and b.tags_suggestion == prev.tags_suggestion
+            and b.label == first.label
+            and b.project_suggestion == first.project_suggestion
+            and b.tags_suggestion == first.tags_suggestion
         ):
-            merged[-1] = replace(
-                prev,
-                end_ts_utc=b.end_ts_utc,
-                seconds=prev.seconds + b.seconds + max(gap, 0),
-                evidence=[*prev.evidence, *b.evidence],
-            )
+            if run_evidence is None:
+                run_evidence = list(first.evidence)
+            run_evidence.extend(b.evidence)
+            if b.evidence_ref is not None:
+                run_ref = b.evidence_ref if run_ref is None else run_ref.extend(b.evidence_ref)
+            run_seconds += b.seconds + max(gap, 0)
         else:
-            merged.append(b)
-
-    return merged
+            yield _run_block(first, run_end, run_seconds, run_evidence, run_ref)
+            first = b
+            run_seconds = b.seconds
+            run_evidence = None
+            run_ref = b.evidence_ref
+        run_end = b.end_ts_utc
+        run_end_dt = parse_ts(run_end)
+
+    yield _run_block(first, run_end, run_seconds, run_evidence, run_ref)
+
+
+def _run_block(
+    first: TimesheetBlock,
+    end_ts_utc: str,
+    seconds: int,
+    evidence: list[EvidenceItem] | None,
+    evidence_ref: EvidenceRef | None,
+) -> TimesheetBlock:
+    if evidence is None:
+        return first
+    return replace(
+        first,
+        end_ts_utc=end_ts_utc,
+        seconds=seconds,
+        evidence=evidence,
+        evidence_ref=evidence_ref,
+    )
 
 
 def _duration_hh_mm_ss(seconds: int) -> str:
@@ -98,8 +107,9 @@ def _duration_hh_mm_ss(seconds: int) -> str:
     return f"{h:02d}:{m:02d}:{s:02d}"
 
 
-def write_toggl_csv(path: str | Path, blocks: list[TimesheetBlock]) -> None:
-    """Write a Toggl Track CSV import file.
+@timed("render")
+def write_toggl_csv(path: str | Path, blocks: Iterable[TimesheetBlock]) -> int:
+    """Write a Toggl Track CSV import file; returns the row count.
 
     Uses UTC timestamps from the blocks.
 
@@ -115,6 +125,7 @@ def write_toggl_csv(path: str | Path, blocks: list[TimesheetBlock]) -> None:
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
 
+    n = 0
     with p.open("w", encoding="utf-8", newline="") as f:
         w = csv.DictWriter(
             f,
@@ -141,3 +152,6 @@ def write_toggl_csv(path: str | Path, blocks: list[TimesheetBlock]) -> None:
                     "Duration": _duration_hh_mm_ss(b.seconds),
                 }
             )
+            n += 1
+
+    return n
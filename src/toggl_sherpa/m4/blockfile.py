@@ -0,0 +1,168 @@
+"""Read and write timesheet block files.
+
+Two formats, picked by file extension:
+
+- `.json` (default): one indented JSON array, as written by earlier versions.
+- `.jsonl` / `.ndjson`: one block object per line. These are read and
+  written record by record, so `report merge`, `report apply` and `apply`
+  never hold the whole file (or its text) in memory.
+
+Either can be gzip-compressed by adding `.gz` (e.g. `reviewed.jsonl.gz`).
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import IO, Any
+
+from toggl_sherpa.m3.model import EvidenceItem, EvidenceRef, TimesheetBlock
+from toggl_sherpa.profiling import span, timed
+
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+
+
+def _suffixes(path: str | Path) -> tuple[bool, str]:
+    """(gzipped, format suffix) for a block file path."""
+    p = Path(path)
+    gz = p.suffix.lower() == ".gz"
+    fmt = Path(p.stem).suffix.lower() if gz else p.suffix.lower()
+    return gz, fmt
+
+
+def is_jsonl(path: str | Path) -> bool:
+    return _suffixes(path)[1] in JSONL_SUFFIXES
+
+
+def _open(path: str | Path, mode: str) -> IO[str]:
+    if _suffixes(path)[0]:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def block_from_dict(d: Any, *, where: str, evidence: bool = True) -> TimesheetBlock:
+    if not isinstance(d, dict):
+        raise ValueError(f"{where} must be an object")
+    ev: list[EvidenceItem] = []
+    for j, e in enumerate(d.get("evidence", []) if evidence else []):
+        if not isinstance(e, dict):
+            raise ValueError(f"{where}.evidence[{j}] must be an object")
+        ev.append(
+            EvidenceItem(
+                ts_utc=str(e["ts_utc"]),
+                allowed=bool(e["allowed"]),
+                url=e.get("url"),
+                title=e.get("title"),
+                url_redacted=e.get("url_redacted"),
+                title_redacted=e.get("title_redacted"),
+                last_ts_utc=e.get("last_ts_utc"),
+                count=int(e.get("count", 1)),
+            )
+        )
+
+    return TimesheetBlock(
+        start_ts_utc=str(d["start_ts_utc"]),
+        end_ts_utc=str(d["end_ts_utc"]),
+        seconds=int(d["seconds"]),
+        label=str(d["label"]),
+        project_suggestion=d.get("project_suggestion"),
+        tags_suggestion=[str(x) for x in d.get("tags_suggestion") or []],
+        evidence=ev,
+        evidence_ref=_ref_from_dict(d.get("evidence_ref"), where=where) if evidence else None,
+    )
+
+
+def _ref_from_dict(d: Any, *, where: str) -> EvidenceRef | None:
+    if d is None:
+        return None
+    if not isinstance(d, dict):
+        raise ValueError(f"{where}.evidence_ref must be an object")
+    return EvidenceRef(
+        db=str(d["db"]),
+        ranges=[(int(lo), int(hi)) for lo, hi in d.get("ranges", [])],
+    )
+
+
+def block_to_dict(b: TimesheetBlock) -> dict[str, Any]:
+    """Same shape as `to_jsonable(b)`, without `asdict`'s deep copies."""
+    return {
+        "start_ts_utc": b.start_ts_utc,
+        "end_ts_utc": b.end_ts_utc,
+        "seconds": b.seconds,
+        "label": b.label,
+        "project_suggestion": b.project_suggestion,
+        "tags_suggestion": list(b.tags_suggestion),
+        "evidence": [
+            {
+                "ts_utc": e.ts_utc,
+                "allowed": e.allowed,
+                "url": e.url,
+                "title": e.title,
+                "url_redacted": e.url_redacted,
+                "title_redacted": e.title_redacted,
+                "last_ts_utc": e.last_ts_utc,
+                "count": e.count,
+            }
+            for e in b.evidence
+        ],
+        "evidence_ref": (
+            None
+            if b.evidence_ref is None
+            else {
+                "db": b.evidence_ref.db,
+                "ranges": [[lo, hi] for lo, hi in b.evidence_ref.ranges],
+            }
+        ),
+    }
+
+
+def iter_blocks(path: str | Path, *, evidence: bool = True) -> Iterator[TimesheetBlock]:
+    """Yield the blocks stored in `path`.
+
+    JSON Lines files are streamed; JSON arrays are parsed in one go. Pass
+    `evidence=False` to skip building evidence items nobody will look at.
+    """
+    # Spans stop at each yield, so the consumer's time isn't counted as reading.
+    with _open(path, "r") as f:
+        if not is_jsonl(path):
+            with span("blocks.read"):
+                data = json.load(f)
+            if not isinstance(data, list):
+                raise ValueError("expected a list of blocks")
+            for i, d in enumerate(data):
+                with span("blocks.read"):
+                    b = block_from_dict(d, where=f"block[{i}]", evidence=evidence)
+                yield b
+            return
+
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            with span("blocks.read"):
+                try:
+                    d = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"line {lineno}: invalid JSON ({e.msg})") from e
+                b = block_from_dict(d, where=f"line {lineno}", evidence=evidence)
+            yield b
+
+
+@timed("blocks.write")
+def write_blocks(path: str | Path, blocks: Iterable[TimesheetBlock]) -> int:
+    """Write blocks in the format implied by `path`; returns the block count."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with _open(path, "w") as f:
+        if is_jsonl(path):
+            for b in blocks:
+                f.write(json.dumps(block_to_dict(b), ensure_ascii=False))
+                f.write("\n")
+                n += 1
+            return n
+
+        data = [block_to_dict(b) for b in blocks]
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+        return len(data)
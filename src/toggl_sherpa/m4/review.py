@@ -1,24 +1,28 @@
 from __future__ import annotations
 
-import json
+from collections.abc import Iterable
 from dataclasses import replace
 
 import typer
 
 from toggl_sherpa.m3.model import TimesheetBlock
-from toggl_sherpa.m3.query import to_jsonable
+from toggl_sherpa.m4.blockfile import write_blocks
 
 
 def _fmt_block(b: TimesheetBlock, i: int, n: int) -> str:
     mins = round(b.seconds / 60)
     proj = b.project_suggestion or "(unsuggested)"
     tags = ", ".join(b.tags_suggestion) if b.tags_suggestion else "(none)"
+    ticks = sum(e.count for e in b.evidence)
+    seen = f" from {ticks} tab event(s)" if ticks != len(b.evidence) else ""
+    if b.evidence_ref is not None:
+        seen = f" ({b.evidence_ref.event_count()} tab event(s) by reference)"
     return (
         f"[{i}/{n}] {b.start_ts_utc} → {b.end_ts_utc} ({mins} min)\n"
         f"  label: {b.label}\n"
         f"  project: {proj}\n"
         f"  tags: {tags}\n"
-        f"  evidence: {len(b.evidence)} item(s)\n"
+        f"  evidence: {len(b.evidence)} item(s){seen}\n"
     )
 
 
@@ -85,7 +89,6 @@ def interactive_review(
     return accepted
 
 
-def write_reviewed_json(path: str, blocks: list[TimesheetBlock]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(to_jsonable(blocks), f, ensure_ascii=False, indent=2)
-        f.write("\n")
+def write_reviewed_json(path: str, blocks: Iterable[TimesheetBlock]) -> int:
+    """Write reviewed blocks; `.jsonl`/`.gz` paths pick the streaming formats."""
+    return write_blocks(path, blocks)
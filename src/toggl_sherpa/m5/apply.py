@@ -1,20 +1,39 @@
 from __future__ import annotations
 
-import json
 import os
-from dataclasses import dataclass
+import sqlite3
+import threading
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from datetime import timedelta
 from pathlib import Path
 
 import typer
 
 from toggl_sherpa.m1 import db as db_mod
 from toggl_sherpa.m3.model import TimesheetBlock
-from toggl_sherpa.m5.toggl_api import TogglConfig, create_time_entry
+from toggl_sherpa.m4.blockfile import iter_blocks
+from toggl_sherpa.m5 import metacache
+from toggl_sherpa.m5.reconcile import (
+    IntervalIndex,
+    RemoteEntry,
+    entry_key,
+    fetch_remote_entries,
+    plan_window,
+    reconcile,
+)
+from toggl_sherpa.m5.toggl_api import TogglApiError, TogglClient, TogglConfig
+from toggl_sherpa.m6 import journal
 from toggl_sherpa.m6.idempotency import (
-    already_applied,
+    applied_entry_ids,
+    applied_fingerprints,
+    applied_overlapping,
     fingerprint,
-    record_applied,
+    record_applied_many,
 )
+from toggl_sherpa.m6.journal import JournalItem
+from toggl_sherpa.profiling import timed
 
 
 @dataclass(frozen=True)
@@ -27,28 +46,14 @@ class ApplyPlanItem:
 
 
 def _load_blocks(path: Path) -> list[TimesheetBlock]:
-    obj = json.loads(path.read_text(encoding="utf-8"))
-    if not isinstance(obj, list):
-        raise ValueError("expected a JSON array")
-
-    blocks: list[TimesheetBlock] = []
-    for b in obj:
-        if not isinstance(b, dict):
-            raise ValueError("expected array of objects")
-        blocks.append(
-            TimesheetBlock(
-                start_ts_utc=str(b["start_ts_utc"]),
-                end_ts_utc=str(b["end_ts_utc"]),
-                seconds=int(b["seconds"]),
-                label=str(b["label"]),
-                project_suggestion=(b.get("project_suggestion") or None),
-                tags_suggestion=list(b.get("tags_suggestion") or []),
-                evidence=[],
-            )
-        )
-    return blocks
+    # Evidence isn't needed to apply, so it is never materialised.
+    return [
+        replace(b, project_suggestion=b.project_suggestion or None)
+        for b in iter_blocks(path, evidence=False)
+    ]
 
 
+@timed("plan")
 def build_plan(
     blocks: list[TimesheetBlock],
     *,
@@ -68,7 +73,11 @@ def build_plan(
             if tt and tt not in tags_out:
                 tags_out.append(tt)
 
-        proj_id = project_ids.get(b.project_suggestion) if b.project_suggestion else None
+        proj_id = None
+        if b.project_suggestion:
+            proj_id = project_ids.get(b.project_suggestion)
+            if proj_id is None:
+                proj_id = project_ids.get(b.project_suggestion.strip().casefold())
 
         desc_parts = [b.label]
         if b.project_suggestion:
@@ -89,6 +98,37 @@ def build_plan(
     return plan
 
 
+def project_ids_with_cache(
+    blocks: list[TimesheetBlock],
+    project_ids: dict[str, int],
+    *,
+    db_path: Path,
+    workspace_id: int | None,
+    cfg: TogglConfig | None = None,
+) -> dict[str, int]:
+    """Config `project_ids` plus Toggl project names from the metadata cache.
+
+    Explicit config entries win, and the cache is only consulted when some
+    block's project suggestion isn't in the config. With `cfg`, a stale cache
+    is refreshed first (falling back to the cached names if Toggl can't be
+    reached); without it, resolution is fully offline.
+    """
+    wanted = {b.project_suggestion for b in blocks if b.project_suggestion}
+    if workspace_id is None or wanted <= project_ids.keys():
+        return dict(project_ids)
+    conn = db_mod.connect(db_path)
+    try:
+        if cfg is not None:
+            try:
+                with TogglClient.from_config(cfg) as client:
+                    metacache.load(conn, client, workspace_id=workspace_id, kind="projects")
+            except TogglApiError as e:
+                typer.echo(f"note: using cached Toggl projects ({e})")
+        return {**metacache.project_ids_by_name(conn, workspace_id=workspace_id), **project_ids}
+    finally:
+        conn.close()
+
+
 def print_plan(plan: list[ApplyPlanItem]) -> None:
     typer.echo(f"plan: {len(plan)} time entr(y/ies)")
     for i, p in enumerate(plan, start=1):
@@ -96,7 +136,20 @@ def print_plan(plan: list[ApplyPlanItem]) -> None:
         typer.echo(f"{i:>2}. {p.start} → {p.stop} | {tag_s} | {p.description}")
 
 
-def load_config_from_env() -> TogglConfig:
+def env_workspace_id() -> int | None:
+    """`TOGGL_WORKSPACE_ID` if set to an int (no token needed)."""
+    try:
+        return int(os.environ.get("TOGGL_WORKSPACE_ID") or "")
+    except ValueError:
+        return None
+
+
+def load_config_from_env(*, max_rps: float | None = None, concurrency: int = 1) -> TogglConfig:
+    """Toggl config from the environment.
+
+    Requests aren't limited client-side unless `max_rps` is given (0 or None
+    means no limit); 429s are retried after Retry-After by `RetryPolicy`.
+    """
     tok = os.environ.get("TOGGL_API_TOKEN")
     wid = os.environ.get("TOGGL_WORKSPACE_ID")
     if not tok:
@@ -107,7 +160,322 @@ def load_config_from_env() -> TogglConfig:
         wid_i = int(wid)
     except ValueError as e:
         raise typer.BadParameter("TOGGL_WORKSPACE_ID must be an int") from e
-    return TogglConfig(api_token=tok, workspace_id=wid_i)
+    return TogglConfig(
+        api_token=tok,
+        workspace_id=wid_i,
+        max_rps=max_rps or None,
+        burst=concurrency,
+        pool_maxsize=max(10, concurrency),
+    )
+
+
+# Successful creates are written to the ledger/journal this many at a time.
+LEDGER_BATCH = 50
+
+
+@dataclass
+class ApplyResult:
+    created: list[dict] = field(default_factory=list)
+    # Skipped before sending: already in the ledger (or repeated in the plan).
+    # On resume, journal items that another run has applied since.
+    skipped_items: list[ApplyPlanItem] = field(default_factory=list)
+    # Interrupted in-flight requests that turned out to exist in Toggl.
+    recovered_items: list[ApplyPlanItem] = field(default_factory=list)
+    # Found in Toggl by reconciliation (created elsewhere); not re-created.
+    remote_items: list[ApplyPlanItem] = field(default_factory=list)
+    # Items intersecting existing Toggl entries (not sent with `skip_overlaps`).
+    overlaps: list[tuple[ApplyPlanItem, list[RemoteEntry]]] = field(default_factory=list)
+    # Items that failed this run (kept in the journal) with the error.
+    failed: list[tuple[ApplyPlanItem, str]] = field(default_factory=list)
+    # Journal runs worked on, in order (a resume can continue several).
+    run_ids: list[int] = field(default_factory=list)
+
+    @property
+    def skipped(self) -> int:
+        return len(self.skipped_items)
+
+    @property
+    def run_id(self) -> int | None:
+        return self.run_ids[-1] if self.run_ids else None
+
+
+def _is_fatal(err: TogglApiError) -> bool:
+    # Nothing else in the run can succeed (bad token, wrong workspace, quota) or
+    # the network is gone and the request may or may not have landed.
+    return err.status is None or err.status in {401, 402, 403, 404}
+
+
+def _may_have_landed(err: TogglApiError) -> bool:
+    # A server error can come after the entry was created (e.g. a 502/504 from
+    # a proxy), so the item is looked up in Toggl before it is sent again.
+    return err.status is not None and err.status >= 500
+
+
+def _create_all(
+    client: TogglClient,
+    workspace_id: int,
+    items: list[ApplyPlanItem],
+    *,
+    concurrency: int,
+    stop: threading.Event | None = None,
+) -> Iterator[tuple[int, dict | None, TogglApiError | None]]:
+    """Create entries, yielding `(index, response, error)` as each request finishes.
+
+    With `concurrency > 1` requests run on a thread pool (throttled by the
+    client's limiter). Once `stop` is set, requests not yet sent are yielded as
+    `(index, None, None)`; requests already on the wire still report normally.
+    If the consumer stops early, queued requests are cancelled.
+    """
+
+    def create(p: ApplyPlanItem) -> dict | None:
+        if stop is not None and stop.is_set():
+            return None
+        return client.create_time_entry(
+            workspace_id,
+            start=p.start,
+            stop=p.stop,
+            description=p.description,
+            tags=p.tags or None,
+            project_id=p.project_id,
+        )
+
+    if concurrency <= 1:
+        for i, p in enumerate(items):
+            try:
+                yield i, create(p), None
+            except TogglApiError as e:
+                yield i, None, e
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(create, p): i for i, p in enumerate(items)}
+        try:
+            for fut in as_completed(futures):
+                try:
+                    yield futures[fut], fut.result(), None
+                except TogglApiError as e:
+                    yield futures[fut], None, e
+        finally:
+            for f in futures:
+                f.cancel()
+
+
+def _settle_inflight(
+    conn: sqlite3.Connection,
+    client: TogglClient,
+    run_id: int,
+    items: list[JournalItem],
+) -> set[int]:
+    """Look up interrupted in-flight items in Toggl; record the ones that exist.
+
+    One range fetch covers all of them. Returns the seqs found remotely.
+    """
+
+    # Only exact matches count here, so no look-back for earlier overlaps.
+    window = plan_window(((it.start, it.stop) for it in items), lookback=timedelta(0))
+    if window is None:
+        return set()
+    remote = {
+        (e.start_s, e.stop_s, e.description): e.id for e in fetch_remote_entries(client, *window)
+    }
+
+    matched = [
+        (it, remote[key])
+        for it in items
+        if (key := entry_key(it.start, it.stop, it.description)) in remote
+    ]
+    _record_done(conn, run_id, matched)
+    return {it.seq for it, _te_id in matched}
+
+
+def _record_done(
+    conn: sqlite3.Connection, run_id: int, done: list[tuple[JournalItem, int | None]]
+) -> None:
+    """Ledger rows + journal `done` states for a batch, in one transaction."""
+    if not done:
+        return
+    record_applied_many(
+        conn,
+        ((it.fingerprint, it.start, it.stop, it.description, te_id) for it, te_id in done),
+        commit=False,
+    )
+    journal.mark_done_many(conn, run_id, ((it.seq, te_id) for it, te_id in done), commit=False)
+    conn.commit()
+
+
+def _plan_item(it: JournalItem) -> ApplyPlanItem:
+    return ApplyPlanItem(
+        start=it.start,
+        stop=it.stop,
+        description=it.description,
+        tags=it.tags,
+        project_id=it.project_id,
+    )
+
+
+def _run_journal(
+    conn: sqlite3.Connection,
+    client: TogglClient,
+    workspace_id: int,
+    run_id: int,
+    items: list[JournalItem],
+    result: ApplyResult,
+    *,
+    concurrency: int,
+    check_ledger: bool = False,
+) -> None:
+    if check_ledger:
+        # Applied by another run since this one stopped: never posted again.
+        applied = applied_entry_ids(conn, (it.fingerprint for it in items))
+        if applied:
+            done_now = [it for it in items if it.fingerprint in applied]
+            journal.mark_done_many(
+                conn, run_id, ((it.seq, applied[it.fingerprint]) for it in done_now)
+            )
+            result.skipped_items.extend(_plan_item(it) for it in done_now)
+            items = [it for it in items if it.fingerprint not in applied]
+
+    inflight = [it for it in items if it.state == journal.INFLIGHT]
+    found = _settle_inflight(conn, client, run_id, inflight)
+    result.recovered_items.extend(_plan_item(it) for it in inflight if it.seq in found)
+    todo = [it for it in items if it.seq not in found]
+
+    # Items are marked in-flight a window at a time (one commit per window)
+    # before any of them is sent. Successes are recorded in batches: an item
+    # whose batch never got committed is still in-flight in the journal, so a
+    # resume finds it in Toggl rather than posting it again.
+    window = max(32, concurrency * 4)
+    stop = threading.Event()
+    fatal: TogglApiError | None = None
+    done: list[tuple[JournalItem, int | None]] = []
+    try:
+        for w0 in range(0, len(todo), window):
+            chunk = todo[w0 : w0 + window]
+            journal.mark_inflight(conn, run_id, [it.seq for it in chunk])
+            plan_items = [_plan_item(it) for it in chunk]
+            for i, resp, err in _create_all(
+                client, workspace_id, plan_items, concurrency=concurrency, stop=stop
+            ):
+                it = chunk[i]
+                if err is not None:
+                    if _is_fatal(err):
+                        # Leave the item in-flight: a resume will check Toggl for
+                        # it. Keep draining so requests already sent get recorded.
+                        fatal = fatal or err
+                        stop.set()
+                        continue
+                    journal.mark_failed(
+                        conn, run_id, it.seq, str(err), uncertain=_may_have_landed(err)
+                    )
+                    result.failed.append((plan_items[i], str(err)))
+                    continue
+                if resp is None:
+                    journal.mark_failed(conn, run_id, it.seq, "not sent: run aborted")
+                    continue
+
+                te_id = resp.get("id")
+                done.append((it, int(te_id) if te_id is not None else None))
+                result.created.append(resp)
+                if len(done) >= LEDGER_BATCH:
+                    _record_done(conn, run_id, done)
+                    done = []
+            _record_done(conn, run_id, done)
+            done = []
+            if fatal is not None:
+                raise fatal
+    finally:
+        # Also on Ctrl-C: what is known to have been created gets recorded.
+        _record_done(conn, run_id, done)
+
+    journal.close_run_if_done(conn, run_id)
+
+
+def ledger_overlaps(
+    conn: sqlite3.Connection, plan: Sequence[ApplyPlanItem]
+) -> list[tuple[ApplyPlanItem, list[RemoteEntry]]]:
+    """Plan items whose interval intersects an entry already in the ledger.
+
+    One indexed range query loads the ledger entries around the plan's span;
+    each item is then looked up in an interval index of them, so the cost is
+    O((n + m) log m) rather than a scan of the ledger per item. An entry with
+    the item's exact (start, stop, description) is the item itself, not an
+    overlap.
+    """
+    if not plan:
+        return []
+    keys = [entry_key(p.start, p.stop, p.description) for p in plan]
+    rows = applied_overlapping(conn, min(k[0] for k in keys), max(k[1] for k in keys))
+    index = IntervalIndex(
+        RemoteEntry(
+            id=r["toggl_time_entry_id"],
+            start_s=int(r["start_epoch"]),
+            stop_s=int(r["end_epoch"]),
+            description=str(r["description"]),
+        )
+        for r in rows
+    )
+    out: list[tuple[ApplyPlanItem, list[RemoteEntry]]] = []
+    for p, key in zip(plan, keys, strict=True):
+        hits = [h for h in index.overlapping(key[0], key[1]) if _key(h) != key]
+        if hits:
+            out.append((p, hits))
+    return out
+
+
+def find_ledger_overlaps(
+    plan: Sequence[ApplyPlanItem], *, ledger_db_path: Path
+) -> list[tuple[ApplyPlanItem, list[RemoteEntry]]]:
+    """`ledger_overlaps` for a dry run (no ledger yet means no overlaps)."""
+    if not ledger_db_path.exists():
+        return []
+    conn = db_mod.connect(ledger_db_path)
+    try:
+        return ledger_overlaps(conn, plan)
+    finally:
+        conn.close()
+
+
+def _key(e: RemoteEntry) -> tuple[int, int, str]:
+    return e.start_s, e.stop_s, e.description
+
+
+def _add_overlaps(
+    result: ApplyResult, found: list[tuple[ApplyPlanItem, list[RemoteEntry]]]
+) -> None:
+    """Merge overlaps into `result`, one row per plan item, without repeats."""
+    by_item = {id(p): hits for p, hits in result.overlaps}
+    for p, hits in found:
+        known = by_item.get(id(p))
+        if known is None:
+            by_item[id(p)] = known = []
+            result.overlaps.append((p, known))
+        seen = {_key(h) for h in known}
+        known.extend(h for h in hits if _key(h) not in seen)
+
+
+def _reconcile_remote(
+    conn: sqlite3.Connection,
+    client: TogglClient,
+    fresh: list[tuple[str, ApplyPlanItem]],
+    result: ApplyResult,
+) -> list[tuple[str, ApplyPlanItem]]:
+    """Drop plan items already in Toggl (recording them in the ledger).
+
+    Returns the items still to create; overlaps go to `result.overlaps`.
+    """
+    window = plan_window((p.start, p.stop) for _fp, p in fresh)
+    if window is None:
+        return fresh
+    rec = reconcile([p for _fp, p in fresh], fetch_remote_entries(client, *window))
+    fp_of = {id(p): fp for fp, p in fresh}
+
+    record_applied_many(
+        conn,
+        ((fp_of[id(p)], p.start, p.stop, p.description, r.id) for p, r in rec.existing),
+    )
+    result.remote_items.extend(p for p, _remote in rec.existing)
+    _add_overlaps(result, rec.overlaps)
+    return [(fp_of[id(p)], p) for p in rec.todo]
 
 
 def apply_plan(
@@ -116,44 +484,136 @@ def apply_plan(
     *,
     ledger_db_path: Path,
     force: bool = False,
-) -> tuple[list[dict], int, list[ApplyPlanItem]]:
-    """Apply plan to Toggl, with local idempotency ledger.
+    client: TogglClient | None = None,
+    concurrency: int = 1,
+    reconcile_remote: bool = True,
+    skip_overlaps: bool = False,
+) -> ApplyResult:
+    """Apply plan to Toggl, with local idempotency ledger and apply journal.
+
+    If `force` is False, will skip any item already present in the ledger (or
+    repeated earlier in the plan). All requests share one `TogglClient` (pass
+    `client` to reuse an existing one); `concurrency` > 1 posts in parallel.
 
-    If `force` is False, will skip any item already present in the ledger.
+    Remaining items that intersect entries already in the ledger are reported
+    in `overlaps`. With `reconcile_remote`, their time window is then fetched
+    from Toggl: exact matches are recorded in the ledger instead of being
+    re-created, and overlaps with other entries are reported too.
+    `skip_overlaps` leaves every overlapping item out.
+
+    The remaining items are written to a journal run first; older open runs'
+    items it repeats are superseded by it (see `journal.settle_open_runs`).
+    An item that still fails after the client's retries is reported in
+    `failed` and left in the journal; the rest of the run continues.
+    Auth/workspace/network errors abort the run by raising `TogglApiError`.
+    Either way `resume_apply` picks the run up where it stopped.
     """
 
+    own_client = client is None
+    if client is None:
+        client = TogglClient.from_config(cfg)
     conn = db_mod.connect(ledger_db_path)
     try:
-        created: list[dict] = []
-        skipped = 0
-        skipped_items: list[ApplyPlanItem] = []
-        for p in plan:
-            fp = fingerprint(start=p.start, stop=p.stop, description=p.description)
-            if not force and already_applied(conn, fp):
-                skipped += 1
-                skipped_items.append(p)
+        result = ApplyResult()
+        fps = [fingerprint(start=p.start, stop=p.stop, description=p.description) for p in plan]
+        # One set-based ledger lookup for the whole plan.
+        seen = set() if force else applied_fingerprints(conn, fps)
+        fresh: list[tuple[str, ApplyPlanItem]] = []
+        for fp, p in zip(fps, plan, strict=True):
+            if not force and fp in seen:
+                result.skipped_items.append(p)
                 continue
+            seen.add(fp)
+            fresh.append((fp, p))
+
+        if fresh and not force:
+            _add_overlaps(result, ledger_overlaps(conn, [p for _fp, p in fresh]))
+            if reconcile_remote:
+                fresh = _reconcile_remote(conn, client, fresh, result)
+            if skip_overlaps:
+                blocked = {id(p) for p, _hits in result.overlaps}
+                fresh = [(fp, p) for fp, p in fresh if id(p) not in blocked]
 
-            resp = create_time_entry(
-                cfg,
-                start=p.start,
-                stop=p.stop,
-                description=p.description,
-                tags=p.tags or None,
-                project_id=p.project_id,
+        run_id = None
+        if fresh:
+            run_id = journal.open_run(
+                conn,
+                workspace_id=cfg.workspace_id,
+                items=[
+                    (fp, p.start, p.stop, p.description, p.tags, p.project_id) for fp, p in fresh
+                ],
             )
-            created.append(resp)
+            result.run_ids.append(run_id)
+        journal.settle_open_runs(conn, workspace_id=cfg.workspace_id, run_id=run_id)
+        if run_id is not None:
+            _run_journal(
+                conn,
+                client,
+                cfg.workspace_id,
+                run_id,
+                journal.unfinished_items(conn, run_id),
+                result,
+                concurrency=concurrency,
+            )
+    finally:
+        conn.close()
+        if own_client:
+            client.close()
+
+    return result
+
+
+def resume_apply(
+    cfg: TogglConfig,
+    *,
+    ledger_db_path: Path,
+    client: TogglClient | None = None,
+    concurrency: int = 1,
+) -> ApplyResult:
+    """Continue the unfinished apply runs for `cfg.workspace_id`, oldest first.
 
-            te_id = resp.get("id") if isinstance(resp, dict) else None
-            record_applied(
+    Only the journal's unfinished items are touched (no re-reading of the
+    reviewed plan). Items the ledger has since recorded (applied by a later
+    run) are marked done without being sent; items that were in flight when
+    the run stopped are first looked up in Toggl with a single range request.
+    """
+
+    own_client = client is None
+    if client is None:
+        client = TogglClient.from_config(cfg)
+    conn = db_mod.connect(ledger_db_path)
+    try:
+        result = ApplyResult()
+        for run_id in journal.open_runs(conn, workspace_id=cfg.workspace_id):
+            result.run_ids.append(run_id)
+            _run_journal(
                 conn,
-                fp=fp,
-                start=p.start,
-                stop=p.stop,
-                description=p.description,
-                toggl_time_entry_id=(int(te_id) if te_id is not None else None),
+                client,
+                cfg.workspace_id,
+                run_id,
+                journal.unfinished_items(conn, run_id),
+                result,
+                concurrency=concurrency,
+                check_ledger=True,
             )
     finally:
         conn.close()
+        if own_client:
+            client.close()
+
+    return result
+
 
-    return created, skipped, skipped_items
+def open_run_id(ledger_db_path: Path, *, workspace_id: int) -> int | None:
+    """Id of the latest unfinished apply run, if any."""
+    runs = open_run_ids(ledger_db_path, workspace_id=workspace_id)
+    return runs[-1] if runs else None
+
+
+def open_run_ids(ledger_db_path: Path, *, workspace_id: int) -> list[int]:
+    """Ids of the unfinished apply runs, oldest first."""
+    conn = db_mod.connect(ledger_db_path)
+    try:
+        return journal.open_runs(conn, workspace_id=workspace_id)
+    finally:
+        conn.close()
@@ -0,0 +1,198 @@
+"""Local cache of Toggl metadata (workspaces, projects, tags, clients).
+
+Each object is a row in `toggl_meta`; `toggl_meta_sync` records when a
+(workspace, kind) list was last fetched and the server's ETag. Reads within
+the TTL never touch the network. Stale lists are revalidated with
+`If-None-Match` and, for workspace lists, Toggl's `since` filter so only
+objects changed after the last fetch come back (deleted ones carry
+`server_deleted_at`).
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import UTC, datetime
+from urllib.parse import urlencode
+
+from toggl_sherpa.m5.toggl_api import TogglApiError, TogglClient
+from toggl_sherpa.profiling import timed
+
+KINDS = ("workspaces", "projects", "tags", "clients")
+DEFAULT_TTL_S = 6 * 3600
+# Workspaces belong to the user, not to a workspace; they are stored under 0.
+USER_SCOPE = 0
+# Overlap `since` windows so a little clock skew can't drop a change.
+_SINCE_SLACK_S = 300
+
+
+def _utc_now() -> datetime:
+    return datetime.now(UTC).replace(microsecond=0)
+
+
+def _scope(kind: str, workspace_id: int) -> int:
+    if kind not in KINDS:
+        raise ValueError(f"unknown metadata kind: {kind}")
+    return USER_SCOPE if kind == "workspaces" else workspace_id
+
+
+def last_sync(
+    conn: sqlite3.Connection, *, workspace_id: int, kind: str
+) -> tuple[datetime, str | None] | None:
+    """`(fetched_at, etag)` of the last fetch of this list, or None if never fetched."""
+    row = conn.execute(
+        "SELECT fetched_ts_utc, etag FROM toggl_meta_sync WHERE workspace_id = ? AND kind = ?",
+        (_scope(kind, workspace_id), kind),
+    ).fetchone()
+    if row is None:
+        return None
+    return datetime.fromisoformat(row["fetched_ts_utc"]), row["etag"]
+
+
+def is_fresh(
+    conn: sqlite3.Connection,
+    *,
+    workspace_id: int,
+    kind: str,
+    ttl_s: float = DEFAULT_TTL_S,
+    now: datetime | None = None,
+) -> bool:
+    prev = last_sync(conn, workspace_id=workspace_id, kind=kind)
+    if prev is None:
+        return False
+    return ((now or _utc_now()) - prev[0]).total_seconds() < ttl_s
+
+
+def cached(conn: sqlite3.Connection, *, workspace_id: int, kind: str) -> list[dict]:
+    """Cached raw objects for one list, ordered by name."""
+    cur = conn.execute(
+        """
+        SELECT id, name, raw_json FROM toggl_meta
+        WHERE workspace_id = ? AND kind = ?
+        ORDER BY name COLLATE NOCASE, id
+        """,
+        (_scope(kind, workspace_id), kind),
+    )
+    out: list[dict] = []
+    for r in cur.fetchall():
+        obj = json.loads(r["raw_json"]) if r["raw_json"] else {}
+        out.append({**obj, "id": int(r["id"]), "name": r["name"]})
+    return out
+
+
+@timed("metacache")
+def refresh(
+    conn: sqlite3.Connection,
+    client: TogglClient,
+    *,
+    workspace_id: int,
+    kind: str,
+    full: bool = False,
+) -> int:
+    """Revalidate one list against Toggl; returns the number of objects written.
+
+    `full` ignores the stored ETag/`since` and replaces the list outright.
+    """
+    scope = _scope(kind, workspace_id)
+    prev = None if full else last_sync(conn, workspace_id=workspace_id, kind=kind)
+    now = _utc_now()
+
+    if kind == "workspaces":
+        path = "/me"
+    else:
+        path = f"/workspaces/{workspace_id}/{kind}"
+        if prev is not None:
+            since = int(prev[0].timestamp()) - _SINCE_SLACK_S
+            path += "?" + urlencode({"since": since})
+
+    data, etag = client.get_if_changed(path, etag=prev[1] if prev else None)
+    if kind == "workspaces" and data is not None:
+        data = data.get("workspaces") if isinstance(data, dict) else None
+        data = data if isinstance(data, list) else []
+    if data is not None and not isinstance(data, list):
+        raise TogglApiError("unexpected response")
+
+    written = 0
+    if data is not None:
+        # A delta (`since`) only lists changes; anything else is the whole list.
+        if prev is None or kind == "workspaces":
+            conn.execute(
+                "DELETE FROM toggl_meta WHERE workspace_id = ? AND kind = ?", (scope, kind)
+            )
+        for obj in data:
+            if not isinstance(obj, dict) or obj.get("id") is None:
+                continue
+            if obj.get("server_deleted_at"):
+                conn.execute(
+                    "DELETE FROM toggl_meta WHERE workspace_id = ? AND kind = ? AND id = ?",
+                    (scope, kind, int(obj["id"])),
+                )
+                continue
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO toggl_meta(workspace_id, kind, id, name, raw_json)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (scope, kind, int(obj["id"]), str(obj.get("name") or ""), json.dumps(obj)),
+            )
+            written += 1
+
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO toggl_meta_sync(workspace_id, kind, fetched_ts_utc, etag)
+        VALUES (?, ?, ?, ?)
+        """,
+        (scope, kind, now.isoformat(), etag),
+    )
+    conn.commit()
+    return written
+
+
+def load(
+    conn: sqlite3.Connection,
+    client: TogglClient | None,
+    *,
+    workspace_id: int,
+    kind: str,
+    ttl_s: float = DEFAULT_TTL_S,
+    force: bool = False,
+) -> list[dict]:
+    """Cached list, refreshed first if stale (or `force`) and a client is given.
+
+    Without a client this is purely offline.
+    """
+    if client is not None and (
+        force or not is_fresh(conn, workspace_id=workspace_id, kind=kind, ttl_s=ttl_s)
+    ):
+        refresh(conn, client, workspace_id=workspace_id, kind=kind)
+    return cached(conn, workspace_id=workspace_id, kind=kind)
+
+
+def sync(
+    conn: sqlite3.Connection,
+    client: TogglClient,
+    *,
+    workspace_id: int,
+    full: bool = False,
+) -> dict[str, int]:
+    """Refresh every metadata list for a workspace; returns objects written per kind."""
+    return {
+        kind: refresh(conn, client, workspace_id=workspace_id, kind=kind, full=full)
+        for kind in KINDS
+    }
+
+
+def project_ids_by_name(conn: sqlite3.Connection, *, workspace_id: int) -> dict[str, int]:
+    """Cached project name -> id, keyed by exact and case-folded name.
+
+    Active projects win over archived ones with the same name.
+    """
+    out: dict[str, int] = {}
+    projects = cached(conn, workspace_id=workspace_id, kind="projects")
+    # Archived first so active projects overwrite them.
+    for p in sorted(projects, key=lambda p: p.get("active", True) is not False):
+        name = str(p["name"]).strip()
+        if name:
+            out[name] = int(p["id"])
+            out[name.casefold()] = int(p["id"])
+    return out
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiter.
+
+    Tokens refill at `rate` per second up to `burst`; `acquire()` blocks until a
+    token is available. `pause_for()` stops all callers for a while (used when
+    the server answers 429 with `Retry-After`, optionally slowing the rate).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        *,
+        min_rate: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self.min_rate = min(min_rate, rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now <= self._updated:
+            return
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                else:
+                    wait = (1.0 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now (never blocks)."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now < self._paused_until or self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def pause_for(self, seconds: float, *, slow_down: bool = False) -> None:
+        """Block all callers for `seconds`, then resume from an empty bucket.
+
+        With `slow_down`, also halve the refill rate (down to `min_rate`), so a
+        client that keeps hitting a server-side limit converges below it.
+        """
+        with self._lock:
+            now = self._clock()
+            # Several in-flight requests often hit the same limit together; slow
+            # down once per pause rather than once per rejected request.
+            if slow_down and now >= self._paused_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+            self._paused_until = max(self._paused_until, now + seconds)
+            # No tokens accrue while paused; callers don't burst straight back in.
+            self._tokens = 0.0
+            self._updated = self._paused_until
@@ -0,0 +1,163 @@
+"""Reconcile an apply plan against the time entries already in Toggl.
+
+The local ledger only knows what this machine created. Before posting, the
+plan's time window is fetched from Toggl in a few range requests and indexed
+two ways: by exact (start, stop, description) to drop entries that already
+exist, and by interval to flag plan items that overlap an existing entry
+(created elsewhere, or edited in the Toggl UI).
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from toggl_sherpa.m3.query import parse_ts
+from toggl_sherpa.m5.toggl_api import TogglClient
+from toggl_sherpa.profiling import timed
+
+if TYPE_CHECKING:
+    from toggl_sherpa.m5.apply import ApplyPlanItem
+
+# Toggl's range endpoint is cheap for a week of entries; longer backfills are
+# split so no single response gets huge.
+DEFAULT_PAGE = timedelta(days=7)
+# Toggl filters the range by start time, so a remote entry overlapping the
+# first plan item may start before it. Entries up to this long are found.
+OVERLAP_LOOKBACK = timedelta(days=1)
+
+
+def epoch_s(ts: str) -> int:
+    return int(parse_ts(ts.replace("Z", "+00:00")).timestamp())
+
+
+def entry_key(start: str, stop: str, description: str) -> tuple[int, int, str]:
+    """Identity of a time entry, insensitive to timestamp formatting."""
+    return epoch_s(start), epoch_s(stop), description
+
+
+@dataclass(frozen=True)
+class RemoteEntry:
+    id: int | None
+    start_s: int
+    stop_s: int
+    description: str
+
+
+class IntervalIndex:
+    """Static index of half-open `[start_s, stop_s)` intervals.
+
+    Intervals are sorted by start with a running maximum of stops, so a query
+    bisects to the last interval starting before the query ends and walks back
+    only while an earlier interval could still reach the query's start. For
+    non-overlapping data (a normal timesheet) that is O(log m + k).
+    """
+
+    def __init__(self, entries: Iterable[RemoteEntry]) -> None:
+        self.entries = sorted(entries, key=lambda e: (e.start_s, e.stop_s))
+        self._starts = [e.start_s for e in self.entries]
+        self._max_stop: list[int] = []
+        hi = -1
+        for e in self.entries:
+            hi = max(hi, e.stop_s)
+            self._max_stop.append(hi)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def overlapping(self, start_s: int, stop_s: int) -> list[RemoteEntry]:
+        out: list[RemoteEntry] = []
+        j = bisect_left(self._starts, stop_s) - 1
+        while j >= 0 and self._max_stop[j] > start_s:
+            e = self.entries[j]
+            if e.stop_s > start_s:
+                out.append(e)
+            j -= 1
+        out.reverse()
+        return out
+
+
+def fetch_remote_entries(
+    client: TogglClient,
+    lo: datetime,
+    hi: datetime,
+    *,
+    page: timedelta = DEFAULT_PAGE,
+) -> list[RemoteEntry]:
+    """Finished time entries starting in `[lo, hi)`, fetched one `page` at a time.
+
+    Running entries (no stop yet) are left out.
+    """
+    out: dict[int | None, RemoteEntry] = {}
+    anon: list[RemoteEntry] = []
+    cur = lo
+    while cur < hi:
+        nxt = min(hi, cur + page)
+        for e in client.list_time_entries(start_date=cur.isoformat(), end_date=nxt.isoformat()):
+            if not e.get("start") or not e.get("stop"):
+                continue
+            te_id = e.get("id")
+            entry = RemoteEntry(
+                id=int(te_id) if te_id is not None else None,
+                start_s=epoch_s(str(e["start"])),
+                stop_s=epoch_s(str(e["stop"])),
+                description=str(e.get("description") or ""),
+            )
+            if entry.id is None:
+                anon.append(entry)
+            else:
+                out[entry.id] = entry
+        cur = nxt
+    return [*out.values(), *anon]
+
+
+def plan_window(
+    spans: Iterable[tuple[str, str]], *, lookback: timedelta = OVERLAP_LOOKBACK
+) -> tuple[datetime, datetime] | None:
+    """Start-time range `[lo, hi)` of the remote entries `(start, stop)` spans can meet.
+
+    That is every entry starting from `lookback` before the earliest start up
+    to the latest stop (an exact match starts at a plan start, an overlap
+    before a plan stop). None if there are no spans.
+    """
+    starts: list[datetime] = []
+    stops: list[datetime] = []
+    for start, stop in spans:
+        starts.append(parse_ts(start.replace("Z", "+00:00")))
+        stops.append(parse_ts(stop.replace("Z", "+00:00")))
+    if not starts:
+        return None
+    return min(starts) - lookback, max(max(stops), max(starts) + timedelta(seconds=1))
+
+
+@dataclass
+class Reconciliation:
+    # Plan items with no exact match in Toggl (overlapping ones included).
+    todo: list[ApplyPlanItem] = field(default_factory=list)
+    # Plan items that already exist in Toggl, with the matching entry.
+    existing: list[tuple[ApplyPlanItem, RemoteEntry]] = field(default_factory=list)
+    # Plan items that intersect other Toggl entries.
+    overlaps: list[tuple[ApplyPlanItem, list[RemoteEntry]]] = field(default_factory=list)
+
+
+@timed("reconcile")
+def reconcile(plan: Sequence[ApplyPlanItem], remote: Iterable[RemoteEntry]) -> Reconciliation:
+    remote = list(remote)
+    by_key = {(e.start_s, e.stop_s, e.description): e for e in remote}
+    index = IntervalIndex(remote)
+
+    out = Reconciliation()
+    for p in plan:
+        key = entry_key(p.start, p.stop, p.description)
+        match = by_key.get(key)
+        if match is not None:
+            out.existing.append((p, match))
+            continue
+        out.todo.append(p)
+        hits = index.overlapping(key[0], key[1])
+        if hits:
+            out.overlaps.append((p, hits))
+    return out
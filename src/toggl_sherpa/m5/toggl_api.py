@@ -1,19 +1,83 @@
 from __future__ import annotations
 
 import base64
-from dataclasses import dataclass
+import random
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any
+from urllib.parse import urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from toggl_sherpa.m5.ratelimit import TokenBucket
+from toggl_sherpa.profiling import timed
+
+DEFAULT_BASE_URL = "https://api.track.toggl.com/api/v9"
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a Toggl request.
+
+    Delays grow as `base_delay_s * 2**attempt` (capped at `max_delay_s`) with
+    up to `jitter` of each delay randomised away, so concurrent workers don't
+    retry in lockstep. A server `Retry-After` always wins over the computed
+    delay. `retry_statuses` holds exact codes; `retry_status_classes` holds
+    hundreds digits (5 -> any 5xx).
+
+    Non-idempotent requests (POSTs) are only retried when the request cannot
+    have been processed: a connect failure, a 429, or a 503 carrying
+    `Retry-After`. Any other error may come after Toggl created the entry, so
+    it is left to the apply journal to look up rather than sent twice.
+    """
+
+    max_attempts: int = 4
+    base_delay_s: float = 1.0
+    max_delay_s: float = 30.0
+    jitter: float = 0.5
+    retry_statuses: frozenset[int] = frozenset({429})
+    retry_status_classes: frozenset[int] = frozenset({5})
+
+    def should_retry(
+        self, status: int, *, idempotent: bool = True, retry_after_s: float | None = None
+    ) -> bool:
+        if not idempotent:
+            return status == 429 or (status == 503 and retry_after_s is not None)
+        return status in self.retry_statuses or status // 100 in self.retry_status_classes
+
+    def delay_s(
+        self,
+        attempt: int,
+        retry_after_s: float | None = None,
+        *,
+        rng: random.Random | None = None,
+    ) -> float:
+        if retry_after_s is not None:
+            return retry_after_s
+        delay = min(self.max_delay_s, self.base_delay_s * (2**attempt))
+        return delay * (1.0 - self.jitter * (rng or random).random())
 
 
 @dataclass(frozen=True)
 class TogglConfig:
     api_token: str
     workspace_id: int
+    base_url: str = DEFAULT_BASE_URL
+    timeout_s: float = 30.0
+    pool_maxsize: int = 10
+    # Client-side request limit (None: none). `apply.load_config_from_env`
+    # derives one from the apply concurrency.
+    max_rps: float | None = None
+    burst: int = 1
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
 
 
 class TogglApiError(RuntimeError):
-    pass
+    def __init__(self, message: str, *, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
 
 
 def _auth_header(api_token: str) -> str:
@@ -23,99 +87,238 @@ def _auth_header(api_token: str) -> str:
     return f"Basic {b64}"
 
 
-def list_workspaces(*, api_token: str) -> list[dict]:
-    """List workspaces visible to the user.
-
-    Uses /api/v9/me and returns the raw workspace objects.
-    """
+def _retry_after_s(resp: requests.Response) -> float | None:
+    """Parse `Retry-After` (delta-seconds or HTTP-date); None if absent/invalid."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
 
-    url = "https://api.track.toggl.com/api/v9/me"
-    headers = {
-        "Authorization": _auth_header(api_token),
-        "Content-Type": "application/json",
-    }
 
-    resp = requests.get(url, headers=headers, timeout=30)
+def _json_or_raise(resp: requests.Response) -> Any:
     if resp.status_code >= 400:
-        raise TogglApiError(f"toggl api error {resp.status_code}: {resp.text}")
+        raise TogglApiError(
+            f"toggl api error {resp.status_code}: {resp.text}", status=resp.status_code
+        )
+    return resp.json()
 
-    data = resp.json()
-    if not isinstance(data, dict):
-        raise TogglApiError("unexpected response")
 
-    workspaces = data.get("workspaces")
-    if not isinstance(workspaces, list):
-        return []
-    return [w for w in workspaces if isinstance(w, dict)]
+class TogglClient:
+    """Toggl Track v9 API client with a pooled, keep-alive `requests.Session`.
 
+    The auth header is computed once; connections are reused across calls, so
+    N requests cost one TCP+TLS handshake instead of N. Safe to share between
+    threads as long as `pool_maxsize` covers the number of concurrent callers.
 
-def list_projects(*, api_token: str, workspace_id: int) -> list[dict]:
-    """List projects for a workspace.
-
-    Returns raw project objects.
+    Every request passes through the optional `limiter`. Failed requests are
+    retried according to `retry` (see `RetryPolicy`); each wait pauses the
+    shared limiter so other threads back off too, and a 429 halves its rate.
     """
 
-    url = f"https://api.track.toggl.com/api/v9/workspaces/{workspace_id}/projects"
-    headers = {
-        "Authorization": _auth_header(api_token),
-        "Content-Type": "application/json",
-    }
-
-    resp = requests.get(url, headers=headers, timeout=30)
-    if resp.status_code >= 400:
-        raise TogglApiError(f"toggl api error {resp.status_code}: {resp.text}")
-
-    data = resp.json()
-    if not isinstance(data, list):
-        raise TogglApiError("unexpected response")
-
-    return [p for p in data if isinstance(p, dict)]
+    def __init__(
+        self,
+        api_token: str,
+        *,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout_s: float = 30.0,
+        pool_maxsize: int = 10,
+        limiter: TokenBucket | None = None,
+        retry: RetryPolicy | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+        self.limiter = limiter
+        self.retry = retry or RetryPolicy()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Authorization": _auth_header(api_token),
+                "Content-Type": "application/json",
+            }
+        )
+
+    @classmethod
+    def from_config(cls, cfg: TogglConfig) -> TogglClient:
+        limiter = TokenBucket(cfg.max_rps, cfg.burst) if cfg.max_rps else None
+        return cls(
+            cfg.api_token,
+            base_url=cfg.base_url,
+            timeout_s=cfg.timeout_s,
+            pool_maxsize=cfg.pool_maxsize,
+            limiter=limiter,
+            retry=cfg.retry,
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> TogglClient:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    @timed("network")
+    def _send(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        send = self.session.get if method == "GET" else self.session.post
+        url = f"{self.base_url}{path}"
+        # Only connect failures (and refusals, see `RetryPolicy`) are safe to
+        # resend for non-idempotent requests.
+        retry_errors: tuple[type[Exception], ...] = (
+            (requests.ConnectionError, requests.Timeout)
+            if method == "GET"
+            else (requests.exceptions.ConnectTimeout,)
+        )
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            last = attempt + 1 >= self.retry.max_attempts
+            try:
+                resp = send(url, timeout=self.timeout_s, **kwargs)
+            except requests.RequestException as e:
+                if last or not isinstance(e, retry_errors):
+                    raise TogglApiError(f"toggl api request failed: {e}") from e
+                self._wait(self.retry.delay_s(attempt))
+                attempt += 1
+                continue
+
+            if last or resp.status_code < 400:
+                return resp
+            retry_after = _retry_after_s(resp)
+            if not self.retry.should_retry(
+                resp.status_code, idempotent=method == "GET", retry_after_s=retry_after
+            ):
+                return resp
+            delay = self.retry.delay_s(attempt, retry_after)
+            self._wait(delay, slow_down=resp.status_code == 429)
+            attempt += 1
+
+    def _wait(self, delay_s: float, *, slow_down: bool = False) -> None:
+        if self.limiter is not None:
+            self.limiter.pause_for(delay_s, slow_down=slow_down)
+        else:
+            time.sleep(delay_s)
+
+    def _get(self, path: str) -> Any:
+        return _json_or_raise(self._send("GET", path))
+
+    def _post(self, path: str, payload: dict) -> Any:
+        return _json_or_raise(self._send("POST", path, json=payload))
+
+    def get_if_changed(self, path: str, *, etag: str | None = None) -> tuple[Any, str | None]:
+        """Conditional GET: `(None, etag)` if the server answers 304 Not Modified.
+
+        Otherwise returns the decoded body and the response's `ETag` (if any).
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        resp = self._send("GET", path, headers=headers)
+        if resp.status_code == 304:
+            return None, etag
+        return _json_or_raise(resp), resp.headers.get("ETag")
+
+    def _get_list(self, path: str) -> list[dict]:
+        data = self._get(path)
+        if not isinstance(data, list):
+            raise TogglApiError("unexpected response")
+        return [x for x in data if isinstance(x, dict)]
+
+    def list_workspaces(self) -> list[dict]:
+        """List workspaces visible to the user.
+
+        Uses /me and returns the raw workspace objects.
+        """
+
+        data = self._get("/me")
+        if not isinstance(data, dict):
+            raise TogglApiError("unexpected response")
+
+        workspaces = data.get("workspaces")
+        if not isinstance(workspaces, list):
+            return []
+        return [w for w in workspaces if isinstance(w, dict)]
+
+    def list_projects(self, workspace_id: int) -> list[dict]:
+        """List projects for a workspace (raw project objects)."""
+        return self._get_list(f"/workspaces/{workspace_id}/projects")
+
+    def list_tags(self, workspace_id: int) -> list[dict]:
+        """List tags for a workspace (raw tag objects)."""
+        return self._get_list(f"/workspaces/{workspace_id}/tags")
+
+    def list_clients(self, workspace_id: int) -> list[dict]:
+        """List clients for a workspace (raw client objects)."""
+        return self._get_list(f"/workspaces/{workspace_id}/clients")
+
+    def list_time_entries(self, *, start_date: str, end_date: str) -> list[dict]:
+        """List the user's time entries starting in [start_date, end_date).
+
+        Dates are RFC 3339 timestamps (or YYYY-MM-DD).
+        """
+        query = urlencode({"start_date": start_date, "end_date": end_date})
+        return self._get_list(f"/me/time_entries?{query}")
+
+    def create_time_entry(
+        self,
+        workspace_id: int,
+        *,
+        start: str,
+        stop: str,
+        description: str,
+        tags: list[str] | None = None,
+        project_id: int | None = None,
+    ) -> dict:
+        payload: dict = {
+            "created_with": "toggl-sherpa",
+            "description": description,
+            "start": start,
+            "stop": stop,
+        }
+        if tags:
+            payload["tags"] = tags
+        if project_id is not None:
+            payload["project_id"] = project_id
+
+        data = self._post(f"/workspaces/{workspace_id}/time_entries", payload)
+        if not isinstance(data, dict):
+            raise TogglApiError("unexpected response")
+        return data
+
+
+# One-shot helpers kept for callers that make a single request. Anything issuing
+# several requests should hold a `TogglClient` so the connection is reused.
 
 
-def list_tags(*, api_token: str, workspace_id: int) -> list[dict]:
-    """List tags for a workspace.
-
-    Returns raw tag objects.
-    """
+def list_workspaces(*, api_token: str) -> list[dict]:
+    with TogglClient(api_token) as client:
+        return client.list_workspaces()
 
-    url = f"https://api.track.toggl.com/api/v9/workspaces/{workspace_id}/tags"
-    headers = {
-        "Authorization": _auth_header(api_token),
-        "Content-Type": "application/json",
-    }
 
-    resp = requests.get(url, headers=headers, timeout=30)
-    if resp.status_code >= 400:
-        raise TogglApiError(f"toggl api error {resp.status_code}: {resp.text}")
+def list_projects(*, api_token: str, workspace_id: int) -> list[dict]:
+    with TogglClient(api_token) as client:
+        return client.list_projects(workspace_id)
 
-    data = resp.json()
-    if not isinstance(data, list):
-        raise TogglApiError("unexpected response")
 
-    return [t for t in data if isinstance(t, dict)]
+def list_tags(*, api_token: str, workspace_id: int) -> list[dict]:
+    with TogglClient(api_token) as client:
+        return client.list_tags(workspace_id)
 
 
 def list_clients(*, api_token: str, workspace_id: int) -> list[dict]:
-    """List clients for a workspace.
-
-    Returns raw client objects.
-    """
-
-    url = f"https://api.track.toggl.com/api/v9/workspaces/{workspace_id}/clients"
-    headers = {
-        "Authorization": _auth_header(api_token),
-        "Content-Type": "application/json",
-    }
-
-    resp = requests.get(url, headers=headers, timeout=30)
-    if resp.status_code >= 400:
-        raise TogglApiError(f"toggl api error {resp.status_code}: {resp.text}")
-
-    data = resp.json()
-    if not isinstance(data, list):
-        raise TogglApiError("unexpected response")
-
-    return [c for c in data if isinstance(c, dict)]
+    with TogglClient(api_token) as client:
+        return client.list_clients(workspace_id)
 
 
 def create_time_entry(
@@ -127,28 +330,12 @@ def create_time_entry(
     tags: list[str] | None = None,
     project_id: int | None = None,
 ) -> dict:
-    url = f"https://api.track.toggl.com/api/v9/workspaces/{cfg.workspace_id}/time_entries"
-    headers = {
-        "Authorization": _auth_header(cfg.api_token),
-        "Content-Type": "application/json",
-    }
-
-    payload: dict = {
-        "created_with": "toggl-sherpa",
-        "description": description,
-        "start": start,
-        "stop": stop,
-    }
-    if tags:
-        payload["tags"] = tags
-    if project_id is not None:
-        payload["project_id"] = project_id
-
-    resp = requests.post(url, json=payload, headers=headers, timeout=30)
-    if resp.status_code >= 400:
-        raise TogglApiError(f"toggl api error {resp.status_code}: {resp.text}")
-
-    data = resp.json()
-    if not isinstance(data, dict):
-        raise TogglApiError("unexpected response")
-    return data
+    with TogglClient.from_config(cfg) as client:
+        return client.create_time_entry(
+            cfg.workspace_id,
+            start=start,
+            stop=stop,
+            description=description,
+            tags=tags,
+            project_id=project_id,
+        )
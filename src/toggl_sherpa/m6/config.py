@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import json
 import os
+import re
 from dataclasses import dataclass
 from pathlib import Path
 
+from toggl_sherpa.m3.normalise import DEFAULT_RULES
+
 
 @dataclass(frozen=True)
 class ApplyMapping:
@@ -60,3 +63,41 @@ def load_mapping(path: Path | None) -> ApplyMapping:
             tag_map[k] = v
 
     return ApplyMapping(project_ids=project_ids, tag_map=tag_map)
+
+
+def load_title_rules(path: Path | None) -> tuple[tuple[str, str], ...]:
+    """Title normalisation rules: config.json's own, then the built-in ones.
+
+    `title_rules` is a list of `{"pattern": ..., "replace": ...}` objects
+    (`replace` defaults to ""), applied in order before the built-in rules
+    (which end by tidying whitespace); `"default_title_rules": false` drops
+    the built-in ones.
+    """
+    if path is None:
+        path = default_config_path()
+
+    if not path.exists():
+        return DEFAULT_RULES
+
+    obj = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(obj, dict):
+        raise ValueError("config must be a JSON object")
+
+    raw_rules = obj.get("title_rules", [])
+    if not isinstance(raw_rules, list):
+        raise ValueError("title_rules must be a list")
+
+    rules: list[tuple[str, str]] = []
+    for r in raw_rules:
+        pattern = r.get("pattern") if isinstance(r, dict) else None
+        replace = r.get("replace", "") if isinstance(r, dict) else None
+        if not isinstance(pattern, str) or not isinstance(replace, str):
+            raise ValueError(f"title_rules entries need a pattern string: {r!r}")
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"bad title_rules pattern {pattern!r}: {e}") from e
+        rules.append((pattern, replace))
+
+    defaults = DEFAULT_RULES if obj.get("default_title_rules", True) else ()
+    return (*rules, *defaults)
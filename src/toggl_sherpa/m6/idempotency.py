@@ -3,8 +3,24 @@ from __future__ import annotations
 import hashlib
 import json
 import sqlite3
+from collections.abc import Iterable
 from datetime import UTC, datetime
 
+from toggl_sherpa.profiling import timed
+
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds).
+IN_CHUNK = 500
+
+_INSERT_APPLIED = """
+    INSERT OR IGNORE INTO applied_entries(
+        ts_utc, fingerprint, start_ts_utc, end_ts_utc, description, toggl_time_entry_id,
+        start_epoch, end_epoch
+    ) VALUES (
+        ?1, ?2, ?3, ?4, ?5, ?6,
+        CAST(strftime('%s', ?3) AS INTEGER), CAST(strftime('%s', ?4) AS INTEGER)
+    )
+"""
+
 
 def utc_now_iso() -> str:
     return datetime.now(UTC).replace(microsecond=0).isoformat()
@@ -25,6 +41,48 @@ def already_applied(conn: sqlite3.Connection, fp: str) -> bool:
     return row is not None
 
 
+@timed("ledger")
+def applied_entry_ids(conn: sqlite3.Connection, fps: Iterable[str]) -> dict[str, int | None]:
+    """Ledger fingerprint -> Toggl entry id for the `fps` already applied (chunked `IN`)."""
+    wanted = list(dict.fromkeys(fps))
+    found: dict[str, int | None] = {}
+    for i in range(0, len(wanted), IN_CHUNK):
+        chunk = wanted[i : i + IN_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        cur = conn.execute(
+            "SELECT fingerprint, toggl_time_entry_id FROM applied_entries"
+            f" WHERE fingerprint IN ({marks})",
+            chunk,
+        )
+        found.update((r[0], r[1]) for r in cur)
+    return found
+
+
+def applied_fingerprints(conn: sqlite3.Connection, fps: Iterable[str]) -> set[str]:
+    """The subset of `fps` already in the ledger."""
+    return set(applied_entry_ids(conn, fps))
+
+
+@timed("ledger")
+def applied_overlapping(conn: sqlite3.Connection, start_s: int, stop_s: int) -> list[sqlite3.Row]:
+    """Ledger rows whose `[start, end)` intersects `[start_s, stop_s)` (epoch seconds).
+
+    Uses the start_epoch index: an intersecting entry must start within the
+    longest entry's span before `start_s`.
+    """
+    row = conn.execute("SELECT MAX(end_epoch - start_epoch) FROM applied_entries").fetchone()
+    longest = int(row[0] or 0)
+    return conn.execute(
+        """
+        SELECT toggl_time_entry_id, start_epoch, end_epoch, description, fingerprint
+        FROM applied_entries
+        WHERE start_epoch >= ? AND start_epoch < ? AND end_epoch > ?
+        ORDER BY start_epoch
+        """,
+        (start_s - longest, stop_s, start_s),
+    ).fetchall()
+
+
 def record_applied(
     conn: sqlite3.Connection,
     *,
@@ -33,13 +91,28 @@ def record_applied(
     stop: str,
     description: str,
     toggl_time_entry_id: int | None,
+    commit: bool = True,
 ) -> None:
     conn.execute(
-        """
-        INSERT OR IGNORE INTO applied_entries(
-            ts_utc, fingerprint, start_ts_utc, end_ts_utc, description, toggl_time_entry_id
-        ) VALUES (?, ?, ?, ?, ?, ?)
-        """,
+        _INSERT_APPLIED,
         (utc_now_iso(), fp, start, stop, description, toggl_time_entry_id),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
+
+
+@timed("ledger")
+def record_applied_many(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[str, str, str, str, int | None]],
+    *,
+    commit: bool = True,
+) -> None:
+    """Insert `(fp, start, stop, description, toggl_time_entry_id)` rows in one statement."""
+    now = utc_now_iso()
+    conn.executemany(
+        _INSERT_APPLIED,
+        ((now, fp, start, stop, desc, te_id) for fp, start, stop, desc, te_id in rows),
+    )
+    if commit:
+        conn.commit()
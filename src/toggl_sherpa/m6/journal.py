@@ -0,0 +1,236 @@
+"""Apply journal: durable progress for Toggl apply runs.
+
+Each run stores its items up front (state `pending`). Items are marked
+`inflight` *before* their POST is sent and `done` in the same transaction as
+the ledger insert, so after a crash or Ctrl-C the journal says exactly which
+items still need work and which few might have reached Toggl unrecorded.
+
+A later run that repeats an older open run's items supersedes them (see
+`settle_open_runs`), so one entry is never owned by two runs.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from toggl_sherpa.profiling import timed
+
+PENDING = "pending"
+INFLIGHT = "inflight"
+DONE = "done"
+SUPERSEDED = "superseded"
+
+
+def utc_now_iso() -> str:
+    return datetime.now(UTC).replace(microsecond=0).isoformat()
+
+
+@dataclass(frozen=True)
+class JournalItem:
+    seq: int
+    fingerprint: str
+    start: str
+    stop: str
+    description: str
+    tags: list[str]
+    project_id: int | None
+    state: str
+    error: str | None = None
+
+
+@timed("journal")
+def open_run(
+    conn: sqlite3.Connection,
+    *,
+    workspace_id: int,
+    items: Iterable[tuple[str, str, str, str, list[str], int | None]],
+) -> int:
+    """Create a run with `(fingerprint, start, stop, description, tags, project_id)` items."""
+    cur = conn.execute(
+        "INSERT INTO apply_runs(ts_utc, workspace_id, state) VALUES (?, ?, 'open')",
+        (utc_now_iso(), workspace_id),
+    )
+    run_id = int(cur.lastrowid)
+    conn.executemany(
+        """
+        INSERT INTO apply_journal(
+            run_id, seq, fingerprint, start_ts_utc, end_ts_utc, description, tags_json, project_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (run_id, seq, fp, start, stop, desc, json.dumps(tags), project_id)
+            for seq, (fp, start, stop, desc, tags, project_id) in enumerate(items)
+        ),
+    )
+    conn.commit()
+    return run_id
+
+
+def open_runs(conn: sqlite3.Connection, *, workspace_id: int) -> list[int]:
+    """Ids of the workspace's unfinished runs, oldest first."""
+    cur = conn.execute(
+        "SELECT id FROM apply_runs WHERE workspace_id = ? AND state = 'open' ORDER BY id",
+        (workspace_id,),
+    )
+    return [int(r["id"]) for r in cur]
+
+
+def latest_open_run(conn: sqlite3.Connection, *, workspace_id: int) -> int | None:
+    row = conn.execute(
+        """
+        SELECT id FROM apply_runs
+        WHERE workspace_id = ? AND state = 'open'
+        ORDER BY id DESC
+        LIMIT 1
+        """,
+        (workspace_id,),
+    ).fetchone()
+    return int(row["id"]) if row is not None else None
+
+
+@timed("journal")
+def unfinished_items(conn: sqlite3.Connection, run_id: int) -> list[JournalItem]:
+    cur = conn.execute(
+        """
+        SELECT seq, fingerprint, start_ts_utc, end_ts_utc, description, tags_json,
+               project_id, state, error
+        FROM apply_journal
+        WHERE run_id = ? AND state IN ('pending', 'inflight')
+        ORDER BY seq ASC
+        """,
+        (run_id,),
+    )
+    return [
+        JournalItem(
+            seq=int(r["seq"]),
+            fingerprint=str(r["fingerprint"]),
+            start=str(r["start_ts_utc"]),
+            stop=str(r["end_ts_utc"]),
+            description=str(r["description"]),
+            tags=[str(t) for t in json.loads(r["tags_json"])],
+            project_id=(int(r["project_id"]) if r["project_id"] is not None else None),
+            state=str(r["state"]),
+            error=r["error"],
+        )
+        for r in cur.fetchall()
+    ]
+
+
+@timed("journal")
+def mark_inflight(conn: sqlite3.Connection, run_id: int, seqs: Sequence[int]) -> None:
+    """Durably mark items as about to be sent (one commit for the whole window)."""
+    conn.executemany(
+        "UPDATE apply_journal SET state = 'inflight' WHERE run_id = ? AND seq = ?",
+        ((run_id, seq) for seq in seqs),
+    )
+    conn.commit()
+
+
+@timed("journal")
+def mark_done_many(
+    conn: sqlite3.Connection,
+    run_id: int,
+    done: Iterable[tuple[int, int | None]],
+    *,
+    commit: bool = True,
+) -> None:
+    """Mark `(seq, toggl_time_entry_id)` items done in one statement."""
+    conn.executemany(
+        """
+        UPDATE apply_journal SET state = 'done', toggl_time_entry_id = ?, error = NULL
+        WHERE run_id = ? AND seq = ?
+        """,
+        ((te_id, run_id, seq) for seq, te_id in done),
+    )
+    if commit:
+        conn.commit()
+
+
+def mark_failed(
+    conn: sqlite3.Connection, run_id: int, seq: int, error: str, *, uncertain: bool = False
+) -> None:
+    """Record an item's error.
+
+    The item returns to `pending` (it definitely did not succeed), or with
+    `uncertain` stays `inflight` so a resume looks it up in Toggl first.
+    """
+    conn.execute(
+        "UPDATE apply_journal SET state = ?, error = ? WHERE run_id = ? AND seq = ?",
+        (INFLIGHT if uncertain else PENDING, error, run_id, seq),
+    )
+    conn.commit()
+
+
+@timed("journal")
+def settle_open_runs(
+    conn: sqlite3.Connection, *, workspace_id: int, run_id: int | None = None
+) -> list[int]:
+    """Settle other open runs' items that the ledger or `run_id` now covers.
+
+    An unfinished item whose fingerprint is in the ledger is marked done
+    (with the ledger's Toggl id). With `run_id` (a run just opened), an item
+    that run repeats is marked superseded, and the new item inherits an
+    `inflight` state so it is looked up in Toggl before being sent again.
+    Runs left with nothing to do are closed; their ids are returned.
+    """
+    others = [r for r in open_runs(conn, workspace_id=workspace_id) if r != run_id]
+    if not others:
+        return []
+    marks = ",".join("?" * len(others))
+    conn.execute(
+        f"""
+        UPDATE apply_journal SET
+            state = 'done',
+            error = NULL,
+            toggl_time_entry_id = (
+                SELECT a.toggl_time_entry_id FROM applied_entries a
+                WHERE a.fingerprint = apply_journal.fingerprint
+            )
+        WHERE run_id IN ({marks}) AND state IN ('pending', 'inflight')
+          AND fingerprint IN (SELECT fingerprint FROM applied_entries)
+        """,
+        others,
+    )
+    if run_id is not None:
+        conn.execute(
+            f"""
+            UPDATE apply_journal SET state = 'inflight'
+            WHERE run_id = ? AND state = 'pending' AND fingerprint IN (
+                SELECT fingerprint FROM apply_journal
+                WHERE run_id IN ({marks}) AND state = 'inflight'
+            )
+            """,
+            (run_id, *others),
+        )
+        conn.execute(
+            f"""
+            UPDATE apply_journal SET state = 'superseded'
+            WHERE run_id IN ({marks}) AND state IN ('pending', 'inflight')
+              AND fingerprint IN (SELECT fingerprint FROM apply_journal WHERE run_id = ?)
+            """,
+            (*others, run_id),
+        )
+    closed = [r for r in others if close_run_if_done(conn, r, commit=False)]
+    conn.commit()
+    return closed
+
+
+def close_run_if_done(conn: sqlite3.Connection, run_id: int, *, commit: bool = True) -> bool:
+    row = conn.execute(
+        """
+        SELECT 1 FROM apply_journal
+        WHERE run_id = ? AND state IN ('pending', 'inflight')
+        LIMIT 1
+        """,
+        (run_id,),
+    ).fetchone()
+    if row is not None:
+        return False
+    conn.execute("UPDATE apply_runs SET state = 'done' WHERE id = ?", (run_id,))
+    if commit:
+        conn.commit()
+    return True
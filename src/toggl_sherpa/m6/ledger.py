@@ -4,12 +4,24 @@ import sqlite3
 from dataclasses import dataclass
 from datetime import UTC, datetime
 
+from toggl_sherpa.profiling import timed
+
 
 def _since_ts_utc(date_yyyy_mm_dd: str) -> str:
     d = datetime.fromisoformat(date_yyyy_mm_dd).date()
     return datetime(d.year, d.month, d.day, tzinfo=UTC).isoformat()
 
 
+def _epoch_s(date_or_ts: str) -> int:
+    """Epoch seconds for a UTC date (YYYY-MM-DD) or an ISO timestamp."""
+    if len(date_or_ts) == 10:
+        return int(datetime.fromisoformat(_since_ts_utc(date_or_ts)).timestamp())
+    dt = datetime.fromisoformat(date_or_ts.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return int(dt.timestamp())
+
+
 @dataclass(frozen=True)
 class LedgerRow:
     ts_utc: str
@@ -18,39 +30,73 @@ class LedgerRow:
     description: str
     toggl_time_entry_id: int | None
     fingerprint: str
+    id: int | None = None
+
+    @property
+    def cursor(self) -> str:
+        """Value for `after=` to continue listing below this row."""
+        return f"{self.ts_utc},{self.id}"
+
 
+def parse_cursor(cursor: str) -> tuple[str, int]:
+    ts, sep, row_id = cursor.rpartition(",")
+    if not sep or not ts:
+        raise ValueError("cursor must look like <ts_utc>,<id>")
+    return ts, int(row_id)
 
+
+@timed("ledger")
 def list_applied(
     conn: sqlite3.Connection,
     *,
     since: str | None = None,
     limit: int = 50,
+    after: tuple[str, int] | None = None,
+    start_from: str | None = None,
+    start_to: str | None = None,
+    prefix: str | None = None,
 ) -> list[LedgerRow]:
+    """Newest-first page of ledger rows.
+
+    Paging is keyset-based: pass the last row's `(ts_utc, id)` as `after` to
+    get the next page, so deep pages cost the same as the first. Entry start
+    range (`start_from` inclusive, `start_to` exclusive; dates or timestamps)
+    and description `prefix` filters are index range scans.
+    """
     if limit <= 0:
         return []
 
+    where: list[str] = []
+    args: list[object] = []
     if since:
-        since_ts = _since_ts_utc(since)
-        cur = conn.execute(
-            """
-            SELECT ts_utc, start_ts_utc, end_ts_utc, description, toggl_time_entry_id, fingerprint
-            FROM applied_entries
-            WHERE ts_utc >= ?
-            ORDER BY ts_utc DESC
-            LIMIT ?
-            """,
-            (since_ts, limit),
-        )
-    else:
-        cur = conn.execute(
-            """
-            SELECT ts_utc, start_ts_utc, end_ts_utc, description, toggl_time_entry_id, fingerprint
-            FROM applied_entries
-            ORDER BY ts_utc DESC
-            LIMIT ?
-            """,
-            (limit,),
-        )
+        where.append("ts_utc >= ?")
+        args.append(_since_ts_utc(since))
+    if after is not None:
+        where.append("(ts_utc, id) < (?, ?)")
+        args.extend(after)
+    if start_from:
+        where.append("start_epoch >= ?")
+        args.append(_epoch_s(start_from))
+    if start_to:
+        where.append("start_epoch < ?")
+        args.append(_epoch_s(start_to))
+    if prefix:
+        # A range instead of LIKE so the description index applies.
+        where.append("description >= ? AND description < ?")
+        args.extend((prefix, prefix + "\U0010ffff"))
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    cur = conn.execute(
+        f"""
+        SELECT id, ts_utc, start_ts_utc, end_ts_utc, description, toggl_time_entry_id,
+            fingerprint
+        FROM applied_entries
+        {where_sql}
+        ORDER BY ts_utc DESC, id DESC
+        LIMIT ?
+        """,
+        (*args, limit),
+    )
 
     out: list[LedgerRow] = []
     for r in cur.fetchall():
@@ -64,6 +110,7 @@ def list_applied(
                     int(r["toggl_time_entry_id"]) if r["toggl_time_entry_id"] is not None else None
                 ),
                 fingerprint=str(r["fingerprint"]),
+                id=int(r["id"]),
             )
         )
     return out
@@ -77,30 +124,50 @@ class LedgerStats:
     unique_time_entry_ids: int
 
 
+@timed("ledger")
 def stats(conn: sqlite3.Connection, *, since: str | None = None) -> LedgerStats:
-    where = ""
-    args: tuple = ()
-    if since:
-        where = "WHERE ts_utc >= ?"
-        args = (_since_ts_utc(since),)
+    """Ledger summary from trigger-maintained counters.
 
-    row = conn.execute(
-        f"""
-        SELECT
-            COUNT(*) AS n,
-            MIN(ts_utc) AS min_ts,
-            MAX(ts_utc) AS max_ts,
-            COUNT(DISTINCT toggl_time_entry_id) AS uniq_ids
-        FROM applied_entries
-        {where}
-        """,
-        args,
-    ).fetchone()
+    Totals come from `ledger_counters`; with `since`, the count sums the
+    per-day `ledger_daily` rows. Min/max use the ts_utc index. Unique ids for
+    a `since` window still need a DISTINCT over that window's rows.
+    """
+    if since:
+        since_ts = _since_ts_utc(since)
+        row = conn.execute(
+            "SELECT COALESCE(SUM(n), 0) FROM ledger_daily WHERE day >= ?", (since_ts[:10],)
+        ).fetchone()
+        count = int(row[0])
+        uniq = conn.execute(
+            """
+            SELECT COUNT(DISTINCT toggl_time_entry_id) FROM applied_entries
+            WHERE ts_utc >= ?
+            """,
+            (since_ts,),
+        ).fetchone()[0]
+        bounds = conn.execute(
+            """
+            SELECT
+                (SELECT MIN(ts_utc) FROM applied_entries WHERE ts_utc >= ?),
+                (SELECT MAX(ts_utc) FROM applied_entries WHERE ts_utc >= ?)
+            """,
+            (since_ts, since_ts),
+        ).fetchone()
+    else:
+        counters = dict(conn.execute("SELECT name, value FROM ledger_counters").fetchall())
+        count = int(counters.get("count", 0))
+        uniq = counters.get("unique_ids", 0)
+        bounds = conn.execute(
+            """
+            SELECT
+                (SELECT MIN(ts_utc) FROM applied_entries),
+                (SELECT MAX(ts_utc) FROM applied_entries)
+            """
+        ).fetchone()
 
-    assert row is not None
     return LedgerStats(
-        count=int(row["n"]),
-        min_ts_utc=(str(row["min_ts"]) if row["min_ts"] is not None else None),
-        max_ts_utc=(str(row["max_ts"]) if row["max_ts"] is not None else None),
-        unique_time_entry_ids=int(row["uniq_ids"]),
+        count=count,
+        min_ts_utc=(str(bounds[0]) if bounds[0] is not None else None),
+        max_ts_utc=(str(bounds[1]) if bounds[1] is not None else None),
+        unique_time_entry_ids=int(uniq),
     )
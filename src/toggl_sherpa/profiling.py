@@ -0,0 +1,136 @@
+"""Lightweight stage timers for `toggl-sherpa --timings`.
+
+Code marks stages with `with span("summarise"): ...`, or `@timed(...)` on a
+whole function. Until `enable()` is called a span is a shared no-op object,
+so instrumented hot paths cost a function call and nothing else. When
+enabled, each span adds its wall time to its stage's total and its *self*
+time (total minus nested spans) to the stage's self column, so nested stages
+(e.g. `suggest` inside `summarise`) are not counted twice in the self column.
+Spans are per-thread; worker threads (concurrent apply) report into the same
+recorder.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    total_s: float = 0.0
+    self_s: float = 0.0
+
+
+@dataclass
+class Recorder:
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _local: threading.local = field(default_factory=threading.local, repr=False)
+
+    def _stack(self) -> list[list]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def add(self, name: str, total_s: float, self_s: float) -> None:
+        with self._lock:
+            st = self.stages.get(name)
+            if st is None:
+                st = self.stages[name] = StageStats()
+            st.calls += 1
+            st.total_s += total_s
+            st.self_s += self_s
+
+
+class _Span:
+    __slots__ = ("name", "rec")
+
+    def __init__(self, name: str, rec: Recorder) -> None:
+        self.name = name
+        self.rec = rec
+
+    def __enter__(self) -> None:
+        # [start, time spent in nested spans]
+        self.rec._stack().append([time.perf_counter(), 0.0])
+
+    def __exit__(self, *exc: object) -> None:
+        stack = self.rec._stack()
+        start, nested = stack.pop()
+        elapsed = time.perf_counter() - start
+        if stack:
+            stack[-1][1] += elapsed
+        self.rec.add(self.name, elapsed, elapsed - nested)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+_recorder: Recorder | None = None
+
+
+def span(name: str) -> _Span | _NoSpan:
+    """Context manager timing one stage (no-op unless timings are enabled)."""
+    rec = _recorder
+    if rec is None:
+        return _NO_SPAN
+    return _Span(name, rec)
+
+
+def timed(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator form of `span` for whole functions."""
+
+    def deco(fn: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+def enable() -> Recorder:
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def disable() -> None:
+    global _recorder
+    _recorder = None
+
+
+def format_table(rec: Recorder) -> str:
+    wall = time.perf_counter() - rec.started
+    rows = sorted(rec.stages.items(), key=lambda kv: kv[1].self_s, reverse=True)
+    width = max([len("stage"), *(len(name) for name, _ in rows)])
+    lines = [f"{'stage':<{width}}  {'calls':>7}  {'total_s':>9}  {'self_s':>9}  {'self%':>6}"]
+    for name, st in rows:
+        pct = 100 * st.self_s / wall if wall > 0 else 0.0
+        lines.append(
+            f"{name:<{width}}  {st.calls:>7}  {st.total_s:>9.4f}  {st.self_s:>9.4f}  {pct:>5.1f}%"
+        )
+    accounted = sum(st.self_s for _, st in rows)
+    lines.append(f"{'(other)':<{width}}  {'':>7}  {'':>9}  {max(wall - accounted, 0):>9.4f}")
+    lines.append(f"{'wall':<{width}}  {'':>7}  {wall:>9.4f}")
+    return "\n".join(lines)
@@ -0,0 +1,211 @@
+"""Synthetic logger data for benchmarks and manual testing.
+
+`generate` fills a DB with what the logger and tab server would have written
+over N calendar days (weekends stay empty): 10-second focus samples that hop
+between a few apps with realistic dwell times and a small pool of repeated
+window titles, a lunch break and occasional shorter idle stretches, and
+browser tab events at a configurable rate while a browser is focused (some
+hosts allowlisted, the rest redacted exactly as the tab server does).
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sqlite3
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+
+from toggl_sherpa.m1.lookup import Lookups
+from toggl_sherpa.m2.redaction import redact_tab
+
+DEFAULT_ALLOW_HOSTS = frozenset({"github.com", "docs.google.com", "notion.so"})
+
+# (wm_class, app name, weight, titles)
+_APPS: list[tuple[str, str, int, list[str]]] = [
+    (
+        "code",
+        "Visual Studio Code",
+        5,
+        [f"{f} - toggl-sherpa" for f in ("cli.py", "summarise.py", "apply.py", "db.py")],
+    ),
+    ("firefox", "Mozilla Firefox", 5, []),
+    ("gnome-terminal-server", "Terminal", 2, ["pytest -q", "vim notes.md", "htop"]),
+    ("slack", "Slack", 2, ["#dev", "#general", "DM Sam"]),
+    ("rstudio", "RStudio", 1, ["analysis.R", "model_fit.R"]),
+]
+
+# (url, title); hosts outside the allowlist are redacted on insert.
+_PAGES: list[tuple[str, str]] = [
+    *(
+        (f"https://github.com/acme/toggl-sherpa/pull/{n}", f"Pull request #{n} · acme")
+        for n in (101, 102, 117)
+    ),
+    ("https://github.com/acme/toggl-sherpa/actions", "CI · acme/toggl-sherpa"),
+    ("https://docs.google.com/document/d/abc/edit", "Q3 planning - Google Docs"),
+    ("https://docs.google.com/spreadsheets/d/xyz/edit", "Timesheet 2026 - Google Sheets"),
+    ("https://www.notion.so/acme/Roadmap-123", "Roadmap"),
+    ("https://mail.example.com/inbox", "Inbox (12)"),
+    ("https://news.example.org/story/42", "Some news story"),
+]
+
+
+@dataclass(frozen=True)
+class SyntheticStats:
+    days: int
+    samples: int
+    tab_events: int
+    start_ts_utc: str
+    end_ts_utc: str
+
+
+def _day_rows(
+    rng: random.Random,
+    day: date,
+    *,
+    interval_s: int,
+    tabs_per_min: float,
+    first_sample_id: int,
+    allow_hosts: frozenset[str] | set[str],
+) -> tuple[list[tuple], list[tuple]]:
+    t = datetime(day.year, day.month, day.day, 9, tzinfo=UTC) + timedelta(
+        minutes=rng.randrange(0, 15)
+    )
+    end = t.replace(hour=17, minute=30) + timedelta(minutes=rng.randrange(0, 20))
+    lunch = (t.replace(hour=12), t.replace(hour=12, minute=40 + rng.randrange(0, 15)))
+
+    samples: list[tuple] = []
+    tabs: list[tuple] = []
+    sample_id = first_sample_id
+    idle_since: datetime | None = None
+    weights = [w for _wm, _name, w, _titles in _APPS]
+    tab_every_s = 60.0 / tabs_per_min if tabs_per_min > 0 else None
+
+    while t < end:
+        wm, app, _w, titles = rng.choices(_APPS, weights=weights)[0]
+        dwell_s = max(30.0, rng.expovariate(1 / 360))
+        session_end = min(end, t + timedelta(seconds=dwell_s))
+        idle_break = rng.random() < 0.03
+        page = rng.choice(_PAGES)
+        title = rng.choice(titles) if titles else page[1]
+        next_tab = t
+
+        while t < session_end:
+            idle = lunch[0] <= t < lunch[1] or idle_break
+            idle_since = (idle_since or t) if idle else None
+            if idle_since is None:
+                idle_ms = rng.randrange(0, 5000)
+            else:
+                idle_ms = int((t - idle_since).total_seconds() * 1000)
+            ts = t.isoformat()
+
+            if wm == "firefox" and idle_since is None:
+                # Hop between pages now and then; titles follow the page.
+                if rng.random() < interval_s / 120:
+                    page = rng.choice(_PAGES)
+                title = page[1]
+                while tab_every_s is not None and next_tab <= t:
+                    red = redact_tab(page[0], page[1], set(allow_hosts))
+                    tabs.append(
+                        (
+                            next_tab.isoformat(),
+                            sample_id,
+                            red.url,
+                            red.title,
+                            red.url_redacted,
+                            red.title_redacted,
+                            1 if red.allowed else 0,
+                            json.dumps({"url": page[0], "title": page[1]}),
+                        )
+                    )
+                    next_tab += timedelta(seconds=tab_every_s)
+
+            samples.append((sample_id, ts, idle_ms, f"{title} — {app}", wm, 4242, "{}", interval_s))
+            sample_id += 1
+            t += timedelta(seconds=interval_s)
+            next_tab = max(next_tab, t - timedelta(seconds=interval_s))
+
+    return samples, tabs
+
+
+def focus_trace(day: date, *, seed: int = 0) -> list[tuple[int, str, str]]:
+    """Ground-truth focus state for every second of `day`, as (idle_ms, title, wm_class).
+
+    The working day comes from the same model as `generate`; the machine is
+    left on (and idle) before and after it.
+    """
+    rows, _tabs = _day_rows(
+        random.Random(seed),
+        day,
+        interval_s=1,
+        tabs_per_min=0,
+        first_sample_id=1,
+        allow_hosts=set(),
+    )
+    midnight = datetime(day.year, day.month, day.day, tzinfo=UTC)
+    first = int((datetime.fromisoformat(rows[0][1]) - midnight).total_seconds())
+    last = first + len(rows)
+    out: list[tuple[int, str, str]] = []
+    for sec in range(24 * 3600):
+        if sec < first:
+            # Idle since yesterday evening.
+            out.append(((sec + 6 * 3600) * 1000, "Lock screen", "gnome-shell"))
+        elif sec >= last:
+            out.append(((sec - last) * 1000, rows[-1][3], rows[-1][4]))
+        else:
+            _id, _ts, idle_ms, title, wm, *_rest = rows[sec - first]
+            out.append((idle_ms, title, wm))
+    return out
+
+
+def generate(
+    conn: sqlite3.Connection,
+    *,
+    days: int,
+    tabs_per_min: float = 6.0,
+    start: date | None = None,
+    interval_s: int = 10,
+    seed: int = 0,
+    allow_hosts: frozenset[str] | set[str] = DEFAULT_ALLOW_HOSTS,
+) -> SyntheticStats:
+    """Append `days` calendar days of samples and tab events, from `start`.
+
+    Deterministic for a given seed. Rows are written one day per transaction.
+    """
+    rng = random.Random(seed)
+    start = start or date(2026, 1, 5)
+    row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM samples").fetchone()
+    next_id = int(row[0]) + 1
+
+    lookups = Lookups()
+    n_samples = n_tabs = 0
+    first_ts = last_ts = ""
+    for d in range(days):
+        day = start + timedelta(days=d)
+        if day.weekday() >= 5:
+            continue
+        samples, tabs = _day_rows(
+            rng,
+            day,
+            interval_s=interval_s,
+            tabs_per_min=tabs_per_min,
+            first_sample_id=next_id,
+            allow_hosts=allow_hosts,
+        )
+        with conn:
+            lookups.insert_samples(conn, samples)
+            lookups.insert_tab_events(conn, tabs)
+        if samples:
+            first_ts = first_ts or samples[0][1]
+            last_ts = samples[-1][1]
+        next_id += len(samples)
+        n_samples += len(samples)
+        n_tabs += len(tabs)
+
+    return SyntheticStats(
+        days=days,
+        samples=n_samples,
+        tab_events=n_tabs,
+        start_ts_utc=first_ts,
+        end_ts_utc=last_ts,
+    )
@@ -0,0 +1,90 @@
+"""A stand-in for `gdbus monitor` watching the toggl-sherpa shell extension.
+
+Prints what `gdbus monitor` would print for a sequence of extension
+`Changed` signals, so `m1.events` can be tested and benchmarked without
+GNOME or a session bus:
+
+    python tests/fake_bus.py --switches 100 --every-s 0.01
+    python tests/fake_bus.py --from events.jsonl --hold
+
+`--from` reads one JSON object per line: the signal payload (`title`,
+`wm_class`, `pid`, `idle_ms`), optionally with `delay_s` before it is sent.
+`--hold` keeps the "monitor" running after the last signal until killed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from toggl_sherpa.m1.events import BUS_NAME, INTERFACE, OBJECT_PATH
+
+_WINDOWS = [
+    ("code", "summarise.py - toggl-sherpa - Visual Studio Code", 101),
+    ("firefox", "Pull request #117 · acme — Mozilla Firefox", 202),
+    ("gnome-terminal-server", "pytest -q", 303),
+    ("slack", "#dev | Slack", 404),
+]
+
+
+def _gvariant_string(s: str) -> str:
+    return "'" + s.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def format_signal(payload: dict[str, Any]) -> str:
+    """One `gdbus monitor` line for an extension `Changed` signal."""
+    # ASCII-only JSON: gdbus output is decoded with C-style escapes.
+    body = json.dumps(payload, ensure_ascii=True, sort_keys=True)
+    return f"{OBJECT_PATH}: {INTERFACE}.Changed ({_gvariant_string(body)},)"
+
+
+def switches(n: int, *, every_s: float = 0.0) -> Iterator[dict[str, Any]]:
+    """`n` focus changes cycling through a few windows."""
+    for i in range(n):
+        wm, title, pid = _WINDOWS[i % len(_WINDOWS)]
+        yield {
+            "delay_s": every_s,
+            "reason": "focus",
+            "wm_class": wm,
+            "title": title,
+            "pid": pid,
+            "idle_ms": 0,
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python tests/fake_bus.py")
+    ap.add_argument("--from", dest="path", help="JSON Lines file of signal payloads")
+    ap.add_argument("--switches", type=int, default=0, help="Emit N generated focus changes")
+    ap.add_argument("--every-s", type=float, default=0.0, help="Delay between generated signals")
+    ap.add_argument("--hold", action="store_true", help="Keep running after the last signal")
+    args = ap.parse_args(argv)
+
+    out = sys.stdout
+    out.write(f"Monitoring signals on object {OBJECT_PATH} owned by {BUS_NAME}\n")
+    out.write(f"The name {BUS_NAME} is owned by :1.23\n")
+    out.flush()
+
+    events: list[dict[str, Any]] = list(switches(args.switches, every_s=args.every_s))
+    if args.path:
+        with open(args.path, encoding="utf-8") as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+
+    for ev in events:
+        delay = float(ev.pop("delay_s", 0.0))
+        if delay > 0:
+            time.sleep(delay)
+        out.write(format_signal(ev) + "\n")
+        out.flush()
+
+    while args.hold:
+        time.sleep(3600)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,244 @@
+"""Local stand-in for the Toggl Track v9 API.
+
+Only implements the endpoints toggl-sherpa uses. Intended for tests and
+benchmarks: it speaks HTTP/1.1 with keep-alive and counts TCP connections so
+callers can check connection reuse. It can also enforce a request rate limit
+(429 + `Retry-After`), inject error responses (`inject(503, ...)`, or
+`inject_after_create(502, ...)` for creates that succeed but are answered with
+an error) and add a fixed per-request latency to mimic a real network
+round-trip. Metadata lists
+carry an `ETag` (answering 304 to a matching `If-None-Match`) and honour
+Toggl's `since` filter on the items' `at` timestamps.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import UTC, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from toggl_sherpa.m5.ratelimit import TokenBucket
+
+_WS_LIST_RE = re.compile(r"^/api/v9/workspaces/(\d+)/(projects|tags|clients)$")
+_WS_TE_RE = re.compile(r"^/api/v9/workspaces/(\d+)/time_entries$")
+
+
+def _parse_date(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=UTC)
+
+
+class StubTogglHandler(BaseHTTPRequestHandler):
+    server: StubTogglServer  # type: ignore[assignment]
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls.
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _json_response(self, status: int, obj: Any) -> None:
+        data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _cacheable_response(self, obj: Any) -> None:
+        data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        etag = f'"{hashlib.sha1(data).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error_response(self, status: int) -> None:
+        data = json.dumps({"error": status}).encode("utf-8")
+        self.send_response(status)
+        # Fractional seconds keep tests fast; the client accepts floats.
+        self.send_header("Retry-After", str(self.server.retry_after_s))
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _admit(self) -> bool:
+        """Count the request; answer with a rate-limit/injected error if due."""
+        srv = self.server
+        if srv.latency_s:
+            time.sleep(srv.latency_s)
+        with srv.lock:
+            srv.requests += 1
+            fault = srv.faults.popleft() if srv.faults else None
+        if srv.limiter is not None and not srv.limiter.try_acquire():
+            with srv.lock:
+                srv.rate_limited += 1
+            self._error_response(HTTPStatus.TOO_MANY_REQUESTS)
+            return False
+        if fault is not None:
+            self._error_response(fault)
+            return False
+        return True
+
+    def _read_json(self) -> Any:
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            length = 0
+        body = self.rfile.read(length) if length else b""
+        return json.loads(body.decode("utf-8") or "null")
+
+    def do_GET(self) -> None:  # noqa: N802
+        srv = self.server
+        if not self._admit():
+            return
+
+        url = urlsplit(self.path)
+        if url.path == "/api/v9/me":
+            self._cacheable_response({"workspaces": srv.workspaces})
+            return
+
+        if url.path == "/api/v9/me/time_entries":
+            q = parse_qs(url.query)
+            try:
+                lo = _parse_date(q["start_date"][0])
+                hi = _parse_date(q["end_date"][0])
+            except (KeyError, ValueError):
+                self._json_response(HTTPStatus.BAD_REQUEST, {"error": "bad date range"})
+                return
+            with srv.lock:
+                found = [e for e in srv.time_entries if lo <= _parse_date(e["start"]) < hi]
+            self._json_response(HTTPStatus.OK, found)
+            return
+
+        m = _WS_LIST_RE.match(url.path)
+        if m:
+            items = getattr(srv, m.group(2)).get(int(m.group(1)), [])
+            since = parse_qs(url.query).get("since")
+            if since:
+                lo = datetime.fromtimestamp(int(since[0]), UTC)
+                items = [x for x in items if "at" not in x or _parse_date(x["at"]) >= lo]
+            self._cacheable_response(items)
+            return
+
+        self._json_response(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def do_POST(self) -> None:  # noqa: N802
+        srv = self.server
+        try:
+            payload = self._read_json()
+        except json.JSONDecodeError:
+            payload = None
+        if not self._admit():
+            return
+
+        m = _WS_TE_RE.match(self.path)
+        if not m:
+            self._json_response(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        if payload is None:
+            self._json_response(HTTPStatus.BAD_REQUEST, {"error": "invalid json"})
+            return
+        if not isinstance(payload, dict):
+            self._json_response(HTTPStatus.BAD_REQUEST, {"error": "expected an object"})
+            return
+
+        with srv.lock:
+            srv.next_id += 1
+            entry = {**payload, "id": srv.next_id, "workspace_id": int(m.group(1))}
+            srv.time_entries.append(entry)
+            late = srv.late_faults.popleft() if srv.late_faults else None
+        if late is not None:
+            self._error_response(late)
+            return
+        self._json_response(HTTPStatus.OK, entry)
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        pass
+
+
+class StubTogglServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: tuple[str, int] = ("127.0.0.1", 0),
+        *,
+        max_rps: float | None = None,
+        burst: int = 1,
+        retry_after_s: float = 0.05,
+        latency_s: float = 0.0,
+    ):
+        super().__init__(server_address, StubTogglHandler)
+        self.lock = threading.Lock()
+        self.limiter = TokenBucket(max_rps, burst) if max_rps else None
+        self.retry_after_s = retry_after_s
+        self.latency_s = latency_s
+        self.faults: deque[int] = deque()
+        self.late_faults: deque[int] = deque()
+        self.connections = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.not_modified = 0
+        self.next_id = 1000
+        self.workspaces: list[dict] = [{"id": 1, "name": "Stub"}]
+        self.projects: dict[int, list[dict]] = {}
+        self.tags: dict[int, list[dict]] = {}
+        self.clients: dict[int, list[dict]] = {}
+        self.time_entries: list[dict] = []
+        self._thread: threading.Thread | None = None
+
+    def inject(self, *statuses: int) -> None:
+        """Answer the next requests with these error statuses, in order."""
+        with self.lock:
+            self.faults.extend(statuses)
+
+    def inject_after_create(self, *statuses: int) -> None:
+        """Create the next entries, but answer those POSTs with these statuses."""
+        with self.lock:
+            self.late_faults.extend(statuses)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v9"
+
+    def start(self) -> StubTogglServer:
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> StubTogglServer:
+        return self.start()
+
+    def __exit__(self, *_exc: object) -> None:
+        self.stop()
@@ -4,11 +4,12 @@ from click.testing import CliRunner
 from typer.main import get_command
 
 import toggl_sherpa.cli as cli
+import toggl_sherpa.m1.gnome as gnome
 
 
 def test_doctor_ok(monkeypatch) -> None:
     monkeypatch.setattr(cli.shutil, "which", lambda _name: "/usr/bin/gdbus")
-    monkeypatch.setattr(cli, "get_focus_sample", lambda: object())
+    monkeypatch.setattr(gnome, "get_focus_sample", lambda: object())
 
     runner = CliRunner()
     res = runner.invoke(get_command(cli.app), ["doctor"])
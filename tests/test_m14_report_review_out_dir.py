@@ -6,6 +6,7 @@ from click.testing import CliRunner
 from typer.main import get_command
 
 import toggl_sherpa.cli as cli
+import toggl_sherpa.m4.review as review
 from toggl_sherpa.m1 import db as db_mod
 
 
@@ -29,7 +30,7 @@ def _seed_samples(db_path: Path) -> None:
 
 def test_report_review_out_dir(monkeypatch, tmp_path: Path) -> None:
     # Avoid prompting by stubbing interactive_review.
-    monkeypatch.setattr(cli, "interactive_review", lambda blocks: blocks)
+    monkeypatch.setattr(review, "interactive_review", lambda blocks: blocks)
 
     db_path = tmp_path / "test.sqlite"
     _seed_samples(db_path)
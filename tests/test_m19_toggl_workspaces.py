@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 from click.testing import CliRunner
 from typer.main import get_command
 
 import toggl_sherpa.cli as cli
 
 
-def test_toggl_workspaces_requires_token(monkeypatch) -> None:
+def test_toggl_workspaces_requires_token(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
     monkeypatch.delenv("TOGGL_API_TOKEN", raising=False)
     runner = CliRunner()
     res = runner.invoke(get_command(cli.app), ["toggl", "workspaces"])
@@ -14,19 +17,21 @@ def test_toggl_workspaces_requires_token(monkeypatch) -> None:
     assert "missing TOGGL_API_TOKEN" in res.stdout
 
 
-def test_toggl_workspaces_lists(monkeypatch) -> None:
+def test_toggl_workspaces_lists(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
     monkeypatch.setenv("TOGGL_API_TOKEN", "t")
 
     import toggl_sherpa.m5.toggl_api as api
 
     class Resp:
         status_code = 200
+        headers: dict = {}
         text = "ok"
 
         def json(self):
             return {"workspaces": [{"id": 1, "name": "A"}]}
 
-    monkeypatch.setattr(api.requests, "get", lambda *a, **k: Resp())
+    monkeypatch.setattr(api.requests.Session, "get", lambda *a, **k: Resp())
 
     runner = CliRunner()
     res = runner.invoke(get_command(cli.app), ["toggl", "workspaces"])
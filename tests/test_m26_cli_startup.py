@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+# Fixed budget for everything `toggl-sherpa log status` imports from the CLI
+# module down (typer included). Best-of-N keeps this stable on noisy CI runners.
+IMPORT_BUDGET_US = 100_000
+RUNS = 3
+
+# Heavy modules that must stay off the `log status` path.
+FORBIDDEN = (
+    "requests",
+    "csv",
+    "http.server",
+    "sqlite3",
+    "toggl_sherpa.m2.tab_server",
+    "toggl_sherpa.m3.summarise",
+    "toggl_sherpa.m5.toggl_api",
+    "toggl_sherpa.m6.ledger",
+)
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+def _log_status_importtime(tmp_path: Path) -> tuple[int, set[str]]:
+    env = dict(os.environ, XDG_CACHE_HOME=str(tmp_path))
+    code = (
+        "import sys; sys.argv = ['toggl-sherpa', 'log', 'status']\n"
+        "sys.stderr.write('-- start --\\n')\n"
+        "from toggl_sherpa.cli import main\n"
+        "main()\n"
+    )
+    cp = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    # Not running -> exit 1; anything else means the command itself broke.
+    assert cp.returncode == 1, cp.stderr
+    assert "stopped pidfile=" in cp.stdout
+
+    # Only count what the command pulls in, not interpreter startup.
+    _startup, _, ours = cp.stderr.partition("-- start --\n")
+    total_us = 0
+    modules: set[str] = set()
+    for line in ours.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), m.group(3), m.group(4)
+        modules.add(name)
+        # Top-level entries only; nested ones are already in their parent's total.
+        if len(indent) == 1:
+            total_us += cumulative
+    assert "toggl_sherpa.cli" in modules
+    return total_us, modules
+
+
+def test_log_status_avoids_heavy_imports(tmp_path: Path) -> None:
+    _total, modules = _log_status_importtime(tmp_path)
+    loaded = {m for m in modules for f in FORBIDDEN if m == f or m.startswith(f + ".")}
+    assert not loaded
+
+
+def test_log_status_import_budget(tmp_path: Path) -> None:
+    best = min(_log_status_importtime(tmp_path)[0] for _ in range(RUNS))
+    assert best < IMPORT_BUDGET_US, f"log status imports took {best} us"
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from stub_server import StubTogglServer
+
+from toggl_sherpa.m5.apply import ApplyPlanItem, apply_plan
+from toggl_sherpa.m5.toggl_api import TogglClient, TogglConfig
+
+
+def test_client_reuses_one_connection() -> None:
+    with StubTogglServer() as srv:
+        srv.projects[1] = [{"id": 7, "name": "Proj"}]
+        with TogglClient("t", base_url=srv.base_url) as client:
+            assert client.list_workspaces() == [{"id": 1, "name": "Stub"}]
+            assert client.list_projects(1) == [{"id": 7, "name": "Proj"}]
+            for i in range(20):
+                te = client.create_time_entry(
+                    1,
+                    start=f"2026-02-08T12:{i:02d}:00+00:00",
+                    stop=f"2026-02-08T12:{i:02d}:30+00:00",
+                    description=f"e{i}",
+                )
+                assert te["id"] > 0
+
+        assert srv.requests == 22
+        assert srv.connections == 1
+        assert srv.time_entries[0]["created_with"] == "toggl-sherpa"
+
+
+def test_apply_plan_shares_one_client(tmp_path: Path) -> None:
+    plan = [
+        ApplyPlanItem(
+            start=f"2026-02-08T12:{i:02d}:00+00:00",
+            stop=f"2026-02-08T12:{i:02d}:30+00:00",
+            description=f"e{i}",
+            tags=["code"],
+            project_id=None,
+        )
+        for i in range(5)
+    ]
+    with StubTogglServer() as srv:
+        cfg = TogglConfig(api_token="t", workspace_id=1, base_url=srv.base_url, max_rps=None)
+        result = apply_plan(plan, cfg, ledger_db_path=tmp_path / "l.sqlite")
+
+    assert len(result.created) == 5
+    assert result.skipped == 0
+    assert srv.connections == 1
+    assert srv.time_entries[0]["tags"] == ["code"]
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from stub_server import StubTogglServer
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m5.apply import ApplyPlanItem, apply_plan, load_config_from_env
+from toggl_sherpa.m5.ratelimit import TokenBucket
+from toggl_sherpa.m5.toggl_api import RetryPolicy, TogglApiError, TogglConfig
+
+
+def _plan(n: int) -> list[ApplyPlanItem]:
+    return [
+        ApplyPlanItem(
+            start=f"2026-02-08T{i // 60:02d}:{i % 60:02d}:00+00:00",
+            stop=f"2026-02-08T{i // 60:02d}:{i % 60:02d}:30+00:00",
+            description=f"e{i}",
+            tags=[],
+            project_id=None,
+        )
+        for i in range(n)
+    ]
+
+
+def _ledger_count(path: Path) -> int:
+    conn = db_mod.connect(path)
+    try:
+        return int(conn.execute("SELECT COUNT(*) FROM applied_entries").fetchone()[0])
+    finally:
+        conn.close()
+
+
+def test_token_bucket_blocks_until_refill() -> None:
+    now = [0.0]
+    slept: list[float] = []
+
+    def sleep(s: float) -> None:
+        slept.append(s)
+        now[0] += s
+
+    tb = TokenBucket(2.0, burst=2, clock=lambda: now[0], sleep=sleep)
+    tb.acquire()
+    tb.acquire()
+    assert slept == []
+    tb.acquire()
+    assert slept == [pytest.approx(0.5)]
+
+    tb.pause_for(3.0)
+    assert tb.try_acquire() is False
+    tb.acquire()
+    assert now[0] >= 3.5
+
+
+def test_concurrent_apply_survives_rate_limits_and_faults(tmp_path: Path) -> None:
+    ledger = tmp_path / "ledger.sqlite"
+    plan = _plan(30)
+    # The client is allowed to go faster than the server, so it must back off on 429s.
+    with StubTogglServer(max_rps=40, burst=2, retry_after_s=0.05) as srv:
+        srv.inject(503, 502)
+        cfg = TogglConfig(
+            api_token="t",
+            workspace_id=1,
+            base_url=srv.base_url,
+            max_rps=200,
+            burst=6,
+            retry=RetryPolicy(max_attempts=8),
+        )
+        result = apply_plan(plan, cfg, ledger_db_path=ledger, concurrency=6)
+
+        assert len(result.created) == 30
+        assert result.skipped == 0
+        assert result.failed == []
+        assert srv.rate_limited > 0
+        assert sorted(e["description"] for e in srv.time_entries) == sorted(
+            p.description for p in plan
+        )
+        assert _ledger_count(ledger) == 30
+
+        # Idempotent: nothing is re-posted.
+        again = apply_plan(plan, cfg, ledger_db_path=ledger, concurrency=6)
+        assert again.created == []
+        assert again.skipped == 30
+        assert len(srv.time_entries) == 30
+
+
+def test_concurrent_apply_client_limiter_avoids_429(tmp_path: Path) -> None:
+    with StubTogglServer(max_rps=50, burst=2) as srv:
+        cfg = TogglConfig(api_token="t", workspace_id=1, base_url=srv.base_url, max_rps=25, burst=1)
+        result = apply_plan(_plan(10), cfg, ledger_db_path=tmp_path / "l.sqlite", concurrency=4)
+    assert len(result.created) == 10
+    assert srv.rate_limited == 0
+
+
+def test_rate_limit_is_opt_in(monkeypatch) -> None:
+    monkeypatch.setenv("TOGGL_API_TOKEN", "t")
+    monkeypatch.setenv("TOGGL_WORKSPACE_ID", "1")
+    # Unthrottled by default, as before --max-rps existed.
+    assert load_config_from_env().max_rps is None
+    assert load_config_from_env(concurrency=4).max_rps is None
+    cfg = load_config_from_env(max_rps=2.5, concurrency=4)
+    assert (cfg.max_rps, cfg.burst) == (2.5, 4)
+    assert load_config_from_env(max_rps=0, concurrency=4).max_rps is None
+
+
+def test_concurrent_apply_error_keeps_ledger_consistent(tmp_path: Path) -> None:
+    ledger = tmp_path / "ledger.sqlite"
+    plan = _plan(12)
+    with StubTogglServer() as srv:
+        cfg = TogglConfig(
+            api_token="t",
+            workspace_id=1,
+            base_url=srv.base_url,
+            max_rps=None,
+            retry=RetryPolicy(max_attempts=1),
+        )
+        # A fatal status (auth) aborts the run mid-way.
+        srv.inject(403)
+        with pytest.raises(TogglApiError):
+            apply_plan(plan, cfg, ledger_db_path=ledger, concurrency=3, reconcile_remote=False)
+
+        # Every entry the server created is in the ledger (and vice versa).
+        assert _ledger_count(ledger) == len(srv.time_entries)
+
+        result = apply_plan(plan, cfg, ledger_db_path=ledger, concurrency=3)
+        assert result.skipped + len(result.created) == 12
+        assert len(srv.time_entries) == 12
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+from stub_server import StubTogglServer
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m5.apply import ApplyPlanItem, apply_plan, open_run_id, resume_apply
+from toggl_sherpa.m5.toggl_api import RetryPolicy, TogglClient, TogglConfig
+from toggl_sherpa.m6 import journal
+from toggl_sherpa.m6.idempotency import fingerprint
+
+
+def _plan(n: int) -> list[ApplyPlanItem]:
+    return [
+        ApplyPlanItem(
+            start=f"2026-02-09T09:{i:02d}:00+00:00",
+            stop=f"2026-02-09T09:{i:02d}:30+00:00",
+            description=f"e{i}",
+            tags=[],
+            project_id=None,
+        )
+        for i in range(n)
+    ]
+
+
+def _cfg(srv: StubTogglServer) -> TogglConfig:
+    return TogglConfig(
+        api_token="t",
+        workspace_id=1,
+        base_url=srv.base_url,
+        max_rps=None,
+        retry=RetryPolicy(base_delay_s=0.01, max_delay_s=0.05),
+    )
+
+
+def _journal_states(path: Path) -> dict[str, int]:
+    conn = db_mod.connect(path)
+    try:
+        rows = conn.execute("SELECT state, COUNT(*) FROM apply_journal GROUP BY state")
+        return {str(r[0]): int(r[1]) for r in rows}
+    finally:
+        conn.close()
+
+
+def test_retry_policy_delays() -> None:
+    policy = RetryPolicy(base_delay_s=1.0, max_delay_s=5.0, jitter=0.0)
+    assert [policy.delay_s(a) for a in range(4)] == [1.0, 2.0, 4.0, 5.0]
+    # Retry-After wins over the computed backoff.
+    assert policy.delay_s(3, 0.25) == 0.25
+
+    jittered = RetryPolicy(base_delay_s=1.0, jitter=0.5)
+    rng = random.Random(0)
+    delays = [jittered.delay_s(1, rng=rng) for _ in range(50)]
+    assert all(1.0 <= d <= 2.0 for d in delays)
+    assert len(set(delays)) > 1
+
+    assert policy.should_retry(429)
+    assert policy.should_retry(503)
+    assert not policy.should_retry(400)
+    assert RetryPolicy(retry_statuses=frozenset({409})).should_retry(409)
+
+    # A create is only resent when the server says it turned the request away.
+    assert policy.should_retry(429, idempotent=False)
+    assert policy.should_retry(503, idempotent=False, retry_after_s=1.0)
+    assert not policy.should_retry(503, idempotent=False)
+    assert not policy.should_retry(502, idempotent=False, retry_after_s=1.0)
+    assert not policy.should_retry(500, idempotent=False)
+
+
+def test_transient_errors_are_retried(tmp_path: Path) -> None:
+    with StubTogglServer() as srv:
+        srv.inject(502, 503, 429)
+        result = apply_plan(_plan(3), _cfg(srv), ledger_db_path=tmp_path / "l.sqlite")
+
+    assert len(result.created) == 3
+    assert result.failed == []
+    assert len(srv.time_entries) == 3
+    assert open_run_id(tmp_path / "l.sqlite", workspace_id=1) is None
+
+
+def test_failed_item_is_kept_for_resume(tmp_path: Path) -> None:
+    ledger = tmp_path / "l.sqlite"
+    with StubTogglServer() as srv:
+        # 400 is not retryable: that item fails, the rest of the run continues.
+        # (No reconciliation, so the fault hits the first POST.)
+        srv.inject(400)
+        result = apply_plan(_plan(4), _cfg(srv), ledger_db_path=ledger, reconcile_remote=False)
+
+        assert len(result.created) == 3
+        assert [p.description for p, _err in result.failed] == ["e0"]
+        assert "400" in result.failed[0][1]
+        assert _journal_states(ledger) == {"done": 3, "pending": 1}
+        run_id = open_run_id(ledger, workspace_id=1)
+        assert run_id == result.run_id
+
+        resumed = resume_apply(_cfg(srv), ledger_db_path=ledger)
+        assert resumed.run_id == run_id
+        assert [e["description"] for e in resumed.created] == ["e0"]
+        assert len(srv.time_entries) == 4
+        assert open_run_id(ledger, workspace_id=1) is None
+
+        # Nothing left to do.
+        assert resume_apply(_cfg(srv), ledger_db_path=ledger).run_id is None
+
+
+class _CrashingClient(TogglClient):
+    """Dies (like Ctrl-C) right after the server accepted the Nth create."""
+
+    def __init__(self, *args: object, crash_after: int, **kw: object) -> None:
+        super().__init__(*args, **kw)  # type: ignore[arg-type]
+        self.crash_after = crash_after
+        self.calls = 0
+
+    def create_time_entry(self, *args: object, **kw: object) -> dict:
+        resp = super().create_time_entry(*args, **kw)  # type: ignore[arg-type]
+        self.calls += 1
+        if self.calls == self.crash_after:
+            raise KeyboardInterrupt
+        return resp
+
+
+def test_resume_after_interruption_does_not_duplicate(tmp_path: Path) -> None:
+    ledger = tmp_path / "l.sqlite"
+    plan = _plan(6)
+    with StubTogglServer() as srv:
+        cfg = _cfg(srv)
+        crashing = _CrashingClient("t", base_url=srv.base_url, crash_after=3)
+        with crashing, pytest.raises(KeyboardInterrupt):
+            apply_plan(plan, cfg, ledger_db_path=ledger, client=crashing)
+
+        # The third entry exists in Toggl but never reached the ledger.
+        assert len(srv.time_entries) == 3
+        assert _journal_states(ledger) == {"done": 2, "inflight": 4}
+
+        result = resume_apply(cfg, ledger_db_path=ledger)
+        assert [p.description for p in result.recovered_items] == ["e2"]
+        assert sorted(e["description"] for e in result.created) == ["e3", "e4", "e5"]
+        assert sorted(e["description"] for e in srv.time_entries) == [f"e{i}" for i in range(6)]
+
+        # The ledger now covers everything, so a plain re-apply is a no-op.
+        again = apply_plan(plan, cfg, ledger_db_path=ledger)
+        assert again.created == []
+        assert again.skipped == 6
+        assert len(srv.time_entries) == 6
+
+
+def test_create_answered_with_server_error_is_looked_up_not_resent(tmp_path: Path) -> None:
+    ledger = tmp_path / "l.sqlite"
+    with StubTogglServer() as srv:
+        # e0 is created, but the answer is a gateway error.
+        srv.inject_after_create(502)
+        result = apply_plan(_plan(3), _cfg(srv), ledger_db_path=ledger, reconcile_remote=False)
+        assert [p.description for p, _err in result.failed] == ["e0"]
+        assert len(srv.time_entries) == 3
+        assert _journal_states(ledger) == {"done": 2, "inflight": 1}
+
+        resumed = resume_apply(_cfg(srv), ledger_db_path=ledger)
+        assert [p.description for p in resumed.recovered_items] == ["e0"]
+        assert resumed.created == []
+        assert len(srv.time_entries) == 3
+
+        # A 503 with Retry-After was turned away, so the create is retried.
+        srv.inject(503)
+        again = apply_plan(_plan(4), _cfg(srv), ledger_db_path=ledger, reconcile_remote=False)
+        assert [e["description"] for e in again.created] == ["e3"]
+        assert len(srv.time_entries) == 4
+
+
+def test_later_apply_supersedes_open_run(tmp_path: Path) -> None:
+    ledger = tmp_path / "l.sqlite"
+    plan = _plan(3)
+    with StubTogglServer() as srv:
+        srv.inject(500)
+        first = apply_plan(plan, _cfg(srv), ledger_db_path=ledger, reconcile_remote=False)
+        assert [p.description for p, _err in first.failed] == ["e0"]
+
+        # A plain re-apply creates e0 and takes it over from the first run.
+        second = apply_plan(plan, _cfg(srv), ledger_db_path=ledger)
+        assert [e["description"] for e in second.created] == ["e0"]
+        assert open_run_id(ledger, workspace_id=1) is None
+        assert _journal_states(ledger) == {"done": 3, "superseded": 1}
+
+        assert resume_apply(_cfg(srv), ledger_db_path=ledger).run_id is None
+        assert sorted(e["description"] for e in srv.time_entries) == ["e0", "e1", "e2"]
+
+
+def test_resume_skips_items_another_run_applied(tmp_path: Path) -> None:
+    ledger = tmp_path / "l.sqlite"
+    (p,) = _plan(1)
+    fp = fingerprint(start=p.start, stop=p.stop, description=p.description)
+    conn = db_mod.connect(ledger)
+    # Two runs left open with the same item (as an older version could leave them).
+    runs = [
+        journal.open_run(
+            conn, workspace_id=1, items=[(fp, p.start, p.stop, p.description, [], None)]
+        )
+        for _ in range(2)
+    ]
+    conn.close()
+
+    with StubTogglServer() as srv:
+        resumed = resume_apply(_cfg(srv), ledger_db_path=ledger)
+        assert resumed.run_ids == runs
+        assert [e["description"] for e in resumed.created] == ["e0"]
+        assert [q.description for q in resumed.skipped_items] == ["e0"]
+        assert len(srv.time_entries) == 1
+    assert open_run_id(ledger, workspace_id=1) is None
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+from stub_server import StubTogglServer
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.model import TimesheetBlock
+from toggl_sherpa.m5 import apply as apply_mod
+from toggl_sherpa.m5 import metacache
+from toggl_sherpa.m5.apply import build_plan, project_ids_with_cache
+from toggl_sherpa.m5.toggl_api import TogglClient
+
+OLD = "2020-01-01T00:00:00+00:00"
+
+
+def _seed(srv: StubTogglServer) -> None:
+    srv.projects[1] = [
+        {"id": 10, "name": "Dev", "active": True, "at": OLD},
+        {"id": 11, "name": "Admin", "active": True, "at": OLD},
+        {"id": 12, "name": "dev", "active": False, "at": OLD},
+    ]
+    srv.tags[1] = [{"id": 20, "name": "code", "at": OLD}]
+    srv.clients[1] = [{"id": 30, "name": "ACME", "at": OLD}]
+
+
+def _block(project: str | None) -> TimesheetBlock:
+    return TimesheetBlock(
+        start_ts_utc="2026-02-09T09:00:00+00:00",
+        end_ts_utc="2026-02-09T09:30:00+00:00",
+        seconds=1800,
+        label="code:X",
+        project_suggestion=project,
+        tags_suggestion=[],
+        evidence=[],
+    )
+
+
+def test_sync_then_revalidate(tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    with StubTogglServer() as srv:
+        _seed(srv)
+        with TogglClient("t", base_url=srv.base_url) as client:
+            counts = metacache.sync(conn, client, workspace_id=1)
+            assert counts == {"workspaces": 1, "projects": 3, "tags": 1, "clients": 1}
+
+            # Fresh: served from the cache without any request.
+            before = srv.requests
+            tags = metacache.load(conn, client, workspace_id=1, kind="tags")
+            assert [t["name"] for t in tags] == ["code"]
+            assert srv.requests == before
+
+            # Revalidate after one rename and one delete; `since` returns only those.
+            srv.projects[1][1] = {**srv.projects[1][1], "name": "Ops", "at": "2099-01-01T00:00:00Z"}
+            srv.projects[1].append(
+                {"id": 12, "name": "dev", "server_deleted_at": "2099-01-01T00:00:00Z"}
+            )
+            changed = metacache.sync(conn, client, workspace_id=1)
+
+    assert changed["projects"] == 1
+    # Workspaces are unchanged: the ETag revalidation answered 304.
+    assert changed["workspaces"] == 0
+    assert srv.not_modified >= 1
+    names = {p["name"]: p["id"] for p in metacache.cached(conn, workspace_id=1, kind="projects")}
+    assert names == {"Dev": 10, "Ops": 11}
+    conn.close()
+
+
+def test_project_resolution_is_offline_and_config_wins(tmp_path: Path) -> None:
+    db_path = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db_path)
+    with StubTogglServer() as srv:
+        _seed(srv)
+        with TogglClient("t", base_url=srv.base_url) as client:
+            metacache.sync(conn, client, workspace_id=1)
+    conn.close()
+
+    blocks = [_block("dev"), _block("Admin"), _block("unknown"), _block(None)]
+    ids = project_ids_with_cache(blocks, {"Admin": 99}, db_path=db_path, workspace_id=1)
+    plan = build_plan(blocks, project_ids=ids)
+    # "dev" matches the active "Dev" project, not the archived "dev".
+    assert [p.project_id for p in plan] == [10, 99, None, None]
+
+    # Without a workspace there's nothing to look up.
+    assert project_ids_with_cache(blocks, {}, db_path=db_path, workspace_id=None) == {}
+
+
+def test_toggl_projects_uses_cache_without_token(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("TOGGL_API_TOKEN", raising=False)
+    db_path = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db_path)
+    with StubTogglServer() as srv:
+        _seed(srv)
+        with TogglClient("t", base_url=srv.base_url) as client:
+            metacache.refresh(conn, client, workspace_id=1, kind="projects")
+    conn.close()
+
+    res = CliRunner().invoke(
+        get_command(cli.app),
+        ["toggl", "projects", "--workspace-id", "1", "--db", str(db_path)],
+    )
+    assert res.exit_code == 0
+    assert "10\tDev" in res.stdout
+
+    res = CliRunner().invoke(
+        get_command(cli.app),
+        ["toggl", "projects", "--workspace-id", "1", "--db", str(db_path), "--refresh"],
+    )
+    assert res.exit_code == 2
+    assert "missing TOGGL_API_TOKEN" in res.stdout
+
+
+def test_apply_reads_the_cache_sync_meta_fills(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("TOGGL_WORKSPACE_ID", "1")
+    db_path = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db_path)
+    with StubTogglServer() as srv:
+        _seed(srv)
+        with TogglClient("t", base_url=srv.base_url) as client:
+            metacache.sync(conn, client, workspace_id=1)
+    conn.close()
+    reviewed = tmp_path / "reviewed.json"
+    block = {**_block("dev").__dict__, "evidence": []}
+    reviewed.write_text(json.dumps([block]), encoding="utf-8")
+
+    resolved: list[dict[str, int]] = []
+    real = apply_mod.project_ids_with_cache
+
+    def spy(*args, **kwargs) -> dict[str, int]:
+        resolved.append(real(*args, **kwargs))
+        return resolved[-1]
+
+    monkeypatch.setattr(apply_mod, "project_ids_with_cache", spy)
+    # A separate ledger doesn't hide the cache in the main DB.
+    args = ["apply", "--reviewed", str(reviewed), "--db", str(db_path)]
+    res = CliRunner().invoke(
+        get_command(cli.app), [*args, "--ledger-db", str(tmp_path / "ledger.sqlite")]
+    )
+    assert res.exit_code == 0, res.output
+    assert [ids.get("dev") for ids in resolved] == [10]
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import random
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from stub_server import StubTogglServer
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m5.apply import ApplyPlanItem, apply_plan
+from toggl_sherpa.m5.reconcile import (
+    IntervalIndex,
+    RemoteEntry,
+    fetch_remote_entries,
+    plan_window,
+)
+from toggl_sherpa.m5.toggl_api import TogglClient, TogglConfig
+
+
+def _item(start: str, stop: str, desc: str) -> ApplyPlanItem:
+    return ApplyPlanItem(start=start, stop=stop, description=desc, tags=[], project_id=None)
+
+
+def _remote(srv: StubTogglServer, start: str, stop: str, desc: str) -> None:
+    srv.next_id += 1
+    srv.time_entries.append(
+        {"id": srv.next_id, "workspace_id": 1, "start": start, "stop": stop, "description": desc}
+    )
+
+
+def test_interval_index_matches_brute_force() -> None:
+    rng = random.Random(7)
+    entries = []
+    for i in range(300):
+        start = rng.randrange(0, 10_000)
+        stop = start + rng.randrange(1, 400)
+        entries.append(RemoteEntry(id=i, start_s=start, stop_s=stop, description=""))
+    index = IntervalIndex(entries)
+    for _ in range(200):
+        lo = rng.randrange(0, 10_000)
+        hi = lo + rng.randrange(1, 300)
+        want = {e.id for e in entries if e.start_s < hi and e.stop_s > lo}
+        assert {e.id for e in index.overlapping(lo, hi)} == want
+    # Touching intervals don't overlap.
+    index = IntervalIndex([RemoteEntry(id=1, start_s=10, stop_s=20, description="")])
+    assert index.overlapping(20, 30) == []
+    assert index.overlapping(0, 10) == []
+
+
+def test_fetch_is_paged_by_range() -> None:
+    lo = datetime(2026, 1, 1, tzinfo=UTC)
+    with StubTogglServer() as srv:
+        for day in (0, 9, 19):
+            start = lo + timedelta(days=day)
+            _remote(srv, start.isoformat(), (start + timedelta(hours=1)).isoformat(), f"d{day}")
+        with TogglClient("t", base_url=srv.base_url) as client:
+            found = fetch_remote_entries(client, lo, lo + timedelta(days=20))
+    # 20 days in 7-day pages: 3 requests.
+    assert srv.requests == 3
+    assert sorted(e.description for e in found) == ["d0", "d19", "d9"]
+
+
+def test_apply_skips_entries_already_in_toggl(tmp_path: Path) -> None:
+    ledger = tmp_path / "ledger.sqlite"
+    plan = [
+        _item("2026-02-09T09:00:00+00:00", "2026-02-09T09:30:00+00:00", "dup"),
+        _item("2026-02-09T10:00:00+00:00", "2026-02-09T11:00:00+00:00", "overlaps"),
+        _item("2026-02-09T12:00:00+00:00", "2026-02-09T12:30:00+00:00", "new"),
+    ]
+    with StubTogglServer() as srv:
+        # Created from another machine / the Toggl UI; the ledger doesn't know them.
+        _remote(srv, "2026-02-09T09:00:00Z", "2026-02-09T09:30:00Z", "dup")
+        _remote(srv, "2026-02-09T10:45:00Z", "2026-02-09T11:15:00Z", "meeting")
+        cfg = TogglConfig(api_token="t", workspace_id=1, base_url=srv.base_url, max_rps=None)
+
+        result = apply_plan(plan, cfg, ledger_db_path=ledger, skip_overlaps=True)
+        assert [p.description for p in result.remote_items] == ["dup"]
+        assert [(p.description, [h.description for h in hits]) for p, hits in result.overlaps] == [
+            ("overlaps", ["meeting"])
+        ]
+        assert [e["description"] for e in result.created] == ["new"]
+
+        # Without skip_overlaps the overlap is reported but still created. The
+        # duplicate is now in the ledger: one range fetch + one POST.
+        before = srv.requests
+        again = apply_plan(plan, cfg, ledger_db_path=ledger)
+        assert again.skipped == 2
+        assert [e["description"] for e in again.created] == ["overlaps"]
+        assert srv.requests == before + 2
+
+    assert sorted(e["description"] for e in srv.time_entries) == [
+        "dup",
+        "meeting",
+        "new",
+        "overlaps",
+    ]
+    conn = db_mod.connect(ledger)
+    ids = conn.execute(
+        "SELECT toggl_time_entry_id FROM applied_entries WHERE description = 'dup'"
+    ).fetchall()
+    conn.close()
+    assert [r[0] for r in ids] == [srv.time_entries[0]["id"]]
+
+
+def test_overlap_starting_before_the_plan_is_found(tmp_path: Path) -> None:
+    plan = [
+        _item("2026-02-09T09:00:00+00:00", "2026-02-09T09:30:00+00:00", "first"),
+        _item("2026-02-09T12:00:00+00:00", "2026-02-09T12:30:00+00:00", "last"),
+    ]
+    assert plan_window([(p.start, p.stop) for p in plan], lookback=timedelta(hours=2)) == (
+        datetime(2026, 2, 9, 7, tzinfo=UTC),
+        datetime(2026, 2, 9, 12, 30, tzinfo=UTC),
+    )
+    with StubTogglServer() as srv:
+        # Starts before every plan item, so a window built from plan starts misses it.
+        _remote(srv, "2026-02-09T08:00:00Z", "2026-02-09T09:15:00Z", "workshop")
+        # Starts after the last plan start but before its stop.
+        _remote(srv, "2026-02-09T12:15:00Z", "2026-02-09T13:00:00Z", "call")
+        cfg = TogglConfig(api_token="t", workspace_id=1, base_url=srv.base_url, max_rps=None)
+        result = apply_plan(plan, cfg, ledger_db_path=tmp_path / "l.sqlite", skip_overlaps=True)
+    assert [(p.description, [h.description for h in hits]) for p, hits in result.overlaps] == [
+        ("first", ["workshop"]),
+        ("last", ["call"]),
+    ]
+    assert result.created == []
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from stub_server import StubTogglServer
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m5 import apply as apply_mod
+from toggl_sherpa.m5.apply import ApplyPlanItem, apply_plan
+from toggl_sherpa.m5.toggl_api import TogglConfig
+from toggl_sherpa.m6 import idempotency
+from toggl_sherpa.m6.idempotency import applied_fingerprints, record_applied_many
+
+
+def _rows(n: int) -> list[tuple[str, str, str, str, int | None]]:
+    return [
+        (f"fp{i}", "2026-02-09T09:00:00+00:00", "2026-02-09T09:30:00+00:00", f"e{i}", i)
+        for i in range(n)
+    ]
+
+
+def test_applied_fingerprints_chunks_large_inputs(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(idempotency, "IN_CHUNK", 7)
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    record_applied_many(conn, _rows(30))
+    # Duplicate rows are ignored like record_applied does.
+    record_applied_many(conn, _rows(3))
+    assert conn.execute("SELECT COUNT(*) FROM applied_entries").fetchone()[0] == 30
+
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    wanted = [f"fp{i}" for i in range(20, 40)] + ["fp25"]
+    assert applied_fingerprints(conn, wanted) == {f"fp{i}" for i in range(20, 30)}
+    # 20 distinct fingerprints in chunks of 7.
+    assert sum("IN (" in s for s in statements) == 3
+    conn.close()
+
+
+def test_apply_writes_ledger_in_batches(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(apply_mod, "LEDGER_BATCH", 8)
+    commits = 0
+    real_commit = sqlite3.Connection.commit
+
+    class CountingConnection(sqlite3.Connection):
+        def commit(self) -> None:
+            nonlocal commits
+            commits += 1
+            real_commit(self)
+
+    real_connect = sqlite3.connect
+    monkeypatch.setattr(
+        db_mod.sqlite3,
+        "connect",
+        lambda *a, **k: real_connect(*a, factory=CountingConnection, **k),
+    )
+
+    plan = [
+        ApplyPlanItem(
+            start=f"2026-02-09T09:{i:02d}:00+00:00",
+            stop=f"2026-02-09T09:{i:02d}:30+00:00",
+            description=f"e{i}",
+            tags=[],
+            project_id=None,
+        )
+        for i in range(40)
+    ]
+    with StubTogglServer() as srv:
+        cfg = TogglConfig(api_token="t", workspace_id=1, base_url=srv.base_url, max_rps=None)
+        result = apply_plan(plan, cfg, ledger_db_path=tmp_path / "l.sqlite")
+    assert len(result.created) == 40
+    # 5 ledger batches plus a handful of journal/migration commits, not one per entry.
+    assert commits <= 15
+
+    conn = db_mod.connect(tmp_path / "l.sqlite")
+    assert conn.execute("SELECT COUNT(*) FROM applied_entries").fetchone()[0] == 40
+    states = conn.execute("SELECT DISTINCT state FROM apply_journal").fetchall()
+    assert [r[0] for r in states] == ["done"]
+    conn.close()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+from stub_server import StubTogglServer
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m5.apply import ApplyPlanItem, apply_plan, ledger_overlaps
+from toggl_sherpa.m5.toggl_api import TogglConfig
+from toggl_sherpa.m6.idempotency import fingerprint, record_applied
+
+
+def _item(start: str, stop: str, desc: str = "code:X") -> ApplyPlanItem:
+    return ApplyPlanItem(start=start, stop=stop, description=desc, tags=[], project_id=None)
+
+
+def _applied(conn, start: str, stop: str, desc: str = "code:X", te_id: int = 1) -> None:
+    record_applied(
+        conn,
+        fp=fingerprint(start=start, stop=stop, description=desc),
+        start=start,
+        stop=stop,
+        description=desc,
+        toggl_time_entry_id=te_id,
+    )
+
+
+def test_ledger_overlaps_catch_shifted_blocks(tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    # A long entry far earlier must still be found (span-bounded index query).
+    _applied(conn, "2026-02-09T01:00:00+00:00", "2026-02-09T08:00:00+00:00", "long", 1)
+    _applied(conn, "2026-02-09T09:00:00+00:00", "2026-02-09T10:00:00+00:00", "code:X", 2)
+    _applied(conn, "2026-02-08T09:00:00+00:00", "2026-02-08T10:00:00+00:00", "yesterday", 3)
+
+    plan = [
+        # Re-summarised with another idle threshold: shifted by a few minutes.
+        _item("2026-02-09T09:04:00+00:00", "2026-02-09T10:02:00+00:00"),
+        # Identical to what was applied: that's the entry itself, not an overlap.
+        _item("2026-02-09T09:00:00+00:00", "2026-02-09T10:00:00+00:00"),
+        # Touches the long entry's end only.
+        _item("2026-02-09T08:00:00+00:00", "2026-02-09T08:30:00+00:00"),
+        _item("2026-02-09T07:30:00Z", "2026-02-09T08:30:00Z", "late"),
+    ]
+    found = {p.start: [h.id for h in hits] for p, hits in ledger_overlaps(conn, plan)}
+    assert found == {"2026-02-09T09:04:00+00:00": [2], "2026-02-09T07:30:00Z": [1]}
+    conn.close()
+
+
+def test_migration_backfills_epoch_columns(tmp_path: Path) -> None:
+    path = tmp_path / "db.sqlite"
+    conn = db_mod.connect(path)
+    # Rewind to a v5 ledger holding a row without epoch columns.
+    conn.execute("DROP TRIGGER trg_applied_entries_ai")
+    conn.execute("DROP TRIGGER trg_applied_entries_ad")
+    conn.execute("DROP TRIGGER trg_applied_entries_au")
+    conn.execute("DROP INDEX idx_applied_entries_start_epoch")
+    conn.execute("DROP INDEX idx_applied_entries_span")
+    conn.execute("ALTER TABLE applied_entries DROP COLUMN start_epoch")
+    conn.execute("ALTER TABLE applied_entries DROP COLUMN end_epoch")
+    conn.execute(
+        """
+        INSERT INTO applied_entries(ts_utc, fingerprint, start_ts_utc, end_ts_utc, description)
+        VALUES ('x', 'fp', '2026-02-09T09:00:00+00:00', '2026-02-09T09:30:00Z', 'old')
+        """
+    )
+    conn.execute("UPDATE meta SET value = '5' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+
+    conn = db_mod.connect(path)
+    row = conn.execute("SELECT start_epoch, end_epoch FROM applied_entries").fetchone()
+    assert (row[0], row[1]) == (1770627600, 1770629400)
+    plan = [_item("2026-02-09T09:10:00+00:00", "2026-02-09T09:20:00+00:00")]
+    assert len(ledger_overlaps(conn, plan)) == 1
+    conn.close()
+
+
+def test_apply_can_block_ledger_overlaps(tmp_path: Path) -> None:
+    ledger = tmp_path / "ledger.sqlite"
+    conn = db_mod.connect(ledger)
+    _applied(conn, "2026-02-09T09:00:00+00:00", "2026-02-09T10:00:00+00:00")
+    conn.close()
+
+    plan = [
+        _item("2026-02-09T09:05:00+00:00", "2026-02-09T10:05:00+00:00"),
+        _item("2026-02-09T11:00:00+00:00", "2026-02-09T11:30:00+00:00"),
+    ]
+    with StubTogglServer() as srv:
+        cfg = TogglConfig(api_token="t", workspace_id=1, base_url=srv.base_url, max_rps=None)
+        result = apply_plan(
+            plan, cfg, ledger_db_path=ledger, reconcile_remote=False, skip_overlaps=True
+        )
+    assert [p.start for p, _hits in result.overlaps] == ["2026-02-09T09:05:00+00:00"]
+    assert [e["start"] for e in result.created] == ["2026-02-09T11:00:00+00:00"]
+
+
+def test_dry_run_lists_overlaps(tmp_path: Path) -> None:
+    ledger = tmp_path / "ledger.sqlite"
+    conn = db_mod.connect(ledger)
+    _applied(conn, "2026-02-09T09:00:00+00:00", "2026-02-09T10:00:00+00:00", "code:Y")
+    conn.close()
+
+    reviewed = tmp_path / "reviewed.json"
+    reviewed.write_text(
+        json.dumps(
+            [
+                {
+                    "start_ts_utc": "2026-02-09T09:30:00+00:00",
+                    "end_ts_utc": "2026-02-09T10:30:00+00:00",
+                    "seconds": 3600,
+                    "label": "code:X",
+                    "project_suggestion": None,
+                    "tags_suggestion": [],
+                    "evidence": [],
+                }
+            ]
+        ),
+        encoding="utf-8",
+    )
+    res = CliRunner().invoke(
+        get_command(cli.app),
+        ["apply", "--reviewed", str(reviewed), "--ledger-db", str(ledger)],
+    )
+    assert res.exit_code == 0
+    assert "warning: 1 entr(y/ies) overlap already-applied entries" in res.stdout
+    assert "~ code:Y" in res.stdout
+    assert "dry-run: not creating anything" in res.stdout
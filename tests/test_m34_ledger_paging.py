@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m6.idempotency import record_applied_many
+from toggl_sherpa.m6.ledger import list_applied, parse_cursor, stats
+
+
+def _seed(conn, n: int) -> None:
+    rows = [
+        (
+            f"fp{i}",
+            f"2026-02-{1 + i % 20:02d}T09:00:00+00:00",
+            f"2026-02-{1 + i % 20:02d}T09:30:00+00:00",
+            f"{'code' if i % 2 else 'mail'}:{i}",
+            i % 7,
+        )
+        for i in range(n)
+    ]
+    record_applied_many(conn, rows)
+    # Several rows share a ts_utc so the id tiebreak matters.
+    conn.execute(
+        "UPDATE applied_entries SET ts_utc = '2026-03-0' || (id % 3 + 1) || 'T00:00:00+00:00'"
+    )
+    conn.commit()
+
+
+def _full_stats(conn, since: str | None = None) -> tuple:
+    where = "WHERE ts_utc >= ?" if since else ""
+    args = (f"{since}T00:00:00+00:00",) if since else ()
+    return tuple(
+        conn.execute(
+            f"""
+            SELECT COUNT(*), MIN(ts_utc), MAX(ts_utc), COUNT(DISTINCT toggl_time_entry_id)
+            FROM applied_entries {where}
+            """,
+            args,
+        ).fetchone()
+    )
+
+
+def test_keyset_pages_cover_every_row_once(tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    _seed(conn, 47)
+
+    seen: list[int] = []
+    after = None
+    while True:
+        page = list_applied(conn, limit=10, after=after)
+        if not page:
+            break
+        seen.extend(r.id for r in page)
+        after = parse_cursor(page[-1].cursor)
+    everything = [r.id for r in list_applied(conn, limit=1000)]
+    assert seen == everything
+    assert sorted(seen) == list(range(1, 48))
+    conn.close()
+
+
+def test_start_range_and_prefix_filters(tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    _seed(conn, 40)
+
+    rows = list_applied(conn, limit=100, start_from="2026-02-03", start_to="2026-02-05")
+    assert {r.start_ts_utc[:10] for r in rows} == {"2026-02-03", "2026-02-04"}
+    assert len(rows) == 4
+
+    rows = list_applied(conn, limit=100, prefix="code:", start_from="2026-02-02T09:00:00Z")
+    assert rows and all(r.description.startswith("code:") for r in rows)
+    assert all(r.start_ts_utc >= "2026-02-02" for r in rows)
+    assert list_applied(conn, limit=100, prefix="nope") == []
+    conn.close()
+
+
+def test_stats_counters_track_inserts_and_deletes(tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    assert stats(conn).count == 0
+    _seed(conn, 30)
+    # Duplicates are ignored and must not bump the counters.
+    record_applied_many(conn, [("fp3", "a", "b", "c", 99)])
+    record_applied_many(conn, [("new", "2026-02-01T09:00:00Z", "2026-02-01T10:00:00Z", "x", None)])
+
+    def check() -> None:
+        for since in (None, "2026-03-02", "2030-01-01"):
+            s = stats(conn, since=since)
+            full = _full_stats(conn, since)
+            assert (s.count, s.min_ts_utc, s.max_ts_utc, s.unique_time_entry_ids) == full
+
+    check()
+    conn.execute("UPDATE applied_entries SET toggl_time_entry_id = 100 WHERE id IN (5, 6)")
+    conn.commit()
+    check()
+    conn.execute("DELETE FROM applied_entries WHERE toggl_time_entry_id IN (0, 1)")
+    conn.commit()
+    check()
+    conn.execute("DELETE FROM applied_entries")
+    conn.commit()
+    check()
+    conn.close()
+
+
+def test_cli_prints_next_page_cursor(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db)
+    _seed(conn, 5)
+    conn.close()
+
+    runner = CliRunner()
+    app = get_command(cli.app)
+    first = runner.invoke(app, ["ledger", "list", "--db", str(db), "--limit", "3"])
+    assert first.exit_code == 0
+    cursor = first.stdout.strip().splitlines()[-1].removeprefix("next page: --after ")
+
+    second = runner.invoke(
+        app, ["ledger", "list", "--db", str(db), "--limit", "3", "--after", cursor]
+    )
+    assert second.exit_code == 0
+    lines = second.stdout.strip().splitlines()
+    assert len(lines) == 2
+    assert "next page" not in second.stdout
+
+    bad = runner.invoke(app, ["ledger", "list", "--db", str(db), "--after", "nope"])
+    assert bad.exit_code == 2
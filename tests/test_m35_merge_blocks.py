@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import random
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+
+from toggl_sherpa.m3.model import EvidenceItem, TimesheetBlock
+from toggl_sherpa.m3.query import parse_ts
+from toggl_sherpa.m4.apply import merge_adjacent_blocks
+
+
+def _merge_reference(blocks: list[TimesheetBlock], *, gap_seconds: int = 60):
+    # The previous pairwise implementation, kept as the behavioural spec.
+    if not blocks:
+        return []
+    merged = [blocks[0]]
+    for b in blocks[1:]:
+        prev = merged[-1]
+        gap = int((parse_ts(b.start_ts_utc) - parse_ts(prev.end_ts_utc)).total_seconds())
+        if (
+            gap <= gap_seconds
+            and b.label == prev.label
+            and b.project_suggestion == prev.project_suggestion
+            and b.tags_suggestion == prev.tags_suggestion
+        ):
+            merged[-1] = replace(
+                prev,
+                end_ts_utc=b.end_ts_utc,
+                seconds=prev.seconds + b.seconds + max(gap, 0),
+                evidence=[*prev.evidence, *b.evidence],
+            )
+        else:
+            merged.append(b)
+    return merged
+
+
+def _random_blocks(rng: random.Random, n: int) -> list[TimesheetBlock]:
+    t = datetime(2026, 2, 9, tzinfo=UTC)
+    out = []
+    for i in range(n):
+        # Mostly contiguous, sometimes gaps or overlaps.
+        t += timedelta(seconds=rng.choice([0, 0, 0, 5, 90, -3]))
+        dur = rng.randrange(1, 120)
+        end = t + timedelta(seconds=dur)
+        ev = [
+            EvidenceItem(
+                ts_utc=t.isoformat(),
+                allowed=True,
+                url=f"u{i}",
+                title=None,
+                url_redacted=None,
+                title_redacted=None,
+            )
+            for _ in range(rng.randrange(0, 3))
+        ]
+        out.append(
+            TimesheetBlock(
+                start_ts_utc=t.isoformat(),
+                end_ts_utc=end.isoformat(),
+                seconds=dur,
+                label=rng.choice(["code:A", "code:A", "mail"]),
+                project_suggestion=rng.choice([None, "P"]) if i % 5 == 0 else None,
+                tags_suggestion=["t"] if i % 7 == 0 else [],
+                evidence=ev,
+            )
+        )
+        t = end
+    return out
+
+
+def test_merge_matches_previous_implementation() -> None:
+    rng = random.Random(35)
+    assert merge_adjacent_blocks([]) == []
+    for n in (1, 2, 3, 50, 400):
+        blocks = _random_blocks(rng, n)
+        for gap in (0, 5, 60, 120):
+            got = merge_adjacent_blocks(blocks, gap_seconds=gap)
+            assert got == _merge_reference(blocks, gap_seconds=gap)
+
+
+def test_merge_leaves_inputs_untouched() -> None:
+    blocks = _random_blocks(random.Random(1), 100)
+    snapshot = [replace(b, evidence=list(b.evidence)) for b in blocks]
+    merged = merge_adjacent_blocks(blocks, gap_seconds=120)
+    assert blocks == snapshot
+    assert len(merged) < len(blocks)
+    # Unmerged blocks are passed through as-is.
+    single = merge_adjacent_blocks(blocks[:1])
+    assert single[0] is blocks[0]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m3.model import EvidenceItem, TimesheetBlock
+from toggl_sherpa.m4.blockfile import is_jsonl, iter_blocks, write_blocks
+from toggl_sherpa.m5.apply import _load_blocks
+
+
+def _blocks(n: int) -> list[TimesheetBlock]:
+    return [
+        TimesheetBlock(
+            start_ts_utc=f"2026-02-09T09:{i:02d}:00+00:00",
+            end_ts_utc=f"2026-02-09T09:{i:02d}:50+00:00",
+            seconds=50,
+            label="code:X" if i < 3 else "mail",
+            project_suggestion="P" if i < 3 else None,
+            tags_suggestion=["t"],
+            evidence=[EvidenceItem(f"2026-02-09T09:{i:02d}:01+00:00", True, "u", "é", None, None)],
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("name", ["b.json", "b.json.gz", "b.jsonl", "b.ndjson", "b.jsonl.gz"])
+def test_round_trip_by_extension(tmp_path: Path, name: str) -> None:
+    path = tmp_path / name
+    blocks = _blocks(5)
+    assert write_blocks(path, iter(blocks)) == 5
+    assert list(iter_blocks(path)) == blocks
+
+    data = path.read_bytes()
+    raw = (gzip.decompress(data) if name.endswith(".gz") else data).decode("utf-8")
+    if is_jsonl(path):
+        assert len(raw.splitlines()) == 5
+        assert json.loads(raw.splitlines()[0])["label"] == "code:X"
+    else:
+        assert isinstance(json.loads(raw), list)
+
+
+def test_block_to_dict_matches_to_jsonable() -> None:
+    from toggl_sherpa.m3.query import to_jsonable
+    from toggl_sherpa.m4.blockfile import block_to_dict
+
+    for b in _blocks(4):
+        assert json.dumps(block_to_dict(b)) == json.dumps(to_jsonable(b))
+
+
+def test_jsonl_errors_name_the_line(tmp_path: Path) -> None:
+    path = tmp_path / "b.jsonl"
+    good = json.dumps({"start_ts_utc": "a", "end_ts_utc": "b", "seconds": 1, "label": "x"})
+    path.write_text(f"{good}\n\n[1]\n", encoding="utf-8")
+    it = iter_blocks(path)
+    assert next(it).label == "x"
+    with pytest.raises(ValueError, match="line 3 must be an object"):
+        next(it)
+
+    path.write_text("{nope\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="line 1: invalid JSON"):
+        list(iter_blocks(path))
+
+
+def test_apply_loader_skips_evidence(tmp_path: Path) -> None:
+    path = tmp_path / "b.jsonl.gz"
+    write_blocks(path, _blocks(2))
+    loaded = _load_blocks(path)
+    assert [b.evidence for b in loaded] == [[], []]
+    assert loaded[0].project_suggestion == "P"
+
+
+def test_cli_merge_and_apply_stream_jsonl(tmp_path: Path) -> None:
+    reviewed = tmp_path / "reviewed.jsonl"
+    merged = tmp_path / "merged.jsonl.gz"
+    csv_path = tmp_path / "import.csv"
+    write_blocks(reviewed, _blocks(5))
+
+    runner = CliRunner()
+    app = get_command(cli.app)
+    res = runner.invoke(app, ["report", "merge", "--in", str(reviewed), "--out", str(merged)])
+    assert res.exit_code == 0
+    assert "(2 block(s))" in res.stdout
+    out = list(iter_blocks(merged))
+    assert [(b.label, len(b.evidence)) for b in out] == [("code:X", 3), ("mail", 2)]
+
+    res = runner.invoke(app, ["report", "apply", "--in", str(merged), "--out", str(csv_path)])
+    assert res.exit_code == 0
+    assert "(2 row(s))" in res.stdout
+    assert len(csv_path.read_text(encoding="utf-8").splitlines()) == 3
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from toggl_sherpa.m3.model import SampleRow, TabEventRow
+from toggl_sherpa.m3.report import blocks_to_markdown
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.m4.blockfile import iter_blocks, write_blocks
+
+T0 = datetime(2026, 2, 9, 9, tzinfo=UTC)
+
+
+def _ticks(urls: list[str]) -> tuple[list[SampleRow], list[TabEventRow]]:
+    samples: list[SampleRow] = []
+    tabs: list[TabEventRow] = []
+    for i, url in enumerate(urls):
+        ts = (T0 + timedelta(seconds=10 * i)).isoformat()
+        samples.append(SampleRow(i, ts, 0, "Firefox", "firefox", 1))
+        allowed = "secret" not in url
+        tabs.append(
+            TabEventRow(
+                id=i,
+                ts_utc=ts,
+                sample_id=i,
+                allowed=allowed,
+                url=url if allowed else None,
+                title=f"T {url[-1]}" if allowed else None,
+                url_redacted=None if allowed else "https://secret.example/…",
+                title_redacted=None if allowed else "[REDACTED]",
+            )
+        )
+    return samples, tabs
+
+
+def test_evidence_is_collapsed_per_url_and_title() -> None:
+    urls = ["https://github.com/pr/1", "https://github.com/pr/2"] * 180
+    samples, tabs = _ticks(urls)
+
+    (block,) = summarise_blocks(samples, tabs)
+    ev = {e.url or e.url_redacted: e for e in block.evidence}
+    assert list(ev) == [
+        "https://github.com/pr/1",
+        "https://github.com/pr/2",
+    ]
+    pr1 = ev["https://github.com/pr/1"]
+    assert (pr1.ts_utc, pr1.count) == (T0.isoformat(), 180)
+    assert pr1.last_ts_utc == (T0 + timedelta(seconds=10 * 358)).isoformat()
+    assert sum(e.count for e in block.evidence) == len(urls)
+
+    md = blocks_to_markdown([block])
+    assert f"{T0.isoformat()} … " in md
+    assert "×180" in md
+
+
+def test_per_tick_evidence_flag_keeps_old_shape(tmp_path: Path) -> None:
+    samples, tabs = _ticks(["https://github.com/pr/1"] * 30)
+    (ticks,) = summarise_blocks(samples, tabs, per_tick_evidence=True)
+    assert len(ticks.evidence) == 30
+    assert {(e.count, e.last_ts_utc) for e in ticks.evidence} == {(1, None)}
+
+    (agg,) = summarise_blocks(samples, tabs)
+    assert len(agg.evidence) == 1
+
+    # Redacted tabs group on their redacted form.
+    samples, tabs = _ticks([f"https://secret.example/{i}" for i in range(12)])
+    (redacted,) = summarise_blocks(samples, tabs)
+    assert [(e.url_redacted, e.count) for e in redacted.evidence] == [
+        ("https://secret.example/…", 12)
+    ]
+    # Aggregates survive a block file round trip.
+    path = tmp_path / "b.jsonl"
+    write_blocks(path, [agg, ticks])
+    assert list(iter_blocks(path)) == [agg, ticks]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m2.tab_ingest import TabPayload, insert_tab_event
+from toggl_sherpa.m3.query import (
+    db_fingerprint,
+    fetch_samples,
+    fetch_tab_events,
+    hydrate_evidence,
+)
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.m4.apply import merge_adjacent_blocks
+from toggl_sherpa.m4.blockfile import iter_blocks, write_blocks
+from toggl_sherpa.m5.apply import _load_blocks
+
+DAY = ("2026-02-09T00:00:00+00:00", "2026-02-09T23:59:59+00:00")
+
+
+def _seed(path: Path) -> None:
+    conn = db_mod.connect(path)
+    t0 = datetime(2026, 2, 9, 9, tzinfo=UTC)
+    for i in range(60):
+        ts = (t0 + timedelta(seconds=10 * i)).isoformat()
+        conn.execute(
+            """
+            INSERT INTO samples(ts_utc, idle_ms, focus_title, focus_wm_class, focus_pid, raw_json)
+            VALUES (?, 0, 'Firefox', 'firefox', 1, '{}')
+            """,
+            (ts,),
+        )
+        host = "github.com" if i < 40 else "secret.example"
+        payload = TabPayload(url=f"https://{host}/p/{i % 3}", title=f"Page {i % 3}", ts_utc=ts)
+        insert_tab_event(conn, payload, {"github.com"})
+    conn.close()
+
+
+def test_referenced_blocks_hydrate_to_embedded_evidence(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    _seed(db)
+    conn = db_mod.connect(db)
+    samples = fetch_samples(conn, *DAY)
+    tabs = fetch_tab_events(conn, *DAY)
+    embedded = summarise_blocks(samples, tabs)
+    refd = summarise_blocks(samples, tabs, evidence_ref_db=db_fingerprint(conn))
+
+    assert [b.evidence for b in refd] == [[], []]
+    assert [b.evidence_ref.ranges for b in refd] == [[(1, 40)], [(41, 60)]]
+
+    path = tmp_path / "reviewed.json"
+    write_blocks(path, refd)
+    loaded = list(iter_blocks(path))
+    assert [hydrate_evidence(conn, b) for b in loaded] == embedded
+    per_tick = hydrate_evidence(conn, loaded[0], per_tick=True)
+    assert len(per_tick.evidence) == 40
+
+    # Merging concatenates (and coalesces) the id ranges.
+    merged = merge_adjacent_blocks([loaded[0], loaded[0]], gap_seconds=10_000)
+    assert merged[0].evidence_ref.ranges == [(1, 40), (1, 40)]
+
+    # The apply path never looks at evidence.
+    assert [b.evidence_ref for b in _load_blocks(path)] == [None, None]
+    conn.close()
+
+    other = db_mod.connect(tmp_path / "other.sqlite")
+    with pytest.raises(ValueError, match="different database"):
+        hydrate_evidence(other, loaded[0])
+    other.close()
+
+
+def test_review_file_references_and_show_hydrates(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    _seed(db)
+    reviewed = tmp_path / "reviewed.json"
+    runner = CliRunner()
+    app = get_command(cli.app)
+
+    res = runner.invoke(
+        app,
+        [
+            "report",
+            "review",
+            "--date",
+            "2026-02-09",
+            "--db",
+            str(db),
+            "--out",
+            str(reviewed),
+            "--evidence-ref",
+        ],
+        input="a\na\n",
+    )
+    assert res.exit_code == 0, res.stdout
+    assert "40 tab event(s) by reference" in res.stdout
+    text = reviewed.read_text(encoding="utf-8")
+    assert "github.com/p/" not in text
+
+    res = runner.invoke(app, ["report", "show", "--in", str(reviewed), "--db", str(db)])
+    assert res.exit_code == 0
+    assert "https://github.com/p/0" in res.stdout
+    assert "×14" in res.stdout
+
+    res = runner.invoke(
+        app, ["report", "show", "--in", str(reviewed), "--db", str(tmp_path / "x.sqlite")]
+    )
+    assert res.exit_code == 1
+    assert "different database" in res.stdout
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import pstats
+import threading
+import time
+from pathlib import Path
+
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa import profiling
+from toggl_sherpa.m1 import db as db_mod
+
+
+def test_spans_record_total_and_self_time() -> None:
+    assert profiling.span("x") is profiling.span("y")  # Shared no-op when disabled.
+
+    rec = profiling.enable()
+    try:
+        with profiling.span("outer"):
+            time.sleep(0.02)
+            with profiling.span("inner"):
+                time.sleep(0.03)
+
+        worker = threading.Thread(target=lambda: profiling.timed("inner")(time.sleep)(0.01))
+        worker.start()
+        worker.join()
+    finally:
+        profiling.disable()
+
+    outer, inner = rec.stages["outer"], rec.stages["inner"]
+    assert (outer.calls, inner.calls) == (1, 2)
+    assert outer.total_s >= 0.05
+    assert 0.02 <= outer.self_s < outer.total_s - 0.025
+    assert inner.self_s == inner.total_s >= 0.04
+
+    table = profiling.format_table(rec)
+    assert table.splitlines()[0].split() == ["stage", "calls", "total_s", "self_s", "self%"]
+    assert table.splitlines()[1].startswith("inner ")
+
+
+def test_cli_timings_and_profile(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db)
+    for i in range(6):
+        conn.execute(
+            """
+            INSERT INTO samples(ts_utc, idle_ms, focus_title, focus_wm_class, focus_pid, raw_json)
+            VALUES (?, 0, 'X', 'code', 1, '{}')
+            """,
+            (f"2026-02-09T09:00:{10 * i:02d}+00:00",),
+        )
+    conn.commit()
+    conn.close()
+
+    runner = CliRunner()
+    app = get_command(cli.app)
+    args = ["report", "draft-timesheet", "--date", "2026-02-09", "--db", str(db)]
+
+    res = runner.invoke(app, ["--timings", *args, "--format", "json"])
+    assert res.exit_code == 0
+    assert res.stdout.startswith("[")  # The table goes to stderr only.
+    stages = {line.split()[0] for line in res.stderr.splitlines()[1:]}
+    assert {"db.connect", "db.fetch", "summarise", "suggest", "render"} <= stages
+    assert "db.migrate" not in stages  # Already at the current schema.
+    assert "wall" in stages
+
+    out = tmp_path / "out.pstats"
+    res = runner.invoke(app, ["--profile", str(out), *args])
+    assert res.exit_code == 0
+    assert "Draft timesheet" in res.stdout
+    funcs = {name for _file, _line, name in pstats.Stats(str(out)).stats}
+    assert "summarise_blocks" in funcs
+    assert profiling.span("x") is profiling.span("y")
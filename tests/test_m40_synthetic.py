@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.query import fetch_samples, fetch_tab_events
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.synthetic import generate
+
+
+def _dump(path: Path) -> list[tuple]:
+    conn = db_mod.connect(path)
+    rows = conn.execute("SELECT ts_utc, idle_ms, focus_title FROM samples ORDER BY id").fetchall()
+    conn.close()
+    return [tuple(r) for r in rows]
+
+
+def test_generate_is_deterministic_and_realistic(tmp_path: Path) -> None:
+    a, b = tmp_path / "a.sqlite", tmp_path / "b.sqlite"
+    stats = []
+    for path in (a, b):
+        conn = db_mod.connect(path)
+        # Friday to Monday: the weekend stays empty.
+        stats.append(generate(conn, days=4, start=date(2026, 1, 9)))
+        conn.close()
+    assert stats[0] == stats[1]
+    assert _dump(a) == _dump(b)
+
+    conn = db_mod.connect(a)
+    days = [r[0] for r in conn.execute("SELECT DISTINCT substr(ts_utc, 1, 10) FROM samples")]
+    assert days == ["2026-01-09", "2026-01-12"]
+    # Lunch shows up as a long idle stretch.
+    assert conn.execute("SELECT MAX(idle_ms) FROM samples").fetchone()[0] >= 30 * 60_000
+    titles = conn.execute("SELECT COUNT(DISTINCT focus_title) FROM samples").fetchone()[0]
+    assert 5 < titles < 40
+
+    # Tab events are linked to browser samples and redacted outside the allowlist.
+    tabs = conn.execute(
+        """
+        SELECT t.allowed, t.url, t.url_redacted, s.focus_wm_class
+        FROM tab_events t JOIN samples s ON s.id = t.sample_id
+        """
+    ).fetchall()
+    assert len(tabs) == stats[0].tab_events > 0
+    assert {r["focus_wm_class"] for r in tabs} == {"firefox"}
+    assert {r["allowed"] for r in tabs} == {0, 1}
+    redacted = [r for r in tabs if not r["allowed"]]
+    assert all(r["url"] is None and r["url_redacted"].endswith("/…") for r in redacted)
+
+    samples = fetch_samples(conn, stats[0].start_ts_utc, stats[0].end_ts_utc)
+    tab_rows = fetch_tab_events(conn, stats[0].start_ts_utc, stats[0].end_ts_utc)
+    blocks = summarise_blocks(samples, tab_rows)
+    assert len(blocks) > 10
+    assert any(b.evidence for b in blocks)
+    conn.close()
+
+
+def test_gen_synthetic_cli_appends(tmp_path: Path) -> None:
+    path = tmp_path / "db.sqlite"
+    runner = CliRunner()
+    args = ["dev", "gen-synthetic", "--db", str(path), "--days", "1", "--tabs-per-min", "0"]
+    res = runner.invoke(get_command(cli.app), args)
+    assert res.exit_code == 0, res.output
+    assert res.stdout.startswith("generated ")
+    assert "and 0 tab events" in res.stdout
+
+    res = runner.invoke(get_command(cli.app), [*args, "--start", "2026-01-06"])
+    assert res.exit_code == 0, res.output
+    conn = db_mod.connect(path)
+    days = conn.execute("SELECT COUNT(DISTINCT substr(ts_utc, 1, 10)) FROM samples").fetchone()[0]
+    conn.close()
+    assert days == 2
+
+    res = runner.invoke(get_command(cli.app), [*args, "--start", "nope"])
+    assert res.exit_code == 2
+    assert "invalid --start" in res.stdout
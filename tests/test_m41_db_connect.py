@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+
+
+def test_connect_does_not_write_when_current(tmp_path: Path) -> None:
+    path = tmp_path / "db.sqlite"
+    db_mod.connect(path).close()
+
+    # A logger mid-transaction holds the write lock.
+    writer = sqlite3.connect(path)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO samples(ts_utc) VALUES ('2026-02-09T09:00:00+00:00')")
+    try:
+        t0 = time.perf_counter()
+        for connect in (db_mod.connect, db_mod.connect_readonly):
+            conn = connect(path)
+            assert conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0] == 0
+            conn.close()
+        assert time.perf_counter() - t0 < 1.0  # No busy wait on the lock.
+    finally:
+        writer.rollback()
+        writer.close()
+
+
+def test_connect_readonly_profile(tmp_path: Path) -> None:
+    path = tmp_path / "new" / "db.sqlite"
+    # A missing DB is created and migrated first.
+    conn = db_mod.connect_readonly(path)
+    assert db_mod.schema_version(conn) == db_mod.SCHEMA_VERSION
+    assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        conn.execute("INSERT INTO samples(ts_utc) VALUES ('x')")
+    conn.close()
+
+    # An outdated DB is migrated before it is opened read-only.
+    conn = db_mod.connect(path)
+    conn.execute("DELETE FROM meta WHERE key = 'db_id'")
+    conn.execute("UPDATE meta SET value = '7' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+    conn = db_mod.connect_readonly(path)
+    assert db_mod.schema_version(conn) == db_mod.SCHEMA_VERSION
+    assert conn.execute("SELECT value FROM meta WHERE key = 'db_id'").fetchone() is not None
+    conn.close()
+
+
+def test_report_commands_work_on_a_fresh_db(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    runner = CliRunner()
+    app = get_command(cli.app)
+    res = runner.invoke(app, ["ledger", "stats", "--db", str(db)])
+    assert res.exit_code == 0, res.output
+    assert "count: 0" in res.stdout
+    res = runner.invoke(app, ["report", "draft-timesheet", "--date", "2026-02-09", "--db", str(db)])
+    assert res.exit_code == 0, res.output
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import toggl_sherpa.m1.logger as logger
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.gnome import FocusSample
+from toggl_sherpa.m1.schedule import AdaptiveSchedule
+from toggl_sherpa.m3.model import SampleRow
+from toggl_sherpa.m3.query import fetch_samples
+from toggl_sherpa.m3.summarise import summarise_blocks
+
+
+def _fs(title: str, idle_ms: int = 0) -> FocusSample:
+    return FocusSample(idle_ms=idle_ms, title=title, wm_class="code", pid=1, raw={})
+
+
+def test_adaptive_schedule_speeds_up_and_backs_off() -> None:
+    sched = AdaptiveSchedule(base_s=10, fast_s=2, fast_samples=2, max_s=60)
+    got = [sched.next_interval(_fs(t)) for t in ["A", "A", "B", "B", "B", "B"]]
+    assert got == [10, 10, 2, 2, 10, 10]
+
+    idle = [sched.next_interval(_fs("B", idle_ms=ms)) for ms in (60_000, 80_000, 120_000, 200_000)]
+    assert idle == [20, 40, 60, 60]
+    # Activity resets the backoff.
+    assert sched.next_interval(_fs("B")) == 10
+    assert sched.next_interval(_fs("B", idle_ms=60_000)) == 20
+
+
+def test_run_loop_keeps_a_monotonic_deadline(monkeypatch, tmp_path: Path) -> None:
+    class Clock:
+        now = 100.0
+        sleeps: list[float] = []
+
+        def monotonic(self) -> float:
+            return self.now
+
+        def sleep(self, s: float) -> None:
+            self.sleeps.append(s)
+            self.now += s
+            if len(self.sleeps) == 4:
+                raise KeyboardInterrupt
+
+    clock = Clock()
+    titles = iter(["A", "A", "B", "B"])
+
+    def sample() -> FocusSample:
+        clock.now += 0.5  # The gdbus call takes time.
+        if len(clock.sleeps) == 1:
+            clock.now += 15  # And once, longer than a whole interval.
+        return _fs(next(titles))
+
+    monkeypatch.setattr(logger, "time", clock)
+    monkeypatch.setattr(logger.signal, "signal", lambda *a: None)
+    monkeypatch.setattr(logger, "get_focus_sample", sample)
+    db = tmp_path / "db.sqlite"
+    with pytest.raises(KeyboardInterrupt):
+        logger.run_loop(db, interval_s=10)
+
+    # Slept to the deadline, not for a fixed interval; the overrun moved it.
+    assert clock.sleeps == [9.5, 0, 2 - 0.5, 2 - 0.5]
+    conn = db_mod.connect(db)
+    rows = fetch_samples(conn, "0000", "9999")
+    conn.close()
+    assert [r.interval_s for r in rows] == [10, 10, 2, 2]
+
+
+def test_summarise_uses_recorded_intervals() -> None:
+    def row(i: int, sec: int, title: str, interval: float | None, idle_ms: int = 0) -> SampleRow:
+        ts = f"2026-02-09T09:{sec // 60:02d}:{sec % 60:02d}+00:00"
+        return SampleRow(i, ts, idle_ms, title, "code", 1, interval)
+
+    # A, then an idle stretch (dropped), then B at 2s while focus just changed.
+    samples = [
+        *(row(i, 10 * i, "A", 10) for i in range(6)),
+        row(6, 60, "A", 20, idle_ms=90_000),
+        *(row(7 + i, 80 + 2 * i, "B", 2) for i in range(3)),
+        row(10, 86, "B", 10),
+    ]
+    blocks = summarise_blocks(samples, [], min_block_s=1)
+    assert [(b.label, b.seconds) for b in blocks] == [("code:A", 60), ("code:B", 16)]
+    assert blocks[0].end_ts_utc == "2026-02-09T09:01:00+00:00"
+
+    # Rows without an interval run to the next sample, idle ones included.
+    legacy = [SampleRow(s.id, s.ts_utc, s.idle_ms, s.focus_title, "code", 1) for s in samples]
+    no_idle_row = legacy[:6] + legacy[7:]
+    blocks = summarise_blocks(no_idle_row, [], min_block_s=1)
+    assert [(b.label, b.seconds) for b in blocks] == [("code:A", 80), ("code:B", 16)]
+    blocks = summarise_blocks(legacy, [], min_block_s=1)
+    assert [(b.label, b.seconds) for b in blocks] == [("code:A", 60), ("code:B", 16)]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+from fake_bus import format_signal
+
+import toggl_sherpa.m1.events as events
+from toggl_sherpa.m1 import daemon
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.gnome import GnomeShellEvalError
+from toggl_sherpa.m1.rawstore import sample_raw_json
+
+
+def _no_poll():
+    raise GnomeShellEvalError("no GNOME here")
+
+
+def _fake(*args: str) -> list[str]:
+    return [sys.executable, str(Path(__file__).with_name("fake_bus.py")), *args]
+
+
+def _rows(db: Path) -> list[tuple]:
+    conn = db_mod.connect(db)
+    rows = [
+        (r[0], r[1], json.loads(sample_raw_json(conn, r[2]))["source"], r[3])
+        for r in conn.execute("SELECT focus_title, idle_ms, id, interval_s FROM samples")
+    ]
+    conn.close()
+    return rows
+
+
+def test_monitor_lines_round_trip() -> None:
+    payload = {"title": "Café 'notes' \\ draft", "wm_class": "code", "pid": 7, "idle_ms": 12}
+    sample = events.parse_monitor_line(format_signal(payload))
+    assert sample is not None
+    assert (sample.title, sample.wm_class, sample.pid, sample.idle_ms) == (
+        "Café 'notes' \\ draft",
+        "code",
+        7,
+        12,
+    )
+    assert events.parse_monitor_line("The name org.gnome.Shell is owned by :1.23") is None
+    assert events.parse_monitor_line("/org/other: org.x.Changed ('{}',)") is None
+
+
+def test_event_loop_writes_only_changes(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(events.signal, "signal", lambda *a: None)
+    trace = tmp_path / "events.jsonl"
+    lines = [
+        {"title": "A", "wm_class": "code", "pid": 1, "idle_ms": 0},
+        {"title": "A", "wm_class": "code", "pid": 1, "idle_ms": 3000},  # Same state.
+        {"title": "B", "wm_class": "code", "pid": 1, "idle_ms": 0},
+        {"title": "B", "wm_class": "code", "pid": 1, "idle_ms": 60_000, "reason": "idle"},
+        {"title": "B", "wm_class": "code", "pid": 1, "idle_ms": 0, "reason": "active"},
+    ]
+    trace.write_text("".join(json.dumps(x) + "\n" for x in lines), encoding="utf-8")
+    db = tmp_path / "db.sqlite"
+
+    n = events.run_event_loop(db, monitor_cmd=_fake("--from", str(trace)), poll=_no_poll)
+
+    assert n == 4
+    assert _rows(db) == [
+        ("A", 0, "event", None),
+        ("B", 0, "event", None),
+        ("B", 60_000, "event", None),
+        ("B", 0, "event", None),
+    ]
+
+
+def test_event_loop_writes_heartbeats(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(events.signal, "signal", lambda *a: None)
+    db = tmp_path / "db.sqlite"
+    stop = threading.Event()
+    timer = threading.Timer(1.0, stop.set)
+    timer.start()
+    try:
+        events.run_event_loop(
+            db,
+            heartbeat_s=0.25,
+            monitor_cmd=_fake("--switches", "1", "--hold"),
+            poll=_no_poll,
+            stop=stop,
+        )
+    finally:
+        timer.cancel()
+
+    rows = _rows(db)
+    assert rows[0][2] == "event"
+    # Eval is unavailable, so heartbeats repeat the last signalled state.
+    beats = [r for r in rows if r[2] == "heartbeat"]
+    assert 2 <= len(beats) <= 5
+    assert {r[0] for r in beats} == {rows[0][0]}
+
+
+def test_start_logger_events_mode(monkeypatch, tmp_path: Path) -> None:
+    seen: list[list[str]] = []
+
+    class Proc:
+        pid = 4242
+
+        def __init__(self, args, **_kw) -> None:
+            seen.append(args)
+
+    monkeypatch.setattr(daemon.subprocess, "Popen", Proc)
+    pid = daemon.start_logger("db.sqlite", pidfile=tmp_path / "pid", events=True, heartbeat_s=30.0)
+    assert pid == 4242
+    assert seen[0][-2:] == ["--events", "--heartbeat=30.0"]
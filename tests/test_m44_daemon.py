@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import urllib.request
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+import toggl_sherpa.daemon as unified
+from toggl_sherpa.m1 import daemon as logger_daemon
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.gnome import FocusSample
+
+
+def _poll() -> FocusSample:
+    return FocusSample(idle_ms=0, title="notes.md - Code", wm_class="code", pid=1, raw={})
+
+
+def _post(address: tuple[str, int], payload: dict) -> dict:
+    req = urllib.request.Request(
+        f"http://{address[0]}:{address[1]}/v1/active_tab",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def test_ring_matches_table_lookup() -> None:
+    ring = unified.RecentSamples(maxlen=4)
+    for i, ts in enumerate(["12:00:00", "12:00:10", "12:00:20", "12:00:30", "12:00:40"], 1):
+        ring.add(i, f"2026-02-07T{ts}+00:00")
+
+    assert len(ring) == 4
+    assert ring.nearest("2026-02-07T12:00:24Z", 60) == 3
+    assert ring.nearest("2026-02-07T12:00:25+00:00", 60) == 3  # Tie: the earlier sample.
+    assert ring.nearest("2026-02-07T12:02:00+00:00", 60) is None
+    assert ring.nearest("not a timestamp", 60) is None
+    # Sample 1 was evicted, so only events well after it are answered by the ring.
+    assert ring.covers("2026-02-07T12:01:20+00:00", 60)
+    assert not ring.covers("2026-02-07T12:00:50+00:00", 60)
+
+
+def test_daemon_samples_and_links_tabs_without_reading_samples(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(unified.signal, "signal", lambda *a: None)
+    db = tmp_path / "db.sqlite"
+    d = unified.UnifiedDaemon(db, port=0, allowlist="example.com", interval_s=0.2, poll=_poll)
+    statements: list[str] = []
+    d.conn.set_trace_callback(statements.append)
+
+    stop = threading.Event()
+    t = threading.Thread(target=d.run, args=(stop,))
+    t.start()
+    try:
+        allowed = _post(d.address, {"url": "https://example.com/a", "title": "A"})
+        hidden = _post(d.address, {"url": "https://secret.com/b", "title": "B"})
+        stop.wait(0.5)
+    finally:
+        stop.set()
+        t.join(timeout=5)
+    d.close()
+
+    assert allowed["allowed"] is True
+    assert hidden["title_redacted"] == "[REDACTED]"
+    assert d.db_links == 0
+    reads = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert not [s for s in reads if "samples" in s or "sample_rows" in s]
+
+    conn = db_mod.connect(db)
+    samples = conn.execute("SELECT id, focus_title FROM samples").fetchall()
+    tabs = conn.execute("SELECT sample_id, url, title FROM tab_events ORDER BY id").fetchall()
+    conn.close()
+    assert len(samples) >= 2
+    assert {s["focus_title"] for s in samples} == {"notes.md - Code"}
+    ids = {s["id"] for s in samples}
+    assert [(r["sample_id"] in ids, r["url"], r["title"]) for r in tabs] == [
+        (True, "https://example.com/a", "A"),
+        (True, None, None),
+    ]
+
+
+def test_daemon_falls_back_to_table_for_old_events(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db)
+    for ts in ("12:00:00", "12:00:10", "12:00:20"):
+        conn.execute(
+            "INSERT INTO samples(ts_utc, raw_json) VALUES (?, '{}')",
+            (f"2026-02-07T{ts}+00:00",),
+        )
+    conn.commit()
+    conn.close()
+
+    d = unified.UnifiedDaemon(db, port=0, poll=_poll, ring_size=2)
+    try:
+        # Ring seeded with the two newest samples; the oldest needs the table.
+        assert d.link("2026-02-07T12:00:21+00:00", 10) == 3
+        assert d.db_links == 0
+        assert d.link("2026-02-07T12:00:01+00:00", 5) == 1
+        assert d.db_links == 1
+    finally:
+        d.close()
+
+
+def test_daemon_holds_the_logger_pidfile(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(logger_daemon.subprocess, "Popen", None)  # Never spawn a logger.
+    runner = CliRunner()
+    seen = []
+
+    def run(self, stop=None) -> None:  # noqa: ANN001
+        # While the daemon runs, the `log` commands see it as the logger.
+        seen.append(runner.invoke(get_command(cli.app), ["log", "status"]))
+        seen.append(runner.invoke(get_command(cli.app), ["log", "start", "--db", str(db)]))
+
+    monkeypatch.setattr(unified.UnifiedDaemon, "run", run)
+    db = tmp_path / "db.sqlite"
+    unified.serve(db, port=0, poll=_poll)
+
+    status, start = seen
+    assert status.exit_code == 0
+    assert f"running (pid {os.getpid()})" in status.stdout
+    assert start.exit_code == 1
+    assert "already running" in start.stdout
+    assert logger_daemon.status() == (False, None)
+
+    # And the daemon doesn't start next to a running logger.
+    pidfile = tmp_path / "logger.pid"
+    pidfile.write_text(str(os.getppid()))
+    with pytest.raises(logger_daemon.AlreadyRunningError):
+        unified.serve(db, pidfile=pidfile, port=0, poll=_poll)
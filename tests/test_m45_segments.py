@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1 import logger, segments
+from toggl_sherpa.m1.gnome import FocusSample
+from toggl_sherpa.m2.tab_ingest import TabPayload, insert_tab_event
+from toggl_sherpa.m3.query import fetch_samples
+
+
+def _fs(title: str | None, idle_ms: int | None = 0) -> FocusSample:
+    return FocusSample(idle_ms=idle_ms, title=title, wm_class="code", pid=7, raw={"t": title})
+
+
+def _ts(sec: int) -> str:
+    return f"2026-02-07T12:{sec // 60:02d}:{sec % 60:02d}+00:00"
+
+
+def test_records_round_trip_and_stop_at_torn_record(tmp_path: Path) -> None:
+    w = segments.SegmentWriter(tmp_path / "segs")
+    w.append(_fs("Café ✓"), ts_utc=_ts(0), interval_s=2.0)
+    w.append(FocusSample(None, None, None, None, {"error": "x"}), ts_utc=_ts(10))
+    sealed = w.seal()
+    assert sealed is not None and sealed.suffix == ".seg"
+
+    recs = segments.read_segment(sealed)
+    assert [(r.ts_utc, r.title, r.idle_ms, r.pid, r.interval_s) for r in recs] == [
+        (_ts(0), "Café ✓", 0, 7, 2.0),
+        (_ts(10), None, None, None, None),
+    ]
+    assert recs[1].raw_json == '{"error": "x"}'
+
+    # Flip a byte in the second record: only the first survives.
+    data = bytearray(sealed.read_bytes())
+    data[-1] ^= 0xFF
+    sealed.write_bytes(bytes(data))
+    assert len(segments.read_segment(sealed)) == 1
+
+
+def test_writer_resumes_open_segment_after_crash(tmp_path: Path) -> None:
+    d = tmp_path / "segs"
+    w = segments.SegmentWriter(d)
+    w.append(_fs("A"), ts_utc=_ts(0))
+    w.append(_fs("B"), ts_utc=_ts(1))
+    # Simulate a crash: half a record written after the good ones, no seal.
+    assert w._mm is not None
+    partial = segments.encode_record(_fs("C"), ts_utc=_ts(2))[:30]
+    w._mm[w._offset : w._offset + len(partial)] = partial
+    w._mm.flush()
+
+    w2 = segments.SegmentWriter(d)
+    w2.append(_fs("D"), ts_utc=_ts(3))
+    sealed = w2.seal()
+    assert sealed is not None
+    assert [r.title for r in segments.read_segment(sealed)] == ["A", "B", "D"]
+    assert list(d.glob("*.open")) == []
+
+
+def test_writer_rotates_full_segments(tmp_path: Path) -> None:
+    w = segments.SegmentWriter(tmp_path / "segs", segment_bytes=256)
+    for i in range(10):
+        w.append(_fs(f"window {i}"), ts_utc=_ts(i))
+    w.close()
+    files = sorted((tmp_path / "segs").glob("*.seg"))
+    assert len(files) > 1
+    titles = [r.title for f in files for r in segments.read_segment(f)]
+    assert titles == [f"window {i}" for i in range(10)]
+
+
+def test_import_is_bulk_idempotent_and_relinks_tabs(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db)
+    d = segments.segments_dir(db)
+    w = segments.SegmentWriter(d)
+    for i in range(3):
+        w.append(_fs(f"w{i}"), ts_utc=_ts(10 * i), interval_s=10.0)
+
+    # While the samples are only in segment files, the tab event has nothing to link to.
+    insert_tab_event(conn, TabPayload("https://x.org/", "X", _ts(21)), {"x.org"})
+    assert conn.execute("SELECT sample_id FROM tab_events").fetchone()[0] is None
+
+    # Reports see the unsealed tail.
+    tail = fetch_samples(conn, _ts(0), _ts(59))
+    assert [(s.focus_title, s.id < 0) for s in tail] == [("w0", True), ("w1", True), ("w2", True)]
+
+    sealed = w.seal()
+    assert sealed is not None
+    # A copy of the segment stands in for a file left behind by a crash after commit.
+    leftover = sealed.read_bytes()
+    assert segments.import_sealed(conn, d) == 3
+    assert segments.import_sealed(conn, d) == 0
+    sealed.write_bytes(leftover)
+    assert segments.import_sealed(conn, d) == 0
+    assert not sealed.exists()
+
+    rows = fetch_samples(conn, _ts(0), _ts(59))
+    assert [(s.focus_title, s.interval_s) for s in rows] == [
+        ("w0", 10.0),
+        ("w1", 10.0),
+        ("w2", 10.0),
+    ]
+    assert all(s.id > 0 for s in rows)
+    linked = conn.execute("SELECT sample_id FROM tab_events").fetchone()[0]
+    assert linked == rows[2].id
+    conn.close()
+
+
+def test_tail_counts_each_sample_once_around_imports(monkeypatch, tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db)
+    d = segments.segments_dir(db)
+    w = segments.SegmentWriter(d)
+    files = []
+    for i in range(2):
+        w.append(_fs(f"w{i}"), ts_utc=_ts(10 * i))
+        files.append(w.seal())
+    copies = [f.read_bytes() for f in files]
+    assert segments.import_sealed(conn, d) == 2
+    # Both files left behind (e.g. unlink failed): neither is read again.
+    for f, data in zip(files, copies, strict=True):
+        f.write_bytes(data)
+    assert [s.focus_title for s in fetch_samples(conn, _ts(0), _ts(59))] == ["w0", "w1"]
+    assert segments.import_sealed(conn, d) == 0
+    assert list(d.iterdir()) == []
+
+    # A segment imported (and removed) by another connection while the tail is
+    # being read: the read starts over and sees it in the DB instead.
+    w.append(_fs("w2"), ts_utc=_ts(20))
+    w.seal()
+    read_segment = segments.read_segment
+    raced = []
+
+    def import_first(path: Path):
+        if not raced:
+            raced.append(path)
+            other = db_mod.connect(db)
+            monkeypatch.setattr(segments, "read_segment", read_segment)
+            segments.import_sealed(other, d)
+            monkeypatch.setattr(segments, "read_segment", import_first)
+            other.close()
+        return read_segment(path)
+
+    monkeypatch.setattr(segments, "read_segment", import_first)
+    rows = fetch_samples(conn, _ts(0), _ts(59))
+    assert raced
+    assert [(s.focus_title, s.id > 0) for s in rows] == [("w0", True), ("w1", True), ("w2", True)]
+    conn.close()
+
+
+def test_importer_survives_a_failed_import(caplog, monkeypatch, tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    db_mod.connect(db).close()
+    real = segments.SegmentStore._import_once
+    calls = []
+
+    def flaky(self) -> int:
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("segment vanished")
+        return real(self)
+
+    monkeypatch.setattr(segments.SegmentStore, "_import_once", flaky)
+    store = segments.SegmentStore(db, import_every_s=0.01)
+    store.append(_fs("A"), ts_utc=_ts(0))
+    store.writer.seal()
+    for _ in range(500):
+        if len(calls) > 1 and not list(segments.segments_dir(db).glob("*.seg")):
+            break
+        time.sleep(0.01)
+    # The thread logged the error and kept going.
+    assert store._thread.is_alive()
+    store.close()
+    assert "segment import failed" in caplog.text
+    conn = db_mod.connect(db)
+    assert [r[0] for r in conn.execute("SELECT focus_title FROM samples")] == ["A"]
+    conn.close()
+
+
+def test_run_loop_in_segment_mode_imports_on_stop(monkeypatch, tmp_path: Path) -> None:
+    class Clock:
+        now = 0.0
+        sleeps = 0
+
+        def monotonic(self) -> float:
+            return self.now
+
+        def sleep(self, s: float) -> None:
+            self.sleeps += 1
+            self.now += s
+            if self.sleeps == 3:
+                raise KeyboardInterrupt
+
+    titles = iter(["A", "B", "C"])
+    monkeypatch.setattr(logger, "time", Clock())
+    monkeypatch.setattr(logger.signal, "signal", lambda *a: None)
+    monkeypatch.setattr(logger, "get_focus_sample", lambda: _fs(next(titles)))
+    db = tmp_path / "db.sqlite"
+    with pytest.raises(KeyboardInterrupt):
+        logger.run_loop(db, interval_s=10, adaptive=False, segments=True)
+
+    conn = db_mod.connect(db)
+    titles_in_db = [r[0] for r in conn.execute("SELECT focus_title FROM samples ORDER BY id")]
+    conn.close()
+    assert titles_in_db == ["A", "B", "C"]
+    assert list(segments.segments_dir(db).iterdir()) == []
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.gnome import FocusSample
+from toggl_sherpa.m1.logger import insert_sample
+from toggl_sherpa.m1.lookup import Lookups
+from toggl_sherpa.m1.rawstore import sample_raw_json, tab_event_raw_json
+from toggl_sherpa.m2.tab_ingest import TabPayload, insert_tab_event
+from toggl_sherpa.m3.query import (
+    fetch_samples,
+    fetch_tab_events,
+    sample_counts_by_app,
+    tab_counts_by_host,
+)
+
+DAY = ("2026-02-07T00:00:00+00:00", "2026-02-07T23:59:59+00:00")
+
+
+def _v9_db(path: Path) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        INSERT INTO meta VALUES ('schema_version', '9');
+        CREATE TABLE samples (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, ts_utc TEXT NOT NULL, idle_ms INTEGER,
+            focus_title TEXT, focus_wm_class TEXT, focus_pid INTEGER, raw_json TEXT,
+            interval_s REAL
+        );
+        CREATE TABLE tab_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, ts_utc TEXT NOT NULL, sample_id INTEGER,
+            url TEXT, title TEXT, url_redacted TEXT, title_redacted TEXT,
+            allowed INTEGER NOT NULL DEFAULT 0, raw_json TEXT,
+            FOREIGN KEY(sample_id) REFERENCES samples(id) ON DELETE SET NULL
+        );
+        INSERT INTO samples VALUES
+            (1, '2026-02-07T12:00:00+00:00', 0, 'notes.md - Code', 'code', 1, '{}', 10.0),
+            (2, '2026-02-07T12:00:10+00:00', 0, 'PR #1 — Firefox', 'firefox', 2, '{}', NULL),
+            (3, '2026-02-07T12:00:20+00:00', NULL, NULL, NULL, NULL, '{"error": "x"}', 10.0),
+            (4, '2026-02-07T12:00:30+00:00', 0, 'notes.md - Code', 'code', 1, '{}', 10.0);
+        INSERT INTO tab_events VALUES
+            (7, '2026-02-07T12:00:11+00:00', 2, 'https://github.com/a/1', 'PR #1',
+             'https://github.com/a/1', 'PR #1', 1, '{}'),
+            (8, '2026-02-07T12:00:12+00:00', 2, NULL, NULL, 'https://secret.com/…',
+             '[REDACTED]', 0, '{}');
+        DELETE FROM samples WHERE id = 4;
+        """
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_migration_keeps_rows_ids_and_shape(tmp_path: Path) -> None:
+    db = tmp_path / "v9.sqlite"
+    _v9_db(db)
+    old = sqlite3.connect(db)
+    before = (
+        old.execute("SELECT * FROM samples ORDER BY id").fetchall(),
+        old.execute("SELECT * FROM tab_events ORDER BY id").fetchall(),
+    )
+    old.close()
+
+    conn = db_mod.connect(db)
+    assert db_mod.schema_version(conn) == db_mod.SCHEMA_VERSION
+    # Raw payloads moved to `raw_payloads` (v11); read them back by id.
+    after = (
+        [
+            (*r[:6], sample_raw_json(conn, r[0]), r[7])
+            for r in conn.execute("SELECT * FROM samples ORDER BY id")
+        ],
+        [
+            (*r[:8], tab_event_raw_json(conn, r[0]))
+            for r in conn.execute("SELECT * FROM tab_events ORDER BY id")
+        ],
+    )
+    assert after == before
+    kinds = dict(conn.execute("SELECT name, type FROM sqlite_master").fetchall())
+    assert kinds["samples"] == kinds["tab_events"] == "view"
+    assert conn.execute("SELECT COUNT(*) FROM titles").fetchone()[0] == 4
+    assert [r[0] for r in conn.execute("SELECT host FROM hosts ORDER BY host")] == [
+        "github.com",
+        "secret.com",
+    ]
+    # Deleted id 4 is not reused.
+    assert insert_sample(conn, FocusSample(0, "x", "code", 1, {})) == 5
+    conn.close()
+
+
+def test_failed_encode_step_keeps_earlier_steps_and_retries(monkeypatch, tmp_path: Path) -> None:
+    db = tmp_path / "v5.sqlite"
+    _v9_db(db)
+    old = sqlite3.connect(db)
+    old.executescript(
+        """
+        UPDATE meta SET value = '5' WHERE key = 'schema_version';
+        CREATE TABLE applied_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, ts_utc TEXT NOT NULL,
+            fingerprint TEXT NOT NULL UNIQUE, start_ts_utc TEXT NOT NULL,
+            end_ts_utc TEXT NOT NULL, description TEXT NOT NULL, toggl_time_entry_id INTEGER
+        );
+        """
+    )
+    old.close()
+
+    def interrupted(_conn: sqlite3.Connection) -> None:
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(db_mod, "_encode_strings", interrupted)
+    with pytest.raises(sqlite3.OperationalError):
+        db_mod.connect(db)
+    monkeypatch.undo()
+    # v6-v9 were committed along with their version, so the re-run starts at v10.
+    old = sqlite3.connect(db)
+    assert db_mod.schema_version(old) == 9
+    old.close()
+
+    conn = db_mod.connect(db)
+    assert db_mod.schema_version(conn) == db_mod.SCHEMA_VERSION
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(applied_entries)")}
+    assert {"start_epoch", "end_epoch"} <= cols
+    assert [r[0] for r in conn.execute("SELECT id FROM samples ORDER BY id")] == [1, 2, 3]
+    conn.close()
+
+
+def test_interned_and_plain_inserts_read_back_the_same(tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    lookups = Lookups()
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    for i in range(3):
+        insert_sample(
+            conn,
+            FocusSample(0, "notes.md - Code", "code", 1, {}),
+            ts_utc=f"2026-02-07T12:00:0{i}+00:00",
+            lookups=lookups,
+        )
+    # Each string was looked up once; later samples used the cache.
+    assert sum("FROM titles" in s for s in statements) == 1
+    conn.set_trace_callback(None)
+
+    conn.execute(
+        "INSERT INTO samples(ts_utc, idle_ms, focus_title, focus_wm_class, focus_pid, raw_json)"
+        " VALUES ('2026-02-07T12:00:05+00:00', 0, 'notes.md - Code', 'code', 1, '{}')"
+    )
+    for url in ("https://GitHub.com/a", "https://secret.com/x"):
+        insert_tab_event(
+            conn,
+            TabPayload(url, "T", "2026-02-07T12:00:04+00:00"),
+            {"github.com"},
+            lookups=lookups,
+        )
+    conn.commit()
+
+    samples = fetch_samples(conn, *DAY)
+    assert {(s.focus_title, s.focus_wm_class) for s in samples} == {("notes.md - Code", "code")}
+    assert conn.execute("SELECT COUNT(*) FROM titles").fetchone()[0] == 3  # + "T" and "[REDACTED]"
+    tabs = fetch_tab_events(conn, *DAY)
+    assert [(t.url, t.url_redacted, t.title_redacted) for t in tabs] == [
+        ("https://GitHub.com/a", "https://GitHub.com/a", "T"),
+        (None, "https://secret.com/…", "[REDACTED]"),
+    ]
+    assert sample_counts_by_app(conn, *DAY) == [("code", 4)]
+    assert tab_counts_by_host(conn, *DAY) == [("github.com", 1), ("secret.com", 1)]
+    conn.close()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1 import rawstore
+from toggl_sherpa.m1.gnome import FocusSample
+from toggl_sherpa.m1.logger import insert_sample
+from toggl_sherpa.m2.tab_ingest import TabPayload, insert_tab_event
+
+
+def _ts(sec: int) -> str:
+    return f"2026-02-07T12:00:{sec:02d}+00:00"
+
+
+def test_codecs_round_trip() -> None:
+    for raw in ("{}", json.dumps({"title": "Café ✓ " * 40, "pid": 7})):
+        codec, data = rawstore.encode(raw)
+        assert rawstore.decode(codec, data) == raw
+    assert rawstore.encode("{}")[0] == "none"
+    assert rawstore.encode("x" * 500)[0] in {"zlib", "zstd"}
+    with pytest.raises(ValueError):
+        rawstore.decode("lz4", b"")
+
+
+def test_writers_store_each_payload_once(tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    raw = {"title": "notes.md - Code", "note": "n" * 300}
+    ids = [
+        insert_sample(conn, FocusSample(0, "notes.md - Code", "code", 1, raw), ts_utc=_ts(i))
+        for i in range(3)
+    ]
+    insert_sample(conn, FocusSample(0, "other", "code", 1, {"error": "x"}), ts_utc=_ts(3))
+    for _ in range(2):
+        insert_tab_event(conn, TabPayload("https://x.org/", "X", _ts(4)), {"x.org"})
+
+    assert conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0] == 3
+    assert (
+        conn.execute("SELECT COUNT(*) FROM sample_rows WHERE raw_json IS NOT NULL").fetchone()[0]
+        == 0
+    )
+    assert [json.loads(rawstore.sample_raw_json(conn, i)) for i in ids] == [raw] * 3
+    (codec,) = conn.execute(
+        "SELECT p.codec FROM sample_rows s JOIN raw_payloads p ON p.id = s.raw_id WHERE s.id = ?",
+        (ids[0],),
+    ).fetchone()
+    assert codec in {"zlib", "zstd"}
+    event_ids = [r[0] for r in conn.execute("SELECT id FROM tab_events ORDER BY id")]
+    assert json.loads(rawstore.tab_event_raw_json(conn, event_ids[1]))["url"] == "https://x.org/"
+    assert rawstore.sample_raw_json(conn, 999) is None
+    conn.close()
+
+
+def test_compact_moves_inline_rows_in_resumable_chunks(tmp_path: Path) -> None:
+    conn = db_mod.connect(tmp_path / "db.sqlite")
+    # Plain SQL through the views keeps the payload inline.
+    for i in range(5):
+        conn.execute(
+            "INSERT INTO samples(ts_utc, focus_title, raw_json) VALUES (?, 'A', ?)",
+            (_ts(i), json.dumps({"i": i % 2})),
+        )
+    conn.execute(
+        "INSERT INTO tab_events(ts_utc, url, raw_json) VALUES (?, 'https://x.org/', '{}')",
+        (_ts(9),),
+    )
+    conn.commit()
+    inline = [tuple(r) for r in conn.execute("SELECT id, raw_json FROM samples ORDER BY id")]
+
+    # A chunk that fails part-way is rolled back; the chunks before it stay done.
+    calls = 0
+    real = rawstore.RawPayloads.__call__
+
+    def flaky(self, c: sqlite3.Connection, raw: str | None) -> int | None:
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise KeyboardInterrupt
+        return real(self, c, raw)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(rawstore.RawPayloads, "__call__", flaky)
+        with pytest.raises(KeyboardInterrupt):
+            rawstore.compact(conn, chunk=2)
+    assert (
+        conn.execute("SELECT COUNT(*) FROM sample_rows WHERE raw_json IS NULL").fetchone()[0] == 2
+    )
+
+    assert rawstore.compact(conn, chunk=2) == 4
+    assert rawstore.compact(conn) == 0
+    assert conn.execute("SELECT COUNT(*) FROM raw_payloads").fetchone()[0] == 3
+    assert [(i, rawstore.sample_raw_json(conn, i)) for i, _ in inline] == inline
+    # The views stay plain SQL: any client can read them and see where each
+    # payload is stored.
+    plain = sqlite3.connect(tmp_path / "db.sqlite")
+    rows = plain.execute("SELECT id, raw_json, raw_id FROM samples ORDER BY id").fetchall()
+    assert [(i, raw) for i, raw, _ in rows] == [(i, None) for i, _ in inline]
+    assert all(raw_id is not None for *_, raw_id in rows)
+    assert plain.execute("SELECT raw_json, raw_id FROM tab_events").fetchone()[1] is not None
+    plain.close()
+    conn.close()
+
+
+def test_migration_from_v10_compacts_existing_rows(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db)
+    conn.execute("INSERT INTO samples(ts_utc, raw_json) VALUES (?, '{\"a\": 1}')", (_ts(0),))
+    conn.commit()
+    # Rewind to v10: drop the payload table's contents and put the JSON back inline.
+    conn.execute("UPDATE sample_rows SET raw_json = '{\"a\": 1}', raw_id = NULL")
+    conn.execute("DELETE FROM raw_payloads")
+    conn.execute("UPDATE meta SET value = '10' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+
+    conn = db_mod.connect(db)
+    assert db_mod.schema_version(conn) == db_mod.SCHEMA_VERSION
+    row = conn.execute("SELECT raw_json, raw_id IS NOT NULL FROM sample_rows").fetchone()
+    assert tuple(row) == (None, 1)
+    assert rawstore.sample_raw_json(conn, 1) == '{"a": 1}'
+    conn.close()
+
+
+def test_migration_replaces_views_that_need_a_sql_function(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    db_mod.connect(db).close()
+    # v13 views decoded payloads through a Python function plain clients lack.
+    old = sqlite3.connect(db)
+    old.executescript(
+        """
+        DROP VIEW samples;
+        CREATE VIEW samples AS SELECT id, ts_utc, raw_decode(raw_id, raw_json) AS raw_json
+        FROM sample_rows;
+        UPDATE meta SET value = '13' WHERE key = 'schema_version';
+        """
+    )
+    old.close()
+
+    db_mod.connect(db).close()
+    plain = sqlite3.connect(db)
+    assert plain.execute("SELECT COUNT(*) FROM samples").fetchone()[0] == 0
+    plain.close()
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m1.gnome import FocusSample
+from toggl_sherpa.m1.logger import insert_sample
+from toggl_sherpa.m2.tab_ingest import TabPayload, insert_tab_event
+from toggl_sherpa.m3.search import match_expression, search
+
+
+def _ts(day: int, hh: int, mm: int, ss: int = 0) -> str:
+    return f"2026-02-{day:02d}T{hh:02d}:{mm:02d}:{ss:02d}+00:00"
+
+
+def _seed(db: Path) -> None:
+    conn = db_mod.connect(db)
+    for ts in (_ts(7, 12, 0), _ts(7, 12, 0, 10), _ts(7, 12, 0, 20), _ts(9, 9, 0)):
+        insert_sample(conn, FocusSample(0, "ABC-123 fix parser — Code", "code", 1, {}), ts_utc=ts)
+    insert_sample(conn, FocusSample(0, "Inbox (3) — Mail", "mail", 2, {}), ts_utc=_ts(7, 12, 1))
+    # Plain SQL through the view is indexed too.
+    conn.execute(
+        "INSERT INTO samples(ts_utc, focus_title, focus_wm_class, interval_s)"
+        " VALUES (?, 'Review abc-123 — Firefox', 'firefox', 60)",
+        (_ts(7, 12, 3),),
+    )
+    allow = {"github.com"}
+    insert_tab_event(
+        conn, TabPayload("https://github.com/o/r/issues/ABC-123", "Issue", _ts(7, 12, 4)), allow
+    )
+    insert_tab_event(
+        conn, TabPayload("https://secret.com/abc-123", "ABC-123 secret", _ts(7, 12, 5)), allow
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_match_expression_quotes_words() -> None:
+    assert match_expression('ABC-123 pars* say "hi"') == '"ABC-123" "pars"* "say" """hi"""'
+    with pytest.raises(ValueError):
+        match_expression(" - * ")
+
+
+def test_index_never_holds_redacted_tab_strings(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    _seed(db)
+    conn = db_mod.connect(db)
+    urls = [r[0] for r in conn.execute("SELECT url FROM url_fts")]
+    titles = {r[0] for r in conn.execute("SELECT title FROM title_fts")}
+    assert urls == ["https://github.com/o/r/issues/ABC-123"]
+    assert "[REDACTED]" not in titles and "Issue" in titles
+    assert search(conn, "secret") == []
+    conn.close()
+
+
+def test_search_groups_matches_into_sessions(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    _seed(db)
+    conn = db_mod.connect_readonly(db)
+
+    first, second = search(conn, "abc-123")
+    assert (first.start_ts_utc, first.end_ts_utc) == (_ts(7, 12, 0), _ts(7, 12, 4))
+    assert (first.samples, first.tab_events) == (4, 1)
+    assert first.matches[0] == "ABC-123 fix parser — Code"
+    assert (second.start_ts_utc, second.samples) == (_ts(9, 9, 0), 1)
+
+    # A shorter gap splits the first session where the mail sample was.
+    assert len(search(conn, "abc-123", gap_s=60)) == 3
+    # Words match whole tokens unless they end in `*`.
+    assert search(conn, "ab") == []
+    assert len(search(conn, "ab*")) == 2
+    assert [s.start_ts_utc for s in search(conn, "abc-123", until="2026-02-07")] == [_ts(7, 12, 0)]
+    assert [s.start_ts_utc for s in search(conn, "pars*", since=_ts(8, 0, 0))] == [_ts(9, 9, 0)]
+    assert search(conn, "github issues")[0].matches == ("https://github.com/o/r/issues/ABC-123",)
+    conn.close()
+
+
+def test_upgrade_indexes_existing_rows(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    _seed(db)
+    conn = db_mod.connect(db)
+    conn.executescript(
+        """
+        DROP TRIGGER sample_rows_fts;
+        DROP TRIGGER tab_event_rows_fts;
+        DROP TABLE title_fts;
+        DROP TABLE url_fts;
+        UPDATE meta SET value = '11' WHERE key = 'schema_version';
+        """
+    )
+    conn.close()
+
+    conn = db_mod.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM url_fts").fetchone()[0] == 1
+    assert len(search(conn, "abc-123")) == 2
+    # Rerunning the step (e.g. after a rewind) doesn't index anything twice.
+    conn.execute("UPDATE meta SET value = '11' WHERE key = 'schema_version'")
+    conn.commit()
+    conn.close()
+    conn = db_mod.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM title_fts").fetchone()[0] == 4
+    conn.close()
+
+
+def test_search_cli(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    _seed(db)
+    runner = CliRunner()
+    res = runner.invoke(
+        get_command(cli.app), ["search", "ABC-123", "--db", str(db), "--since", "2026-02-07"]
+    )
+    assert res.exit_code == 0
+    assert f"{_ts(7, 12, 0)} → {_ts(7, 12, 4)} (4 min; 4 sample(s), 1 tab event(s))" in res.stdout
+    assert "2 session(s)" in res.stdout
+
+    res = runner.invoke(get_command(cli.app), ["search", "--db", str(db), "--", "-"])
+    assert res.exit_code == 2
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.model import SampleRow
+from toggl_sherpa.m3.summarise import summarise_blocks
+
+T0 = datetime(2026, 2, 8, 12, tzinfo=UTC)
+
+
+def _samples(*runs: tuple[str, str, int], start_s: int = 0) -> list[SampleRow]:
+    """Samples every 10 s for consecutive (wm_class, title, seconds) runs."""
+    out: list[SampleRow] = []
+    t = start_s
+    for wm, title, secs in runs:
+        for _ in range(secs // 10):
+            ts = (T0 + timedelta(seconds=t)).isoformat()
+            out.append(SampleRow(len(out) + 1, ts, 0, title, wm, 1, 10.0))
+            t += 10
+    return out
+
+
+def _labels(samples: list[SampleRow], **kw) -> list[tuple[str, int]]:
+    return [(b.label, b.seconds) for b in summarise_blocks(samples, [], **kw)]
+
+
+def test_short_interruptions_are_absorbed() -> None:
+    samples = _samples(("code", "cli.py", 600), ("slack", "DM Sam", 10), ("code", "cli.py", 300))
+    # Without smoothing the glance at Slack splits the block (and, under
+    # min_block_s, is dropped along with its time).
+    assert _labels(samples) == [("code:cli.py", 600), ("code:cli.py", 300)]
+    assert _labels(samples, min_dwell_s=60) == [("code:cli.py", 910)]
+
+    # Long enough to count as its own activity: still split.
+    samples = _samples(("code", "cli.py", 600), ("slack", "DM Sam", 60), ("code", "cli.py", 300))
+    assert [label for label, _ in _labels(samples, min_dwell_s=60)] == [
+        "code:cli.py",
+        "slack:DM Sam",
+        "code:cli.py",
+    ]
+
+
+def test_leading_runs_join_the_next_activity_and_gaps_still_split() -> None:
+    samples = _samples(("slack", "DM Sam", 20), ("code", "cli.py", 300))
+    # Ten minutes later, past the gap threshold.
+    samples += _samples(("firefox", "Docs", 20), ("rstudio", "model.R", 120), start_s=920)
+    assert _labels(samples, min_dwell_s=60) == [
+        ("code:cli.py", 320),
+        ("rstudio:model.R", 140),
+    ]
+    # A stretch with nothing long enough to anchor it keeps its labels.
+    samples = _samples(("slack", "DM Sam", 30), ("code", "cli.py", 30))
+    assert [lbl for lbl, _ in _labels(samples, min_dwell_s=60, min_block_s=1)] == [
+        "slack:DM Sam",
+        "code:cli.py",
+    ]
+
+
+def test_suggestion_comes_from_the_block_own_samples() -> None:
+    samples = _samples(("rstudio", "model.R", 300), ("slack", "#dev", 20))
+    (block,) = summarise_blocks(samples, [], min_dwell_s=60)
+    assert block.label == "rstudio:model.R"
+    assert block.seconds == 320
+    assert block.project_suggestion == "analysis"
+
+
+def test_cli_min_dwell_option(tmp_path: Path) -> None:
+    db = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db)
+    for s in _samples(("code", "cli.py", 600), ("slack", "DM Sam", 10), ("code", "cli.py", 300)):
+        conn.execute(
+            "INSERT INTO samples(ts_utc, idle_ms, focus_title, focus_wm_class, interval_s)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (s.ts_utc, s.idle_ms, s.focus_title, s.focus_wm_class, s.interval_s),
+        )
+    conn.commit()
+    conn.close()
+
+    runner = CliRunner()
+    args = ["report", "draft-timesheet", "--date", "2026-02-08", "--db", str(db)]
+    # Off by default: every switch still splits a block.
+    res = runner.invoke(get_command(cli.app), [*args, "--format", "json"])
+    assert res.exit_code == 0
+    assert res.stdout.count('"label"') == 2
+    res = runner.invoke(get_command(cli.app), [*args, "--format", "json", "--min-dwell-s", "60"])
+    assert res.exit_code == 0
+    assert res.stdout.count('"label"') == 1
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from typer.main import get_command
+
+import toggl_sherpa.cli as cli
+from toggl_sherpa.m1 import db as db_mod
+from toggl_sherpa.m3.model import SampleRow, TabEventRow
+from toggl_sherpa.m3.normalise import DEFAULT_RULES, TitleNormaliser
+from toggl_sherpa.m3.summarise import summarise_blocks
+from toggl_sherpa.m6.config import load_title_rules
+
+T0 = datetime(2026, 2, 8, 12, tzinfo=UTC)
+
+
+def _samples(titles: list[tuple[str, str]]) -> list[SampleRow]:
+    return [
+        SampleRow(i + 1, (T0 + timedelta(seconds=10 * i)).isoformat(), 0, title, wm, 1, 10.0)
+        for i, (wm, title) in enumerate(titles)
+    ]
+
+
+def test_default_rules_drop_volatile_parts() -> None:
+    n = TitleNormaliser()
+    assert [
+        n(t)
+        for t in (
+            "(3) Slack | #dev | acme",
+            "[12] Inbox - Mail",
+            "● cli.py - toggl-sherpa - Visual Studio Code",
+            "Inbox (12) — Mozilla Firefox",
+            "Standup 09:30 AM - Calendar",
+            "tail app.log 2026-02-07T12:00:01Z",
+            "PR #117 · acme",
+            "12:00",
+        )
+    ] == [
+        "Slack | #dev | acme",
+        "Inbox - Mail",
+        "cli.py - toggl-sherpa - Visual Studio Code",
+        "Inbox — Mozilla Firefox",
+        "Standup - Calendar",
+        "tail app.log",
+        "PR #117 · acme",
+        "12:00",  # nothing but volatile parts: kept as is
+    ]
+    assert n(None) is None
+    # Line:column refs aren't clock times.
+    for title in ("cli.py:10:20 - Code", "main.rs:5:12", "traceback at x.py:1:05:07"):
+        assert n(title) == title
+
+    # Each distinct title is rewritten once, then served from the cache.
+    small = TitleNormaliser(max_cached=2)
+    for t in ("(1) a", "(1) a", "(2) a", "(3) a"):
+        assert small(t) == "a"
+    assert list(small._cache) == ["(3) a"]
+
+
+def test_summarise_labels_and_suggests_on_normalised_titles() -> None:
+    titles = [("code", "cli.py - Code"), ("code", "● cli.py - Code")] * 9
+    samples = _samples(titles)
+    assert len(summarise_blocks(samples, [], min_block_s=1)) == 18
+    (block,) = summarise_blocks(samples, [], normalise_title=TitleNormaliser())
+    assert (block.label, block.seconds) == ("code:cli.py - Code", 180)
+
+    # Tab titles are normalised for suggestions; evidence keeps what was seen.
+    samples = _samples([("firefox", "x")] * 6)
+    tab = TabEventRow(
+        1,
+        samples[-1].ts_utc,
+        6,
+        True,
+        "https://mail.acme.org/",
+        "(2) Invoices",
+        "https://mail.acme.org/",
+        "(2) Invoices",
+    )
+    rules = [(r"\bInvoices\b", "Invoice"), *DEFAULT_RULES]
+    blocks = summarise_blocks(samples, [tab], min_block_s=1, normalise_title=TitleNormaliser(rules))
+    block = blocks[-1]
+    assert block.project_suggestion == "admin"
+    assert [e.title for e in block.evidence] == ["(2) Invoices"]
+
+
+def test_config_title_rules(tmp_path: Path) -> None:
+    assert load_title_rules(tmp_path / "missing.json") == DEFAULT_RULES
+    cfg = tmp_path / "config.json"
+    cfg.write_text(json.dumps({"title_rules": [{"pattern": r" - Visual Studio Code$"}]}))
+    n = TitleNormaliser(load_title_rules(cfg))
+    assert n("● cli.py - Visual Studio Code") == "cli.py"
+
+    cfg.write_text(json.dumps({"title_rules": [], "default_title_rules": False}))
+    assert load_title_rules(cfg) == ()
+    for bad in ({"title_rules": [{"pattern": "("}]}, {"title_rules": [{"replace": "x"}]}):
+        cfg.write_text(json.dumps(bad))
+        with pytest.raises(ValueError):
+            load_title_rules(cfg)
+
+
+def test_cli_normalises_only_when_asked(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "cfg"))
+    db = tmp_path / "db.sqlite"
+    conn = db_mod.connect(db)
+    for s in _samples([("slack", f"({i % 3 + 1}) Slack | #dev") for i in range(30)]):
+        conn.execute(
+            "INSERT INTO samples(ts_utc, idle_ms, focus_title, focus_wm_class, interval_s)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (s.ts_utc, s.idle_ms, s.focus_title, s.focus_wm_class, s.interval_s),
+        )
+    conn.commit()
+    conn.close()
+
+    runner = CliRunner()
+    args = ["report", "draft-timesheet", "--date", "2026-02-08", "--db", str(db)]
+    args += ["--format", "json", "--min-dwell-s", "0"]
+    # Raw by default: the counter splits these 5 minutes into 10 s blocks, all
+    # under min_block_s.
+    for extra in ([], ["--raw-titles"]):
+        res = runner.invoke(get_command(cli.app), [*args, *extra])
+        assert res.exit_code == 0
+        assert json.loads(res.stdout) == []
+    args.append("--normalise-titles")
+    res = runner.invoke(get_command(cli.app), args)
+    assert res.exit_code == 0
+    assert [b["label"] for b in json.loads(res.stdout)] == ["slack:Slack | #dev"]
+
+    # `--config` points at rules other than the XDG ones, for review too.
+    cfg = tmp_path / "other.json"
+    cfg.write_text(json.dumps({"title_rules": [{"pattern": r" \| #dev$"}]}))
+    res = runner.invoke(get_command(cli.app), [*args, "--config", str(cfg)])
+    assert res.exit_code == 0
+    assert [b["label"] for b in json.loads(res.stdout)] == ["slack:Slack"]
+    cfg.write_text('{"title_rules": [1]}')
+    review = ["report", "review", "--date", "2026-02-08", "--db", str(db), "--config", str(cfg)]
+    res = runner.invoke(get_command(cli.app), [*review, "--normalise-titles"])
+    assert res.exit_code == 2
+
+    (tmp_path / "cfg" / "toggl-sherpa").mkdir(parents=True)
+    (tmp_path / "cfg" / "toggl-sherpa" / "config.json").write_text('{"title_rules": [1]}')
+    res = runner.invoke(get_command(cli.app), args)
+    assert res.exit_code == 2
@@ -75,13 +75,24 @@ def test_apply_yes_posts_with_mock(monkeypatch, tmp_path: Path) -> None:
 
         text = "ok"
 
-    def fake_post(url, json=None, headers=None, timeout=None):
+    def fake_post(_session, url, json=None, headers=None, timeout=None):
         calls.append({"url": url, "json": json, "headers": headers, "timeout": timeout})
         return Resp()
 
     import toggl_sherpa.m5.toggl_api as api
 
-    monkeypatch.setattr(api.requests, "post", fake_post)
+    monkeypatch.setattr(api.requests.Session, "post", fake_post)
+
+    class ListResp:
+        status_code = 200
+        headers: dict = {}
+        text = "[]"
+
+        def json(self):
+            return []
+
+    # Reconciliation finds nothing in Toggl yet.
+    monkeypatch.setattr(api.requests.Session, "get", lambda *a, **k: ListResp())
 
     runner = CliRunner()
     res = runner.invoke(
@@ -42,13 +42,24 @@ def test_apply_is_idempotent_by_default(monkeypatch, tmp_path: Path) -> None:
 
         text = "ok"
 
-    def fake_post(url, json=None, headers=None, timeout=None):
+    def fake_post(_session, url, json=None, headers=None, timeout=None):
         calls.append({"url": url, "json": json})
         return Resp()
 
     import toggl_sherpa.m5.toggl_api as api
 
-    monkeypatch.setattr(api.requests, "post", fake_post)
+    monkeypatch.setattr(api.requests.Session, "post", fake_post)
+
+    class ListResp:
+        status_code = 200
+        headers: dict = {}
+        text = "[]"
+
+        def json(self):
+            return []
+
+    # Reconciliation finds nothing in Toggl yet.
+    monkeypatch.setattr(api.requests.Session, "get", lambda *a, **k: ListResp())
 
     runner = CliRunner()
     res1 = runner.invoke(